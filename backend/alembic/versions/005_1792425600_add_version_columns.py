@@ -0,0 +1,32 @@
+"""add version columns for optimistic concurrency
+
+Revision ID: 005_1792425600
+Revises: 004_1728658789, d995159813bc
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '005_1792425600'
+down_revision: str | Sequence[str] | None = ('004_1728658789', 'd995159813bc')
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+VERSIONED_TABLES = ('companies', 'customers', 'items', 'stores', 'users')
+
+
+def upgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.add_column(
+            table,
+            sa.Column('version', sa.Integer(), nullable=False, server_default='1')
+        )
+
+
+def downgrade() -> None:
+    for table in reversed(VERSIONED_TABLES):
+        op.drop_column(table, 'version')
@@ -0,0 +1,33 @@
+"""add company scoped unique constraints
+
+Revision ID: 006_1792429200
+Revises: 005_1792425600
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = '006_1792429200'
+down_revision: str | Sequence[str] | None = '005_1792425600'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Names must match CONSTRAINT_VIOLATIONS in app/core/exceptions.py.
+UNIQUE_CONSTRAINTS = (
+    ('uq_items_company_id_sku', 'items', ['company_id', 'sku']),
+    ('uq_customers_company_id_code', 'customers', ['company_id', 'code']),
+    ('uq_user_store_access_user_id_store_id', 'user_store_access', ['user_id', 'store_id']),
+    ('uq_company_cost_centers_company_id_cost_center_id', 'company_cost_centers', ['company_id', 'cost_center_id']),
+)
+
+
+def upgrade() -> None:
+    for name, table, columns in UNIQUE_CONSTRAINTS:
+        op.create_unique_constraint(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _columns in reversed(UNIQUE_CONSTRAINTS):
+        op.drop_constraint(name, table, type_='unique')
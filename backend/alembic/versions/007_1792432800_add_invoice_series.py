@@ -0,0 +1,40 @@
+"""add invoice series
+
+Revision ID: 007_1792432800
+Revises: 006_1792429200
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '007_1792432800'
+down_revision: str | Sequence[str] | None = '006_1792429200'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'invoice_series',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('store_id', sa.BigInteger(), nullable=False),
+        sa.Column('financial_year', sa.String(length=7), nullable=False),
+        sa.Column('prefix', sa.String(length=10), nullable=False),
+        sa.Column('next_number', sa.BigInteger(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('store_id', 'financial_year', name='uq_invoice_series_store_id_financial_year'),
+    )
+    # Every allocation rewrites the same row; leaving free space on the page
+    # keeps those updates HOT so the counter row does not bloat its index.
+    op.execute('ALTER TABLE invoice_series SET (fillfactor = 50)')
+
+
+def downgrade() -> None:
+    op.drop_table('invoice_series')
@@ -0,0 +1,52 @@
+"""add item rates
+
+Revision ID: 008_1792436400
+Revises: 007_1792432800
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '008_1792436400'
+down_revision: str | Sequence[str] | None = '007_1792432800'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'item_rates',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('item_id', sa.BigInteger(), nullable=False),
+        sa.Column('customer_id', sa.BigInteger(), nullable=True),
+        sa.Column('rate', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('effective_from', sa.Date(), nullable=False),
+        sa.Column('effective_to', sa.Date(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='active'),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['item_id'], ['items.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.CheckConstraint(
+            'effective_to IS NULL OR effective_to >= effective_from', name='ck_item_rates_effective_window'
+        ),
+    )
+    op.create_index(
+        'ix_item_rates_company_id_item_id_customer_id',
+        'item_rates',
+        ['company_id', 'item_id', 'customer_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_item_rates_company_id_item_id_customer_id', table_name='item_rates')
+    op.drop_table('item_rates')
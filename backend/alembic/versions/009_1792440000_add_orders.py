@@ -0,0 +1,79 @@
+"""add orders
+
+Revision ID: 009_1792440000
+Revises: 008_1792436400
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '009_1792440000'
+down_revision: str | Sequence[str] | None = '008_1792436400'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'stores', sa.Column('next_order_number', sa.BigInteger(), nullable=False, server_default='1')
+    )
+
+    op.create_table(
+        'orders',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('store_id', sa.BigInteger(), nullable=False),
+        sa.Column('customer_id', sa.BigInteger(), nullable=False),
+        sa.Column('order_no', sa.String(length=30), nullable=False),
+        sa.Column('order_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='received'),
+        sa.Column('pickup_address_id', sa.BigInteger(), nullable=True),
+        sa.Column('delivery_address_id', sa.BigInteger(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ondelete='RESTRICT'),
+        sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ondelete='RESTRICT'),
+        sa.ForeignKeyConstraint(['pickup_address_id'], ['customer_addresses.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['delivery_address_id'], ['customer_addresses.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('store_id', 'order_no', name='uq_orders_store_id_order_no'),
+    )
+    op.create_index('ix_orders_company_id_order_date', 'orders', ['company_id', 'order_date'], unique=False)
+    op.create_index(op.f('ix_orders_customer_id'), 'orders', ['customer_id'], unique=False)
+
+    op.create_table(
+        'order_items',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('order_id', sa.BigInteger(), nullable=False),
+        sa.Column('item_id', sa.BigInteger(), nullable=False),
+        sa.Column('service_type_id', sa.BigInteger(), nullable=True),
+        sa.Column('item_rate_id', sa.BigInteger(), nullable=True),
+        sa.Column('qty', sa.Numeric(precision=12, scale=3), nullable=False),
+        sa.Column('unit_price', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('tax_rate', sa.Numeric(precision=5, scale=2), nullable=False),
+        sa.Column('line_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('remarks', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['item_id'], ['items.id'], ondelete='RESTRICT'),
+        sa.ForeignKeyConstraint(['service_type_id'], ['service_types.id'], ondelete='RESTRICT'),
+        sa.ForeignKeyConstraint(['item_rate_id'], ['item_rates.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_table('order_items')
+    op.drop_index(op.f('ix_orders_customer_id'), table_name='orders')
+    op.drop_index('ix_orders_company_id_order_date', table_name='orders')
+    op.drop_table('orders')
+    op.drop_column('stores', 'next_order_number')
@@ -0,0 +1,76 @@
+"""add invoices
+
+Revision ID: 010_1792443600
+Revises: 009_1792440000
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '010_1792443600'
+down_revision: str | Sequence[str] | None = '009_1792440000'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'invoices',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('store_id', sa.BigInteger(), nullable=False),
+        sa.Column('customer_id', sa.BigInteger(), nullable=False),
+        sa.Column('order_id', sa.BigInteger(), nullable=True),
+        sa.Column('invoice_no', sa.String(length=30), nullable=True),
+        sa.Column('invoice_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='draft'),
+        sa.Column('subtotal', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('tax_total', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('discount_total', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('package_applied_total', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('grand_total', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ondelete='RESTRICT'),
+        sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ondelete='RESTRICT'),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('store_id', 'invoice_no', name='uq_invoices_store_id_invoice_no'),
+    )
+    op.create_index('ix_invoices_company_id_invoice_date', 'invoices', ['company_id', 'invoice_date'], unique=False)
+    op.create_index(op.f('ix_invoices_customer_id'), 'invoices', ['customer_id'], unique=False)
+    op.create_index(op.f('ix_invoices_order_id'), 'invoices', ['order_id'], unique=False)
+
+    op.create_table(
+        'invoice_lines',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('invoice_id', sa.BigInteger(), nullable=False),
+        sa.Column('order_item_id', sa.BigInteger(), nullable=True),
+        sa.Column('item_id', sa.BigInteger(), nullable=False),
+        sa.Column('qty', sa.Numeric(precision=12, scale=3), nullable=False),
+        sa.Column('price', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('tax_rate', sa.Numeric(precision=5, scale=2), nullable=False),
+        sa.Column('line_tax', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('line_total', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['invoice_id'], ['invoices.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['order_item_id'], ['order_items.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['item_id'], ['items.id'], ondelete='RESTRICT'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_invoice_lines_invoice_id'), 'invoice_lines', ['invoice_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_invoice_lines_invoice_id'), table_name='invoice_lines')
+    op.drop_table('invoice_lines')
+    op.drop_index(op.f('ix_invoices_order_id'), table_name='invoices')
+    op.drop_index(op.f('ix_invoices_customer_id'), table_name='invoices')
+    op.drop_index('ix_invoices_company_id_invoice_date', table_name='invoices')
+    op.drop_table('invoices')
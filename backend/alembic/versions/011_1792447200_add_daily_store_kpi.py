@@ -0,0 +1,67 @@
+"""add daily_store_kpi and kpi_deltas
+
+Revision ID: 011_1792447200
+Revises: 010_1792443600
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '011_1792447200'
+down_revision: str | Sequence[str] | None = '010_1792443600'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _metric_columns() -> list[sa.Column]:
+    return [
+        sa.Column('orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('invoices', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sales_gross', sa.Numeric(precision=16, scale=2), nullable=False, server_default='0'),
+        sa.Column('sales_net', sa.Numeric(precision=16, scale=2), nullable=False, server_default='0'),
+        sa.Column('receipts', sa.Numeric(precision=16, scale=2), nullable=False, server_default='0'),
+        sa.Column('new_customers', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('expenses_total', sa.Numeric(precision=16, scale=2), nullable=False, server_default='0'),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_store_kpi',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('store_id', sa.BigInteger(), nullable=False),
+        sa.Column('kpi_date', sa.Date(), nullable=False),
+        *_metric_columns(),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('store_id', 'kpi_date', name='uq_daily_store_kpi_store_id_kpi_date'),
+    )
+    op.create_index(
+        'ix_daily_store_kpi_company_id_kpi_date', 'daily_store_kpi', ['company_id', 'kpi_date'], unique=False
+    )
+
+    op.create_table(
+        'kpi_deltas',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('store_id', sa.BigInteger(), nullable=False),
+        sa.Column('kpi_date', sa.Date(), nullable=False),
+        *_metric_columns(),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_kpi_deltas_store_id_kpi_date', 'kpi_deltas', ['store_id', 'kpi_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_kpi_deltas_store_id_kpi_date', table_name='kpi_deltas')
+    op.drop_table('kpi_deltas')
+    op.drop_index('ix_daily_store_kpi_company_id_kpi_date', table_name='daily_store_kpi')
+    op.drop_table('daily_store_kpi')
@@ -0,0 +1,97 @@
+"""add store closing cutoff, store_day_snapshots and daily_store_close
+
+Revision ID: 012_1792450800
+Revises: 011_1792447200
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '012_1792450800'
+down_revision: str | Sequence[str] | None = '011_1792447200'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _money(name: str, **kwargs: object) -> sa.Column:
+    return sa.Column(name, sa.Numeric(precision=14, scale=2), nullable=False, **kwargs)
+
+
+def upgrade() -> None:
+    op.add_column('stores', sa.Column('closing_cutoff', sa.Time(), server_default='23:59', nullable=False))
+
+    op.create_table(
+        'store_day_snapshots',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('store_id', sa.BigInteger(), nullable=False),
+        sa.Column('business_date', sa.Date(), nullable=False),
+        _money('cash_opening_float', server_default='0'),
+        _money('cash_from_sales', server_default='0'),
+        _money('digital_receipts_total', server_default='0'),
+        _money('cash_petty_expense', server_default='0'),
+        _money('cash_deposit_bank', server_default='0'),
+        _money('rider_settlements_due', server_default='0'),
+        _money('package_adjustments', server_default='0'),
+        sa.Column('unposted_invoices', sa.Integer(), server_default='0', nullable=False),
+        _money('unposted_invoices_total', server_default='0'),
+        sa.Column('closed', sa.Boolean(), server_default='false', nullable=False),
+        sa.Column('version', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('store_id', 'business_date', name='uq_store_day_snapshots_store_id_business_date'),
+    )
+    op.create_index(
+        op.f('ix_store_day_snapshots_company_id'), 'store_day_snapshots', ['company_id'], unique=False
+    )
+
+    op.create_table(
+        'daily_store_close',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('store_id', sa.BigInteger(), nullable=False),
+        sa.Column('close_date', sa.Date(), nullable=False),
+        sa.Column('cutoff_time_local', sa.Time(), nullable=False),
+        _money('cash_opening_float'),
+        _money('cash_from_sales'),
+        _money('cash_petty_expense'),
+        _money('cash_deposit_bank'),
+        _money('cash_closing_expected'),
+        _money('cash_counted'),
+        _money('variance'),
+        _money('digital_receipts_total'),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('snapshot_version', sa.Integer(), nullable=False),
+        sa.Column('closed_by', sa.BigInteger(), nullable=True),
+        sa.Column('closed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('reopened_by', sa.BigInteger(), nullable=True),
+        sa.Column('reopened_at', sa.DateTime(), nullable=True),
+        sa.Column('reopen_reason', sa.Text(), nullable=True),
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['closed_by'], ['users.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['reopened_by'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('store_id', 'close_date', name='uq_daily_store_close_store_id_close_date'),
+    )
+    op.create_index(
+        'ix_daily_store_close_company_id_close_date', 'daily_store_close', ['company_id', 'close_date'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_daily_store_close_company_id_close_date', table_name='daily_store_close')
+    op.drop_table('daily_store_close')
+    op.drop_index(op.f('ix_store_day_snapshots_company_id'), table_name='store_day_snapshots')
+    op.drop_table('store_day_snapshots')
+    op.drop_column('stores', 'closing_cutoff')
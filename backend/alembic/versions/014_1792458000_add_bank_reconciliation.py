@@ -0,0 +1,114 @@
+"""add bank_import_file, bank_txn, recon_rule and recon_match
+
+Revision ID: 014_1792458000
+Revises: 013_1792454400
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '014_1792458000'
+down_revision: str | Sequence[str] | None = '013_1792454400'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'bank_import_file',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('source_bank', sa.String(length=50), nullable=False),
+        sa.Column('statement_date_from', sa.Date(), nullable=True),
+        sa.Column('statement_date_to', sa.Date(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('created_by', sa.BigInteger(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_bank_import_file_company_id'), 'bank_import_file', ['company_id'], unique=False)
+
+    op.create_table(
+        'bank_txn',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('import_file_id', sa.BigInteger(), nullable=False),
+        sa.Column('posted_at', sa.DateTime(), nullable=True),
+        sa.Column('value_date', sa.Date(), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('direction', sa.String(length=10), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('utr_ref', sa.String(length=64), nullable=True),
+        sa.Column('account_last4', sa.String(length=4), nullable=True),
+        sa.Column('raw', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['import_file_id'], ['bank_import_file.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_bank_txn_import_file_id'), 'bank_txn', ['import_file_id'], unique=False)
+
+    op.create_table(
+        'recon_rule',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('match_type', sa.String(length=20), nullable=False),
+        sa.Column('pattern', sa.String(length=500), nullable=False),
+        sa.Column('map_to', sa.String(length=20), nullable=False),
+        sa.Column('field', sa.String(length=20), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False),
+        sa.Column('active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_recon_rule_company_id_priority', 'recon_rule', ['company_id', 'priority'], unique=False)
+
+    op.create_table(
+        'recon_match',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('bank_txn_id', sa.BigInteger(), nullable=False),
+        sa.Column('entity_type', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.BigInteger(), nullable=False),
+        sa.Column('rule_id', sa.BigInteger(), nullable=True),
+        sa.Column('confidence', sa.Numeric(precision=4, scale=3), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('note', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['bank_txn_id'], ['bank_txn.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['rule_id'], ['recon_rule.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'uq_recon_match_live_bank_txn_id',
+        'recon_match',
+        ['bank_txn_id'],
+        unique=True,
+        postgresql_where=sa.text("status <> 'discarded'"),
+    )
+    op.create_index(
+        'ix_recon_match_entity', 'recon_match', ['company_id', 'entity_type', 'entity_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recon_match_entity', table_name='recon_match')
+    op.drop_index('uq_recon_match_live_bank_txn_id', table_name='recon_match')
+    op.drop_table('recon_match')
+    op.drop_index('ix_recon_rule_company_id_priority', table_name='recon_rule')
+    op.drop_table('recon_rule')
+    op.drop_index(op.f('ix_bank_txn_import_file_id'), table_name='bank_txn')
+    op.drop_table('bank_txn')
+    op.drop_index(op.f('ix_bank_import_file_company_id'), table_name='bank_import_file')
+    op.drop_table('bank_import_file')
@@ -0,0 +1,135 @@
+"""add import_mapping, franchise imports, import_row_error and bank import file metadata
+
+Revision ID: 015_1792461600
+Revises: 014_1792458000
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '015_1792461600'
+down_revision: str | Sequence[str] | None = '014_1792458000'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'bank_import_file', sa.Column('file_format', sa.String(length=10), server_default='csv', nullable=False)
+    )
+    op.add_column('bank_import_file', sa.Column('stored_path', sa.String(length=500), nullable=True))
+    op.add_column('bank_import_file', sa.Column('size_bytes', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('bank_import_file', sa.Column('mapping_json', sa.JSON(), nullable=True))
+    op.add_column('bank_import_file', sa.Column('rows_total', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('bank_import_file', sa.Column('rows_failed', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('bank_import_file', sa.Column('error', sa.Text(), nullable=True))
+
+    op.create_table(
+        'import_mapping',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('source', sa.String(length=50), nullable=False),
+        sa.Column('mapping_json', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('company_id', 'kind', 'source', name='uq_import_mapping_company_id_kind_source'),
+    )
+
+    op.create_table(
+        'franchise_import',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('store_id', sa.BigInteger(), nullable=False),
+        sa.Column('source', sa.String(length=50), nullable=False),
+        sa.Column('period', sa.String(length=7), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('file_format', sa.String(length=10), nullable=False),
+        sa.Column('stored_path', sa.String(length=500), nullable=True),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('mapping_json', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('rows_total', sa.Integer(), nullable=False),
+        sa.Column('rows_failed', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.BigInteger(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_franchise_import_company_id_source_period',
+        'franchise_import',
+        ['company_id', 'source', 'period'],
+        unique=False,
+    )
+
+    op.create_table(
+        'franchise_sales_staging',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('import_id', sa.BigInteger(), nullable=False),
+        sa.Column('store_id', sa.BigInteger(), nullable=False),
+        sa.Column('row_no', sa.Integer(), nullable=False),
+        sa.Column('order_ref', sa.String(length=64), nullable=False),
+        sa.Column('order_date', sa.Date(), nullable=False),
+        sa.Column('customer_name', sa.String(length=200), nullable=True),
+        sa.Column('customer_phone', sa.String(length=20), nullable=True),
+        sa.Column('service', sa.String(length=100), nullable=True),
+        sa.Column('quantity', sa.Numeric(precision=12, scale=3), nullable=True),
+        sa.Column('amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('raw', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['import_id'], ['franchise_import.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        op.f('ix_franchise_sales_staging_import_id'), 'franchise_sales_staging', ['import_id'], unique=False
+    )
+
+    op.create_table(
+        'import_row_error',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('import_kind', sa.String(length=20), nullable=False),
+        sa.Column('import_id', sa.BigInteger(), nullable=False),
+        sa.Column('row_no', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=False),
+        sa.Column('raw', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_import_row_error_import_kind_import_id',
+        'import_row_error',
+        ['import_kind', 'import_id', 'row_no'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_import_row_error_import_kind_import_id', table_name='import_row_error')
+    op.drop_table('import_row_error')
+    op.drop_index(op.f('ix_franchise_sales_staging_import_id'), table_name='franchise_sales_staging')
+    op.drop_table('franchise_sales_staging')
+    op.drop_index('ix_franchise_import_company_id_source_period', table_name='franchise_import')
+    op.drop_table('franchise_import')
+    op.drop_table('import_mapping')
+    op.drop_column('bank_import_file', 'error')
+    op.drop_column('bank_import_file', 'rows_failed')
+    op.drop_column('bank_import_file', 'rows_total')
+    op.drop_column('bank_import_file', 'mapping_json')
+    op.drop_column('bank_import_file', 'size_bytes')
+    op.drop_column('bank_import_file', 'stored_path')
+    op.drop_column('bank_import_file', 'file_format')
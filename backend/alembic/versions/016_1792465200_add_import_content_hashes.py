@@ -0,0 +1,72 @@
+"""add content and row hashes to bank and franchise imports
+
+Revision ID: 016_1792465200
+Revises: 015_1792461600
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '016_1792465200'
+down_revision: str | Sequence[str] | None = '015_1792461600'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('bank_import_file', sa.Column('content_sha256', sa.String(length=64), nullable=True))
+    op.add_column('bank_import_file', sa.Column('rows_new', sa.Integer(), server_default='0', nullable=False))
+    op.create_index(
+        'ix_bank_import_file_company_id_content_sha256',
+        'bank_import_file',
+        ['company_id', 'content_sha256'],
+        unique=False,
+    )
+    op.add_column('franchise_import', sa.Column('content_sha256', sa.String(length=64), nullable=True))
+    op.add_column('franchise_import', sa.Column('rows_new', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('franchise_import', sa.Column('rows_removed', sa.Integer(), server_default='0', nullable=False))
+
+    # Rows imported before this revision have no hash and are never treated as duplicates.
+    op.add_column('bank_txn', sa.Column('row_hash', sa.String(length=64), nullable=True))
+    op.add_column('bank_txn', sa.Column('row_seq', sa.Integer(), nullable=True))
+    op.create_index(
+        'uq_bank_txn_company_id_row_hash', 'bank_txn', ['company_id', 'row_hash', 'row_seq'], unique=True
+    )
+
+    op.add_column('franchise_sales_staging', sa.Column('source', sa.String(length=50), nullable=True))
+    op.add_column('franchise_sales_staging', sa.Column('period', sa.String(length=7), nullable=True))
+    op.add_column('franchise_sales_staging', sa.Column('row_hash', sa.String(length=64), nullable=True))
+    op.add_column('franchise_sales_staging', sa.Column('row_seq', sa.Integer(), nullable=True))
+    op.execute(
+        'UPDATE franchise_sales_staging AS s SET source = i.source, period = i.period '
+        'FROM franchise_import AS i WHERE i.id = s.import_id'
+    )
+    op.alter_column('franchise_sales_staging', 'source', nullable=False)
+    op.alter_column('franchise_sales_staging', 'period', nullable=False)
+    op.create_index(
+        'uq_franchise_sales_staging_period_row_hash',
+        'franchise_sales_staging',
+        ['store_id', 'source', 'period', 'row_hash', 'row_seq'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_franchise_sales_staging_period_row_hash', table_name='franchise_sales_staging')
+    op.drop_column('franchise_sales_staging', 'row_seq')
+    op.drop_column('franchise_sales_staging', 'row_hash')
+    op.drop_column('franchise_sales_staging', 'period')
+    op.drop_column('franchise_sales_staging', 'source')
+    op.drop_index('uq_bank_txn_company_id_row_hash', table_name='bank_txn')
+    op.drop_column('bank_txn', 'row_seq')
+    op.drop_column('bank_txn', 'row_hash')
+    op.drop_column('franchise_import', 'rows_removed')
+    op.drop_column('franchise_import', 'rows_new')
+    op.drop_column('franchise_import', 'content_sha256')
+    op.drop_index('ix_bank_import_file_company_id_content_sha256', table_name='bank_import_file')
+    op.drop_column('bank_import_file', 'rows_new')
+    op.drop_column('bank_import_file', 'content_sha256')
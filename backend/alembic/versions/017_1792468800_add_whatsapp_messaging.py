@@ -0,0 +1,80 @@
+"""add whatsapp_template, message_log and customer WhatsApp opt-out
+
+Revision ID: 017_1792468800
+Revises: 016_1792465200
+Create Date: 2026-10-20 00:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '017_1792468800'
+down_revision: str | Sequence[str] | None = '016_1792465200'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('customers', sa.Column('whatsapp_opted_out_at', sa.DateTime(), nullable=True))
+
+    op.create_table(
+        'whatsapp_template',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('code', sa.String(length=50), nullable=False),
+        sa.Column('type', sa.String(length=20), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('vars', sa.JSON(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), server_default='true', nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('company_id', 'code', name='uq_whatsapp_template_company_id_code'),
+    )
+
+    op.create_table(
+        'message_log',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('customer_id', sa.BigInteger(), nullable=True),
+        sa.Column('to_phone', sa.String(length=20), nullable=False),
+        sa.Column('template_code', sa.String(length=50), nullable=True),
+        sa.Column('type', sa.String(length=20), nullable=False),
+        sa.Column('body_rendered', sa.Text(), nullable=False),
+        sa.Column('order_id', sa.BigInteger(), nullable=True),
+        sa.Column('campaign_id', sa.String(length=64), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('provider', sa.String(length=50), nullable=False),
+        sa.Column('provider_msg_id', sa.String(length=128), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_message_log_company_id_created_at', 'message_log', ['company_id', 'created_at'], unique=False
+    )
+    op.create_index(
+        'ix_message_log_campaign_id_customer_id', 'message_log', ['campaign_id', 'customer_id'], unique=False
+    )
+    op.create_index('ix_message_log_order_id', 'message_log', ['order_id'], unique=False)
+    op.create_index(
+        'uq_message_log_provider_msg_id', 'message_log', ['provider', 'provider_msg_id'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_message_log_provider_msg_id', table_name='message_log')
+    op.drop_index('ix_message_log_order_id', table_name='message_log')
+    op.drop_index('ix_message_log_campaign_id_customer_id', table_name='message_log')
+    op.drop_index('ix_message_log_company_id_created_at', table_name='message_log')
+    op.drop_table('message_log')
+    op.drop_table('whatsapp_template')
+    op.drop_column('customers', 'whatsapp_opted_out_at')
@@ -0,0 +1,27 @@
+"""add delivery and read receipt times to message_log
+
+Revision ID: 018_1792472400
+Revises: 017_1792468800
+Create Date: 2026-10-20 01:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '018_1792472400'
+down_revision: str | Sequence[str] | None = '017_1792468800'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('message_log', sa.Column('delivered_at', sa.DateTime(), nullable=True))
+    op.add_column('message_log', sa.Column('read_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('message_log', 'read_at')
+    op.drop_column('message_log', 'delivered_at')
@@ -0,0 +1,77 @@
+"""add document and document_download_log
+
+Revision ID: 019_1792476000
+Revises: 018_1792472400
+Create Date: 2026-10-20 02:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '019_1792476000'
+down_revision: str | Sequence[str] | None = '018_1792472400'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'document',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.BigInteger(), nullable=False),
+        sa.Column('store_id', sa.BigInteger(), nullable=True),
+        sa.Column('entity_type', sa.String(length=50), nullable=False),
+        sa.Column('entity_id', sa.BigInteger(), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('mime_type', sa.String(length=100), nullable=False),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('content_sha256', sa.String(length=64), nullable=False),
+        sa.Column('storage_key', sa.String(length=200), nullable=False),
+        sa.Column('tags', sa.JSON(), nullable=False),
+        sa.Column('visibility_role_min', sa.String(length=30), nullable=False),
+        sa.Column('download_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('uploaded_by', sa.BigInteger(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['uploaded_by'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_document_company_id_entity_type_entity_id',
+        'document',
+        ['company_id', 'entity_type', 'entity_id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_document_company_id_content_sha256', 'document', ['company_id', 'content_sha256'], unique=False
+    )
+
+    op.create_table(
+        'document_download_log',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('document_id', sa.BigInteger(), nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=True),
+        sa.Column('ip', sa.String(length=45), nullable=True),
+        sa.Column('downloaded_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['document_id'], ['document.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_document_download_log_document_id_downloaded_at',
+        'document_download_log',
+        ['document_id', 'downloaded_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_document_download_log_document_id_downloaded_at', table_name='document_download_log')
+    op.drop_table('document_download_log')
+    op.drop_index('ix_document_company_id_content_sha256', table_name='document')
+    op.drop_index('ix_document_company_id_entity_type_entity_id', table_name='document')
+    op.drop_table('document')
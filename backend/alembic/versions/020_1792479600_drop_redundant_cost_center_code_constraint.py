@@ -0,0 +1,26 @@
+"""drop the cost_centers code constraint duplicated by ix_cost_centers_code
+
+Revision ID: 020_1792479600
+Revises: 019_1792476000
+Create Date: 2026-10-20 03:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = '020_1792479600'
+down_revision: str | Sequence[str] | None = '019_1792476000'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+# 002 created both an unnamed UNIQUE constraint and the unique index the
+# model declares; Postgres reported the constraint's generated name, which
+# CONSTRAINT_VIOLATIONS in app/core/exceptions.py does not list.
+def upgrade() -> None:
+    op.drop_constraint('cost_centers_code_key', 'cost_centers', type_='unique')
+
+
+def downgrade() -> None:
+    op.create_unique_constraint('cost_centers_code_key', 'cost_centers', ['code'])
@@ -0,0 +1,43 @@
+"""move order numbering off the stores row into order_series
+
+Revision ID: 021_1792483200
+Revises: 020_1792479600
+Create Date: 2026-10-20 04:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = '021_1792483200'
+down_revision: str | Sequence[str] | None = '020_1792479600'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'order_series',
+        sa.Column('store_id', sa.BigInteger(), nullable=False),
+        sa.Column('next_number', sa.BigInteger(), server_default='1', nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('store_id'),
+    )
+    op.execute(
+        'INSERT INTO order_series (store_id, next_number) SELECT id, next_order_number FROM stores'
+    )
+    op.drop_column('stores', 'next_order_number')
+
+
+def downgrade() -> None:
+    op.add_column(
+        'stores', sa.Column('next_order_number', sa.BigInteger(), server_default='1', nullable=False)
+    )
+    op.execute(
+        'UPDATE stores SET next_order_number = order_series.next_number '
+        'FROM order_series WHERE order_series.store_id = stores.id'
+    )
+    op.drop_table('order_series')
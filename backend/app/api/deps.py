@@ -1,6 +1,6 @@
-from typing import Annotated
+from typing import Annotated, Any
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,20 +10,18 @@ from app.core.security import decode_token, is_token_revoked
 from app.db.session import get_db
 from app.models.user import User
 from app.models.user_role import UserRole
+from app.models.user_store_access import UserStoreAccess
 
-__all__ = ["get_current_user", "get_db", "get_accessible_company_ids"]
+__all__ = ["get_current_user", "get_db", "get_token_payload"]
 
 security = HTTPBearer()
 
 
-async def get_current_user(
+async def get_token_payload(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
-    db: Annotated[AsyncSession, Depends(get_db)],
-) -> User:
-    token = credentials.credentials
-
+) -> dict[str, Any]:
     try:
-        payload = decode_token(token)
+        payload = decode_token(credentials.credentials)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -37,6 +35,10 @@ async def get_current_user(
             detail="Token has been revoked",
         )
 
+    return payload
+
+
+def token_user_id(payload: dict[str, Any]) -> int:
     user_id: str | None = payload.get("sub")
     if user_id is None:
         raise HTTPException(
@@ -45,20 +47,22 @@ async def get_current_user(
         )
 
     try:
-        user_int_id = int(user_id)
+        return int(user_id)
     except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid user ID format",
         ) from exc
 
+
+async def load_active_user(db: AsyncSession, user_id: int) -> User:
     result = await db.execute(
         select(User)
         .options(
             selectinload(User.roles).selectinload(UserRole.role),
-            selectinload(User.store_accesses)
+            selectinload(User.store_accesses).selectinload(UserStoreAccess.store),
         )
-        .where(User.id == user_int_id)
+        .where(User.id == user_id)
     )
     user = result.scalar_one_or_none()
 
@@ -77,24 +81,15 @@ async def get_current_user(
     return user
 
 
-async def get_accessible_company_ids(
-    current_user: Annotated[User, Depends(get_current_user)],
+async def get_current_user(
+    request: Request,
+    payload: Annotated[dict[str, Any], Depends(get_token_payload)],
     db: Annotated[AsyncSession, Depends(get_db)],
-) -> set[int]:
-    from app.models.store import Store
-    from app.models.user_store_access import UserStoreAccess
-
-    result = await db.execute(
-        select(UserStoreAccess.store_id).where(UserStoreAccess.user_id == current_user.id)
-    )
-    store_ids = [row[0] for row in result.fetchall()]
-
-    if not store_ids:
-        return set()
-
-    result = await db.execute(
-        select(Store.company_id).where(Store.id.in_(store_ids))
-    )
-    company_ids = {row[0] for row in result.fetchall()}
-
-    return company_ids
+) -> User:
+    # Cached on the request so get_principal's fallback and handlers that
+    # need the full user share a single load.
+    user: User | None = getattr(request.state, "current_user", None)
+    if user is None:
+        user = await load_active_user(db, token_user_id(payload))
+        request.state.current_user = user
+    return user
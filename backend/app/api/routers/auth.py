@@ -1,12 +1,16 @@
 import uuid
-from typing import Annotated
+from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, load_active_user
+from app.core.authz_version import issue_authz_version
+from app.core.config import settings
+from app.core.rate_limit import rate_limit
+from app.core.rbac import permission_registry
 from app.core.security import (
     create_access_token,
     create_refresh_token,
@@ -28,10 +32,26 @@ from app.schemas.auth import (
 )
 from app.schemas.user import UserResponse
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(
+    prefix="/auth", tags=["auth"], dependencies=[Depends(rate_limit("general"))]
+)
+
+
+async def _access_token_data(db: AsyncSession, user: User) -> dict[str, Any]:
+    data: dict[str, Any] = {"sub": str(user.id), "email": user.email, "jti": str(uuid.uuid4())}
+    if not settings.ACCESS_TOKEN_CLAIMS_ENABLED:
+        return data
 
+    # Read the version before loading roles and stores: a change that lands
+    # in between bumps the counter and makes these claims stale, never wrong.
+    authz_version = await issue_authz_version(user.id)
+    if authz_version is not None:
+        user = await load_active_user(db, user.id)
+        data.update(permission_registry.access_claims(user, authz_version))
+    return data
 
-@router.post("/login", response_model=TokenResponse)
+
+@router.post("/login", response_model=TokenResponse, dependencies=[Depends(rate_limit("auth"))])
 async def login(
     credentials: LoginRequest,
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -51,12 +71,9 @@ async def login(
             detail="User account is not active",
         )
 
-    access_jti = str(uuid.uuid4())
     refresh_jti = str(uuid.uuid4())
 
-    access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email, "jti": access_jti}
-    )
+    access_token = create_access_token(data=await _access_token_data(db, user))
     refresh_token = create_refresh_token(
         data={"sub": str(user.id), "jti": refresh_jti}
     )
@@ -67,7 +84,7 @@ async def login(
     )
 
 
-@router.post("/refresh", response_model=RefreshResponse)
+@router.post("/refresh", response_model=RefreshResponse, dependencies=[Depends(rate_limit("auth"))])
 async def refresh(
     request: RefreshRequest,
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -118,10 +135,7 @@ async def refresh(
             detail="User not found or not active",
         )
 
-    new_access_jti = str(uuid.uuid4())
-    access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email, "jti": new_access_jti}
-    )
+    access_token = create_access_token(data=await _access_token_data(db, user))
 
     return RefreshResponse(access_token=access_token)
 
@@ -168,6 +182,7 @@ async def get_current_user_info(
         "first_name": user_with_data.first_name,
         "last_name": user_with_data.last_name,
         "status": user_with_data.status,
+        "version": user_with_data.version,
         "roles": [user_role.role for user_role in user_with_data.roles],
         "store_accesses": user_with_data.store_accesses,
         "created_at": user_with_data.created_at,
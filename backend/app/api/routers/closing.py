@@ -0,0 +1,120 @@
+from datetime import date
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db
+from app.core.etag import etag_for, if_match_version
+from app.core.rate_limit import rate_limit
+from app.core.rbac import COMPANY_WIDE_ROLES, Principal, permission_registry, require_principal
+from app.schemas.closing import (
+    ClosingCommitRequest,
+    ClosingPreviewResponse,
+    ClosingReopenRequest,
+    DailyStoreCloseResponse,
+)
+from app.services.closing import closing_preview, commit_closing, reopen_closing
+
+router = APIRouter(
+    prefix="/closing", tags=["closing"], dependencies=[Depends(rate_limit("general"))]
+)
+
+VARIANCE_APPROVER_ROLES = permission_registry.roles.mask(("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER"))
+
+
+def _company_id(principal: Principal) -> int:
+    if principal.company_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must have store access to close a day",
+        )
+    return principal.company_id
+
+
+def _check_store(principal: Principal, store_id: int) -> None:
+    if not principal.can_access_store(store_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Store not found",
+        )
+
+
+@router.get("/preview", response_model=ClosingPreviewResponse)
+async def get_closing_preview(
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal,
+        Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER", "STORE_MANAGER", "ACCOUNTANT")),
+    ],
+    store_id: int,
+    business_date: Annotated[date, Query(alias="date")],
+) -> ClosingPreviewResponse:
+    """The store-day's takings so far; one row, kept up to date as payments and invoices are written."""
+    company_id = _company_id(principal)
+    _check_store(principal, store_id)
+
+    preview = await closing_preview(db, company_id, store_id, business_date)
+    response.headers["ETag"] = etag_for(preview.version)
+    return ClosingPreviewResponse.model_validate(preview)
+
+
+@router.post("/commit", response_model=DailyStoreCloseResponse)
+async def commit_day(
+    request: ClosingCommitRequest,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER", "STORE_MANAGER"))
+    ],
+    expected_version: Annotated[int | None, Depends(if_match_version)],
+) -> DailyStoreCloseResponse:
+    """Close and lock the store-day against the previewed figures (send the preview's ETag as If-Match).
+
+    Committing an already closed day returns the existing close with 200.
+    """
+    company_id = _company_id(principal)
+    _check_store(principal, request.store_id)
+
+    close, created = await commit_closing(
+        db,
+        company_id,
+        request.store_id,
+        request.close_date,
+        request.cash_counted,
+        closed_by=principal.user_id,
+        notes=request.notes,
+        expected_version=expected_version,
+        can_approve_variance=principal.has_any_role(VARIANCE_APPROVER_ROLES),
+    )
+    await db.commit()
+    response.status_code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    response.headers["ETag"] = etag_for(close.version)
+    return DailyStoreCloseResponse.model_validate(close)
+
+
+@router.post("/{close_id}/reopen", response_model=DailyStoreCloseResponse)
+async def reopen_day(
+    close_id: int,
+    request: ClosingReopenRequest,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER"))
+    ],
+) -> DailyStoreCloseResponse:
+    """Reopen a closed store-day so it accepts writes again; who reopened it and why is kept on the close."""
+    company_id = _company_id(principal)
+
+    close = await reopen_closing(
+        db,
+        company_id,
+        close_id,
+        reopened_by=principal.user_id,
+        reason=request.reason,
+        store_ids=None if principal.has_any_role(COMPANY_WIDE_ROLES) else principal.store_ids,
+    )
+    await db.commit()
+    response.headers["ETag"] = etag_for(close.version)
+    return DailyStoreCloseResponse.model_validate(close)
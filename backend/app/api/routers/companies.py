@@ -1,47 +1,46 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import get_db
-from app.core.rbac import require_role
+from app.core.etag import etag_for, if_match_version
+from app.core.rate_limit import rate_limit
+from app.core.rbac import Principal, require_principal
+from app.db.persistence import insert_many_returning, insert_returning, mark_loaded, update_returning
 from app.models.company import Company
 from app.models.company_gstin import CompanyGSTIN
-from app.models.user import User
 from app.schemas.company import CompanyCreate, CompanyResponse, CompanyUpdate
 
-router = APIRouter(prefix="/companies", tags=["companies"])
+router = APIRouter(
+    prefix="/companies", tags=["companies"], dependencies=[Depends(rate_limit("general"))]
+)
 
 
 @router.post("", response_model=CompanyResponse, status_code=status.HTTP_201_CREATED)
 async def create_company(
     company_data: CompanyCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> CompanyResponse:
-    company_dict = company_data.model_dump(exclude={"gstins"})
-    company = Company(**company_dict)
-    db.add(company)
-    await db.flush()
-
-    for gstin_data in company_data.gstins:
-        gstin = CompanyGSTIN(
-            company_id=company.id,
-            **gstin_data.model_dump()
-        )
-        db.add(gstin)
+    company = await insert_returning(db, Company, company_data.model_dump(exclude={"gstins"}))
+    gstins = await insert_many_returning(
+        db,
+        CompanyGSTIN,
+        [{"company_id": company.id, **gstin_data.model_dump()} for gstin_data in company_data.gstins],
+    )
+    mark_loaded(company, gstins=gstins)
 
     await db.commit()
-    await db.refresh(company, ["gstins"])
     return CompanyResponse.model_validate(company)
 
 
 @router.get("", response_model=list[CompanyResponse])
 async def list_companies(
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> list[CompanyResponse]:
     result = await db.execute(
         select(Company)
@@ -55,8 +54,9 @@ async def list_companies(
 @router.get("/{company_id}", response_model=CompanyResponse)
 async def get_company(
     company_id: int,
+    response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> CompanyResponse:
     result = await db.execute(
         select(Company)
@@ -71,6 +71,7 @@ async def get_company(
             detail="Company not found",
         )
 
+    response.headers["ETag"] = etag_for(company.version)
     return CompanyResponse.model_validate(company)
 
 
@@ -78,15 +79,19 @@ async def get_company(
 async def update_company(
     company_id: int,
     company_data: CompanyUpdate,
+    response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
+    expected_version: Annotated[int | None, Depends(if_match_version)],
 ) -> CompanyResponse:
-    result = await db.execute(
-        select(Company)
-        .where(Company.id == company_id)
-        .options(selectinload(Company.gstins))
+    company = await update_returning(
+        db,
+        Company,
+        where=[Company.id == company_id],
+        values=company_data.model_dump(exclude_unset=True),
+        expected_version=expected_version,
+        options=[selectinload(Company.gstins)],
     )
-    company = result.scalar_one_or_none()
 
     if not company:
         raise HTTPException(
@@ -94,12 +99,8 @@ async def update_company(
             detail="Company not found",
         )
 
-    update_data = company_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(company, field, value)
-
     await db.commit()
-    await db.refresh(company, ["gstins"])
+    response.headers["ETag"] = etag_for(company.version)
     return CompanyResponse.model_validate(company)
 
 
@@ -107,7 +108,7 @@ async def update_company(
 async def delete_company(
     company_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN"))],
 ) -> None:
     result = await db.execute(select(Company).where(Company.id == company_id))
     company = result.scalar_one_or_none()
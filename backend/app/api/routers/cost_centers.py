@@ -6,11 +6,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import get_db
-from app.core.rbac import require_role
+from app.core.rate_limit import rate_limit
+from app.core.rbac import Principal, require_principal
+from app.db.persistence import insert_returning
 from app.models.company import Company
 from app.models.company_cost_center import CompanyCostCenter
 from app.models.cost_center import CostCenter
-from app.models.user import User
 from app.schemas.cost_center import (
     CompanyCostCenterCreate,
     CompanyCostCenterResponse,
@@ -19,7 +20,9 @@ from app.schemas.cost_center import (
     CostCenterUpdate,
 )
 
-router = APIRouter(prefix="/cost-centers", tags=["cost-centers"])
+router = APIRouter(
+    prefix="/cost-centers", tags=["cost-centers"], dependencies=[Depends(rate_limit("general"))]
+)
 
 
 @router.post(
@@ -28,32 +31,18 @@ router = APIRouter(prefix="/cost-centers", tags=["cost-centers"])
 async def create_cost_center(
     cost_center_data: CostCenterCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN"))],
 ) -> CostCenterResponse:
     """Create a new global cost center (PLATFORM_ADMIN only)."""
-    result = await db.execute(
-        select(CostCenter).where(CostCenter.code == cost_center_data.code)
-    )
-    existing_cc = result.scalar_one_or_none()
-    if existing_cc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Cost center with code '{cost_center_data.code}' already exists",
-        )
-
-    cost_center = CostCenter(**cost_center_data.model_dump())
-    db.add(cost_center)
+    cost_center = await insert_returning(db, CostCenter, cost_center_data.model_dump())
     await db.commit()
-    await db.refresh(cost_center)
     return CostCenterResponse.model_validate(cost_center)
 
 
 @router.get("", response_model=list[CostCenterResponse])
 async def list_cost_centers(
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))
-    ],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
     active_only: bool = True,
 ) -> list[CostCenterResponse]:
     """List all global cost centers."""
@@ -70,9 +59,7 @@ async def list_cost_centers(
 async def get_cost_center(
     cost_center_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))
-    ],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> CostCenterResponse:
     """Get a specific cost center by ID."""
     result = await db.execute(
@@ -94,7 +81,7 @@ async def update_cost_center(
     cost_center_id: int,
     cost_center_data: CostCenterUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN"))],
 ) -> CostCenterResponse:
     """Update a cost center (PLATFORM_ADMIN only)."""
     result = await db.execute(
@@ -121,7 +108,7 @@ async def update_cost_center(
 async def delete_cost_center(
     cost_center_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN"))],
 ) -> None:
     """Soft delete a cost center (PLATFORM_ADMIN only)."""
     result = await db.execute(
@@ -146,9 +133,7 @@ async def delete_cost_center(
 async def list_company_cost_centers(
     company_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))
-    ],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> list[CompanyCostCenterResponse]:
     """List cost centers assigned to a company."""
     result = await db.execute(select(Company).where(Company.id == company_id))
@@ -177,9 +162,7 @@ async def assign_cost_center_to_company(
     company_id: int,
     assignment_data: CompanyCostCenterCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))
-    ],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> CompanyCostCenterResponse:
     """Assign a cost center to a company."""
     company_result = await db.execute(
@@ -207,19 +190,6 @@ async def assign_cost_center_to_company(
             detail="Cannot assign inactive cost center",
         )
 
-    result = await db.execute(
-        select(CompanyCostCenter).where(
-            CompanyCostCenter.company_id == company_id,
-            CompanyCostCenter.cost_center_id == assignment_data.cost_center_id,
-        )
-    )
-    existing_assignment = result.scalar_one_or_none()
-    if existing_assignment:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cost center already assigned to this company",
-        )
-
     if assignment_data.is_default:
         defaults_result = await db.execute(
             select(CompanyCostCenter).where(
@@ -230,14 +200,17 @@ async def assign_cost_center_to_company(
         for existing_default in defaults_result.scalars().all():
             existing_default.is_default = False
 
-    assignment = CompanyCostCenter(
-        company_id=company_id,
-        cost_center_id=assignment_data.cost_center_id,
-        is_default=assignment_data.is_default,
+    assignment = await insert_returning(
+        db,
+        CompanyCostCenter,
+        {
+            "company_id": company_id,
+            "cost_center_id": assignment_data.cost_center_id,
+            "is_default": assignment_data.is_default,
+        },
+        cost_center=cost_center,
     )
-    db.add(assignment)
     await db.commit()
-    await db.refresh(assignment, ["cost_center"])
     return CompanyCostCenterResponse.model_validate(assignment)
 
 
@@ -249,9 +222,7 @@ async def remove_cost_center_from_company(
     company_id: int,
     assignment_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))
-    ],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> None:
     """Remove a cost center assignment from a company."""
     result = await db.execute(
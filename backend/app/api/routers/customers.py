@@ -1,16 +1,18 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import get_db
-from app.core.rbac import require_role
+from app.core.etag import etag_for, if_match_version
+from app.core.rate_limit import rate_limit
+from app.core.rbac import Principal, require_principal
+from app.db.persistence import insert_returning, update_returning
 from app.models.customer import Customer
 from app.models.customer_address import CustomerAddress
 from app.models.customer_contact import CustomerContact
-from app.models.user import User
 from app.schemas.customer import (
     CustomerAddressCreate,
     CustomerAddressResponse,
@@ -23,66 +25,56 @@ from app.schemas.customer import (
     CustomerUpdate,
 )
 
-router = APIRouter(prefix="/customers", tags=["customers"])
+router = APIRouter(
+    prefix="/customers", tags=["customers"], dependencies=[Depends(rate_limit("general"))]
+)
 
 
 @router.post("", response_model=CustomerResponse, status_code=status.HTTP_201_CREATED)
 async def create_customer(
     customer_data: CustomerCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
 ) -> CustomerResponse:
     """Create a new customer."""
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to create customers",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
-
-    if customer_data.code:
-        result = await db.execute(
-            select(Customer).where(
-                Customer.company_id == company_id,
-                Customer.code == customer_data.code,
-            )
-        )
-        if result.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"Customer with code '{customer_data.code}' already exists",
-            )
+    company_id = principal.company_id
 
-    customer = Customer(
-        company_id=company_id,
-        **customer_data.model_dump()
+    customer = await insert_returning(
+        db,
+        Customer,
+        {"company_id": company_id, **customer_data.model_dump()},
+        contacts=[],
+        addresses=[],
     )
-    db.add(customer)
     await db.commit()
-    await db.refresh(customer, ["contacts", "addresses"])
     return CustomerResponse.model_validate(customer)
 
 
 @router.get("", response_model=list[CustomerResponse])
 async def list_customers(
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
     search: str | None = Query(None, description="Search by name, phone, or email"),
     status_filter: str | None = Query(None, description="Filter by status (active/inactive)"),
 ) -> list[CustomerResponse]:
     """List all customers for the user's company with optional search."""
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to view customers",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
     query = select(Customer).where(Customer.company_id == company_id)
 
@@ -112,19 +104,20 @@ async def list_customers(
 @router.get("/{customer_id}", response_model=CustomerResponse)
 async def get_customer(
     customer_id: int,
+    response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
 ) -> CustomerResponse:
     """Get a specific customer by ID."""
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to view customers",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
     result = await db.execute(
         select(Customer)
@@ -142,6 +135,7 @@ async def get_customer(
             detail="Customer not found",
         )
 
+    response.headers["ETag"] = etag_for(customer.version)
     return CustomerResponse.model_validate(customer)
 
 
@@ -149,29 +143,30 @@ async def get_customer(
 async def update_customer(
     customer_id: int,
     customer_data: CustomerUpdate,
+    response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
+    expected_version: Annotated[int | None, Depends(if_match_version)],
 ) -> CustomerResponse:
     """Update a customer."""
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to update customers",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
-    result = await db.execute(
-        select(Customer)
-        .where(Customer.id == customer_id, Customer.company_id == company_id)
-        .options(
-            selectinload(Customer.contacts),
-            selectinload(Customer.addresses)
-        )
+    customer = await update_returning(
+        db,
+        Customer,
+        where=[Customer.id == customer_id, Customer.company_id == company_id],
+        values=customer_data.model_dump(exclude_unset=True),
+        expected_version=expected_version,
+        options=[selectinload(Customer.contacts), selectinload(Customer.addresses)],
     )
-    customer = result.scalar_one_or_none()
 
     if not customer:
         raise HTTPException(
@@ -179,12 +174,8 @@ async def update_customer(
             detail="Customer not found",
         )
 
-    update_data = customer_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(customer, field, value)
-
     await db.commit()
-    await db.refresh(customer, ["contacts", "addresses"])
+    response.headers["ETag"] = etag_for(customer.version)
     return CustomerResponse.model_validate(customer)
 
 
@@ -192,18 +183,18 @@ async def update_customer(
 async def delete_customer(
     customer_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
 ) -> None:
     """Soft delete a customer by setting status to inactive."""
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to delete customers",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
     result = await db.execute(
         select(Customer).where(Customer.id == customer_id, Customer.company_id == company_id)
@@ -225,18 +216,18 @@ async def create_customer_contact(
     customer_id: int,
     contact_data: CustomerContactCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
 ) -> CustomerContactResponse:
     """Create a new contact for a customer."""
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to manage customer contacts",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
     result = await db.execute(
         select(Customer).where(Customer.id == customer_id, Customer.company_id == company_id)
@@ -270,18 +261,18 @@ async def create_customer_contact(
 async def list_customer_contacts(
     customer_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
 ) -> list[CustomerContactResponse]:
     """List all contacts for a customer."""
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to view customer contacts",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
     result = await db.execute(
         select(Customer).where(Customer.id == customer_id, Customer.company_id == company_id)
@@ -308,18 +299,18 @@ async def update_customer_contact(
     contact_id: int,
     contact_data: CustomerContactUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
 ) -> CustomerContactResponse:
     """Update a customer contact."""
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to update customer contacts",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
     result = await db.execute(
         select(Customer).where(Customer.id == customer_id, Customer.company_id == company_id)
@@ -370,18 +361,18 @@ async def delete_customer_contact(
     customer_id: int,
     contact_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
 ) -> None:
     """Delete a customer contact."""
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to delete customer contacts",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
     result = await db.execute(
         select(Customer).where(Customer.id == customer_id, Customer.company_id == company_id)
@@ -415,18 +406,18 @@ async def create_customer_address(
     customer_id: int,
     address_data: CustomerAddressCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
 ) -> CustomerAddressResponse:
     """Create a new address for a customer."""
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to manage customer addresses",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
     result = await db.execute(
         select(Customer).where(Customer.id == customer_id, Customer.company_id == company_id)
@@ -468,18 +459,18 @@ async def create_customer_address(
 async def list_customer_addresses(
     customer_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
 ) -> list[CustomerAddressResponse]:
     """List all addresses for a customer."""
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to view customer addresses",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
     result = await db.execute(
         select(Customer).where(Customer.id == customer_id, Customer.company_id == company_id)
@@ -506,18 +497,18 @@ async def update_customer_address(
     address_id: int,
     address_data: CustomerAddressUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
 ) -> CustomerAddressResponse:
     """Update a customer address."""
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to update customer addresses",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
     result = await db.execute(
         select(Customer).where(Customer.id == customer_id, Customer.company_id == company_id)
@@ -581,18 +572,18 @@ async def delete_customer_address(
     customer_id: int,
     address_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
 ) -> None:
     """Delete a customer address."""
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to delete customer addresses",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
     result = await db.execute(
         select(Customer).where(Customer.id == customer_id, Customer.company_id == company_id)
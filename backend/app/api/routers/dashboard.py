@@ -0,0 +1,78 @@
+from datetime import date
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.core.config import settings
+from app.core.rate_limit import rate_limit
+from app.core.rbac import COMPANY_WIDE_ROLES, Principal, require_principal
+from app.core.result_cache import ResultCache, result_key
+from app.db.session import AsyncSessionLocal
+from app.schemas.dashboard import DashboardKpisResponse, StoreKpiResponse
+from app.services.kpi_rollup import kpi_versions, store_kpis
+
+router = APIRouter(
+    prefix="/dashboard", tags=["dashboard"], dependencies=[Depends(rate_limit("general"))]
+)
+
+MAX_KPI_DAYS = 366
+
+dashboard_cache = ResultCache(
+    "dashboard",
+    kpi_versions,
+    ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS,
+    stale_seconds=settings.DASHBOARD_CACHE_STALE_SECONDS,
+    max_local_entries=settings.DASHBOARD_CACHE_MAX_ENTRIES,
+)
+
+
+def _company_id(principal: Principal) -> int:
+    if principal.company_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must have store access to view the dashboard",
+        )
+    return principal.company_id
+
+
+@router.get("/kpis", response_model=DashboardKpisResponse)
+async def get_kpis(
+    principal: Annotated[
+        Principal,
+        Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER", "STORE_MANAGER", "ACCOUNTANT")),
+    ],
+    date_from: Annotated[date, Query()],
+    date_to: Annotated[date, Query()],
+    store_ids: Annotated[list[int] | None, Query(description="Limit to these stores")] = None,
+    by_day: bool = Query(False, description="One row per store and day instead of per store"),
+) -> DashboardKpisResponse:
+    """KPI tiles per store, read from the daily rollup; cost grows with stores and days, not orders.
+
+    Results are shared between managers with the same scope through
+    ``dashboard_cache`` and may lag a write by up to the cache's stale window.
+    """
+    company_id = _company_id(principal)
+    if date_to < date_from or (date_to - date_from).days >= MAX_KPI_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"date_to must be on or after date_from and at most {MAX_KPI_DAYS} days later",
+        )
+    scope = None if principal.has_any_role(COMPANY_WIDE_ROLES) else set(principal.store_ids)
+    if store_ids is not None:
+        scope = set(store_ids) if scope is None else scope & set(store_ids)
+
+    async def compute() -> dict[str, Any]:
+        async with AsyncSessionLocal() as db:
+            rows = await store_kpis(db, company_id, date_from, date_to, store_ids=scope, by_day=by_day)
+        return DashboardKpisResponse(
+            date_from=date_from,
+            date_to=date_to,
+            stores=[StoreKpiResponse.model_validate(row) for row in rows],
+        ).model_dump(mode="json")
+
+    digest = result_key(
+        "company" if principal.has_any_role(COMPANY_WIDE_ROLES) else "stores",
+        scope,
+        {"view": "kpis", "date_from": date_from, "date_to": date_to, "by_day": by_day},
+    )
+    return DashboardKpisResponse.model_validate(await dashboard_cache.get_or_compute(company_id, digest, compute))
@@ -0,0 +1,226 @@
+from datetime import UTC, datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db
+from app.core.config import settings
+from app.core.rate_limit import concurrency_limit, rate_limit
+from app.core.rbac import COMPANY_WIDE_ROLES, Principal, require_principal
+from app.core.storage import get_storage
+from app.core.uploads import upload_too_large
+from app.models.document import Document
+from app.models.store import Store
+from app.schemas.documents import DocumentDownloadLogResponse, DocumentResponse, DocumentUrlResponse
+from app.services.documents import (
+    VisibilityRole,
+    can_view,
+    create_document,
+    download_log,
+    find_duplicate,
+    get_document,
+    list_documents,
+    record_download,
+    signed_download_url,
+    verify_download,
+)
+
+router = APIRouter(
+    prefix="/documents", tags=["documents"], dependencies=[Depends(rate_limit("general"))]
+)
+
+# Signed links are fetched by the browser without a token, and resumed
+# downloads come back with one Range request per chunk.
+download_router = APIRouter(
+    prefix="/documents", tags=["documents"], dependencies=[Depends(rate_limit("document_download"))]
+)
+
+DocumentPrincipal = Annotated[
+    Principal,
+    Depends(
+        require_principal(
+            "PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER", "STORE_MANAGER", "STAFF", "ACCOUNTANT"
+        )
+    ),
+]
+UploadPrincipal = Annotated[
+    Principal,
+    Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER", "STORE_MANAGER", "ACCOUNTANT")),
+]
+AuditPrincipal = Annotated[
+    Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+]
+
+EntityType = Annotated[
+    str, Query(max_length=50, pattern=r"^[a-z][a-z0-9_]*$", description="e.g. company_gstin, order, expense")
+]
+
+
+def _company_id(principal: Principal) -> int:
+    if principal.company_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must belong to a company to use documents",
+        )
+    return principal.company_id
+
+
+async def _document_or_404(db: AsyncSession, principal: Principal, document_id: int) -> Document:
+    document = await get_document(db, document_id)
+    if document is None or not can_view(principal, document):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    return document
+
+
+def _media_type(request: Request) -> str:
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    return media_type[:100] or "application/octet-stream"
+
+
+def _counts_as_download(request: Request) -> bool:
+    """Resumed and parallel chunk requests are part of a download that was already logged."""
+    requested = request.headers.get("range")
+    return requested is None or requested.replace(" ", "").startswith("bytes=0-")
+
+
+@router.post(
+    "",
+    response_model=DocumentResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(concurrency_limit("document_upload"))],
+)
+async def upload_document(
+    request: Request,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: UploadPrincipal,
+    entity_type: EntityType,
+    entity_id: int,
+    filename: Annotated[str, Query(min_length=1, max_length=255)],
+    store_id: int | None = None,
+    tags: Annotated[list[str] | None, Query(max_length=20)] = None,
+    visibility_role_min: VisibilityRole = "STAFF",
+) -> DocumentResponse:
+    """Upload a document as the raw request body; its type is taken from ``Content-Type``.
+
+    The body is streamed to storage and hashed as it arrives, with no
+    database connection held meanwhile; each user may have two uploads in
+    flight. Content already stored for the company is kept once, and
+    uploading the same file to the same record again returns 200 with the
+    existing document.
+    """
+    company_id = _company_id(principal)
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > settings.DOCUMENT_MAX_UPLOAD_BYTES:
+        raise upload_too_large(settings.DOCUMENT_MAX_UPLOAD_BYTES)
+    if store_id is None and not principal.has_any_role(COMPANY_WIDE_ROLES):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="store_id is required for store-level users",
+        )
+    if store_id is not None:
+        store = await db.scalar(select(Store.id).where(Store.id == store_id, Store.company_id == company_id))
+        if store is None or not principal.can_access_store(store_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Store not found")
+    # Give the connection back to the pool while the body arrives; the store
+    # check (and the user load behind a plain token) opened a transaction that
+    # would otherwise sit idle for the whole upload.
+    await db.rollback()
+
+    # A stored object that ends up unreferenced (the insert below fails) is
+    # harmless: the next upload of the same content reuses it.
+    stored = await get_storage().put(str(company_id), request.stream(), settings.DOCUMENT_MAX_UPLOAD_BYTES)
+    previous = await find_duplicate(db, company_id, entity_type, entity_id, stored.sha256)
+    if previous is not None:
+        response.status_code = status.HTTP_200_OK
+        return DocumentResponse.model_validate(previous).model_copy(update={"duplicate": True})
+    document = await create_document(
+        db,
+        {
+            "company_id": company_id,
+            "store_id": store_id,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "filename": filename,
+            "mime_type": _media_type(request),
+            "size_bytes": stored.size,
+            "content_sha256": stored.sha256,
+            "storage_key": stored.key,
+            "tags": sorted(set(tags or [])),
+            "visibility_role_min": visibility_role_min,
+            "uploaded_by": principal.user_id,
+        },
+    )
+    await db.commit()
+    return DocumentResponse.model_validate(document)
+
+
+@router.get("", response_model=list[DocumentResponse])
+async def get_documents(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: DocumentPrincipal,
+    entity_type: Annotated[str | None, Query(max_length=50)] = None,
+    entity_id: int | None = None,
+    store_id: int | None = None,
+) -> list[DocumentResponse]:
+    """The company's documents the caller may download, newest first."""
+    documents = await list_documents(db, principal, _company_id(principal), entity_type, entity_id, store_id)
+    return [DocumentResponse.model_validate(document) for document in documents]
+
+
+@router.get("/{document_id}", response_model=DocumentResponse)
+async def get_document_details(
+    document_id: Annotated[int, Path()],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: DocumentPrincipal,
+) -> DocumentResponse:
+    return DocumentResponse.model_validate(await _document_or_404(db, principal, document_id))
+
+
+@router.get("/{document_id}/url", response_model=DocumentUrlResponse)
+async def get_download_url(
+    document_id: Annotated[int, Path()],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: DocumentPrincipal,
+) -> DocumentUrlResponse:
+    """A download link for the caller, valid for ``DOCUMENT_URL_TTL_SECONDS``; it needs no token."""
+    document = await _document_or_404(db, principal, document_id)
+    url, expires = signed_download_url(document.id, principal.user_id)
+    return DocumentUrlResponse(url=url, expires_at=datetime.fromtimestamp(expires, UTC))
+
+
+@router.get("/{document_id}/downloads", response_model=list[DocumentDownloadLogResponse])
+async def get_download_log(
+    document_id: Annotated[int, Path()],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: AuditPrincipal,
+    limit: Annotated[int, Query(ge=1, le=500)] = 100,
+) -> list[DocumentDownloadLogResponse]:
+    """Who downloaded the document and when, newest first."""
+    document = await _document_or_404(db, principal, document_id)
+    entries = await download_log(db, document.id, limit)
+    return [DocumentDownloadLogResponse.model_validate(entry) for entry in entries]
+
+
+@download_router.get("/{document_id}/download", response_model=None)
+async def download_document(
+    request: Request,
+    document_id: Annotated[int, Path()],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    uid: int,
+    expires: int,
+    sig: Annotated[str, Query(max_length=64)],
+) -> Response:
+    """Send the document for a signed link; Range requests are answered with partial content."""
+    if not verify_download(document_id, uid, expires, sig):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Download link is invalid or has expired")
+    document = await get_document(db, document_id)
+    storage = get_storage()
+    if document is None or not await storage.exists(document.storage_key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    if _counts_as_download(request):
+        await record_download(db, document.id, uid, request.client.host if request.client else None)
+        await db.commit()
+    return storage.download_response(document.storage_key, filename=document.filename, media_type=document.mime_type)
@@ -0,0 +1,317 @@
+from typing import Annotated, Any, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db
+from app.core.config import settings
+from app.core.rate_limit import rate_limit
+from app.core.rbac import Principal, require_principal
+from app.core.uploads import save_stream, upload_too_large
+from app.models.bank_import_file import BankImportFile
+from app.models.franchise_import import FranchiseImport
+from app.models.store import Store
+from app.schemas.imports import (
+    BankImportResponse,
+    FranchiseImportResponse,
+    ImportAcceptedResponse,
+    ImportMappingResponse,
+    ImportMappingUpsert,
+    ImportRowErrorResponse,
+)
+from app.services.import_parsing import ImportKind
+from app.services.imports import (
+    create_bank_import,
+    create_franchise_import,
+    file_format_for,
+    find_bank_import,
+    find_franchise_import,
+    get_mapping,
+    list_mappings,
+    row_errors,
+    save_mapping,
+    upload_path,
+)
+from app.tasks.jobs import Job, status_url
+from app.tasks.queue import get_job_queue
+
+router = APIRouter(
+    prefix="/imports", tags=["imports"], dependencies=[Depends(rate_limit("general"))]
+)
+
+FranchiseSource = Literal["tumbledry", "uclean"]
+SOURCE_PATTERN = r"^[a-z0-9][a-z0-9_-]*$"
+PERIOD_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+ImportPrincipal = Annotated[
+    Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "ACCOUNTANT"))
+]
+FranchisePrincipal = Annotated[
+    Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER", "ACCOUNTANT"))
+]
+Filename = Annotated[str, Query(min_length=1, max_length=255, description="Original file name (.csv or .xlsx)")]
+AfterRow = Annotated[int, Query(ge=0, description="Continue after this source row number")]
+ErrorLimit = Annotated[int, Query(ge=1, le=500)]
+
+
+def _company_id(principal: Principal) -> int:
+    if principal.company_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must belong to a company to import files",
+        )
+    return principal.company_id
+
+
+def _check_upload(request: Request, filename: str) -> None:
+    try:
+        file_format_for(filename)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > settings.IMPORT_MAX_UPLOAD_BYTES:
+        raise upload_too_large(settings.IMPORT_MAX_UPLOAD_BYTES)
+
+
+async def _mapping_or_422(db: AsyncSession, company_id: int, kind: ImportKind, source: str) -> dict[str, Any]:
+    mapping = await get_mapping(db, company_id, kind, source)
+    if mapping is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"No column mapping for {kind} source {source!r}; save one with PUT /imports/mappings first",
+        )
+    return mapping.mapping_json
+
+
+async def _queue(name: str, payload: dict[str, int], principal: Principal, response: Response) -> Job:
+    job = await get_job_queue().enqueue(
+        Job(name=name, payload=payload, company_id=principal.company_id, user_id=principal.user_id)
+    )
+    response.headers["Location"] = status_url(job.id)
+    return job
+
+
+def _import_url(kind: ImportKind, import_id: int) -> str:
+    return f"{settings.API_V1_STR}/imports/{kind}/{import_id}"
+
+
+def _accepted(kind: ImportKind, import_id: int, job: Job) -> ImportAcceptedResponse:
+    return ImportAcceptedResponse(
+        import_id=import_id,
+        import_url=_import_url(kind, import_id),
+        job_id=job.id,
+        status=job.status,
+        status_url=status_url(job.id),
+    )
+
+
+def _duplicate(
+    response: Response, kind: ImportKind, previous: BankImportFile | FranchiseImport
+) -> ImportAcceptedResponse:
+    """Answer a byte-identical re-upload with the earlier import; nothing is parsed again."""
+    response.status_code = status.HTTP_200_OK
+    response.headers["Location"] = _import_url(kind, previous.id)
+    return ImportAcceptedResponse(
+        import_id=previous.id, import_url=_import_url(kind, previous.id), status=previous.status, duplicate=True
+    )
+
+
+@router.get("/mappings", response_model=list[ImportMappingResponse])
+async def get_mappings(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: FranchisePrincipal,
+) -> list[ImportMappingResponse]:
+    """The company's saved column mappings for bank statements and franchise sales files."""
+    mappings = await list_mappings(db, _company_id(principal))
+    return [ImportMappingResponse.model_validate(mapping) for mapping in mappings]
+
+
+@router.put("/mappings/{kind}/{source}", response_model=ImportMappingResponse)
+async def put_mapping(
+    kind: ImportKind,
+    source: Annotated[str, Path(max_length=50, pattern=SOURCE_PATTERN)],
+    mapping_data: ImportMappingUpsert,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: ImportPrincipal,
+) -> ImportMappingResponse:
+    """Create or replace how files from ``source`` map onto import fields; later uploads use it."""
+    try:
+        mapping = await save_mapping(db, _company_id(principal), kind, source, mapping_data.mapping_json)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+    await db.commit()
+    return ImportMappingResponse.model_validate(mapping)
+
+
+@router.post(
+    "/bank",
+    response_model=ImportAcceptedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit("upload"))],
+)
+async def upload_bank_statement(
+    request: Request,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: ImportPrincipal,
+    source_bank: Annotated[str, Query(max_length=50, pattern=SOURCE_PATTERN)],
+    filename: Filename,
+) -> ImportAcceptedResponse:
+    """Upload a statement as the raw request body and parse it in the background.
+
+    The body is streamed to disk as it arrives and cut off past the upload
+    limit. Lines are parsed with the saved mapping for ``source_bank``; poll
+    the returned status URL, then read the file's counts and rejected rows.
+
+    Re-uploading a file already imported returns 200 with that import.
+    Lines already imported from an overlapping statement are skipped.
+    """
+    company_id = _company_id(principal)
+    _check_upload(request, filename)
+    mapping_json = await _mapping_or_422(db, company_id, "bank", source_bank)
+    # Give the connection back to the pool while the body arrives; the
+    # lookups above (and the user load behind a plain token) opened a
+    # transaction that would otherwise sit idle for the whole upload.
+    await db.rollback()
+    path = upload_path("bank", company_id, file_format_for(filename))
+    saved = await save_stream(request.stream(), path, settings.IMPORT_MAX_UPLOAD_BYTES)
+    try:
+        previous = await find_bank_import(db, company_id, source_bank, saved.sha256)
+        if previous is not None:
+            path.unlink()
+            return _duplicate(response, "bank", previous)
+        statement = await create_bank_import(
+            db, company_id, source_bank, filename, path, saved, mapping_json, created_by=principal.user_id
+        )
+        await db.commit()
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    job = await _queue("imports.bank", {"file_id": statement.id}, principal, response)
+    return _accepted("bank", statement.id, job)
+
+
+@router.post(
+    "/franchise",
+    response_model=ImportAcceptedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit("upload"))],
+)
+async def upload_franchise_sales(
+    request: Request,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: FranchisePrincipal,
+    source: FranchiseSource,
+    store_id: int,
+    period: Annotated[str, Query(pattern=PERIOD_PATTERN, description="Sales month, YYYY-MM")],
+    filename: Filename,
+) -> ImportAcceptedResponse:
+    """Upload a franchisor's sales file for one store and month as the raw request body.
+
+    Parsed in the background like bank statements; rows dated outside
+    ``period`` are rejected. A later file for the same store, source and
+    period replaces the earlier one, writing only the rows that changed; an
+    identical file returns 200 with the earlier import.
+    """
+    company_id = _company_id(principal)
+    _check_upload(request, filename)
+    store = await db.scalar(select(Store).where(Store.id == store_id, Store.company_id == company_id))
+    if store is None or not principal.can_access_store(store.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Store not found",
+        )
+    if not store.is_franchise:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Sales files can only be imported for franchise stores",
+        )
+    mapping_json = await _mapping_or_422(db, company_id, "franchise", source)
+    # As for bank statements, nothing holds a connection while the body arrives.
+    await db.rollback()
+    path = upload_path("franchise", company_id, file_format_for(filename))
+    saved = await save_stream(request.stream(), path, settings.IMPORT_MAX_UPLOAD_BYTES)
+    try:
+        previous = await find_franchise_import(db, company_id, store_id, source, period, saved.sha256)
+        if previous is not None:
+            path.unlink()
+            return _duplicate(response, "franchise", previous)
+        upload = await create_franchise_import(
+            db, company_id, store_id, source, period, filename, path, saved, mapping_json, created_by=principal.user_id
+        )
+        await db.commit()
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    job = await _queue("imports.franchise", {"import_id": upload.id}, principal, response)
+    return _accepted("franchise", upload.id, job)
+
+
+async def _bank_import_or_404(db: AsyncSession, principal: Principal, file_id: int) -> BankImportFile:
+    statement = await db.get(BankImportFile, file_id)
+    if statement is None or statement.company_id != _company_id(principal):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import not found",
+        )
+    return statement
+
+
+async def _franchise_import_or_404(db: AsyncSession, principal: Principal, import_id: int) -> FranchiseImport:
+    upload = await db.get(FranchiseImport, import_id)
+    if upload is None or upload.company_id != _company_id(principal) or not principal.can_access_store(
+        upload.store_id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import not found",
+        )
+    return upload
+
+
+@router.get("/bank/{file_id}", response_model=BankImportResponse)
+async def get_bank_import(
+    file_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: ImportPrincipal,
+) -> BankImportResponse:
+    return BankImportResponse.model_validate(await _bank_import_or_404(db, principal, file_id))
+
+
+@router.get("/franchise/{import_id}", response_model=FranchiseImportResponse)
+async def get_franchise_import(
+    import_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: FranchisePrincipal,
+) -> FranchiseImportResponse:
+    return FranchiseImportResponse.model_validate(await _franchise_import_or_404(db, principal, import_id))
+
+
+@router.get("/bank/{file_id}/errors", response_model=list[ImportRowErrorResponse])
+async def get_bank_import_errors(
+    file_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: ImportPrincipal,
+    after_row: AfterRow = 0,
+    limit: ErrorLimit = 100,
+) -> list[ImportRowErrorResponse]:
+    """Statement lines the import rejected, in file order, with the reason and the line as read."""
+    await _bank_import_or_404(db, principal, file_id)
+    errors = await row_errors(db, "bank", file_id, after_row, limit)
+    return [ImportRowErrorResponse.model_validate(error) for error in errors]
+
+
+@router.get("/franchise/{import_id}/errors", response_model=list[ImportRowErrorResponse])
+async def get_franchise_import_errors(
+    import_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: FranchisePrincipal,
+    after_row: AfterRow = 0,
+    limit: ErrorLimit = 100,
+) -> list[ImportRowErrorResponse]:
+    """Sales rows the import rejected, in file order, with the reason and the row as read."""
+    await _franchise_import_or_404(db, principal, import_id)
+    errors = await row_errors(db, "franchise", import_id, after_row, limit)
+    return [ImportRowErrorResponse.model_validate(error) for error in errors]
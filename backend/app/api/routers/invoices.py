@@ -0,0 +1,228 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.api.deps import get_db
+from app.core.etag import etag_for
+from app.core.rate_limit import concurrency_limit, rate_limit
+from app.core.rbac import COMPANY_WIDE_ROLES, Principal, require_principal
+from app.models.invoice import Invoice
+from app.schemas.invoice import (
+    InvoiceExportRequest,
+    InvoicePostRequest,
+    InvoiceResponse,
+    InvoicesFromOrdersRequest,
+    InvoicesFromOrdersResponse,
+    InvoicesPostedResponse,
+    InvoiceSummaryResponse,
+)
+from app.schemas.job import JobAcceptedResponse
+from app.services.invoice_export import scoped_invoice_ids, stream_invoices_pdf, stream_invoices_zip
+from app.services.invoices import invoices_from_orders, post_invoices
+from app.services.kpi_rollup import kpi_versions
+from app.tasks.jobs import Job, status_url
+from app.tasks.queue import get_job_queue
+
+router = APIRouter(
+    prefix="/invoices", tags=["invoices"], dependencies=[Depends(rate_limit("general"))]
+)
+
+# Streamed exports hold a concurrency slot until the last byte is sent.
+STREAMED_EXPORT_LIMITS = [Depends(rate_limit("export")), Depends(concurrency_limit("export"))]
+
+
+def _company_id(principal: Principal) -> int:
+    if principal.company_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must have store access to manage invoices",
+        )
+    return principal.company_id
+
+
+MAX_EXPORT_INVOICES = 1000
+
+
+def _export_ids(ids: str) -> list[int]:
+    try:
+        invoice_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of invoice ids",
+        ) from exc
+    if not invoice_ids or len(invoice_ids) > MAX_EXPORT_INVOICES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Export between 1 and {MAX_EXPORT_INVOICES} invoices at a time",
+        )
+    return invoice_ids
+
+
+async def _exportable_ids(db: AsyncSession, principal: Principal, ids: str) -> list[int]:
+    invoice_ids = await scoped_invoice_ids(
+        db,
+        _company_id(principal),
+        _export_ids(ids),
+        store_ids=None if principal.has_any_role(COMPANY_WIDE_ROLES) else principal.store_ids,
+    )
+    if not invoice_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No invoices found",
+        )
+    return invoice_ids
+
+
+@router.post("/from-orders", response_model=InvoicesFromOrdersResponse, status_code=status.HTTP_201_CREATED)
+async def create_invoices_from_orders(
+    request: InvoicesFromOrdersRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "ACCOUNTANT"))
+    ],
+) -> InvoicesFromOrdersResponse:
+    """Create one draft invoice per order, skipping orders that cannot be invoiced."""
+    company_id = _company_id(principal)
+
+    invoices, skipped = await invoices_from_orders(
+        db,
+        company_id,
+        request.order_ids,
+        request.invoice_date,
+        discounts=request.discounts,
+        store_ids=None if principal.has_any_role(COMPANY_WIDE_ROLES) else principal.store_ids,
+    )
+    await db.commit()
+    if invoices:
+        await kpi_versions.bump(company_id)
+    return InvoicesFromOrdersResponse(
+        invoices=[InvoiceSummaryResponse.model_validate(invoice) for invoice in invoices],
+        skipped_order_ids=skipped,
+    )
+
+
+@router.post("/post", response_model=InvoicesPostedResponse)
+async def post_draft_invoices(
+    request: InvoicePostRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "ACCOUNTANT"))
+    ],
+) -> InvoicesPostedResponse:
+    """Give draft invoices their store's next series numbers and post them, skipping the rest."""
+    invoices, skipped = await post_invoices(
+        db,
+        _company_id(principal),
+        request.invoice_ids,
+        store_ids=None if principal.has_any_role(COMPANY_WIDE_ROLES) else principal.store_ids,
+    )
+    await db.commit()
+    return InvoicesPostedResponse(
+        invoices=[InvoiceSummaryResponse.model_validate(invoice) for invoice in invoices],
+        skipped_invoice_ids=skipped,
+    )
+
+
+@router.get("/export.pdf", response_class=StreamingResponse, dependencies=STREAMED_EXPORT_LIMITS)
+async def export_invoices_pdf(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "ACCOUNTANT"))
+    ],
+    ids: str = Query(..., description="Comma-separated invoice ids"),
+) -> StreamingResponse:
+    """Stream the invoices as one PDF, in the order requested. Unknown ids are skipped."""
+    invoice_ids = await _exportable_ids(db, principal, ids)
+    return StreamingResponse(
+        stream_invoices_pdf(db, invoice_ids),
+        media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="invoices.pdf"'},
+    )
+
+
+@router.get("/export.zip", response_class=StreamingResponse, dependencies=STREAMED_EXPORT_LIMITS)
+async def export_invoices_zip(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "ACCOUNTANT"))
+    ],
+    ids: str = Query(..., description="Comma-separated invoice ids"),
+) -> StreamingResponse:
+    """Stream a ZIP holding one PDF per invoice. Unknown ids are skipped."""
+    invoice_ids = await _exportable_ids(db, principal, ids)
+    return StreamingResponse(
+        stream_invoices_zip(db, invoice_ids),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="invoices.zip"'},
+    )
+
+
+@router.post(
+    "/export",
+    response_model=JobAcceptedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit("export"))],
+)
+async def queue_invoice_export(
+    request: InvoiceExportRequest,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "ACCOUNTANT"))
+    ],
+) -> JobAcceptedResponse:
+    """Render a large export in the background; poll the returned status URL, then download the result."""
+    invoice_ids = await scoped_invoice_ids(
+        db,
+        _company_id(principal),
+        request.invoice_ids,
+        store_ids=None if principal.has_any_role(COMPANY_WIDE_ROLES) else principal.store_ids,
+    )
+    if not invoice_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No invoices found",
+        )
+    job = await get_job_queue().enqueue(
+        Job(
+            name="invoices.export",
+            payload={"invoice_ids": invoice_ids, "format": request.format},
+            company_id=principal.company_id,
+            user_id=principal.user_id,
+        )
+    )
+    response.headers["Location"] = status_url(job.id)
+    return JobAcceptedResponse(job_id=job.id, status=job.status, status_url=status_url(job.id))
+
+
+@router.get("/{invoice_id}", response_model=InvoiceResponse)
+async def get_invoice(
+    invoice_id: int,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "ACCOUNTANT"))
+    ],
+) -> InvoiceResponse:
+    company_id = _company_id(principal)
+
+    result = await db.execute(
+        select(Invoice)
+        .where(Invoice.id == invoice_id, Invoice.company_id == company_id)
+        .options(selectinload(Invoice.lines))
+    )
+    invoice = result.scalar_one_or_none()
+
+    if not invoice or not principal.can_access_store(invoice.store_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Invoice not found",
+        )
+
+    response.headers["ETag"] = etag_for(invoice.version)
+    return InvoiceResponse.model_validate(invoice)
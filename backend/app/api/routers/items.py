@@ -1,73 +1,60 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db
-from app.core.rbac import require_role
+from app.core.etag import etag_for, if_match_version
+from app.core.rate_limit import rate_limit
+from app.core.rbac import Principal, require_principal
+from app.db.persistence import insert_returning, update_returning
 from app.models.item import Item
-from app.models.user import User
 from app.schemas.item import ItemCreate, ItemResponse, ItemUpdate
 
-router = APIRouter(prefix="/items", tags=["items"])
+router = APIRouter(
+    prefix="/items", tags=["items"], dependencies=[Depends(rate_limit("general"))]
+)
 
 
 @router.post("", response_model=ItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_item(
     item_data: ItemCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
 ) -> ItemResponse:
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to create items",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
-    result = await db.execute(
-        select(Item).where(
-            Item.company_id == company_id,
-            Item.sku == item_data.sku,
-        )
-    )
-    if result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"Item with SKU '{item_data.sku}' already exists",
-        )
-
-    item = Item(
-        company_id=company_id,
-        **item_data.model_dump()
-    )
-    db.add(item)
+    item = await insert_returning(db, Item, {"company_id": company_id, **item_data.model_dump()})
     await db.commit()
-    await db.refresh(item)
     return ItemResponse.model_validate(item)
 
 
 @router.get("", response_model=list[ItemResponse])
 async def list_items(
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "STAFF"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "STAFF"))
     ],
     search: str | None = Query(None, description="Search by SKU or name"),
     status_filter: str | None = Query(None, description="Filter by status (active/inactive)"),
     type_filter: str | None = Query(None, description="Filter by type (service/product)"),
 ) -> list[ItemResponse]:
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to view items",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
     query = select(Item).where(Item.company_id == company_id)
 
@@ -94,18 +81,19 @@ async def list_items(
 @router.get("/{item_id}", response_model=ItemResponse)
 async def get_item(
     item_id: int,
+    response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "STAFF"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "STAFF"))
     ],
 ) -> ItemResponse:
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to view items",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
     result = await db.execute(
         select(Item).where(Item.id == item_id, Item.company_id == company_id)
@@ -118,6 +106,7 @@ async def get_item(
             detail="Item not found",
         )
 
+    response.headers["ETag"] = etag_for(item.version)
     return ItemResponse.model_validate(item)
 
 
@@ -125,23 +114,28 @@ async def get_item(
 async def update_item(
     item_id: int,
     item_data: ItemUpdate,
+    response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
     ],
+    expected_version: Annotated[int | None, Depends(if_match_version)],
 ) -> ItemResponse:
-    if not current_user.store_accesses:
+    if principal.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User must have store access to update items",
         )
 
-    company_id = current_user.store_accesses[0].store.company_id
+    company_id = principal.company_id
 
-    result = await db.execute(
-        select(Item).where(Item.id == item_id, Item.company_id == company_id)
+    item = await update_returning(
+        db,
+        Item,
+        where=[Item.id == item_id, Item.company_id == company_id],
+        values=item_data.model_dump(exclude_unset=True),
+        expected_version=expected_version,
     )
-    item = result.scalar_one_or_none()
 
     if not item:
         raise HTTPException(
@@ -149,24 +143,6 @@ async def update_item(
             detail="Item not found",
         )
 
-    if item_data.sku and item_data.sku != item.sku:
-        result = await db.execute(
-            select(Item).where(
-                Item.company_id == company_id,
-                Item.sku == item_data.sku,
-                Item.id != item_id,
-            )
-        )
-        if result.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"Item with SKU '{item_data.sku}' already exists",
-            )
-
-    update_data = item_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(item, field, value)
-
     await db.commit()
-    await db.refresh(item)
+    response.headers["ETag"] = etag_for(item.version)
     return ItemResponse.model_validate(item)
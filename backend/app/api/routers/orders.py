@@ -0,0 +1,113 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.api.deps import get_db
+from app.core.etag import etag_for, if_match_version
+from app.core.rate_limit import rate_limit
+from app.core.rbac import COMPANY_WIDE_ROLES, Principal, require_principal
+from app.db.session import AsyncSessionLocal
+from app.models.order import Order
+from app.schemas.order import OrderCreate, OrderResponse
+from app.services.kpi_rollup import kpi_versions
+from app.services.order_series import OrderNumberAllocator
+from app.services.orders import create_order, mark_delivered
+
+router = APIRouter(
+    prefix="/orders", tags=["orders"], dependencies=[Depends(rate_limit("general"))]
+)
+
+order_numbers = OrderNumberAllocator(AsyncSessionLocal)
+
+
+def _company_id(principal: Principal, store_id: int | None = None) -> int:
+    if principal.company_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must have store access to manage orders",
+        )
+    if store_id is not None and not principal.can_access_store(store_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No access to this store",
+        )
+    return principal.company_id
+
+
+@router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+async def post_order(
+    order_data: OrderCreate,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal,
+        Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "STAFF", "B2B_SALES")),
+    ],
+) -> OrderResponse:
+    """Create an order with all of its lines, snapshotting each line's price and tax rate."""
+    company_id = _company_id(principal, order_data.store_id)
+
+    order = await create_order(db, company_id, order_data, order_numbers)
+    await db.commit()
+    await kpi_versions.bump(company_id)
+    response.headers["ETag"] = etag_for(order.version)
+    return OrderResponse.model_validate(order)
+
+
+@router.get("/{order_id}", response_model=OrderResponse)
+async def get_order(
+    order_id: int,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal,
+        Depends(
+            require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER", "STORE_MANAGER", "STAFF", "B2B_SALES")
+        ),
+    ],
+) -> OrderResponse:
+    company_id = _company_id(principal)
+
+    result = await db.execute(
+        select(Order)
+        .where(Order.id == order_id, Order.company_id == company_id)
+        .options(selectinload(Order.items))
+    )
+    order = result.scalar_one_or_none()
+
+    if not order or not principal.can_access_store(order.store_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found",
+        )
+
+    response.headers["ETag"] = etag_for(order.version)
+    return OrderResponse.model_validate(order)
+
+
+@router.post("/{order_id}/deliver", response_model=OrderResponse)
+async def deliver_order(
+    order_id: int,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "STAFF"))
+    ],
+    expected_version: Annotated[int | None, Depends(if_match_version)],
+) -> OrderResponse:
+    """Mark the order as handed back to the customer, which takes it off the pending deliveries report."""
+    company_id = _company_id(principal)
+
+    order = await mark_delivered(
+        db,
+        company_id,
+        order_id,
+        expected_version=expected_version,
+        store_ids=None if principal.has_any_role(COMPANY_WIDE_ROLES) else principal.store_ids,
+    )
+    await db.commit()
+    response.headers["ETag"] = etag_for(order.version)
+    return OrderResponse.model_validate(order)
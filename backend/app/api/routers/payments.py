@@ -0,0 +1,52 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db
+from app.core.rate_limit import rate_limit
+from app.core.rbac import COMPANY_WIDE_ROLES, Principal, require_principal
+from app.schemas.payment import PaymentCreate, PaymentResponse
+from app.services.kpi_rollup import kpi_versions
+from app.services.payments import record_payment
+
+router = APIRouter(
+    prefix="/payments", tags=["payments"], dependencies=[Depends(rate_limit("general"))]
+)
+
+
+def _company_id(principal: Principal) -> int:
+    if principal.company_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must have store access to record payments",
+        )
+    return principal.company_id
+
+
+@router.post("", response_model=PaymentResponse, status_code=status.HTTP_201_CREATED)
+async def post_payment(
+    request: PaymentCreate,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "ACCOUNTANT"))
+    ],
+) -> PaymentResponse:
+    """Record a payment against an invoice; send an Idempotency-Key so a retried request is not counted twice."""
+    company_id = _company_id(principal)
+
+    payment = await record_payment(
+        db,
+        company_id,
+        request.invoice_id,
+        request.amount,
+        request.mode,
+        request.payment_date,
+        txn_ref=request.txn_ref,
+        notes=request.notes,
+        received_by=principal.user_id,
+        store_ids=None if principal.has_any_role(COMPANY_WIDE_ROLES) else principal.store_ids,
+    )
+    await db.commit()
+    await kpi_versions.bump(company_id)
+    return PaymentResponse.model_validate(payment)
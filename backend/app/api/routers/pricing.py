@@ -0,0 +1,168 @@
+from datetime import date
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db
+from app.core.etag import etag_for, if_match_version
+from app.core.rate_limit import rate_limit
+from app.core.rbac import Principal, require_principal
+from app.db.persistence import insert_returning, update_returning
+from app.models.customer import Customer
+from app.models.item import Item
+from app.models.item_rate import ItemRate
+from app.models.store import Store
+from app.schemas.pricing import (
+    ItemRateCreate,
+    ItemRateResponse,
+    ItemRateUpdate,
+    PriceResolveRequest,
+    PriceResolveResponse,
+    ResolvedPrice,
+)
+from app.services.pricing import pricing_cache
+from app.services.store_calendar import DEFAULT_CLOSING_CUTOFF, current_business_date
+
+router = APIRouter(
+    prefix="/pricing", tags=["pricing"], dependencies=[Depends(rate_limit("general"))]
+)
+
+
+def _company_id(principal: Principal) -> int:
+    if principal.company_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must have store access to manage pricing",
+        )
+    return principal.company_id
+
+
+async def _store_business_date(db: AsyncSession, principal: Principal, company_id: int, store_id: int | None) -> date:
+    row = None
+    if store_id is not None and principal.can_access_store(store_id):
+        row = (
+            await db.execute(
+                select(Store.timezone, Store.closing_cutoff).where(Store.id == store_id, Store.company_id == company_id)
+            )
+        ).one_or_none()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Store not found",
+        )
+    timezone, cutoff = row
+    return current_business_date(timezone, cutoff or DEFAULT_CLOSING_CUTOFF)
+
+
+@router.post("/resolve", response_model=PriceResolveResponse)
+async def resolve_prices(
+    request: PriceResolveRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[
+        Principal,
+        Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER", "STAFF", "B2B_SALES")),
+    ],
+) -> PriceResolveResponse:
+    """Resolve effective rates for a whole cart in one call.
+
+    Without ``on_date`` the rates are those of the store's current business
+    day, the day a new order at that store is priced on.
+    """
+    company_id = _company_id(principal)
+    on_date = request.on_date or await _store_business_date(db, principal, company_id, request.store_id)
+
+    index = await pricing_cache.index_for(db, company_id)
+    resolved = index.resolve_many(request.item_ids, request.customer_id, on_date)
+
+    return PriceResolveResponse(
+        on_date=on_date,
+        prices=[
+            ResolvedPrice(item_id=r.item_id, rate=r.rate, rate_id=r.rate_id, source=r.source)
+            for r in resolved.values()
+        ],
+        unpriced_item_ids=sorted({item_id for item_id in request.item_ids if item_id not in resolved}),
+    )
+
+
+@router.get("/rates", response_model=list[ItemRateResponse])
+async def list_item_rates(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))],
+    item_id: int | None = Query(None, description="Filter by item"),
+    customer_id: int | None = Query(None, description="Filter by customer override"),
+) -> list[ItemRateResponse]:
+    company_id = _company_id(principal)
+
+    query = select(ItemRate).where(ItemRate.company_id == company_id)
+    if item_id is not None:
+        query = query.where(ItemRate.item_id == item_id)
+    if customer_id is not None:
+        query = query.where(ItemRate.customer_id == customer_id)
+
+    result = await db.execute(query.order_by(ItemRate.item_id, ItemRate.customer_id, ItemRate.effective_from))
+    return [ItemRateResponse.model_validate(rate) for rate in result.scalars().all()]
+
+
+@router.post("/rates", response_model=ItemRateResponse, status_code=status.HTTP_201_CREATED)
+async def create_item_rate(
+    rate_data: ItemRateCreate,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
+) -> ItemRateResponse:
+    company_id = _company_id(principal)
+
+    item = await db.execute(select(Item.id).where(Item.id == rate_data.item_id, Item.company_id == company_id))
+    if item.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Item not found",
+        )
+
+    if rate_data.customer_id is not None:
+        customer = await db.execute(
+            select(Customer.id).where(Customer.id == rate_data.customer_id, Customer.company_id == company_id)
+        )
+        if customer.scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Customer not found",
+            )
+
+    rate = await insert_returning(db, ItemRate, {"company_id": company_id, **rate_data.model_dump()})
+    await db.commit()
+    await pricing_cache.invalidate(company_id)
+    return ItemRateResponse.model_validate(rate)
+
+
+@router.patch("/rates/{rate_id}", response_model=ItemRateResponse)
+async def update_item_rate(
+    rate_id: int,
+    rate_data: ItemRateUpdate,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
+    expected_version: Annotated[int | None, Depends(if_match_version)],
+) -> ItemRateResponse:
+    company_id = _company_id(principal)
+
+    # The effective window is checked by ck_item_rates_effective_window.
+    rate = await update_returning(
+        db,
+        ItemRate,
+        where=[ItemRate.id == rate_id, ItemRate.company_id == company_id],
+        values=rate_data.model_dump(exclude_unset=True),
+        expected_version=expected_version,
+    )
+
+    if not rate:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rate not found",
+        )
+
+    await db.commit()
+    await pricing_cache.invalidate(company_id)
+    response.headers["ETag"] = etag_for(rate.version)
+    return ItemRateResponse.model_validate(rate)
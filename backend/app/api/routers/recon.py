@@ -0,0 +1,74 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db
+from app.core.rate_limit import rate_limit
+from app.core.rbac import Principal, require_principal
+from app.db.persistence import insert_returning
+from app.models.recon_rule import ReconRule
+from app.schemas.recon import AutoMatchResponse, ReconRuleCreate, ReconRuleResponse
+from app.services.recon import auto_match, compile_pattern
+
+router = APIRouter(
+    prefix="/recon", tags=["recon"], dependencies=[Depends(rate_limit("general"))]
+)
+
+ReconPrincipal = Annotated[
+    Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "ACCOUNTANT"))
+]
+
+
+def _company_id(principal: Principal) -> int:
+    if principal.company_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must belong to a company to reconcile statements",
+        )
+    return principal.company_id
+
+
+@router.get("/rules", response_model=list[ReconRuleResponse])
+async def list_rules(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: ReconPrincipal,
+) -> list[ReconRuleResponse]:
+    """The company's rules in the order auto-match applies them."""
+    rules = await db.execute(
+        select(ReconRule)
+        .where(ReconRule.company_id == _company_id(principal))
+        .order_by(ReconRule.priority, ReconRule.id)
+    )
+    return [ReconRuleResponse.model_validate(rule) for rule in rules.scalars()]
+
+
+@router.post("/rules", response_model=ReconRuleResponse, status_code=status.HTTP_201_CREATED)
+async def create_rule(
+    rule_data: ReconRuleCreate,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: ReconPrincipal,
+) -> ReconRuleResponse:
+    try:
+        compile_pattern(rule_data.match_type, rule_data.pattern)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+
+    rule = await insert_returning(
+        db, ReconRule, {"company_id": _company_id(principal), **rule_data.model_dump()}
+    )
+    await db.commit()
+    return ReconRuleResponse.model_validate(rule)
+
+
+@router.post("/auto-match", response_model=AutoMatchResponse)
+async def run_auto_match(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: ReconPrincipal,
+    file_id: Annotated[int, Query(description="Statement to match")],
+) -> AutoMatchResponse:
+    """Match the statement's open credit lines to payments and invoices; lines already matched are left alone."""
+    result = await auto_match(db, _company_id(principal), file_id)
+    await db.commit()
+    return AutoMatchResponse.model_validate(result)
@@ -0,0 +1,255 @@
+from collections.abc import AsyncIterator, Sequence
+from datetime import date
+from typing import Annotated, Any, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db
+from app.core.rate_limit import concurrency_limit, rate_limit
+from app.core.rbac import COMPANY_WIDE_ROLES, Principal, require_principal
+from app.schemas.report import (
+    AgingTotalResponse,
+    PendingDeliveriesPage,
+    PendingDeliveryResponse,
+    PendingPaymentResponse,
+    PendingPaymentsAgingResponse,
+    PendingPaymentsPage,
+)
+from app.services.reports import (
+    REPORT_PAGE_SIZE,
+    AgingBucket,
+    Cursor,
+    PendingDeliveriesFilter,
+    PendingDelivery,
+    PendingPayment,
+    PendingPaymentsFilter,
+    decode_cursor,
+    default_as_of,
+    encode_cursor,
+    pending_deliveries,
+    pending_delivery_pages,
+    pending_payment_pages,
+    pending_payments,
+    pending_payments_aging,
+    stream_csv,
+    stream_xlsx,
+)
+
+router = APIRouter(
+    prefix="/reports", tags=["reports"], dependencies=[Depends(rate_limit("general"))]
+)
+
+MAX_PAGE_SIZE = 500
+ExportFormat = Literal["csv", "xlsx"]
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+EXPORT_LIMITS = [Depends(rate_limit("export")), Depends(concurrency_limit("export"))]
+
+_heavy_report_limit = rate_limit("heavy_report")
+
+
+async def _report_run_limit(request: Request, response: Response, cursor: str | None = None) -> None:
+    """A report run counts once against ``heavy_report``; following its cursor to later pages does not."""
+    if cursor is None:
+        await _heavy_report_limit(request, response)
+
+
+ReportPrincipal = Annotated[
+    Principal,
+    Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER", "STORE_MANAGER", "ACCOUNTANT")),
+]
+
+
+def _company_id(principal: Principal) -> int:
+    if principal.company_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must have store access to view reports",
+        )
+    return principal.company_id
+
+
+def _store_scope(principal: Principal, store_ids: list[int] | None) -> frozenset[int] | None:
+    scope = None if principal.has_any_role(COMPANY_WIDE_ROLES) else principal.store_ids
+    if store_ids is not None:
+        scope = frozenset(store_ids) if scope is None else scope & frozenset(store_ids)
+    return scope
+
+
+def _cursor(cursor: str | None) -> Cursor | None:
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor must be a next_cursor returned by this report",
+        ) from exc
+
+
+def _next_cursor(rows: Sequence[PendingPayment | PendingDelivery], limit: int) -> str | None:
+    return encode_cursor(rows[-1].cursor) if len(rows) == limit else None
+
+
+def _export(
+    body: AsyncIterator[bytes], export_format: ExportFormat, filename: str
+) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
+
+
+def _export_body(
+    row_type: type[Any], pages: AsyncIterator[Sequence[Any]], export_format: ExportFormat, sheet_name: str
+) -> AsyncIterator[bytes]:
+    return stream_csv(row_type, pages) if export_format == "csv" else stream_xlsx(row_type, pages, sheet_name)
+
+
+def _payments_filter(
+    principal: ReportPrincipal,
+    store_id: Annotated[list[int] | None, Query(description="Limit to these stores")] = None,
+    customer_id: int | None = None,
+    date_from: Annotated[date | None, Query(description="Earliest invoice date")] = None,
+    date_to: Annotated[date | None, Query(description="Latest invoice date")] = None,
+    aging_bucket: AgingBucket | None = None,
+) -> PendingPaymentsFilter:
+    return PendingPaymentsFilter(
+        store_ids=_store_scope(principal, store_id),
+        customer_id=customer_id,
+        date_from=date_from,
+        date_to=date_to,
+        aging_bucket=aging_bucket,
+    )
+
+
+def _deliveries_filter(
+    principal: ReportPrincipal,
+    store_id: Annotated[list[int] | None, Query(description="Limit to these stores")] = None,
+    customer_id: int | None = None,
+    date_from: Annotated[date | None, Query(description="Earliest order date")] = None,
+    date_to: Annotated[date | None, Query(description="Latest order date")] = None,
+    stage: Annotated[str | None, Query(description="Order status")] = None,
+) -> PendingDeliveriesFilter:
+    return PendingDeliveriesFilter(
+        store_ids=_store_scope(principal, store_id),
+        customer_id=customer_id,
+        date_from=date_from,
+        date_to=date_to,
+        stage=stage,
+    )
+
+
+PaymentsFilter = Annotated[PendingPaymentsFilter, Depends(_payments_filter)]
+DeliveriesFilter = Annotated[PendingDeliveriesFilter, Depends(_deliveries_filter)]
+AsOf = Annotated[
+    date | None,
+    Query(description="Age rows as of this date; defaults to the current business day of the stores reported on"),
+]
+
+
+@router.get("/pending-payments", response_model=PendingPaymentsPage, dependencies=[Depends(_report_run_limit)])
+async def get_pending_payments(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: ReportPrincipal,
+    where: PaymentsFilter,
+    as_of: AsOf = None,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = REPORT_PAGE_SIZE,
+) -> PendingPaymentsPage:
+    """Invoices with an outstanding balance, oldest first, with days outstanding and aging bucket."""
+    company_id = _company_id(principal)
+    as_of = as_of or await default_as_of(db, company_id, where.store_ids)
+    rows = await pending_payments(db, company_id, as_of, where, _cursor(cursor), limit)
+    return PendingPaymentsPage(
+        as_of=as_of,
+        items=[PendingPaymentResponse.model_validate(row) for row in rows],
+        next_cursor=_next_cursor(rows, limit),
+    )
+
+
+@router.get(
+    "/pending-payments/aging",
+    response_model=PendingPaymentsAgingResponse,
+    dependencies=[Depends(rate_limit("heavy_report"))],
+)
+async def get_pending_payments_aging(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: ReportPrincipal,
+    where: PaymentsFilter,
+    as_of: AsOf = None,
+) -> PendingPaymentsAgingResponse:
+    """Outstanding invoices and balance per aging bucket for the same filters."""
+    company_id = _company_id(principal)
+    as_of = as_of or await default_as_of(db, company_id, where.store_ids)
+    totals = await pending_payments_aging(db, company_id, as_of, where)
+    return PendingPaymentsAgingResponse(
+        as_of=as_of, buckets=[AgingTotalResponse.model_validate(total) for total in totals]
+    )
+
+
+@router.get(
+    "/pending-payments/export.{export_format}", response_class=StreamingResponse, dependencies=EXPORT_LIMITS
+)
+async def export_pending_payments(
+    export_format: ExportFormat,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: ReportPrincipal,
+    where: PaymentsFilter,
+    as_of: AsOf = None,
+) -> StreamingResponse:
+    """Stream the whole report as CSV or XLSX."""
+    company_id = _company_id(principal)
+    as_of = as_of or await default_as_of(db, company_id, where.store_ids)
+    pages = pending_payment_pages(db, company_id, as_of, where)
+    return _export(
+        _export_body(PendingPayment, pages, export_format, "Pending payments"), export_format, "pending-payments"
+    )
+
+
+@router.get("/pending-deliveries", response_model=PendingDeliveriesPage, dependencies=[Depends(_report_run_limit)])
+async def get_pending_deliveries(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: ReportPrincipal,
+    where: DeliveriesFilter,
+    as_of: AsOf = None,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = REPORT_PAGE_SIZE,
+) -> PendingDeliveriesPage:
+    """Orders not yet delivered, oldest first, with days pending."""
+    company_id = _company_id(principal)
+    as_of = as_of or await default_as_of(db, company_id, where.store_ids)
+    rows = await pending_deliveries(db, company_id, as_of, where, _cursor(cursor), limit)
+    return PendingDeliveriesPage(
+        as_of=as_of,
+        items=[PendingDeliveryResponse.model_validate(row) for row in rows],
+        next_cursor=_next_cursor(rows, limit),
+    )
+
+
+@router.get(
+    "/pending-deliveries/export.{export_format}", response_class=StreamingResponse, dependencies=EXPORT_LIMITS
+)
+async def export_pending_deliveries(
+    export_format: ExportFormat,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: ReportPrincipal,
+    where: DeliveriesFilter,
+    as_of: AsOf = None,
+) -> StreamingResponse:
+    """Stream the whole report as CSV or XLSX."""
+    company_id = _company_id(principal)
+    as_of = as_of or await default_as_of(db, company_id, where.store_ids)
+    pages = pending_delivery_pages(db, company_id, as_of, where)
+    return _export(
+        _export_body(PendingDelivery, pages, export_format, "Pending deliveries"),
+        export_format,
+        "pending-deliveries",
+    )
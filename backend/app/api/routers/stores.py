@@ -1,49 +1,49 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_accessible_company_ids, get_db
-from app.core.rbac import require_role
+from app.api.deps import get_db
+from app.core.etag import etag_for, if_match_version
+from app.core.rate_limit import rate_limit
+from app.core.rbac import Principal, require_principal
+from app.db.persistence import insert_returning, update_returning
 from app.models.store import Store
-from app.models.user import User
 from app.schemas.store import StoreCreate, StoreResponse, StoreUpdate
 
-router = APIRouter(prefix="/stores", tags=["stores"])
+router = APIRouter(
+    prefix="/stores", tags=["stores"], dependencies=[Depends(rate_limit("general"))]
+)
 
 
 @router.post("", response_model=StoreResponse, status_code=status.HTTP_201_CREATED)
 async def create_store(
     store_data: StoreCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> StoreResponse:
-    store = Store(**store_data.model_dump())
-    db.add(store)
+    store = await insert_returning(db, Store, store_data.model_dump())
     await db.commit()
-    await db.refresh(store)
     return StoreResponse.model_validate(store)
 
 
 @router.get("", response_model=list[StoreResponse])
 async def list_stores(
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User,
+    principal: Annotated[
+        Principal,
         Depends(
-            require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER", "STORE_MANAGER")
+            require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER", "STORE_MANAGER")
         ),
     ],
-    accessible_company_ids: Annotated[set[int], Depends(get_accessible_company_ids)],
 ) -> list[StoreResponse]:
     query = select(Store).where(Store.status == "active")
 
-    user_role_codes = {user_role.role.code for user_role in current_user.roles}
-    if "PLATFORM_ADMIN" not in user_role_codes:
-        if not accessible_company_ids:
+    if not principal.is_platform_admin:
+        if principal.company_id is None:
             return []
-        query = query.where(Store.company_id.in_(accessible_company_ids))
+        query = query.where(Store.company_id == principal.company_id)
 
     result = await db.execute(query)
     stores = result.scalars().all()
@@ -53,14 +53,14 @@ async def list_stores(
 @router.get("/{store_id}", response_model=StoreResponse)
 async def get_store(
     store_id: int,
+    response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User,
+    principal: Annotated[
+        Principal,
         Depends(
-            require_role("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER", "STORE_MANAGER")
+            require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER", "STORE_MANAGER")
         ),
     ],
-    accessible_company_ids: Annotated[set[int], Depends(get_accessible_company_ids)],
 ) -> StoreResponse:
     result = await db.execute(select(Store).where(Store.id == store_id))
     store = result.scalar_one_or_none()
@@ -71,13 +71,13 @@ async def get_store(
             detail="Store not found",
         )
 
-    user_role_codes = {user_role.role.code for user_role in current_user.roles}
-    if "PLATFORM_ADMIN" not in user_role_codes and store.company_id not in accessible_company_ids:
+    if not principal.is_platform_admin and store.company_id != principal.company_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this store",
         )
 
+    response.headers["ETag"] = etag_for(store.version)
     return StoreResponse.model_validate(store)
 
 
@@ -85,32 +85,37 @@ async def get_store(
 async def update_store(
     store_id: int,
     store_data: StoreUpdate,
+    response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
-    accessible_company_ids: Annotated[set[int], Depends(get_accessible_company_ids)],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
+    expected_version: Annotated[int | None, Depends(if_match_version)],
 ) -> StoreResponse:
-    result = await db.execute(select(Store).where(Store.id == store_id))
-    store = result.scalar_one_or_none()
+    where = [Store.id == store_id]
+    if not principal.is_platform_admin:
+        where.append(Store.company_id == principal.company_id)
+
+    store = await update_returning(
+        db,
+        Store,
+        where=where,
+        values=store_data.model_dump(exclude_unset=True),
+        expected_version=expected_version,
+    )
 
     if not store:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Store not found",
-        )
-
-    user_role_codes = {user_role.role.code for user_role in current_user.roles}
-    if "PLATFORM_ADMIN" not in user_role_codes and store.company_id not in accessible_company_ids:
+        result = await db.execute(select(Store.id).where(Store.id == store_id))
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Store not found",
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this store",
         )
 
-    update_data = store_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(store, field, value)
-
     await db.commit()
-    await db.refresh(store)
+    response.headers["ETag"] = etag_for(store.version)
     return StoreResponse.model_validate(store)
 
 
@@ -118,8 +123,7 @@ async def update_store(
 async def delete_store(
     store_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
-    accessible_company_ids: Annotated[set[int], Depends(get_accessible_company_ids)],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> None:
     result = await db.execute(select(Store).where(Store.id == store_id))
     store = result.scalar_one_or_none()
@@ -130,8 +134,7 @@ async def delete_store(
             detail="Store not found",
         )
 
-    user_role_codes = {user_role.role.code for user_role in current_user.roles}
-    if "PLATFORM_ADMIN" not in user_role_codes and store.company_id not in accessible_company_ids:
+    if not principal.is_platform_admin and store.company_id != principal.company_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this store",
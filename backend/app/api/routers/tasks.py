@@ -0,0 +1,156 @@
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse, StreamingResponse
+
+from app.core.rate_limit import rate_limit
+from app.core.rbac import COMPANY_WIDE_ROLES, Principal, get_principal
+from app.core.sse import SSE_HEADERS, SSE_KEEPALIVE, sse_event
+from app.schemas.job import JobResponse
+from app.tasks.events import JobEventHub, get_job_event_hub, job_event
+from app.tasks.jobs import TERMINAL_STATUSES, Job
+from app.tasks.queue import JobQueue, get_job_queue
+from app.tasks.worker import results_dir
+
+router = APIRouter(
+    prefix="/tasks", tags=["tasks"], dependencies=[Depends(rate_limit("general"))]
+)
+
+SSE_KEEPALIVE_SECONDS = 15.0
+
+
+def _timestamp(value: float | None) -> datetime | None:
+    return datetime.fromtimestamp(value, UTC) if value is not None else None
+
+
+def job_response(job: Job) -> JobResponse:
+    return JobResponse(
+        id=job.id,
+        name=job.name,
+        status=job.status,
+        priority=job.priority,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        progress=job.progress,
+        message=job.message,
+        errors=job.errors,
+        result=job.result,
+        result_url=job.result_url,
+        error=job.error,
+        cancel_requested=job.cancel_requested,
+        created_at=datetime.fromtimestamp(job.created_at, UTC),
+        started_at=_timestamp(job.started_at),
+        finished_at=_timestamp(job.finished_at),
+    )
+
+
+def can_view_job(principal: Principal, job: Job) -> bool:
+    """Platform admins see every job; others see their own, or their company's with a company-wide role."""
+    if principal.is_platform_admin:
+        return True
+    if job.company_id is None or job.company_id != principal.company_id:
+        return False
+    return principal.has_any_role(COMPANY_WIDE_ROLES) or job.user_id == principal.user_id
+
+
+async def _visible_job(job_id: str, principal: Principal) -> Job:
+    job = await get_job_queue().get(job_id)
+    if job is None or not can_view_job(principal, job):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found",
+        )
+    return job
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_task(
+    job_id: str,
+    principal: Annotated[Principal, Depends(get_principal)],
+) -> JobResponse:
+    """Poll a background job for its status, progress and result."""
+    return job_response(await _visible_job(job_id, principal))
+
+
+async def job_event_stream(
+    job_id: str,
+    hub: JobEventHub | None = None,
+    queue: JobQueue | None = None,
+    keepalive_seconds: float = SSE_KEEPALIVE_SECONDS,
+) -> AsyncIterator[bytes]:
+    """SSE frames for one job: its current state, each change, and a final ``end`` event."""
+    hub = hub or get_job_event_hub()
+    queue = queue or get_job_queue()
+    # Subscribe before taking the snapshot so no change in between is missed.
+    async with hub.subscribe(job_id) as events:
+        job = await queue.get(job_id)
+        if job is None:
+            return
+        event: dict[str, Any] = job_event(job)
+        while True:
+            if event["status"] in TERMINAL_STATUSES:
+                yield sse_event(event, "end")
+                return
+            yield sse_event(event, "progress")
+            try:
+                event = await asyncio.wait_for(events.get(), keepalive_seconds)
+            except TimeoutError:
+                yield SSE_KEEPALIVE
+                # Re-read the record now and then in case a published event was lost.
+                job = await queue.get(job_id)
+                if job is None:
+                    return
+                event = job_event(job)
+
+
+@router.get("/{job_id}/events", response_class=StreamingResponse)
+async def stream_task_events(
+    job_id: str,
+    principal: Annotated[Principal, Depends(get_principal)],
+) -> StreamingResponse:
+    """Follow a job live with Server-Sent Events instead of polling.
+
+    A ``progress`` event carries the status, percentage, message and partial
+    error count whenever they change. The stream closes after one ``end``
+    event holding the final state and, for jobs that produce a file, its
+    ``result_url``.
+    """
+    await _visible_job(job_id, principal)
+    return StreamingResponse(job_event_stream(job_id), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_task(
+    job_id: str,
+    principal: Annotated[Principal, Depends(get_principal)],
+) -> JobResponse:
+    """Cancel a job. A queued job stops at once; a running one stops at its next progress report."""
+    await _visible_job(job_id, principal)
+    job = await get_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found",
+        )
+    return job_response(job)
+
+
+@router.get("/{job_id}/result", response_class=FileResponse)
+async def download_task_result(
+    job_id: str,
+    principal: Annotated[Principal, Depends(get_principal)],
+) -> FileResponse:
+    job = await _visible_job(job_id, principal)
+    result = job.result or {}
+    filename = result.get("file")
+    # Result files are named by handlers; refuse anything that is not a plain file name.
+    path = results_dir(job.id) / filename if isinstance(filename, str) and "/" not in filename else None
+    if job.status != "succeeded" or path is None or not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task result not available",
+        )
+    return FileResponse(path, media_type=result.get("media_type"), filename=filename)
@@ -1,13 +1,17 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import get_db
-from app.core.rbac import require_role
+from app.core.authz_version import authz_change
+from app.core.etag import etag_for, if_match_version
+from app.core.rate_limit import rate_limit
+from app.core.rbac import Principal, require_principal
 from app.core.security import get_password_hash
+from app.db.persistence import insert_returning, update_returning
 from app.models.role import Role
 from app.models.user import User
 from app.models.user_role import UserRole
@@ -24,56 +28,45 @@ from app.schemas.user_store_access import (
     UserStoreAccessUpdate,
 )
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(
+    prefix="/users", tags=["users"], dependencies=[Depends(rate_limit("general"))]
+)
 
 
 @router.post("", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(
     user_data: UserCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN"))],
 ) -> UserResponse:
-    result = await db.execute(select(User).where(User.email == user_data.email))
-    existing_user = result.scalar_one_or_none()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"User with email '{user_data.email}' already exists",
-        )
-
-    user = User(
-        email=user_data.email,
-        phone=user_data.phone,
-        password_hash=get_password_hash(user_data.password),
-        first_name=user_data.first_name,
-        last_name=user_data.last_name,
-        status=user_data.status,
+    user = await insert_returning(
+        db,
+        User,
+        {
+            "email": user_data.email,
+            "phone": user_data.phone,
+            "password_hash": get_password_hash(user_data.password),
+            "first_name": user_data.first_name,
+            "last_name": user_data.last_name,
+            "status": user_data.status,
+        },
+        roles=[],
+        store_accesses=[],
     )
-    db.add(user)
     await db.commit()
-    await db.refresh(user, ["roles"])
-
-    result = await db.execute(
-        select(User)
-        .where(User.id == user.id)
-        .options(
-            selectinload(User.roles).selectinload(UserRole.role),
-            selectinload(User.store_accesses).selectinload(UserStoreAccess.store),
-        )
-    )
-    user_with_roles = result.scalar_one()
 
     user_dict = {
-        "id": user_with_roles.id,
-        "email": user_with_roles.email,
-        "phone": user_with_roles.phone,
-        "first_name": user_with_roles.first_name,
-        "last_name": user_with_roles.last_name,
-        "status": user_with_roles.status,
-        "roles": [user_role.role for user_role in user_with_roles.roles],
-        "store_accesses": user_with_roles.store_accesses,
-        "created_at": user_with_roles.created_at,
-        "updated_at": user_with_roles.updated_at,
+        "id": user.id,
+        "email": user.email,
+        "phone": user.phone,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "status": user.status,
+        "version": user.version,
+        "roles": [],
+        "store_accesses": [],
+        "created_at": user.created_at,
+        "updated_at": user.updated_at,
     }
 
     return UserResponse.model_validate(user_dict)
@@ -82,9 +75,7 @@ async def create_user(
 @router.get("", response_model=list[UserResponse])
 async def list_users(
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))
-    ],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
     search: str | None = Query(None, description="Search by name or email"),
     status_filter: str | None = Query(None, description="Filter by status"),
     skip: int = Query(0, ge=0),
@@ -122,6 +113,7 @@ async def list_users(
                 "first_name": user.first_name,
                 "last_name": user.last_name,
                 "status": user.status,
+                "version": user.version,
                 "roles": [user_role.role for user_role in user.roles],
                 "store_accesses": user.store_accesses,
                 "created_at": user.created_at,
@@ -135,10 +127,9 @@ async def list_users(
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
+    response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))
-    ],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> UserResponse:
     result = await db.execute(
         select(User)
@@ -163,12 +154,14 @@ async def get_user(
         "first_name": user.first_name,
         "last_name": user.last_name,
         "status": user.status,
+        "version": user.version,
         "roles": [user_role.role for user_role in user.roles],
         "store_accesses": user.store_accesses,
         "created_at": user.created_at,
         "updated_at": user.updated_at,
     }
 
+    response.headers["ETag"] = etag_for(user.version)
     return UserResponse.model_validate(user_dict)
 
 
@@ -176,55 +169,39 @@ async def get_user(
 async def update_user(
     user_id: int,
     user_data: UserUpdate,
+    response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN"))],
+    expected_version: Annotated[int | None, Depends(if_match_version)],
 ) -> UserResponse:
-    result = await db.execute(
-        select(User)
-        .where(User.id == user_id)
-        .options(
+    update_data = user_data.model_dump(exclude_unset=True)
+
+    if "password" in update_data:
+        update_data["password_hash"] = get_password_hash(update_data.pop("password"))
+
+    updated_user = await update_returning(
+        db,
+        User,
+        where=[User.id == user_id],
+        values=update_data,
+        expected_version=expected_version,
+        options=[
             selectinload(User.roles).selectinload(UserRole.role),
             selectinload(User.store_accesses).selectinload(UserStoreAccess.store),
-        )
+        ],
     )
-    user = result.scalar_one_or_none()
 
-    if not user:
+    if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
 
-    update_data = user_data.model_dump(exclude_unset=True)
-
-    if "password" in update_data:
-        update_data["password_hash"] = get_password_hash(update_data.pop("password"))
-
-    if "email" in update_data and update_data["email"] != user.email:
-        email_check = await db.execute(
-            select(User).where(User.email == update_data["email"])
-        )
-        if email_check.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"User with email '{update_data['email']}' already exists",
-            )
-
-    for field, value in update_data.items():
-        setattr(user, field, value)
-
-    await db.commit()
-    await db.refresh(user)
-
-    result = await db.execute(
-        select(User)
-        .where(User.id == user_id)
-        .options(
-            selectinload(User.roles).selectinload(UserRole.role),
-            selectinload(User.store_accesses).selectinload(UserStoreAccess.store),
-        )
-    )
-    updated_user = result.scalar_one()
+    if "status" in update_data:
+        async with authz_change(user_id):
+            await db.commit()
+    else:
+        await db.commit()
 
     user_dict = {
         "id": updated_user.id,
@@ -233,12 +210,14 @@ async def update_user(
         "first_name": updated_user.first_name,
         "last_name": updated_user.last_name,
         "status": updated_user.status,
+        "version": updated_user.version,
         "roles": [user_role.role for user_role in updated_user.roles],
         "store_accesses": updated_user.store_accesses,
         "created_at": updated_user.created_at,
         "updated_at": updated_user.updated_at,
     }
 
+    response.headers["ETag"] = etag_for(updated_user.version)
     return UserResponse.model_validate(user_dict)
 
 
@@ -246,7 +225,7 @@ async def update_user(
 async def delete_user(
     user_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN"))],
 ) -> None:
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
@@ -258,7 +237,8 @@ async def delete_user(
         )
 
     user.status = "inactive"
-    await db.commit()
+    async with authz_change(user_id):
+        await db.commit()
 
 
 @router.post(
@@ -270,7 +250,7 @@ async def assign_role_to_user(
     user_id: int,
     role_assignment: UserRoleAssignment,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN"))],
 ) -> UserResponse:
     user_result = await db.execute(
         select(User)
@@ -308,7 +288,8 @@ async def assign_role_to_user(
 
     user_role = UserRole(user_id=user_id, role_id=role_assignment.role_id)
     db.add(user_role)
-    await db.commit()
+    async with authz_change(user_id):
+        await db.commit()
 
     result = await db.execute(
         select(User)
@@ -327,6 +308,7 @@ async def assign_role_to_user(
         "first_name": updated_user.first_name,
         "last_name": updated_user.last_name,
         "status": updated_user.status,
+        "version": updated_user.version,
         "roles": [user_role.role for user_role in updated_user.roles],
         "store_accesses": updated_user.store_accesses,
         "created_at": updated_user.created_at,
@@ -341,7 +323,7 @@ async def remove_role_from_user(
     user_id: int,
     role_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(require_role("PLATFORM_ADMIN"))],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN"))],
 ) -> None:
     result = await db.execute(
         select(UserRole).where(
@@ -358,16 +340,15 @@ async def remove_role_from_user(
         )
 
     await db.delete(user_role)
-    await db.commit()
+    async with authz_change(user_id):
+        await db.commit()
 
 
 @router.get("/{user_id}/stores", response_model=list[UserStoreAccessResponse])
 async def list_user_stores(
     user_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))
-    ],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> list[UserStoreAccessResponse]:
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
@@ -397,19 +378,8 @@ async def assign_store_to_user(
     user_id: int,
     store_access_data: UserStoreAccessCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))
-    ],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> UserStoreAccessResponse:
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
-        )
-
     from app.models.store import Store
 
     result = await db.execute(
@@ -423,28 +393,20 @@ async def assign_store_to_user(
             detail="Store not found",
         )
 
-    result = await db.execute(
-        select(UserStoreAccess).where(
-            UserStoreAccess.user_id == user_id,
-            UserStoreAccess.store_id == store_access_data.store_id,
-        )
+    # A missing user or a duplicate assignment surfaces as an IntegrityError
+    # that the constraint registry maps to 404/409.
+    store_access = await insert_returning(
+        db,
+        UserStoreAccess,
+        {
+            "user_id": user_id,
+            "store_id": store_access_data.store_id,
+            "scope": store_access_data.scope,
+        },
+        store=store,
     )
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="User already has access to this store",
-        )
-
-    store_access = UserStoreAccess(
-        user_id=user_id,
-        store_id=store_access_data.store_id,
-        scope=store_access_data.scope,
-    )
-    db.add(store_access)
-    await db.commit()
-    await db.refresh(store_access, ["store"])
+    async with authz_change(user_id):
+        await db.commit()
 
     return UserStoreAccessResponse.model_validate(store_access)
 
@@ -455,9 +417,7 @@ async def update_user_store_access(
     store_id: int,
     update_data: UserStoreAccessUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))
-    ],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> UserStoreAccessResponse:
     result = await db.execute(
         select(UserStoreAccess).where(
@@ -474,7 +434,8 @@ async def update_user_store_access(
         )
 
     store_access.scope = update_data.scope
-    await db.commit()
+    async with authz_change(user_id):
+        await db.commit()
     await db.refresh(store_access, ["store"])
 
     return UserStoreAccessResponse.model_validate(store_access)
@@ -485,9 +446,7 @@ async def remove_store_access(
     user_id: int,
     store_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[
-        User, Depends(require_role("PLATFORM_ADMIN", "COMPANY_ADMIN"))
-    ],
+    principal: Annotated[Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN"))],
 ) -> None:
     result = await db.execute(
         select(UserStoreAccess).where(
@@ -504,4 +463,5 @@ async def remove_store_access(
         )
 
     await db.delete(store_access)
-    await db.commit()
+    async with authz_change(user_id):
+        await db.commit()
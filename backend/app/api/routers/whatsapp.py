@@ -0,0 +1,221 @@
+import time
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Request, Response, status
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db
+from app.core.config import settings
+from app.core.rate_limit import rate_limit
+from app.core.rbac import Principal, require_principal
+from app.models.order import Order
+from app.models.whatsapp_template import WhatsAppTemplate
+from app.schemas.job import JobAcceptedResponse
+from app.schemas.whatsapp import (
+    BroadcastRequest,
+    CallbackAcceptedResponse,
+    OptOutResponse,
+    ProviderCallback,
+    WhatsAppTemplateResponse,
+    WhatsAppTemplateUpsert,
+)
+from app.services.whatsapp import (
+    FEEDBACK_VARS,
+    RECIPIENT_VARS,
+    feedback_already_sent,
+    save_template,
+    set_opt_out,
+    template_cache,
+)
+from app.services.whatsapp_callbacks import StatusEvent, enqueue_events, verify_signature
+from app.tasks.jobs import Job, status_url
+from app.tasks.queue import get_job_queue
+
+router = APIRouter(
+    prefix="/whatsapp", tags=["whatsapp"], dependencies=[Depends(rate_limit("general"))]
+)
+
+# The provider authenticates with a signature, not a user token, and sends
+# bursts that the general per-IP limit would reject.
+callback_router = APIRouter(
+    prefix="/whatsapp", tags=["whatsapp"], dependencies=[Depends(rate_limit("provider_callback"))]
+)
+
+WhatsAppPrincipal = Annotated[
+    Principal, Depends(require_principal("PLATFORM_ADMIN", "COMPANY_ADMIN", "STORE_MANAGER"))
+]
+
+TemplateCode = Annotated[str, Path(min_length=1, max_length=50, pattern=r"^[a-z0-9_]+$")]
+
+
+def _company_id(principal: Principal) -> int:
+    if principal.company_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must belong to a company to send WhatsApp messages",
+        )
+    return principal.company_id
+
+
+async def _queue(
+    name: str, payload: dict[str, object], principal: Principal, response: Response
+) -> JobAcceptedResponse:
+    job = await get_job_queue().enqueue(
+        Job(name=name, payload=payload, company_id=principal.company_id, user_id=principal.user_id)
+    )
+    response.headers["Location"] = status_url(job.id)
+    return JobAcceptedResponse(job_id=job.id, status=job.status, status_url=status_url(job.id))
+
+
+@router.get("/templates", response_model=list[WhatsAppTemplateResponse])
+async def list_templates(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: WhatsAppPrincipal,
+) -> list[WhatsAppTemplateResponse]:
+    templates = await db.execute(
+        select(WhatsAppTemplate)
+        .where(WhatsAppTemplate.company_id == _company_id(principal))
+        .order_by(WhatsAppTemplate.code)
+    )
+    return [WhatsAppTemplateResponse.model_validate(template) for template in templates.scalars()]
+
+
+@router.put("/templates/{code}", response_model=WhatsAppTemplateResponse)
+async def put_template(
+    code: TemplateCode,
+    template_data: WhatsAppTemplateUpsert,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: WhatsAppPrincipal,
+) -> WhatsAppTemplateResponse:
+    """Create or replace a template; sends already running keep the version they started with."""
+    company_id = _company_id(principal)
+    template = await save_template(
+        db, company_id, code, template_data.type, template_data.body, template_data.is_active
+    )
+    await db.commit()
+    await template_cache.invalidate(company_id)
+    return WhatsAppTemplateResponse.model_validate(template)
+
+
+async def _opt_out(db: AsyncSession, principal: Principal, customer_id: int, opted_out: bool) -> OptOutResponse:
+    customer = await set_opt_out(db, _company_id(principal), customer_id, opted_out)
+    if customer is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer not found")
+    await db.commit()
+    return OptOutResponse(customer_id=customer.id, whatsapp_opted_out_at=customer.whatsapp_opted_out_at)
+
+
+@router.put("/opt-outs/{customer_id}", response_model=OptOutResponse)
+async def opt_out(
+    customer_id: Annotated[int, Path()],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: WhatsAppPrincipal,
+) -> OptOutResponse:
+    """Stop all WhatsApp messages to the customer; the first opt-out time is kept."""
+    return await _opt_out(db, principal, customer_id, opted_out=True)
+
+
+@router.delete("/opt-outs/{customer_id}", response_model=OptOutResponse)
+async def opt_back_in(
+    customer_id: Annotated[int, Path()],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: WhatsAppPrincipal,
+) -> OptOutResponse:
+    return await _opt_out(db, principal, customer_id, opted_out=False)
+
+
+@router.post(
+    "/broadcast",
+    response_model=JobAcceptedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit("campaign"))],
+)
+async def broadcast(
+    request: BroadcastRequest,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: WhatsAppPrincipal,
+) -> JobAcceptedResponse:
+    """Send a promo to every opted-in customer in the background, at most one per customer per week."""
+    company_id = _company_id(principal)
+    template = await template_cache.get(db, company_id, request.template_code)
+    if template is None or template.type != "promo":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Promo template not found")
+    missing = template.missing([*request.variables, *RECIPIENT_VARS])
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Missing template variables: {', '.join(missing)}",
+        )
+    return await _queue(
+        "whatsapp.broadcast",
+        {"template_code": request.template_code, "variables": request.variables},
+        principal,
+        response,
+    )
+
+
+@router.post("/send-feedback", response_model=JobAcceptedResponse, status_code=status.HTTP_202_ACCEPTED)
+async def send_feedback(
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: WhatsAppPrincipal,
+    order_id: Annotated[int, Query()],
+    template_code: Annotated[str, Query(min_length=1, max_length=50)] = "feedback",
+) -> JobAcceptedResponse:
+    """Ask the customer of a delivered order for feedback; each order gets one feedback message."""
+    company_id = _company_id(principal)
+    order = (
+        await db.execute(
+            select(Order.store_id, Order.delivered_at).where(Order.id == order_id, Order.company_id == company_id)
+        )
+    ).one_or_none()
+    if order is None or not principal.can_access_store(order.store_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    if order.delivered_at is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order has not been delivered")
+    if await feedback_already_sent(db, order_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Feedback already sent for this order")
+    template = await template_cache.get(db, company_id, template_code)
+    if template is None or template.type != "feedback":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Feedback template not found")
+    missing = template.missing(FEEDBACK_VARS)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Feedback templates can only use {', '.join(sorted(FEEDBACK_VARS))}; found {', '.join(missing)}",
+        )
+    return await _queue(
+        "whatsapp.feedback", {"order_id": order_id, "template_code": template_code}, principal, response
+    )
+
+
+@callback_router.post("/callback/provider", response_model=CallbackAcceptedResponse)
+async def provider_callback(
+    request: Request,
+    signature: Annotated[str | None, Header(alias="X-Signature-256")] = None,
+) -> CallbackAcceptedResponse:
+    """Accept a batch of delivery and read receipts; they are applied to the message log shortly after."""
+    body = await request.body()
+    if not verify_signature(settings.WHATSAPP_CALLBACK_SECRET, body, signature):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid signature")
+    try:
+        callback = ProviderCallback.model_validate_json(body)
+    except ValidationError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed callback") from exc
+
+    received_at = time.time()
+    await enqueue_events([
+        StatusEvent(
+            provider=settings.WHATSAPP_PROVIDER,
+            provider_msg_id=item.id,
+            status=item.status,
+            at=item.timestamp if item.timestamp is not None else received_at,
+            error=item.error,
+            received_at=received_at,
+        )
+        for item in callback.statuses
+    ])
+    return CallbackAcceptedResponse(accepted=len(callback.statuses))
@@ -0,0 +1,52 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import status
+
+from app.core.exceptions import BusinessLogicError
+from app.core.version_counter import VersionCounter, clock_floor
+
+authz_versions = VersionCounter("authz_version")
+
+
+async def get_authz_version(user_id: int) -> int | None:
+    """Current authorization version for a user, or None if it is unknown.
+
+    It is unknown when Redis is unavailable or holds no counter for the user.
+    Callers must then fall back to the database rather than trusting claims
+    embedded in a token.
+    """
+    return await authz_versions.get(user_id, missing=None)
+
+
+async def issue_authz_version(user_id: int) -> int | None:
+    """The version to embed in a new access token, starting the user's counter if needed."""
+    return await authz_versions.ensure(user_id, clock_floor())
+
+
+async def bump_authz_version(user_id: int) -> None:
+    """Invalidate claims in every outstanding access token for a user.
+
+    Raises a 503 when Redis is unreachable, so the change it guards is not committed.
+    """
+    try:
+        await authz_versions.bump(user_id, initial=clock_floor(), strict=True)
+    except Exception as e:
+        raise BusinessLogicError(
+            "Could not revoke the user's existing sessions; try again shortly",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            error_code="authz-version-unavailable",
+        ) from e
+
+
+@asynccontextmanager
+async def authz_change(user_id: int) -> AsyncIterator[None]:
+    """Wrap the commit of a change to a user's roles, stores or status.
+
+    The version is bumped before the commit, so the change fails if tokens
+    cannot be invalidated. It is bumped again afterwards, for tokens issued
+    while the change was committing.
+    """
+    await bump_authz_version(user_id)
+    yield
+    await authz_versions.bump(user_id, initial=clock_floor())
@@ -1,3 +1,6 @@
+from decimal import Decimal
+from typing import Literal
+
 from pydantic import PostgresDsn, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -20,6 +23,8 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    ACCESS_TOKEN_CLAIMS_ENABLED: bool = False
+    TOKEN_CACHE_MAX_ENTRIES: int = 10_000
 
     CORS_ORIGINS: list[str] = ["http://localhost:5173", "http://localhost:3000"]
 
@@ -34,6 +39,73 @@ class Settings(BaseSettings):
 
     REDIS_URL: str = "redis://localhost:6379/0"
 
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_TTL_SECONDS: int = 30
+
+    RATE_LIMIT_ENABLED: bool = True
+
+    REQUIRE_IF_MATCH: bool = False
+
+    # None uses one worker per CPU; 0 renders in the request process.
+    PDF_RENDER_WORKERS: int | None = None
+
+    # "memory" keeps jobs in the API process and runs them there; use it only
+    # for tests and single-process development.
+    JOB_QUEUE_BACKEND: Literal["redis", "memory"] = "redis"
+    JOB_COMPANY_CONCURRENCY: int = 2
+    JOB_LEASE_SECONDS: int = 60
+    JOB_RESULT_TTL_SECONDS: int = 7 * 86400
+    JOB_RESULTS_DIR: str = "var/job-results"
+
+    # Closing a day with a cash variance larger than this (either way) needs
+    # an Area Manager or Company Admin.
+    CLOSING_VARIANCE_THRESHOLD: Decimal = Decimal("500.00")
+
+    # Dashboard results are fresh for the TTL while no KPI write has landed,
+    # then served for up to the stale window while one worker recomputes them.
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30
+    DASHBOARD_CACHE_STALE_SECONDS: int = 300
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 1024
+
+    # Bank statement and franchise sales uploads (SRS caps files at 25 MB).
+    # None parses in one worker process per CPU; 0 parses in the job worker itself.
+    IMPORT_UPLOAD_DIR: str = "var/imports"
+    IMPORT_MAX_UPLOAD_BYTES: int = 25 * 1024 * 1024
+    IMPORT_PARSE_WORKERS: int | None = None
+    IMPORT_COPY_BATCH_ROWS: int = 5000
+
+    # WhatsApp sends go through one provider speaking the JSON API in
+    # app/services/whatsapp_stub.py. SRS caps sends at 20/sec per company
+    # and promos at one per recipient per PROMO_INTERVAL_DAYS.
+    WHATSAPP_PROVIDER: str = "stub"
+    WHATSAPP_API_URL: str = "http://127.0.0.1:8099"
+    WHATSAPP_API_TOKEN: str = ""
+    WHATSAPP_API_TIMEOUT_SECONDS: float = 10.0
+    WHATSAPP_MAX_CONNECTIONS: int = 20
+    WHATSAPP_SENDS_PER_SECOND: int = 20
+    WHATSAPP_SEND_CONCURRENCY: int = 20
+    WHATSAPP_SEND_ATTEMPTS: int = 3
+    WHATSAPP_PROMO_INTERVAL_DAYS: int = 7
+    WHATSAPP_RECIPIENT_PAGE_ROWS: int = 1000
+    WHATSAPP_LOG_BATCH_ROWS: int = 500
+
+    # Delivery callbacks are signed with HMAC-SHA256 of the body using this
+    # secret; an empty secret rejects every callback. Receipts for messages
+    # not logged yet are retried for WHATSAPP_CALLBACK_RETRY_SECONDS.
+    WHATSAPP_CALLBACK_SECRET: str = ""
+    WHATSAPP_CALLBACK_BATCH_EVENTS: int = 2000
+    WHATSAPP_CALLBACK_RETRY_SECONDS: int = 900
+
+    # Documents (GST certificates, QC photo ZIPs, expense bills) are stored
+    # once per company and content hash under DOCUMENT_STORAGE_DIR and fetched
+    # through signed links valid for DOCUMENT_URL_TTL_SECONDS. When nginx
+    # serves DOCUMENT_STORAGE_DIR at an internal location, set
+    # DOCUMENT_ACCEL_REDIRECT_PREFIX to it and nginx sends the file itself.
+    DOCUMENT_STORAGE_DIR: str = "var/documents"
+    DOCUMENT_MAX_UPLOAD_BYTES: int = 200 * 1024 * 1024
+    DOCUMENT_URL_TTL_SECONDS: int = 300
+    DOCUMENT_ACCEL_REDIRECT_PREFIX: str = ""
+
     @property
     def async_database_url(self) -> str:
         return str(self.DATABASE_URL)
@@ -0,0 +1,38 @@
+from typing import Annotated
+
+from fastapi import Header, HTTPException, status
+
+from app.core.config import settings
+
+
+def etag_for(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(value: str | None) -> int | None:
+    if value is None or value.strip() == "*":
+        return None
+
+    tag = value.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+
+    try:
+        return int(tag)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match must be an ETag previously returned by this API",
+        ) from exc
+
+
+async def if_match_version(
+    if_match: Annotated[str | None, Header()] = None,
+) -> int | None:
+    if if_match is None and settings.REQUIRE_IF_MATCH:
+        raise HTTPException(
+            status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+            detail="If-Match header is required for this update",
+        )
+    return parse_if_match(if_match)
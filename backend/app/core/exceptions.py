@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from typing import Any
 
 from fastapi import Request, status
@@ -55,31 +56,82 @@ class BusinessLogicError(Exception):
         super().__init__(self.message)
 
 
+@dataclass(frozen=True)
+class ConstraintViolation:
+    message: str
+    fields: tuple[str, ...]
+    status_code: int = status.HTTP_409_CONFLICT
+    error_code: str = "duplicate-resource"
+    title: str = "Resource Already Exists"
+
+
+# Keyed by the constraint/index name Postgres reports, so names here must match
+# the migrations. Foreign keys that handlers rely on instead of an existence
+# SELECT map to 404s.
+CONSTRAINT_VIOLATIONS: dict[str, ConstraintViolation] = {
+    "ix_users_email": ConstraintViolation("A user with this email already exists.", ("email",)),
+    "ix_roles_code": ConstraintViolation("A role with this code already exists.", ("code",)),
+    "ix_companies_pan": ConstraintViolation("A company with this PAN already exists.", ("pan",)),
+    "ix_company_gstins_gstin": ConstraintViolation("This GSTIN is already registered.", ("gstin",)),
+    "ix_service_types_code": ConstraintViolation("A service type with this code already exists.", ("code",)),
+    "ix_cost_centers_code": ConstraintViolation("A cost center with this code already exists.", ("code",)),
+    "uq_items_company_id_sku": ConstraintViolation("An item with this SKU already exists.", ("sku",)),
+    "uq_customers_company_id_code": ConstraintViolation("A customer with this code already exists.", ("code",)),
+    "uq_user_store_access_user_id_store_id": ConstraintViolation(
+        "User already has access to this store.", ("user_id", "store_id")
+    ),
+    "uq_company_cost_centers_company_id_cost_center_id": ConstraintViolation(
+        "Cost center already assigned to this company.", ("company_id", "cost_center_id")
+    ),
+    "ck_item_rates_effective_window": ConstraintViolation(
+        "effective_to must not be before effective_from.",
+        ("effective_from", "effective_to"),
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+        "invalid-effective-window",
+        "Invalid Effective Window",
+    ),
+    "user_store_access_user_id_fkey": ConstraintViolation(
+        "User not found.", ("user_id",), status.HTTP_404_NOT_FOUND, "not-found", "Not Found"
+    ),
+    "user_store_access_store_id_fkey": ConstraintViolation(
+        "Store not found.", ("store_id",), status.HTTP_404_NOT_FOUND, "not-found", "Not Found"
+    ),
+}
+
+_UNIQUE_VIOLATION = "23505"
+_FOREIGN_KEY_VIOLATION = "23503"
+
+
+def _constraint_details(exc: IntegrityError) -> tuple[str | None, str | None]:
+    """Return ``(constraint_name, sqlstate)`` from the driver error.
+
+    asyncpg exposes both on the exception the SQLAlchemy adapter wraps;
+    psycopg exposes them on ``diag``/``pgcode``.
+    """
+    orig = getattr(exc, "orig", None)
+    constraint_name: str | None = None
+    sqlstate: str | None = None
+    for source in (orig, getattr(orig, "__cause__", None), getattr(orig, "diag", None)):
+        if source is None:
+            continue
+        constraint_name = constraint_name or getattr(source, "constraint_name", None)
+        sqlstate = sqlstate or getattr(source, "sqlstate", None) or getattr(source, "pgcode", None)
+    return constraint_name, sqlstate
+
+
 async def integrity_error_handler(request: Request, exc: IntegrityError) -> JSONResponse:
-    detail = str(exc.orig) if hasattr(exc, "orig") else str(exc)
-
-    field_name = None
-    field_value = None
-
-    if "duplicate key value violates unique constraint" in detail:
-        if 'Key (' in detail:
-            try:
-                key_part = detail.split('Key (')[1].split(')')[0]
-                value_part = detail.split('=(')[1].split(')')[0]
-                field_name = key_part
-                field_value = value_part
-            except (IndexError, AttributeError):
-                pass
-
-        if field_name:
-            user_message = f"A record with {field_name} '{field_value}' already exists."
-            extra = {"field": field_name, "value": field_value}
+    constraint_name, sqlstate = _constraint_details(exc)
+    violation = CONSTRAINT_VIOLATIONS.get(constraint_name or "")
+
+    if violation is None:
+        if sqlstate == _UNIQUE_VIOLATION:
+            message = "A record with this value already exists."
+        elif sqlstate == _FOREIGN_KEY_VIOLATION:
+            message = "A referenced record does not exist."
         else:
-            user_message = "A record with this value already exists."
-            extra = {}
-    else:
-        user_message = "Database integrity constraint violation."
-        extra = {}
+            message = "Database integrity constraint violation."
+        violation = ConstraintViolation(message, (), error_code="integrity-constraint",
+                                        title="Integrity Constraint Violation")
 
     logger.warning(
         f"Integrity constraint violation on {request.url.path}",
@@ -87,22 +139,26 @@ async def integrity_error_handler(request: Request, exc: IntegrityError) -> JSON
             "request_id": request.headers.get("X-Request-ID"),
             "method": request.method,
             "path": request.url.path,
-            "constraint_type": "unique" if "duplicate key" in detail else "unknown",
-            "field": field_name,
+            "constraint": constraint_name,
+            "sqlstate": sqlstate,
         },
     )
 
+    extra: dict[str, Any] = {"fields": list(violation.fields)}
+    if constraint_name:
+        extra["constraint"] = constraint_name
+
     error_response = ErrorResponse(
-        type_="https://api.tsv-rsm.com/errors/integrity-constraint",
-        title="Integrity Constraint Violation",
-        status_code=status.HTTP_409_CONFLICT,
-        detail=user_message,
+        type_=f"https://api.tsv-rsm.com/errors/{violation.error_code}",
+        title=violation.title,
+        status_code=violation.status_code,
+        detail=violation.message,
         instance=str(request.url),
         extra=extra,
     )
 
     return JSONResponse(
-        status_code=status.HTTP_409_CONFLICT,
+        status_code=violation.status_code,
         content=error_response.to_dict(),
     )
 
@@ -0,0 +1,335 @@
+import base64
+import hashlib
+import json
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.exceptions import ErrorResponse
+from app.core.logging import get_logger
+from app.core.redis import get_async_redis
+from app.core.security import decode_token
+
+logger = get_logger(__name__)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+IDEMPOTENT_METHODS = frozenset({"POST", "PUT", "PATCH"})
+MAX_KEY_LENGTH = 255
+MAX_STORED_BODY_BYTES = 1024 * 1024
+MAX_BUFFERED_BODY_BYTES = 1024 * 1024
+
+_STATE_PROCESSING = "processing"
+_STATE_COMPLETED = "completed"
+
+
+def _request_digest(method: str, path: str, query_string: bytes) -> "hashlib._Hash":
+    digest = hashlib.sha256()
+    digest.update(method.encode())
+    digest.update(b"\0")
+    digest.update(path.encode())
+    digest.update(b"\0")
+    digest.update(query_string)
+    digest.update(b"\0")
+    return digest
+
+
+def _fingerprint(method: str, path: str, query_string: bytes, body: bytes) -> str:
+    digest = _request_digest(method, path, query_string)
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _principal(headers: Headers) -> str:
+    """Who the key belongs to: the token's subject, so a retry after a token refresh still replays."""
+    authorization = headers.get("authorization")
+    if not authorization:
+        return "anonymous"
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            subject = decode_token(token).get("sub")
+        except ValueError:
+            subject = None
+        if subject is not None:
+            return f"user:{subject}"
+    return hashlib.sha256(authorization.encode()).hexdigest()[:32]
+
+
+def _buffers_body(headers: Headers) -> bool:
+    """Small JSON bodies are read up front; uploads and other bodies are hashed as the handler streams them."""
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    declared = headers.get("content-length")
+    is_json = content_type == "application/json" or content_type.endswith("+json")
+    return is_json and declared is not None and declared.isdigit() and int(declared) <= MAX_BUFFERED_BODY_BYTES
+
+
+def _redis_key(principal: str, idempotency_key: str) -> str:
+    return f"idempotency:{principal}:{idempotency_key}"
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks: list[bytes] = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+class _BodyHasher:
+    """A ``receive`` that hashes the request body as the application reads it, without keeping it."""
+
+    def __init__(self, digest: "hashlib._Hash", receive: Receive) -> None:
+        self.digest = digest
+        self.receive = receive
+        self.complete = False
+
+    async def __call__(self) -> Message:
+        message = await self.receive()
+        if message["type"] == "http.request":
+            self.digest.update(message.get("body", b""))
+            if not message.get("more_body", False):
+                self.complete = True
+        return message
+
+    def fingerprint(self) -> str | None:
+        """The request fingerprint, once the whole body has been read."""
+        return self.digest.hexdigest() if self.complete else None
+
+    async def drain(self) -> str:
+        while not self.complete:
+            if (await self())["type"] != "http.request":
+                break
+        return self.digest.hexdigest()
+
+
+def _problem(scope: Scope, status_code: int, error: str, title: str, detail: str, **headers: str) -> JSONResponse:
+    headers_obj = Headers(scope=scope)
+    host = headers_obj.get("host", "")
+    instance = f"{scope.get('scheme', 'http')}://{host}{scope.get('path', '')}"
+    error_response = ErrorResponse(
+        type_=f"https://api.tsv-rsm.com/errors/{error}",
+        title=title,
+        status_code=status_code,
+        detail=detail,
+        instance=instance,
+    )
+    return JSONResponse(status_code=status_code, content=error_response.to_dict(), headers=headers or None)
+
+
+class IdempotencyMiddleware:
+    """Replays stored responses for repeated ``Idempotency-Key`` requests.
+
+    The first request for a key takes a short ``SET NX`` lock in Redis, runs the
+    handler and stores its status, headers and body under the same key. Retries
+    with the same key and payload are answered from Redis with a single GET;
+    concurrent duplicates get a 409 while the original is still in flight.
+    Responses with a 5xx status are not stored so the client can retry.
+
+    Only small JSON bodies are read before the handler runs. Uploads are
+    passed through as they stream and hashed on the way, so a keyed 25 MB
+    import is never held in memory; a retry of one is hashed the same way
+    before its stored response is replayed.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        ttl_seconds: int | None = None,
+        lock_ttl_seconds: int | None = None,
+    ) -> None:
+        self.app = app
+        self.ttl_seconds = ttl_seconds or settings.IDEMPOTENCY_TTL_SECONDS
+        self.lock_ttl_seconds = lock_ttl_seconds or settings.IDEMPOTENCY_LOCK_TTL_SECONDS
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            response = _problem(
+                scope,
+                status.HTTP_400_BAD_REQUEST,
+                "invalid-idempotency-key",
+                "Invalid Idempotency Key",
+                f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters.",
+            )
+            await response(scope, receive, send)
+            return
+
+        method, path, query_string = scope["method"], scope["path"], scope.get("query_string", b"")
+        fingerprint: str | None = None
+        hasher: _BodyHasher | None = None
+        app_receive: Receive
+        if _buffers_body(headers):
+            body = await _read_body(receive)
+            app_receive = self._replay_receive(body, receive)
+            fingerprint = _fingerprint(method, path, query_string, body)
+        else:
+            # The lock is taken before the body is read; the fingerprint is
+            # stored with the response once the handler has consumed it.
+            hasher = _BodyHasher(_request_digest(method, path, query_string), receive)
+            app_receive = hasher
+        redis_key = _redis_key(_principal(headers), idempotency_key)
+
+        async def request_fingerprint() -> str:
+            if fingerprint is not None:
+                return fingerprint
+            assert hasher is not None
+            return await hasher.drain()
+
+        try:
+            redis_client = get_async_redis()
+            cached = await redis_client.get(redis_key)
+            acquired = False
+            if cached is None:
+                lock_record = json.dumps({"state": _STATE_PROCESSING, "fingerprint": fingerprint})
+                acquired = bool(
+                    await redis_client.set(redis_key, lock_record, nx=True, ex=self.lock_ttl_seconds)
+                )
+                if not acquired:
+                    cached = await redis_client.get(redis_key)
+        except Exception as e:
+            logger.warning(f"Idempotency store unavailable, processing request without it: {e}")
+            await self.app(scope, app_receive, send)
+            return
+
+        if not acquired:
+            await self._answer_duplicate(scope, app_receive, send, cached, request_fingerprint)
+            return
+
+        await self._execute_and_store(scope, app_receive, send, redis_key, fingerprint, hasher)
+
+    @staticmethod
+    def _replay_receive(body: bytes, receive: Receive) -> Receive:
+        body_sent = False
+
+        async def replay() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return replay
+
+    async def _answer_duplicate(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        cached: str | None,
+        request_fingerprint: Callable[[], Awaitable[str]],
+    ) -> None:
+        record: dict[str, Any] = json.loads(cached) if cached else {"state": _STATE_PROCESSING}
+
+        # A streamed original still in flight has no fingerprint yet, so the
+        # duplicate gets its 409 without its body being read.
+        expected = record.get("fingerprint")
+        if expected is not None and expected != await request_fingerprint():
+            response = _problem(
+                scope,
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                "idempotency-key-reused",
+                "Idempotency Key Reused",
+                "This Idempotency-Key was already used with a different request payload.",
+            )
+            await response(scope, receive, send)
+            return
+
+        if record["state"] != _STATE_COMPLETED:
+            response = _problem(
+                scope,
+                status.HTTP_409_CONFLICT,
+                "idempotency-request-in-progress",
+                "Request In Progress",
+                "A request with this Idempotency-Key is still being processed.",
+                **{"Retry-After": str(self.lock_ttl_seconds)},
+            )
+            await response(scope, receive, send)
+            return
+
+        response_headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in record["headers"]]
+        response_headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": record["status"], "headers": response_headers})
+        await send({"type": "http.response.body", "body": base64.b64decode(record["body"])})
+
+    async def _execute_and_store(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        redis_key: str,
+        fingerprint: str | None,
+        hasher: _BodyHasher | None,
+    ) -> None:
+        response_status = 0
+        response_headers: list[tuple[str, str]] = []
+        body_chunks: list[bytes] = []
+        body_size = 0
+        storable = True
+
+        async def capture(message: Message) -> None:
+            nonlocal response_status, response_headers, body_size, storable
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+                response_headers = [
+                    (name.decode("latin-1"), value.decode("latin-1")) for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body" and storable:
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                if body_size > MAX_STORED_BODY_BYTES:
+                    storable = False
+                    body_chunks.clear()
+                else:
+                    body_chunks.append(chunk)
+            await send(message)
+
+        redis_client = get_async_redis()
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            await self._release(redis_key)
+            raise
+
+        if fingerprint is None and hasher is not None:
+            fingerprint = hasher.fingerprint()
+        # A handler that answered without reading the whole body leaves nothing to match retries against.
+        if not storable or fingerprint is None or response_status == 0 or response_status >= 500:
+            await self._release(redis_key)
+            return
+
+        record = {
+            "state": _STATE_COMPLETED,
+            "fingerprint": fingerprint,
+            "status": response_status,
+            "headers": response_headers,
+            "body": base64.b64encode(b"".join(body_chunks)).decode("ascii"),
+        }
+        try:
+            await redis_client.set(redis_key, json.dumps(record), ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Failed to store idempotent response: {e}")
+
+    @staticmethod
+    async def _release(redis_key: str) -> None:
+        try:
+            await get_async_redis().delete(redis_key)
+        except Exception as e:
+            logger.warning(f"Failed to release idempotency lock: {e}")
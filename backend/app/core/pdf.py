@@ -0,0 +1,131 @@
+"""Minimal streaming PDF writer.
+
+Only what printed business documents need: the standard Helvetica and
+Courier fonts, text, and ruled lines on A4 pages. ``PdfStreamWriter`` emits
+each page as soon as it is added and writes the page tree and cross-reference
+table at the end, so a document of any length is produced with memory bounded
+by a single page.
+"""
+import zlib
+from collections.abc import Iterable
+
+A4_WIDTH = 595.28
+A4_HEIGHT = 841.89
+
+# Font resource names used in content streams.
+FONTS = {
+    "F1": "Helvetica",
+    "F2": "Helvetica-Bold",
+    "F3": "Courier",
+}
+COURIER_ADVANCE = 0.6  # Courier glyphs are 600/1000 em wide
+
+_CATALOG = 1
+_PAGES = 2
+_FIRST_FONT = 3
+
+
+def pdf_string(text: str) -> bytes:
+    """Encode ``text`` as a PDF literal string (WinAnsi; unsupported characters become ``?``)."""
+    raw = text.encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+class Canvas:
+    """Accumulates drawing operators for one page's content stream."""
+
+    __slots__ = ("_ops",)
+
+    def __init__(self) -> None:
+        self._ops: list[bytes] = []
+
+    def raw(self, ops: bytes) -> None:
+        self._ops.append(ops)
+
+    def text(self, x: float, y: float, text: str, font: str = "F1", size: float = 9) -> None:
+        self._ops.append(b"BT /%s %.1f Tf %.2f %.2f Td %s Tj ET\n" % (font.encode(), size, x, y, pdf_string(text)))
+
+    def text_right(self, x: float, y: float, text: str, size: float = 9) -> None:
+        """Right-align ``text`` at ``x`` in Courier, whose fixed advance makes the width exact."""
+        self.text(x - len(text) * size * COURIER_ADVANCE, y, text, font="F3", size=size)
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, width: float = 0.5) -> None:
+        self._ops.append(b"%.2f w %.2f %.2f m %.2f %.2f l S\n" % (width, x1, y1, x2, y2))
+
+    def content(self) -> bytes:
+        return b"".join(self._ops)
+
+
+class PdfStreamWriter:
+    """Writes a PDF incrementally.
+
+    Call ``begin`` once, ``add_page`` for each page content stream, then
+    ``finish``; each returns the bytes to append to the output.
+    """
+
+    def __init__(self, compress: bool = True) -> None:
+        self.compress = compress
+        self._offsets: dict[int, int] = {}
+        self._position = 0
+        self._next_object = _FIRST_FONT + len(FONTS)
+        self._pages: list[int] = []
+
+    def _object(self, number: int, body: bytes) -> bytes:
+        chunk = b"%d 0 obj\n%s\nendobj\n" % (number, body)
+        self._offsets[number] = self._position
+        self._position += len(chunk)
+        return chunk
+
+    def _stream(self, number: int, data: bytes) -> bytes:
+        if self.compress:
+            data = zlib.compress(data, 6)
+            header = b"<< /Length %d /Filter /FlateDecode >>" % len(data)
+        else:
+            header = b"<< /Length %d >>" % len(data)
+        return self._object(number, header + b"\nstream\n" + data + b"\nendstream")
+
+    def begin(self) -> bytes:
+        header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        self._position = len(header)
+        fonts = [
+            self._object(
+                _FIRST_FONT + i, b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+                % base_font.encode()
+            )
+            for i, base_font in enumerate(FONTS.values())
+        ]
+        return header + b"".join(fonts)
+
+    def add_page(self, content: bytes) -> bytes:
+        content_number = self._next_object
+        page_number = content_number + 1
+        self._next_object += 2
+        self._pages.append(page_number)
+        fonts = b" ".join(b"/%s %d 0 R" % (name.encode(), _FIRST_FONT + i) for i, name in enumerate(FONTS))
+        return self._stream(content_number, content) + self._object(
+            page_number,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] /Resources << /Font << %s >> >> "
+            b"/Contents %d 0 R >>" % (_PAGES, A4_WIDTH, A4_HEIGHT, fonts, content_number),
+        )
+
+    def finish(self) -> bytes:
+        kids = b" ".join(b"%d 0 R" % number for number in self._pages)
+        tail = self._object(_PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._pages)))
+        tail += self._object(_CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % _PAGES)
+
+        xref_at = self._position
+        size = self._next_object
+        entries = [b"0000000000 65535 f \n"]
+        entries += [b"%010d 00000 n \n" % self._offsets[number] for number in range(1, size)]
+        tail += b"xref\n0 %d\n%s" % (size, b"".join(entries))
+        tail += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, _CATALOG, xref_at)
+        return tail
+
+
+def build_pdf(pages: Iterable[bytes], compress: bool = True) -> bytes:
+    """Assemble a complete PDF from page content streams."""
+    writer = PdfStreamWriter(compress)
+    chunks = [writer.begin()]
+    chunks.extend(writer.add_page(page) for page in pages)
+    chunks.append(writer.finish())
+    return b"".join(chunks)
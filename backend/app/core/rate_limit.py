@@ -0,0 +1,339 @@
+import math
+import time
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from dataclasses import dataclass
+from typing import Annotated, Any, Literal
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from redis.commands.core import AsyncScript
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.rbac import Principal, get_principal
+from app.core.redis import get_async_redis
+from app.core.security import decode_token
+
+logger = get_logger(__name__)
+
+Scope = Literal["ip", "user", "company"]
+
+# KEYS[1] bucket hash; ARGV: capacity, refill tokens per millisecond, cost.
+# Uses the Redis clock so API workers with skewed clocks share one bucket.
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+  tokens = capacity
+  ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry_after = math.ceil((cost - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, math.floor(tokens), retry_after, math.ceil((capacity - tokens) / rate)}
+"""
+
+# KEYS[1] slot counter; ARGV: max concurrent, safety TTL in seconds.
+_ACQUIRE_SLOT_LUA = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if current >= tonumber(ARGV[1]) then
+  return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+_RELEASE_SLOT_LUA = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if current > 0 then
+  return redis.call('DECR', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    name: str
+    limit: int
+    period_seconds: int
+    scope: Scope
+    burst: int | None = None
+
+    @property
+    def capacity(self) -> int:
+        return self.burst or self.limit
+
+    @property
+    def refill_per_ms(self) -> float:
+        return self.limit / (self.period_seconds * 1000)
+
+
+@dataclass(frozen=True)
+class ConcurrencyPolicy:
+    name: str
+    max_concurrent: int
+    scope: Scope
+    lease_seconds: int = 900
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after_seconds: float
+    reset_seconds: float
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(self.remaining, 0)),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_seconds)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(math.ceil(self.retry_after_seconds), 1))
+        return headers
+
+
+# SRS §9 route classes. Several policies on one class are all enforced.
+ROUTE_CLASS_POLICIES: dict[str, tuple[RateLimitPolicy, ...]] = {
+    "general": (
+        RateLimitPolicy("general_ip", limit=60, period_seconds=60, scope="ip", burst=120),
+        RateLimitPolicy("general_user", limit=600, period_seconds=300, scope="user"),
+    ),
+    "auth": (RateLimitPolicy("auth_ip", limit=5, period_seconds=60, scope="ip"),),
+    "heavy_report": (RateLimitPolicy("heavy_report_user", limit=3, period_seconds=60, scope="user"),),
+    "export": (RateLimitPolicy("export_company_daily", limit=200, period_seconds=86400, scope="company"),),
+    "upload": (RateLimitPolicy("upload_company", limit=5, period_seconds=3600, scope="company"),),
+    "webhook": (RateLimitPolicy("webhook_company", limit=10, period_seconds=1, scope="company"),),
+    "campaign": (RateLimitPolicy("campaign_company", limit=1, period_seconds=60, scope="company"),),
+    "provider_callback": (
+        RateLimitPolicy("provider_callback_ip", limit=200, period_seconds=1, scope="ip", burst=2000),
+    ),
+    "document_download": (RateLimitPolicy("document_download_ip", limit=60, period_seconds=60, scope="ip"),),
+}
+
+CONCURRENCY_POLICIES: dict[str, tuple[ConcurrencyPolicy, ...]] = {
+    "export": (
+        ConcurrencyPolicy("export_user", max_concurrent=2, scope="user"),
+        ConcurrencyPolicy("export_company", max_concurrent=10, scope="company"),
+    ),
+    # Document bodies run to 200 MB, so a slot may be held for a slow mobile upload.
+    "document_upload": (
+        ConcurrencyPolicy("document_upload_user", max_concurrent=2, scope="user", lease_seconds=3600),
+        ConcurrencyPolicy("document_upload_company", max_concurrent=10, scope="company", lease_seconds=3600),
+    ),
+}
+
+
+class RateLimiter:
+    """Redis token buckets with a process-local cache of recent denials.
+
+    Once a key is denied, further requests for it are rejected locally until
+    its retry time passes, so a client hammering the API costs no Redis round
+    trips while it is throttled. API limits fail open when Redis is down;
+    callers that must never exceed a limit pass ``fail_open=False``.
+    """
+
+    def __init__(self, local_cache_size: int = 10_000) -> None:
+        self.local_cache_size = local_cache_size
+        self._deny_until: OrderedDict[str, float] = OrderedDict()
+        self._bucket_script: AsyncScript | None = None
+        self._acquire_script: AsyncScript | None = None
+        self._release_script: AsyncScript | None = None
+
+    async def hit(self, policy: RateLimitPolicy, identity: str, fail_open: bool = True) -> RateLimitResult:
+        key = f"ratelimit:{policy.name}:{identity}"
+        now = time.monotonic()
+
+        deny_until = self._deny_until.get(key)
+        if deny_until is not None:
+            if deny_until > now:
+                wait = deny_until - now
+                return RateLimitResult(False, policy.capacity, 0, wait, wait)
+            del self._deny_until[key]
+
+        try:
+            allowed, remaining, retry_after_ms, reset_ms = await self._take(key, policy)
+        except Exception as e:
+            if not fail_open:
+                raise
+            logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+            return RateLimitResult(True, policy.capacity, policy.capacity, 0, 0)
+
+        result = RateLimitResult(
+            allowed=bool(allowed),
+            limit=policy.capacity,
+            remaining=int(remaining),
+            retry_after_seconds=int(retry_after_ms) / 1000,
+            reset_seconds=int(reset_ms) / 1000,
+        )
+        if not result.allowed:
+            self._remember_denial(key, now + result.retry_after_seconds)
+        return result
+
+    async def acquire_slot(self, policy: ConcurrencyPolicy, identity: str) -> str | None:
+        key = f"concurrency:{policy.name}:{identity}"
+        if self._acquire_script is None:
+            self._acquire_script = get_async_redis().register_script(_ACQUIRE_SLOT_LUA)
+        try:
+            acquired = await self._acquire_script(
+                keys=[key], args=[policy.max_concurrent, policy.lease_seconds], client=get_async_redis()
+            )
+        except Exception as e:
+            logger.warning(f"Concurrency limiter unavailable, allowing request: {e}")
+            return ""
+        return key if acquired else None
+
+    async def release_slot(self, key: str) -> None:
+        if not key:
+            return
+        if self._release_script is None:
+            self._release_script = get_async_redis().register_script(_RELEASE_SLOT_LUA)
+        try:
+            await self._release_script(keys=[key], client=get_async_redis())
+        except Exception as e:
+            logger.warning(f"Failed to release concurrency slot {key}: {e}")
+
+    async def _take(self, key: str, policy: RateLimitPolicy) -> list[int]:
+        if self._bucket_script is None:
+            self._bucket_script = get_async_redis().register_script(_TOKEN_BUCKET_LUA)
+        result: list[int] = await self._bucket_script(
+            keys=[key], args=[policy.capacity, policy.refill_per_ms, 1], client=get_async_redis()
+        )
+        return result
+
+    def _remember_denial(self, key: str, deny_until: float) -> None:
+        self._deny_until[key] = deny_until
+        self._deny_until.move_to_end(key)
+        while len(self._deny_until) > self.local_cache_size:
+            self._deny_until.popitem(last=False)
+
+
+rate_limiter = RateLimiter()
+
+
+def _token_claims(request: Request) -> dict[str, Any] | None:
+    if hasattr(request.state, "rate_limit_claims"):
+        claims: dict[str, Any] | None = request.state.rate_limit_claims
+        return claims
+
+    claims = None
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            claims = decode_token(token)
+        except ValueError:
+            claims = None
+    request.state.rate_limit_claims = claims
+    return claims
+
+
+def client_identity(request: Request, scope: Scope, principal: Principal | None = None) -> str:
+    """The bucket a request counts against.
+
+    Company buckets come from the resolved principal where the route has
+    one, since plain access tokens carry no company claim.
+    """
+    if scope == "company" and principal is not None:
+        if principal.company_id is not None:
+            return f"company:{principal.company_id}"
+        return f"user:{principal.user_id}"
+    if scope != "ip":
+        claims = _token_claims(request)
+        if scope == "company" and claims and claims.get("cid") is not None:
+            return f"company:{claims['cid']}"
+        if claims and claims.get("sub"):
+            return f"user:{claims['sub']}"
+    host = request.client.host if request.client else "unknown"
+    return f"ip:{host}"
+
+
+def rate_limit(route_class: str) -> Callable[..., Awaitable[None]]:
+    """A dependency enforcing the route class's policies.
+
+    Classes with a company-scoped policy resolve the caller's principal
+    (shared with the handler's own ``require_principal``), so they are only
+    for authenticated routes.
+    """
+    policies = ROUTE_CLASS_POLICIES[route_class]
+
+    async def check(request: Request, response: Response, principal: Principal | None) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+
+        tightest: RateLimitResult | None = None
+        for policy in policies:
+            result = await rate_limiter.hit(policy, client_identity(request, policy.scope, principal))
+            if not result.allowed:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=f"Rate limit exceeded for {route_class} requests",
+                    headers=result.headers(),
+                )
+            if tightest is None or result.remaining < tightest.remaining:
+                tightest = result
+
+        if tightest is not None:
+            response.headers.update(tightest.headers())
+
+    if any(policy.scope == "company" for policy in policies):
+
+        async def company_limiter(
+            request: Request, response: Response, principal: Annotated[Principal, Depends(get_principal)]
+        ) -> None:
+            await check(request, response, principal)
+
+        return company_limiter
+
+    async def limiter(request: Request, response: Response) -> None:
+        await check(request, response, None)
+
+    return limiter
+
+
+def concurrency_limit(route_class: str) -> Callable[..., AsyncGenerator[None, None]]:
+    """A dependency holding one slot per policy until the response, streamed or not, has been sent."""
+    policies = CONCURRENCY_POLICIES[route_class]
+
+    async def slot(
+        request: Request, principal: Annotated[Principal, Depends(get_principal)]
+    ) -> AsyncGenerator[None, None]:
+        if not settings.RATE_LIMIT_ENABLED:
+            yield
+            return
+
+        acquired: list[str] = []
+        try:
+            for policy in policies:
+                key = await rate_limiter.acquire_slot(policy, client_identity(request, policy.scope, principal))
+                if key is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                        detail=f"Too many concurrent {route_class} requests",
+                        headers={"Retry-After": "5"},
+                    )
+                acquired.append(key)
+            yield
+        finally:
+            for key in acquired:
+                await rate_limiter.release_slot(key)
+
+    return slot
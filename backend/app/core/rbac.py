@@ -1,41 +1,226 @@
-from collections.abc import Awaitable, Callable
-from typing import Annotated
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Annotated, Any
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_db, get_token_payload, token_user_id
+from app.core.authz_version import get_authz_version
+from app.core.config import settings
+from app.models.role import Role
 from app.models.user import User
 
+# Bit positions are assigned in this order. Append new codes and keys at the
+# end so masks stay comparable between processes and releases; names that are
+# not listed still work but get process-local bits.
+ROLE_CODES = (
+    "PLATFORM_ADMIN",
+    "COMPANY_ADMIN",
+    "AREA_MANAGER",
+    "STORE_MANAGER",
+    "STAFF",
+    "ACCOUNTANT",
+    "B2B_SALES",
+)
 
-def require_role(*required_roles: str) -> Callable[[Annotated[User, Depends(get_current_user)]], Awaitable[User]]:
-    async def role_checker(
-        current_user: Annotated[User, Depends(get_current_user)]
-    ) -> User:
-        user_role_codes = {user_role.role.code for user_role in current_user.roles}
+PERMISSION_KEYS = (
+    "system:manage",
+    "company:manage",
+    "company:view",
+    "company:edit",
+    "store:manage",
+    "store:view",
+    "store:edit",
+    "user:manage",
+    "role:manage",
+    "inventory:manage",
+    "inventory:view",
+    "order:manage",
+    "order:create",
+    "order:view",
+    "customer:manage",
+    "customer:view",
+    "customer:create",
+    "staff:manage",
+    "report:view",
+    "invoice:view",
+    "invoice:manage",
+    "payment:view",
+    "payment:manage",
+    "quote:manage",
+)
 
-        if not any(role in user_role_codes for role in required_roles):
+
+class BitIndex:
+    """Append-only mapping of names to single-bit integers."""
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        self._bits: dict[str, int] = {}
+        for name in names:
+            self.bit(name)
+
+    def bit(self, name: str) -> int:
+        bit = self._bits.get(name)
+        if bit is None:
+            bit = 1 << len(self._bits)
+            self._bits[name] = bit
+        return bit
+
+    def mask(self, names: Iterable[str]) -> int:
+        mask = 0
+        for name in names:
+            mask |= self.bit(name)
+        return mask
+
+    def names(self, mask: int) -> list[str]:
+        return [name for name, bit in self._bits.items() if mask & bit]
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    role_mask: int
+    permission_mask: int
+    company_id: int | None = None
+    store_ids: frozenset[int] = frozenset()
+
+    def has_any_role(self, role_mask: int) -> bool:
+        return bool(self.role_mask & role_mask)
+
+    def has_permission(self, permission_bit: int) -> bool:
+        return bool(self.permission_mask & permission_bit)
+
+    @property
+    def is_platform_admin(self) -> bool:
+        return bool(self.role_mask & PLATFORM_ADMIN)
+
+    def can_access_store(self, store_id: int) -> bool:
+        return bool(self.role_mask & COMPANY_WIDE_ROLES) or store_id in self.store_ids
+
+
+class PermissionRegistry:
+    """Compiles role permission JSON into bitmasks.
+
+    Each role's mask is computed once and reused until the role row's
+    ``updated_at`` changes, so authorising a request is a handful of integer
+    ORs and ANDs instead of walking every role's permissions dict.
+    """
+
+    def __init__(self) -> None:
+        self.roles = BitIndex(ROLE_CODES)
+        self.permissions = BitIndex(PERMISSION_KEYS)
+        self._compiled: dict[str, tuple[datetime, int]] = {}
+
+    def role_permissions(self, role: Role) -> int:
+        cached = self._compiled.get(role.code)
+        if cached is not None and cached[0] == role.updated_at:
+            return cached[1]
+
+        granted: dict[str, Any] = role.permissions or {}
+        mask = self.permissions.mask(key for key, value in granted.items() if value is True)
+        if role.updated_at is not None:
+            self._compiled[role.code] = (role.updated_at, mask)
+        return mask
+
+    def principal_for(self, user: User) -> Principal:
+        role_mask = 0
+        permission_mask = 0
+        for user_role in user.roles:
+            role_mask |= self.roles.bit(user_role.role.code)
+            permission_mask |= self.role_permissions(user_role.role)
+        return Principal(
+            user_id=user.id,
+            role_mask=role_mask,
+            permission_mask=permission_mask,
+            company_id=user.store_accesses[0].store.company_id if user.store_accesses else None,
+            store_ids=frozenset(access.store_id for access in user.store_accesses),
+        )
+
+    def access_claims(self, user: User, authz_version: int) -> dict[str, Any]:
+        """Authorization claims for a self-contained access token."""
+        principal = self.principal_for(user)
+        return {
+            "roles": self.roles.names(principal.role_mask),
+            "perm": principal.permission_mask,
+            "cid": principal.company_id,
+            "sids": sorted(principal.store_ids),
+            "authz_version": authz_version,
+        }
+
+    def principal_from_claims(self, user_id: int, claims: dict[str, Any]) -> Principal:
+        # Role bits are rebuilt from codes so a token stays valid even if this
+        # process assigned bits to uncatalogued role codes in another order.
+        return Principal(
+            user_id=user_id,
+            role_mask=self.roles.mask(claims.get("roles", [])),
+            permission_mask=int(claims.get("perm", 0)),
+            company_id=claims.get("cid"),
+            store_ids=frozenset(claims.get("sids", [])),
+        )
+
+
+permission_registry = PermissionRegistry()
+
+PLATFORM_ADMIN = permission_registry.roles.bit("PLATFORM_ADMIN")
+
+# Roles that work across every store of their company; everyone else is
+# limited to the stores they have been granted.
+COMPANY_WIDE_ROLES = permission_registry.roles.mask(("PLATFORM_ADMIN", "COMPANY_ADMIN", "AREA_MANAGER"))
+
+
+async def get_principal(
+    request: Request,
+    payload: Annotated[dict[str, Any], Depends(get_token_payload)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> Principal:
+    """Resolve the caller's roles, permissions and company scope.
+
+    Claims-rich access tokens are trusted while their ``authz_version`` still
+    matches the user's counter in Redis, which costs one GET and no database
+    work. Plain tokens, stale claims or an unreachable Redis fall back to
+    loading the user. FastAPI caches dependencies per request, so
+    ``require_principal`` and handlers that also depend on this share one result.
+    """
+    user_id = token_user_id(payload)
+    if (
+        settings.ACCESS_TOKEN_CLAIMS_ENABLED
+        and "authz_version" in payload
+        and await get_authz_version(user_id) == payload["authz_version"]
+    ):
+        return permission_registry.principal_from_claims(user_id, payload)
+
+    return permission_registry.principal_for(await get_current_user(request, payload, db))
+
+
+def require_principal(*required_roles: str) -> Callable[..., Awaitable[Principal]]:
+    required_mask = permission_registry.roles.mask(required_roles)
+    detail = f"Required role(s): {', '.join(required_roles)}"
+
+    async def principal_checker(principal: Annotated[Principal, Depends(get_principal)]) -> Principal:
+        if not principal.has_any_role(required_mask):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Required role(s): {', '.join(required_roles)}",
+                detail=detail,
             )
 
-        return current_user
+        return principal
 
-    return role_checker
+    return principal_checker
 
 
-def require_permission(permission_key: str) -> Callable[[Annotated[User, Depends(get_current_user)]], Awaitable[User]]:
-    async def permission_checker(
-        current_user: Annotated[User, Depends(get_current_user)]
-    ) -> User:
-        for user_role in current_user.roles:
-            role_permissions = user_role.role.permissions or {}
-            if role_permissions.get(permission_key) is True:
-                return current_user
+def require_permission(permission_key: str) -> Callable[..., Awaitable[Principal]]:
+    permission_bit = permission_registry.permissions.bit(permission_key)
+    detail = f"Required permission: {permission_key}"
 
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"Required permission: {permission_key}",
-        )
+    async def permission_checker(principal: Annotated[Principal, Depends(get_principal)]) -> Principal:
+        if not principal.has_permission(permission_bit):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=detail,
+            )
+
+        return principal
 
     return permission_checker
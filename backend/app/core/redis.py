@@ -0,0 +1,19 @@
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+_async_redis: Redis | None = None
+
+
+def get_async_redis() -> Redis:
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _async_redis
+
+
+async def close_async_redis() -> None:
+    global _async_redis
+    if _async_redis is not None:
+        await _async_redis.aclose()
+        _async_redis = None
@@ -0,0 +1,215 @@
+"""Shared cache for expensive read-only results such as dashboards.
+
+Entries live in a small process-local L1 in front of Redis (L2), so every
+worker reuses a result any other worker computed. Each entry is tagged with
+the tenant's data version from a ``VersionCounter``; writers bump it after
+committing. An entry is fresh while its version is current and it is younger
+than ``ttl_seconds``. Past that, for up to ``stale_seconds`` more, the old
+result is served while one background task recomputes it. Concurrent misses
+for the same key share a single computation in the process, and a short
+``SET NX`` lock in Redis keeps other workers waiting for that result instead of
+running the same aggregate themselves.
+"""
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Collection, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.logging import get_logger
+from app.core.redis import get_async_redis
+from app.core.version_counter import VersionCounter
+
+logger = get_logger(__name__)
+
+Compute = Callable[[], Awaitable[dict[str, Any]]]
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    version: int | None
+    computed_at: float
+    value: dict[str, Any]
+
+    def age(self) -> float:
+        return time.time() - self.computed_at
+
+    def dumps(self) -> str:
+        return json.dumps({"version": self.version, "computed_at": self.computed_at, "value": self.value})
+
+    @classmethod
+    def loads(cls, raw: str) -> "CachedResult":
+        data = json.loads(raw)
+        return cls(data["version"], data["computed_at"], data["value"])
+
+
+def result_key(
+    role_scope: str, store_ids: Collection[int] | None, params: Mapping[str, Any]
+) -> str:
+    """Digest of everything besides the company that decides a result.
+
+    ``store_ids`` of None means every store in the company.
+    """
+    material = {
+        "scope": role_scope,
+        "stores": None if store_ids is None else sorted(store_ids),
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResultCache:
+    """Versioned, stale-while-revalidate result cache with single-flight refreshes.
+
+    Results must be JSON-serialisable dicts. When Redis is unreachable the
+    version cannot be checked, so an L1 entry is reused only while it is
+    younger than ``ttl_seconds``; otherwise the result is computed inline.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        versions: VersionCounter,
+        ttl_seconds: float,
+        stale_seconds: float,
+        max_local_entries: int = 1024,
+        lock_seconds: float = 30.0,
+        wait_seconds: float = 5.0,
+        poll_seconds: float = 0.05,
+    ) -> None:
+        self.namespace = namespace
+        self.versions = versions
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_local_entries = max_local_entries
+        self.lock_seconds = lock_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_seconds = poll_seconds
+        self._local: OrderedDict[str, CachedResult] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task[CachedResult]] = {}
+
+    def key(self, company_id: int, digest: str) -> str:
+        return f"{self.namespace}:{company_id}:{digest}"
+
+    async def get_or_compute(self, company_id: int, digest: str, compute: Compute) -> dict[str, Any]:
+        """Return the cached result for ``digest``, computing it with ``compute`` when needed.
+
+        ``compute`` may run after the request that supplied it has finished,
+        so it must open its own database session.
+        """
+        key = self.key(company_id, digest)
+        version = await self.versions.get(company_id)
+        entry = self._local.get(key)
+        if entry is not None and self._is_fresh(entry, version):
+            self._local.move_to_end(key)
+            return entry.value
+
+        if version is not None:
+            shared = await self._read_shared(key)
+            if shared is not None and (entry is None or shared.computed_at > entry.computed_at):
+                entry = shared
+                self._remember(key, entry)
+            if entry is not None and self._is_fresh(entry, version):
+                return entry.value
+            if entry is not None and entry.age() < self.ttl_seconds + self.stale_seconds:
+                # Stale, or computed before the latest write: serve it while
+                # one task brings it up to date for the next reader.
+                self._refresh(key, version, compute)
+                return entry.value
+
+        return (await asyncio.shield(self._refresh(key, version, compute))).value
+
+    def _is_fresh(self, entry: CachedResult, version: int | None) -> bool:
+        if version is not None and entry.version != version:
+            return False
+        return entry.age() < self.ttl_seconds
+
+    def _refresh(self, key: str, version: int | None, compute: Compute) -> "asyncio.Task[CachedResult]":
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute(key, version, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._settle(key, done))
+        return task
+
+    def _settle(self, key: str, task: "asyncio.Task[CachedResult]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Awaiting callers see the exception; this covers background refreshes.
+            logger.warning(f"Refreshing {key} failed: {task.exception()!r}")
+
+    async def _compute(self, key: str, version: int | None, compute: Compute) -> CachedResult:
+        if version is None:
+            entry = CachedResult(None, time.time(), await compute())
+            self._remember(key, entry)
+            return entry
+
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        try:
+            locked = bool(
+                await get_async_redis().set(lock_key, token, nx=True, px=int(self.lock_seconds * 1000))
+            )
+        except Exception as e:
+            logger.warning(f"Result cache lock unavailable for {key}: {e}")
+            locked = True
+        if not locked:
+            waited = await self._wait_for_shared(key, version)
+            if waited is not None:
+                self._remember(key, waited)
+                return waited
+
+        try:
+            entry = CachedResult(version, time.time(), await compute())
+            self._remember(key, entry)
+            try:
+                await get_async_redis().set(
+                    key, entry.dumps(), ex=max(1, int(self.ttl_seconds + self.stale_seconds))
+                )
+            except Exception as e:
+                logger.warning(f"Failed to share cached result {key}: {e}")
+            return entry
+        finally:
+            if locked:
+                await self._release(lock_key, token)
+
+    async def _wait_for_shared(self, key: str, version: int) -> CachedResult | None:
+        """Poll L2 while another worker computes ``key``; None if it does not finish in time."""
+        deadline = time.monotonic() + self.wait_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_seconds)
+            entry = await self._read_shared(key)
+            if entry is not None and entry.version == version and entry.age() < self.ttl_seconds:
+                return entry
+        return None
+
+    async def _read_shared(self, key: str) -> CachedResult | None:
+        try:
+            raw = await get_async_redis().get(key)
+        except Exception as e:
+            logger.warning(f"Result cache unavailable for {key}: {e}")
+            return None
+        return CachedResult.loads(raw) if raw is not None else None
+
+    async def _release(self, lock_key: str, token: str) -> None:
+        try:
+            redis_client = get_async_redis()
+            if await redis_client.get(lock_key) == token:
+                await redis_client.delete(lock_key)
+        except Exception as e:
+            logger.warning(f"Failed to release {lock_key}: {e}")
+
+    def _remember(self, key: str, entry: CachedResult) -> None:
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local_entries:
+            self._local.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop the process-local entries; Redis copies expire on their own."""
+        self._local.clear()
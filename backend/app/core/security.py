@@ -1,4 +1,7 @@
+import hashlib
+import time
 import uuid
+from collections import OrderedDict
 from datetime import UTC, datetime, timedelta
 from typing import Any, cast
 
@@ -49,19 +52,91 @@ def create_refresh_token(data: dict[str, Any], expires_delta: timedelta | None =
     return encoded_jwt
 
 
+class DecodedTokenCache:
+    """Bounded LRU of verified JWT payloads keyed by a digest of the token.
+
+    Entries expire at the token's own ``exp``, so a cached payload is never
+    served for a token that would fail verification. The cache only saves
+    signature checks: revocation is still looked up per request, and
+    ``revoke_token`` also evicts the entry from this process.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._digests_by_jti: dict[str, bytes] = {}
+
+    def get(self, digest: bytes) -> dict[str, Any] | None:
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            self._remove(digest)
+            return None
+        self._entries.move_to_end(digest)
+        return payload
+
+    def put(self, digest: bytes, payload: dict[str, Any]) -> None:
+        exp = payload.get("exp")
+        if not isinstance(exp, int | float) or self.max_entries <= 0:
+            return
+        self._entries[digest] = (float(exp), payload)
+        self._entries.move_to_end(digest)
+        jti = payload.get("jti")
+        if isinstance(jti, str):
+            self._digests_by_jti[jti] = digest
+        while len(self._entries) > self.max_entries:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._forget_jti(evicted)
+
+    def evict_jti(self, jti: str) -> None:
+        digest = self._digests_by_jti.pop(jti, None)
+        if digest is not None:
+            self._entries.pop(digest, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._digests_by_jti.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, digest: bytes) -> None:
+        entry = self._entries.pop(digest, None)
+        if entry is not None:
+            self._forget_jti(entry[1])
+
+    def _forget_jti(self, payload: dict[str, Any]) -> None:
+        jti = payload.get("jti")
+        if isinstance(jti, str):
+            self._digests_by_jti.pop(jti, None)
+
+
+token_cache = DecodedTokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
+
 def decode_token(token: str) -> dict[str, Any]:
+    digest = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(digest)
+    if cached is not None:
+        return dict(cached)
+
     try:
         payload: dict[str, Any] = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError as e:
         raise ValueError("Invalid token") from e
 
+    token_cache.put(digest, payload)
+    return dict(payload)
+
 
 def get_redis_client() -> Redis:
     return Redis.from_url(settings.REDIS_URL, decode_responses=True)
 
 
 def revoke_token(jti: str, exp: int) -> None:
+    token_cache.evict_jti(jti)
     try:
         redis_client = get_redis_client()
         ttl = exp - int(datetime.now(UTC).timestamp())
@@ -0,0 +1,18 @@
+"""Server-Sent Events framing."""
+import json
+from typing import Any
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx from buffering the stream.
+    "X-Accel-Buffering": "no",
+}
+
+# A comment line; keeps proxies from closing an idle stream.
+SSE_KEEPALIVE = b": keep-alive\n\n"
+
+
+def sse_event(data: Any, event: str | None = None) -> bytes:
+    """Frame ``data`` as one event, JSON-encoded on a single ``data:`` line."""
+    frame = f"event: {event}\n" if event else ""
+    return f"{frame}data: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
@@ -0,0 +1,116 @@
+"""Content-addressed blob storage for documents.
+
+Objects are keyed by their SHA-256 under a caller-chosen namespace
+(``{namespace}/{sha[:2]}/{sha}``), so storing the same bytes twice keeps one
+copy: the upload is hashed while it streams in and dropped once its key turns
+out to exist already.
+
+``LocalStorage`` keeps objects on the local filesystem and stands in for an
+S3 bucket. Uploads go through ``save_stream`` to a scratch file and are
+renamed into place, so a reader never sees a partial object. Downloads are
+handed to nginx with ``X-Accel-Redirect`` when it fronts the storage
+directory (it sends the file with ``sendfile`` and answers Range requests
+itself); otherwise ``FileResponse`` serves them in chunks, with Range
+support, and lets servers that implement the ASGI path-send extension send
+the file without copying it through Python.
+"""
+import contextlib
+import os
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import quote
+
+from fastapi import Response
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.uploads import save_stream
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    key: str
+    size: int
+    sha256: str
+    # False when an object with the same content was already stored.
+    created: bool
+
+
+def object_key(namespace: str, sha256: str) -> str:
+    return f"{namespace}/{sha256[:2]}/{sha256}"
+
+
+class Storage(ABC):
+    @abstractmethod
+    async def put(self, namespace: str, chunks: AsyncIterator[bytes], max_bytes: int) -> StoredObject:
+        """Store a stream under its content key; raises ``upload_too_large`` past ``max_bytes``."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def download_response(self, key: str, *, filename: str, media_type: str) -> Response:
+        """A response sending the object as an attachment, honouring Range requests."""
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: str | Path, accel_redirect_prefix: str = "") -> None:
+        self.root = Path(root).resolve()
+        self.accel_redirect_prefix = accel_redirect_prefix.rstrip("/")
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root) or path == self.root:
+            raise ValueError(f"Invalid storage key {key!r}")
+        return path
+
+    async def put(self, namespace: str, chunks: AsyncIterator[bytes], max_bytes: int) -> StoredObject:
+        scratch = self.root / ".incoming" / uuid.uuid4().hex
+        saved = await save_stream(chunks, scratch, max_bytes)
+        key = object_key(namespace, saved.sha256)
+        try:
+            created = await run_in_threadpool(self._publish, scratch, self.path(key))
+        finally:
+            scratch.unlink(missing_ok=True)
+        return StoredObject(key, saved.size, saved.sha256, created)
+
+    @staticmethod
+    def _publish(scratch: Path, path: Path) -> bool:
+        if path.exists():
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Two uploads of the same bytes may race here; either rename leaves the same object.
+        os.replace(scratch, path)
+        return True
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self.path(key).is_file)
+
+    async def delete(self, key: str) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            await run_in_threadpool(self.path(key).unlink)
+
+    def download_response(self, key: str, *, filename: str, media_type: str) -> Response:
+        path = self.path(key)
+        if self.accel_redirect_prefix:
+            return Response(
+                media_type=media_type,
+                headers={
+                    "X-Accel-Redirect": f"{self.accel_redirect_prefix}/{quote(key)}",
+                    "Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}",
+                },
+            )
+        return FileResponse(path, media_type=media_type, filename=filename)
+
+
+@lru_cache
+def get_storage() -> Storage:
+    return LocalStorage(settings.DOCUMENT_STORAGE_DIR, settings.DOCUMENT_ACCEL_REDIRECT_PREFIX)
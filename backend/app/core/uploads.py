@@ -0,0 +1,53 @@
+"""Streaming request bodies to disk.
+
+Uploads are written chunk by chunk as they arrive, so a worker never holds
+more than one chunk of a file in memory, and an oversized upload is cut off
+as soon as it crosses the limit rather than after it has been read. The
+SHA-256 of the content is computed on the way through, so recognising a
+re-upload costs no second read.
+"""
+import contextlib
+import hashlib
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import aiofiles  # type: ignore[import-untyped]
+from fastapi import status
+
+from app.core.exceptions import BusinessLogicError
+
+
+def upload_too_large(max_bytes: int) -> BusinessLogicError:
+    return BusinessLogicError(
+        f"Uploads are limited to {max_bytes // (1024 * 1024)} MB",
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        error_code="upload-too-large",
+        extra={"max_bytes": max_bytes},
+    )
+
+
+@dataclass(frozen=True)
+class SavedUpload:
+    size: int
+    sha256: str
+
+
+async def save_stream(chunks: AsyncIterator[bytes], path: Path, max_bytes: int) -> SavedUpload:
+    """Write ``chunks`` to ``path``; the file is removed if the upload fails or is too large."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(path, "wb") as out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise upload_too_large(max_bytes)
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            path.unlink()
+        raise
+    return SavedUpload(size, digest.hexdigest())
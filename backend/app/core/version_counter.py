@@ -0,0 +1,74 @@
+import time
+
+from app.core.logging import get_logger
+from app.core.redis import get_async_redis
+
+logger = get_logger(__name__)
+
+
+def clock_floor() -> int:
+    """Where a missing counter restarts: the clock in microseconds.
+
+    Redis can evict or lose a counter. Restarting from the clock rather than
+    0 keeps the new value above every version a reader may still hold, so a
+    stale copy can never match it again.
+    """
+    return time.time_ns() // 1000
+
+
+class VersionCounter:
+    """Monotonic per-key counters in Redis used to invalidate process-local state.
+
+    Readers compare a version they captured earlier with ``get``; writers call
+    ``bump`` after committing. ``get`` returns None when Redis is unreachable
+    so callers can fall back to the source of truth instead of trusting a
+    possibly stale copy.
+    """
+
+    def __init__(self, namespace: str) -> None:
+        self.namespace = namespace
+
+    def key(self, scope: int | str) -> str:
+        return f"{self.namespace}:{scope}"
+
+    async def get(self, scope: int | str, missing: int | None = 0) -> int | None:
+        """The current version; ``missing`` is returned for a counter that does not exist."""
+        try:
+            value = await get_async_redis().get(self.key(scope))
+        except Exception as e:
+            logger.warning(f"Version store unavailable for {self.namespace}: {e}")
+            return None
+        return int(value) if value is not None else missing
+
+    async def ensure(self, scope: int | str, initial: int) -> int | None:
+        """The current version, starting a missing counter at ``initial``; None if Redis is unreachable."""
+        key = self.key(scope)
+        try:
+            async with get_async_redis().pipeline(transaction=False) as pipe:
+                pipe.set(key, initial, nx=True)
+                pipe.get(key)
+                _, value = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Version store unavailable for {self.namespace}: {e}")
+            return None
+        return int(value) if value is not None else None
+
+    async def bump(self, scope: int | str, initial: int = 0, strict: bool = False) -> None:
+        """Advance the version; a missing counter first starts at ``initial``.
+
+        Failures are logged, or raised with ``strict`` for callers that must
+        not go ahead without invalidating.
+        """
+        key = self.key(scope)
+        try:
+            if not initial:
+                await get_async_redis().incr(key)
+                return
+            async with get_async_redis().pipeline(transaction=True) as pipe:
+                pipe.set(key, initial, nx=True)
+                pipe.incr(key)
+                await pipe.execute()
+        except Exception as e:
+            if strict:
+                raise
+            logger.error(f"Failed to bump {key}: {e}")
@@ -0,0 +1,202 @@
+"""Minimal streaming XLSX writer and read-only reader.
+
+One worksheet of plain values: numbers are written as numbers and
+everything else as inline strings, so no shared-string table has to be held
+in memory. ``XlsxStreamWriter`` writes the fixed workbook parts up front and
+then appends rows to the deflated sheet entry as they arrive; the returned
+bytes can be sent as they are produced.
+
+``iter_xlsx_rows`` reads the first worksheet of a workbook row by row with
+``iterparse``, discarding each row once it has been yielded. Only the
+shared-string table is held in memory.
+"""
+import posixpath
+import re
+import zipfile
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any
+from xml.etree.ElementTree import Element, iterparse
+from xml.sax.saxutils import escape
+
+from app.core.zipstream import ZipSink
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml"'
+    ' ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml"'
+    ' ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    "</Types>"
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1"'
+    ' Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"'
+    ' Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1"'
+    ' Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"'
+    ' Target="worksheets/sheet1.xml"/>'
+    "</Relationships>"
+)
+_SHEET_START = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = b"</sheetData></worksheet>"
+
+# Characters XML 1.0 does not allow, even escaped.
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _workbook(sheet_name: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+        ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet_name[:31], {chr(34): "&quot;"})}" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    )
+
+
+def cell_xml(value: Any) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, int | float | Decimal):
+        return f"<c><v>{value}</v></c>"
+    text = value.isoformat() if isinstance(value, date | datetime) else str(value)
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_INVALID_XML.sub("", text))}</t></is></c>'
+
+
+class XlsxStreamWriter:
+    """Builds a single-sheet workbook incrementally; call ``begin``, ``add_rows`` as needed, then ``finish``."""
+
+    def __init__(self, sheet_name: str = "Sheet1") -> None:
+        self.sheet_name = sheet_name
+        self._sink = ZipSink()
+        self._archive = zipfile.ZipFile(self._sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+        self._sheet: Any = None
+
+    def begin(self) -> bytes:
+        self._archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        self._archive.writestr("_rels/.rels", _ROOT_RELS)
+        self._archive.writestr("xl/workbook.xml", _workbook(self.sheet_name))
+        self._archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        self._sheet = self._archive.open("xl/worksheets/sheet1.xml", mode="w", force_zip64=True)
+        self._sheet.write(_SHEET_START)
+        return self._sink.drain()
+
+    def add_rows(self, rows: Iterable[Sequence[Any]]) -> bytes:
+        self._sheet.write(
+            "".join("<row>" + "".join(cell_xml(value) for value in row) + "</row>" for row in rows).encode()
+        )
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._sheet.write(_SHEET_END)
+        self._sheet.close()
+        self._archive.close()
+        return self._sink.drain()
+
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_CELL_REF = re.compile(r"([A-Z]+)(\d+)")
+
+# A cell as read: text for strings and booleans, Decimal for numbers. Dates
+# are numbers (days since 1899-12-30) unless the file stored them as text.
+CellValue = str | Decimal | None
+
+
+def _first_sheet_path(archive: zipfile.ZipFile) -> str:
+    with archive.open("xl/workbook.xml") as workbook:
+        for _, element in iterparse(workbook):
+            if element.tag == f"{_MAIN_NS}sheet":
+                rel_id = element.get(f"{_REL_NS}id")
+                break
+        else:
+            raise ValueError("Workbook has no sheets")
+    with archive.open("xl/_rels/workbook.xml.rels") as rels:
+        for _, element in iterparse(rels):
+            if element.tag == f"{_PKG_REL_NS}Relationship" and element.get("Id") == rel_id:
+                target = element.get("Target", "")
+                return target.lstrip("/") if target.startswith("/") else posixpath.normpath(f"xl/{target}")
+    raise ValueError("Workbook sheet relationship is missing")
+
+
+def _shared_strings(archive: zipfile.ZipFile) -> list[str]:
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    strings: list[str] = []
+    with archive.open("xl/sharedStrings.xml") as part:
+        for _, element in iterparse(part):
+            if element.tag == f"{_MAIN_NS}si":
+                strings.append("".join(text.text or "" for text in element.iter(f"{_MAIN_NS}t")))
+                element.clear()
+    return strings
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def _cell_value(cell: Element, shared: list[str]) -> CellValue:
+    cell_type = cell.get("t", "n")
+    if cell_type == "inlineStr":
+        return "".join(text.text or "" for text in cell.iter(f"{_MAIN_NS}t"))
+    raw = cell.findtext(f"{_MAIN_NS}v")
+    if raw is None or cell_type == "e":
+        return None
+    if cell_type == "s":
+        return shared[int(raw)]
+    if cell_type in ("str", "b", "d"):
+        return raw
+    try:
+        return Decimal(raw)
+    except InvalidOperation:
+        return raw
+
+
+def iter_xlsx_rows(path: Path) -> Iterator[tuple[int, list[CellValue]]]:
+    """Yield ``(row number, cells)`` for each non-empty row of the first worksheet, 1-based like Excel."""
+    with zipfile.ZipFile(path) as archive:
+        shared = _shared_strings(archive)
+        with archive.open(_first_sheet_path(archive)) as sheet:
+            sheet_data: Element | None = None
+            row_no = 0
+            for event, element in iterparse(sheet, events=("start", "end")):
+                if event == "start":
+                    if element.tag == f"{_MAIN_NS}sheetData":
+                        sheet_data = element
+                    continue
+                if element.tag != f"{_MAIN_NS}row":
+                    continue
+                row_no = int(element.get("r") or row_no + 1)
+                cells: list[CellValue] = []
+                for cell in element.iter(f"{_MAIN_NS}c"):
+                    ref = _CELL_REF.match(cell.get("r", ""))
+                    column = _column_index(ref.group(1)) if ref else len(cells)
+                    cells.extend([None] * (column - len(cells)))
+                    cells.append(_cell_value(cell, shared))
+                # Drop the parsed row from the tree so memory stays flat.
+                if sheet_data is not None:
+                    sheet_data.clear()
+                if cells:
+                    yield row_no, cells
@@ -0,0 +1,24 @@
+class ZipSink:
+    """Write-only, unseekable file object for ``zipfile`` whose contents are drained as they are produced.
+
+    ``zipfile`` writes entries with data descriptors when it cannot seek, so
+    an archive can be streamed while it is being built.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes, /) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
@@ -0,0 +1,93 @@
+from collections.abc import Sequence
+from typing import Any, TypeVar, cast
+
+from fastapi import status
+from sqlalchemy import ColumnElement, Table, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql.base import ExecutableOption
+
+from app.core.exceptions import BusinessLogicError
+from app.db.base import Base
+
+ModelT = TypeVar("ModelT", bound=Base)
+
+
+def mark_loaded(instance: Base, **relationships: Any) -> None:
+    """Populate relationships we already know so serialization never lazy-loads."""
+    for name, value in relationships.items():
+        set_committed_value(instance, name, value)
+
+
+async def insert_returning(
+    db: AsyncSession,
+    model: type[ModelT],
+    values: dict[str, Any],
+    **known_relationships: Any,
+) -> ModelT:
+    """Insert one row with ``INSERT … RETURNING`` and return the mapped instance.
+
+    Server defaults (ids, timestamps) come back from RETURNING, and
+    ``known_relationships`` are attached without a follow-up query.
+    """
+    row = (await db.execute(insert(model).values(**values).returning(model))).scalar_one()
+    mark_loaded(row, **known_relationships)
+    return row
+
+
+async def insert_many_returning(
+    db: AsyncSession,
+    model: type[ModelT],
+    rows: Sequence[dict[str, Any]],
+) -> list[ModelT]:
+    """Insert ``rows`` as one multi-row ``INSERT … RETURNING``, returned in the order given."""
+    if not rows:
+        return []
+    result = await db.execute(insert(model).returning(model, sort_by_parameter_order=True), list(rows))
+    return list(result.scalars().all())
+
+
+async def insert_many(db: AsyncSession, model: type[Base], rows: Sequence[dict[str, Any]]) -> None:
+    """Insert ``rows`` as one multi-row ``INSERT`` without reading anything back."""
+    if rows:
+        await db.execute(insert(model), list(rows))
+
+
+async def update_returning(
+    db: AsyncSession,
+    model: type[ModelT],
+    where: Sequence[ColumnElement[bool]],
+    values: dict[str, Any],
+    expected_version: int | None = None,
+    options: Sequence[ExecutableOption] = (),
+) -> ModelT | None:
+    """Apply ``values`` in one ``UPDATE … RETURNING`` and bump ``version``.
+
+    Returns ``None`` when no row matches ``where``. When ``expected_version`` is
+    given and the row exists at a different version, raises a 412 instead.
+    """
+    version = cast(Table, model.__table__).c.version
+
+    stmt = update(model).where(*where)
+    if expected_version is not None:
+        stmt = stmt.where(version == expected_version)
+    stmt = (
+        stmt.values(**values, version=version + 1)
+        .returning(model)
+        .options(*options)
+        .execution_options(populate_existing=True)
+    )
+
+    row = (await db.execute(stmt)).scalar_one_or_none()
+
+    if row is None and expected_version is not None:
+        current_version = (await db.execute(select(version).where(*where))).scalar_one_or_none()
+        if current_version is not None:
+            raise BusinessLogicError(
+                message="Resource was modified by another request; reload it and retry",
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                error_code="precondition_failed",
+                extra={"current_version": current_version, "expected_version": expected_version},
+            )
+
+    return row
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from typing import Any
 
@@ -8,7 +9,28 @@ from pydantic import ValidationError
 from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 
-from app.api.routers import auth, companies, cost_centers, customers, items, service_types, stores, users
+from app.api.routers import (
+    auth,
+    closing,
+    companies,
+    cost_centers,
+    customers,
+    dashboard,
+    documents,
+    imports,
+    invoices,
+    items,
+    orders,
+    payments,
+    pricing,
+    recon,
+    reports,
+    service_types,
+    stores,
+    tasks,
+    users,
+    whatsapp,
+)
 from app.core.config import settings
 from app.core.exceptions import (
     BusinessLogicError,
@@ -17,8 +39,15 @@ from app.core.exceptions import (
     integrity_error_handler,
     validation_error_handler,
 )
+from app.core.idempotency import IdempotencyMiddleware
 from app.core.logging import get_logger, setup_logging
+from app.core.redis import close_async_redis
 from app.db.session import AsyncSessionLocal
+from app.services.imports import import_parse_pool
+from app.services.invoice_export import pdf_render_pool
+from app.services.whatsapp import close_providers
+from app.tasks.events import close_job_event_hub
+from app.tasks.worker import Worker
 
 setup_logging()
 logger = get_logger(__name__)
@@ -27,7 +56,18 @@ logger = get_logger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> Any:
     logger.info("Starting up TSV-RSM Backend")
+    # With the in-memory queue there are no worker processes, so jobs run here.
+    worker = Worker(concurrency=2) if settings.JOB_QUEUE_BACKEND == "memory" else None
+    worker_task = asyncio.create_task(worker.run()) if worker is not None else None
     yield
+    if worker is not None and worker_task is not None:
+        worker.stop()
+        await worker_task
+    pdf_render_pool.shutdown()
+    import_parse_pool.shutdown()
+    await close_providers()
+    await close_job_event_hub()
+    await close_async_redis()
     logger.info("Shutting down TSV-RSM Backend")
 
 
@@ -44,6 +84,7 @@ app.add_exception_handler(ValidationError, validation_error_handler)  # type: ig
 app.add_exception_handler(BusinessLogicError, business_logic_error_handler)  # type: ignore[arg-type]
 app.add_exception_handler(Exception, generic_exception_handler)
 
+app.add_middleware(IdempotencyMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -53,13 +94,27 @@ app.add_middleware(
 )
 
 app.include_router(auth.router, prefix=settings.API_V1_STR)
+app.include_router(closing.router, prefix=settings.API_V1_STR)
 app.include_router(companies.router, prefix=settings.API_V1_STR)
 app.include_router(cost_centers.router, prefix=settings.API_V1_STR)
 app.include_router(customers.router, prefix=settings.API_V1_STR)
+app.include_router(dashboard.router, prefix=settings.API_V1_STR)
+app.include_router(documents.router, prefix=settings.API_V1_STR)
+app.include_router(documents.download_router, prefix=settings.API_V1_STR)
+app.include_router(imports.router, prefix=settings.API_V1_STR)
+app.include_router(invoices.router, prefix=settings.API_V1_STR)
 app.include_router(items.router, prefix=settings.API_V1_STR)
+app.include_router(orders.router, prefix=settings.API_V1_STR)
+app.include_router(payments.router, prefix=settings.API_V1_STR)
+app.include_router(pricing.router, prefix=settings.API_V1_STR)
+app.include_router(recon.router, prefix=settings.API_V1_STR)
+app.include_router(reports.router, prefix=settings.API_V1_STR)
 app.include_router(service_types.router, prefix=settings.API_V1_STR)
 app.include_router(stores.router, prefix=settings.API_V1_STR)
+app.include_router(tasks.router, prefix=settings.API_V1_STR)
 app.include_router(users.router, prefix=settings.API_V1_STR)
+app.include_router(whatsapp.router, prefix=settings.API_V1_STR)
+app.include_router(whatsapp.callback_router, prefix=settings.API_V1_STR)
 
 
 @app.get("/health")
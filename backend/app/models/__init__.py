@@ -1,5 +1,7 @@
 """SQLAlchemy ORM models"""
 
+from app.models.bank_import_file import BankImportFile
+from app.models.bank_txn import BankTxn
 from app.models.company import Company
 from app.models.company_cost_center import CompanyCostCenter
 from app.models.company_gstin import CompanyGSTIN
@@ -7,15 +9,39 @@ from app.models.cost_center import CostCenter
 from app.models.customer import Customer
 from app.models.customer_address import CustomerAddress
 from app.models.customer_contact import CustomerContact
+from app.models.daily_store_close import DailyStoreClose
+from app.models.daily_store_kpi import DailyStoreKpi
+from app.models.document import Document
+from app.models.document_download_log import DocumentDownloadLog
+from app.models.franchise_import import FranchiseImport
+from app.models.franchise_sales_staging import FranchiseSalesStaging
+from app.models.import_mapping import ImportMapping
+from app.models.import_row_error import ImportRowError
+from app.models.invoice import Invoice
+from app.models.invoice_line import InvoiceLine
+from app.models.invoice_series import InvoiceSeries
 from app.models.item import Item
+from app.models.item_rate import ItemRate
+from app.models.kpi_delta import KpiDelta
+from app.models.message_log import MessageLog
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.order_series import OrderSeries
+from app.models.payment import Payment
+from app.models.recon_match import ReconMatch
+from app.models.recon_rule import ReconRule
 from app.models.role import Role
 from app.models.service_type import ServiceType
 from app.models.store import Store
+from app.models.store_day_snapshot import StoreDaySnapshot
 from app.models.user import User
 from app.models.user_role import UserRole
 from app.models.user_store_access import UserStoreAccess
+from app.models.whatsapp_template import WhatsAppTemplate
 
 __all__ = [
+    "BankImportFile",
+    "BankTxn",
     "Company",
     "CompanyCostCenter",
     "CompanyGSTIN",
@@ -23,11 +49,33 @@ __all__ = [
     "Customer",
     "CustomerAddress",
     "CustomerContact",
+    "DailyStoreClose",
+    "DailyStoreKpi",
+    "Document",
+    "DocumentDownloadLog",
+    "FranchiseImport",
+    "FranchiseSalesStaging",
+    "ImportMapping",
+    "ImportRowError",
+    "Invoice",
+    "InvoiceLine",
+    "InvoiceSeries",
     "Item",
+    "ItemRate",
+    "KpiDelta",
+    "MessageLog",
+    "Order",
+    "OrderItem",
+    "OrderSeries",
+    "Payment",
+    "ReconMatch",
+    "ReconRule",
     "Role",
     "ServiceType",
     "Store",
+    "StoreDaySnapshot",
     "User",
     "UserRole",
     "UserStoreAccess",
+    "WhatsAppTemplate",
 ]
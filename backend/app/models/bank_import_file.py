@@ -0,0 +1,49 @@
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy import JSON, BigInteger, Date, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class BankImportFile(Base):
+    """One uploaded bank statement; its lines are ``bank_txn`` rows.
+
+    ``mapping_json`` is a snapshot of the column mapping the file was parsed
+    with. Lines that could not be parsed are kept in ``import_row_error``.
+    ``rows_new`` counts the lines not already imported from an earlier,
+    overlapping statement; an upload with the same ``content_sha256`` as a
+    live import returns that import instead.
+    """
+
+    __tablename__ = "bank_import_file"
+    __table_args__ = (
+        Index("ix_bank_import_file_company_id_content_sha256", "company_id", "content_sha256"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    source_bank: Mapped[str] = mapped_column(String(50), nullable=False)
+    file_format: Mapped[str] = mapped_column(String(10), nullable=False, default="csv")
+    stored_path: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    content_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    mapping_json: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    statement_date_from: Mapped[date | None] = mapped_column(Date, nullable=True)
+    statement_date_to: Mapped[date | None] = mapped_column(Date, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="uploaded")
+    rows_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rows_failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rows_new: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_by: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
@@ -0,0 +1,44 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import JSON, BigInteger, Date, ForeignKey, Index, Integer, Numeric, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class BankTxn(Base):
+    """A statement line as imported; ``raw`` keeps the source columns for provenance.
+
+    ``row_hash`` fingerprints the parsed line and ``row_seq`` numbers
+    identical lines within one file, so overlapping statements import each
+    line once.
+    """
+
+    __tablename__ = "bank_txn"
+    __table_args__ = (
+        Index("uq_bank_txn_company_id_row_hash", "company_id", "row_hash", "row_seq", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+    import_file_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("bank_import_file.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    posted_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    value_date: Mapped[date] = mapped_column(Date, nullable=False)
+    amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    direction: Mapped[str] = mapped_column(String(10), nullable=False)
+    description: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    utr_ref: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    account_last4: Mapped[str | None] = mapped_column(String(4), nullable=True)
+    raw: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False, default=dict)
+    row_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    row_seq: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
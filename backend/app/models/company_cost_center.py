@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import BigInteger, Boolean, ForeignKey, func
+from sqlalchemy import BigInteger, Boolean, ForeignKey, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -15,6 +15,11 @@ class CompanyCostCenter(Base):
     """Company-specific cost center assignments."""
 
     __tablename__ = "company_cost_centers"
+    __table_args__ = (
+        UniqueConstraint(
+            "company_id", "cost_center_id", name="uq_company_cost_centers_company_id_cost_center_id"
+        ),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     company_id: Mapped[int] = mapped_column(
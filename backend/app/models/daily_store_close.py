@@ -0,0 +1,56 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, Date, ForeignKey, Index, Integer, Numeric, String, Text, Time, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class DailyStoreClose(Base):
+    """A committed end-of-day close for one store; while ``status`` is ``closed`` the day is locked."""
+
+    __tablename__ = "daily_store_close"
+    __table_args__ = (
+        UniqueConstraint("store_id", "close_date", name="uq_daily_store_close_store_id_close_date"),
+        Index("ix_daily_store_close_company_id_close_date", "company_id", "close_date"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+    store_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("stores.id", ondelete="CASCADE"), nullable=False
+    )
+    close_date: Mapped[date] = mapped_column(Date, nullable=False)
+    cutoff_time_local: Mapped[time] = mapped_column(Time, nullable=False)
+    cash_opening_float: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    cash_from_sales: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    cash_petty_expense: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    cash_deposit_bank: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    cash_closing_expected: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    cash_counted: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    variance: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    digital_receipts_total: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="closed")
+    # Version of the store_day_snapshots row the close was verified against.
+    snapshot_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    closed_by: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    closed_at: Mapped[datetime] = mapped_column(nullable=False, server_default=func.now())
+    reopened_by: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    reopened_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    reopen_reason: Mapped[str | None] = mapped_column(Text, nullable=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now(), onupdate=func.now()
+    )
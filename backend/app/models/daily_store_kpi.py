@@ -0,0 +1,37 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, Date, ForeignKey, Index, Integer, Numeric, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class DailyStoreKpi(Base):
+    """Per store-day totals, maintained incrementally from ``kpi_deltas`` (see ``app.services.kpi_rollup``)."""
+
+    __tablename__ = "daily_store_kpi"
+    __table_args__ = (
+        UniqueConstraint("store_id", "kpi_date", name="uq_daily_store_kpi_store_id_kpi_date"),
+        Index("ix_daily_store_kpi_company_id_kpi_date", "company_id", "kpi_date"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+    store_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("stores.id", ondelete="CASCADE"), nullable=False
+    )
+    kpi_date: Mapped[date] = mapped_column(Date, nullable=False)
+    orders: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    invoices: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    sales_gross: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=0, server_default="0")
+    sales_net: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=0, server_default="0")
+    receipts: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=0, server_default="0")
+    new_customers: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    expenses_total: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=0, server_default="0")
+
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, BigInteger, ForeignKey, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class Document(Base):
+    """A file attached to a company record: a GST certificate, QC photos, an expense bill.
+
+    ``entity_type`` and ``entity_id`` name the record it belongs to. The bytes
+    live in document storage under ``storage_key``, which is derived from
+    ``content_sha256``, so documents with the same content share one stored
+    object. Only users holding ``visibility_role_min`` or a more senior role
+    (and, for store documents, access to ``store_id``) may download it.
+    """
+
+    __tablename__ = "document"
+    __table_args__ = (
+        Index("ix_document_company_id_entity_type_entity_id", "company_id", "entity_type", "entity_id"),
+        Index("ix_document_company_id_content_sha256", "company_id", "content_sha256"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+    store_id: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("stores.id", ondelete="CASCADE"), nullable=True
+    )
+    entity_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    entity_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    mime_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    content_sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    storage_key: Mapped[str] = mapped_column(String(200), nullable=False)
+    tags: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
+    visibility_role_min: Mapped[str] = mapped_column(String(30), nullable=False, default="STAFF")
+    download_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    uploaded_by: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, ForeignKey, Index, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class DocumentDownloadLog(Base):
+    """One download of a document through a signed link, for the audit trail."""
+
+    __tablename__ = "document_download_log"
+    __table_args__ = (
+        Index("ix_document_download_log_document_id_downloaded_at", "document_id", "downloaded_at"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    document_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("document.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    ip: Mapped[str | None] = mapped_column(String(45), nullable=True)
+
+    downloaded_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
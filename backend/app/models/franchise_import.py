@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import JSON, BigInteger, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class FranchiseImport(Base):
+    """A franchisor's sales file (TumbleDry, UClean) for one store and period.
+
+    Parsed rows land in ``franchise_sales_staging``; rows that could not be
+    parsed are kept in ``import_row_error``. ``period`` is ``YYYY-MM``.
+
+    Imports are idempotent by store, source and period: a later file for the
+    same period replaces the earlier one's rows, touching only the rows that
+    changed (``rows_new`` added, ``rows_removed`` dropped).
+    """
+
+    __tablename__ = "franchise_import"
+    __table_args__ = (
+        Index("ix_franchise_import_company_id_source_period", "company_id", "source", "period"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+    store_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("stores.id", ondelete="CASCADE"), nullable=False
+    )
+    source: Mapped[str] = mapped_column(String(50), nullable=False)
+    period: Mapped[str] = mapped_column(String(7), nullable=False)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    file_format: Mapped[str] = mapped_column(String(10), nullable=False, default="csv")
+    stored_path: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    content_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    mapping_json: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="uploaded")
+    rows_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rows_failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rows_new: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rows_removed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_by: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
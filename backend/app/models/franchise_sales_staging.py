@@ -0,0 +1,54 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import JSON, BigInteger, Date, ForeignKey, Index, Integer, Numeric, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class FranchiseSalesStaging(Base):
+    """One parsed sales row of a franchise import, before it is reconciled with our own orders.
+
+    The current rows of a store's period are those with its ``source`` and
+    ``period``; ``import_id`` is the import that first brought the row in.
+    ``row_hash`` and ``row_seq`` identify a row across re-uploads.
+    """
+
+    __tablename__ = "franchise_sales_staging"
+    __table_args__ = (
+        Index(
+            "uq_franchise_sales_staging_period_row_hash",
+            "store_id", "source", "period", "row_hash", "row_seq",
+            unique=True,
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+    import_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("franchise_import.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    store_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("stores.id", ondelete="CASCADE"), nullable=False
+    )
+    source: Mapped[str] = mapped_column(String(50), nullable=False)
+    period: Mapped[str] = mapped_column(String(7), nullable=False)
+    row_no: Mapped[int] = mapped_column(Integer, nullable=False)
+    order_ref: Mapped[str] = mapped_column(String(64), nullable=False)
+    order_date: Mapped[date] = mapped_column(Date, nullable=False)
+    customer_name: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    customer_phone: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    service: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    quantity: Mapped[Decimal | None] = mapped_column(Numeric(12, 3), nullable=True)
+    amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    raw: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False, default=dict)
+    row_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    row_seq: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import JSON, BigInteger, ForeignKey, String, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ImportMapping(Base):
+    """How a company's files from one source map onto import fields.
+
+    ``kind`` is ``bank`` (``source`` is the bank) or ``franchise`` (``source``
+    is the franchisor, e.g. ``tumbledry``). See ``MappingSpec`` for the shape
+    of ``mapping_json``.
+    """
+
+    __tablename__ = "import_mapping"
+    __table_args__ = (
+        UniqueConstraint("company_id", "kind", "source", name="uq_import_mapping_company_id_kind_source"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    source: Mapped[str] = mapped_column(String(50), nullable=False)
+    mapping_json: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import JSON, BigInteger, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ImportRowError(Base):
+    """A source row an import could not parse, with the reason and the row as read.
+
+    ``import_kind`` is ``bank`` (``import_id`` is a ``bank_import_file``) or
+    ``franchise`` (a ``franchise_import``).
+    """
+
+    __tablename__ = "import_row_error"
+    __table_args__ = (
+        Index("ix_import_row_error_import_kind_import_id", "import_kind", "import_id", "row_no"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+    import_kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    import_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    row_no: Mapped[int] = mapped_column(Integer, nullable=False)
+    error: Mapped[str] = mapped_column(Text, nullable=False)
+    raw: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False, default=dict)
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+from sqlalchemy import BigInteger, Date, ForeignKey, Index, Integer, Numeric, String, UniqueConstraint, func, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.base import Base
+
+if TYPE_CHECKING:
+    from app.models.invoice_line import InvoiceLine
+
+
+class Invoice(Base):
+    """Customer invoice.
+
+    Drafts have no ``invoice_no``; the store's series number is allocated
+    when the invoice is posted. ``amount_paid`` is the running sum of the
+    invoice's payments; the partial index covers only invoices with a
+    balance, which is what the pending payments report scans.
+    """
+
+    __tablename__ = "invoices"
+    __table_args__ = (
+        UniqueConstraint("store_id", "invoice_no", name="uq_invoices_store_id_invoice_no"),
+        Index("ix_invoices_company_id_invoice_date", "company_id", "invoice_date"),
+        Index(
+            "ix_invoices_unpaid",
+            "company_id",
+            "invoice_date",
+            "id",
+            postgresql_where=text("status <> 'cancelled' AND amount_paid < grand_total"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+    store_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("stores.id", ondelete="RESTRICT"), nullable=False
+    )
+    customer_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("customers.id", ondelete="RESTRICT"), nullable=False, index=True
+    )
+    order_id: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("orders.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    invoice_no: Mapped[str | None] = mapped_column(String(30), nullable=True)
+    invoice_date: Mapped[date] = mapped_column(Date, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="draft")
+    subtotal: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    tax_total: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    discount_total: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    package_applied_total: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    grand_total: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    amount_paid: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0, server_default="0")
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    lines: Mapped[list[InvoiceLine]] = relationship(
+        "InvoiceLine", back_populates="invoice", cascade="all, delete-orphan", order_by="InvoiceLine.id"
+    )
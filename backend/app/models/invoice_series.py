@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, ForeignKey, String, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class InvoiceSeries(Base):
+    """Per-store, per-financial-year invoice counter.
+
+    ``next_number`` is the next unissued number. ``prefix`` is copied from
+    the store when the series is opened, so renaming a store's prefix takes
+    effect from the next financial year and never splits a running series.
+    """
+
+    __tablename__ = "invoice_series"
+    __table_args__ = (
+        UniqueConstraint("store_id", "financial_year", name="uq_invoice_series_store_id_financial_year"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    store_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("stores.id", ondelete="CASCADE"), nullable=False
+    )
+    financial_year: Mapped[str] = mapped_column(String(7), nullable=False)
+    prefix: Mapped[str] = mapped_column(String(10), nullable=False)
+    next_number: Mapped[int] = mapped_column(BigInteger, nullable=False, default=1, server_default="1")
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,38 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, Date, Index, Integer, Numeric, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class KpiDelta(Base):
+    """Outbox of changes to ``daily_store_kpi``.
+
+    Rows are appended in the same transaction as the business write and
+    folded into the rollup shortly after. There are deliberately no foreign
+    keys: the table only ever holds a few seconds' worth of rows, and the
+    inserts sit on hot write paths.
+    """
+
+    __tablename__ = "kpi_deltas"
+    __table_args__ = (
+        Index("ix_kpi_deltas_store_id_kpi_date", "store_id", "kpi_date"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    store_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    kpi_date: Mapped[date] = mapped_column(Date, nullable=False)
+    orders: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    invoices: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    sales_gross: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=0, server_default="0")
+    sales_net: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=0, server_default="0")
+    receipts: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=0, server_default="0")
+    new_customers: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    expenses_total: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=0, server_default="0")
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
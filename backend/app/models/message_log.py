@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, ForeignKey, Index, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class MessageLog(Base):
+    """One outbound WhatsApp message and what the provider made of it.
+
+    Rows are written after the send, in batches, so ``status`` starts at
+    ``sent`` or ``failed``; provider callbacks then move it on to
+    ``delivered`` or ``read`` (or ``failed``) and fill in the receipt times.
+    ``campaign_id`` is the broadcast job's id and ``order_id`` is set for
+    feedback messages.
+    """
+
+    __tablename__ = "message_log"
+    __table_args__ = (
+        Index("ix_message_log_company_id_created_at", "company_id", "created_at"),
+        Index("ix_message_log_campaign_id_customer_id", "campaign_id", "customer_id"),
+        Index("ix_message_log_order_id", "order_id"),
+        Index("uq_message_log_provider_msg_id", "provider", "provider_msg_id", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+    customer_id: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("customers.id", ondelete="SET NULL"), nullable=True
+    )
+    to_phone: Mapped[str] = mapped_column(String(20), nullable=False)
+    template_code: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    type: Mapped[str] = mapped_column(String(20), nullable=False)
+    body_rendered: Mapped[str] = mapped_column(Text, nullable=False)
+    order_id: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("orders.id", ondelete="SET NULL"), nullable=True
+    )
+    campaign_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    provider: Mapped[str] = mapped_column(String(50), nullable=False)
+    provider_msg_id: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    delivered_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    read_at: Mapped[datetime | None] = mapped_column(nullable=True)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import BigInteger, Date, ForeignKey, Index, Integer, String, Text, UniqueConstraint, func, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.base import Base
+
+if TYPE_CHECKING:
+    from app.models.order_item import OrderItem
+
+
+class Order(Base):
+    """Customer order; ``delivered_at`` is set once the garments are handed back."""
+
+    __tablename__ = "orders"
+    __table_args__ = (
+        UniqueConstraint("store_id", "order_no", name="uq_orders_store_id_order_no"),
+        Index("ix_orders_company_id_order_date", "company_id", "order_date"),
+        Index(
+            "ix_orders_undelivered",
+            "company_id",
+            "order_date",
+            "id",
+            postgresql_where=text("delivered_at IS NULL AND status <> 'cancelled'"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+    store_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("stores.id", ondelete="RESTRICT"), nullable=False
+    )
+    customer_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("customers.id", ondelete="RESTRICT"), nullable=False, index=True
+    )
+    order_no: Mapped[str] = mapped_column(String(30), nullable=False)
+    order_date: Mapped[date] = mapped_column(Date, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="received")
+    pickup_address_id: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("customer_addresses.id", ondelete="SET NULL"), nullable=True
+    )
+    delivery_address_id: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("customer_addresses.id", ondelete="SET NULL"), nullable=True
+    )
+    notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    delivered_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    items: Mapped[list[OrderItem]] = relationship(
+        "OrderItem", back_populates="order", cascade="all, delete-orphan", order_by="OrderItem.id"
+    )
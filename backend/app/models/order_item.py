@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+from sqlalchemy import BigInteger, ForeignKey, Numeric, Text, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.base import Base
+
+if TYPE_CHECKING:
+    from app.models.order import Order
+
+
+class OrderItem(Base):
+    """One order line.
+
+    ``unit_price`` and ``tax_rate`` are snapshots taken when the order is
+    created; later rate or item changes never touch them.
+    """
+
+    __tablename__ = "order_items"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    order_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    item_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("items.id", ondelete="RESTRICT"), nullable=False
+    )
+    service_type_id: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("service_types.id", ondelete="RESTRICT"), nullable=True
+    )
+    item_rate_id: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("item_rates.id", ondelete="SET NULL"), nullable=True
+    )
+    qty: Mapped[Decimal] = mapped_column(Numeric(12, 3), nullable=False)
+    unit_price: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    tax_rate: Mapped[Decimal] = mapped_column(Numeric(5, 2), nullable=False)
+    line_amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    remarks: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
+
+    order: Mapped[Order] = relationship("Order", back_populates="items")
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class OrderSeries(Base):
+    """Per-store order counter; ``next_number`` is the next unleased number.
+
+    Kept apart from ``stores`` so numbering never locks the store row.
+    """
+
+    __tablename__ = "order_series"
+
+    store_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("stores.id", ondelete="CASCADE"), primary_key=True
+    )
+    next_number: Mapped[int] = mapped_column(BigInteger, nullable=False, default=1, server_default="1")
+
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,46 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, ForeignKey, Index, Numeric, String, Text, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ReconMatch(Base):
+    """Links a statement line to the invoice or payment it settles.
+
+    A line has at most one live (not discarded) match; discarded matches are
+    kept for provenance.
+    """
+
+    __tablename__ = "recon_match"
+    __table_args__ = (
+        Index(
+            "uq_recon_match_live_bank_txn_id",
+            "bank_txn_id",
+            unique=True,
+            postgresql_where=text("status <> 'discarded'"),
+        ),
+        Index("ix_recon_match_entity", "company_id", "entity_type", "entity_id"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+    bank_txn_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("bank_txn.id", ondelete="CASCADE"), nullable=False
+    )
+    entity_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    entity_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    rule_id: Mapped[int | None] = mapped_column(
+        BigInteger, ForeignKey("recon_rule.id", ondelete="SET NULL"), nullable=True
+    )
+    confidence: Mapped[Decimal] = mapped_column(Numeric(4, 3), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="auto")
+    note: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Boolean, ForeignKey, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ReconRule(Base):
+    """A company's statement-matching rule; lower ``priority`` runs first.
+
+    The rule tests ``field`` of each statement line against ``pattern``. A
+    regex with a group (``ref`` if named) extracts a payment reference or
+    invoice number to look up; otherwise a hit narrows the amount and date
+    match to ``map_to`` entities.
+    """
+
+    __tablename__ = "recon_rule"
+    __table_args__ = (
+        Index("ix_recon_rule_company_id_priority", "company_id", "priority"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
+    )
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    match_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    pattern: Mapped[str] = mapped_column(String(500), nullable=False)
+    map_to: Mapped[str] = mapped_column(String(20), nullable=False)
+    field: Mapped[str] = mapped_column(String(20), nullable=False)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=100)
+    active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now(), onupdate=func.now()
+    )
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, time
 from typing import TYPE_CHECKING
 
-from sqlalchemy import BigInteger, Boolean, ForeignKey, String, func
+from sqlalchemy import BigInteger, Boolean, ForeignKey, Integer, String, Time, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -29,7 +29,12 @@ class Store(Base):
     is_franchise: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     status: Mapped[str] = mapped_column(String(20), nullable=False, default="active")
     timezone: Mapped[str] = mapped_column(String(50), nullable=False, default="Asia/Kolkata")
+    # Local time at which the business day ends (see app.services.store_calendar).
+    closing_cutoff: Mapped[time] = mapped_column(
+        Time, nullable=False, default=time(23, 59), server_default="23:59"
+    )
     invoice_series_prefix: Mapped[str] = mapped_column(String(10), nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
 
     created_at: Mapped[datetime] = mapped_column(
         nullable=False, server_default=func.now()
@@ -0,0 +1,66 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from pydantic import BaseModel, Field
+
+
+class ClosingPreviewResponse(BaseModel):
+    store_id: int
+    business_date: date
+    timezone: str
+    cutoff_time_local: time
+    cutoff_at: datetime = Field(..., description="When the business day ends (UTC)")
+    status: str = Field(..., description="open, closed or reopened")
+    close_id: int | None
+    cash_opening_float: Decimal
+    cash_from_sales: Decimal
+    cash_petty_expense: Decimal
+    cash_deposit_bank: Decimal
+    cash_closing_expected: Decimal
+    digital_receipts_total: Decimal
+    rider_settlements_due: Decimal
+    package_adjustments: Decimal
+    unposted_invoices: int
+    unposted_invoices_total: Decimal
+    version: int = Field(..., description="Send back as If-Match when committing this preview")
+
+    class Config:
+        from_attributes = True
+
+
+class ClosingCommitRequest(BaseModel):
+    store_id: int
+    close_date: date
+    cash_counted: Decimal = Field(..., ge=0, max_digits=14, decimal_places=2)
+    notes: str | None = Field(None, max_length=2000)
+
+
+class ClosingReopenRequest(BaseModel):
+    reason: str = Field(..., min_length=3, max_length=2000)
+
+
+class DailyStoreCloseResponse(BaseModel):
+    id: int
+    company_id: int
+    store_id: int
+    close_date: date
+    cutoff_time_local: time
+    cash_opening_float: Decimal
+    cash_from_sales: Decimal
+    cash_petty_expense: Decimal
+    cash_deposit_bank: Decimal
+    cash_closing_expected: Decimal
+    cash_counted: Decimal
+    variance: Decimal
+    digital_receipts_total: Decimal
+    notes: str | None
+    status: str
+    closed_by: int | None
+    closed_at: datetime
+    reopened_by: int | None
+    reopened_at: datetime | None
+    reopen_reason: str | None
+    version: int
+
+    class Config:
+        from_attributes = True
@@ -78,6 +78,7 @@ class CompanyResponse(BaseModel):
     contacts: CompanyContacts
     address: CompanyAddress
     status: str
+    version: int
     gstins: list[CompanyGSTINResponse]
     created_at: datetime
     updated_at: datetime
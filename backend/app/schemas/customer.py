@@ -93,6 +93,7 @@ class CustomerResponse(BaseModel):
     email: str | None
     notes: str | None
     status: str
+    version: int
     contacts: list[CustomerContactResponse]
     addresses: list[CustomerAddressResponse]
     created_at: datetime
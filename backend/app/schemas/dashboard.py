@@ -0,0 +1,25 @@
+from datetime import date
+from decimal import Decimal
+
+from pydantic import BaseModel
+
+
+class StoreKpiResponse(BaseModel):
+    store_id: int
+    kpi_date: date | None = None
+    orders: int
+    invoices: int
+    sales_gross: Decimal
+    sales_net: Decimal
+    receipts: Decimal
+    new_customers: int
+    expenses_total: Decimal
+
+    class Config:
+        from_attributes = True
+
+
+class DashboardKpisResponse(BaseModel):
+    date_from: date
+    date_to: date
+    stores: list[StoreKpiResponse]
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class DocumentResponse(BaseModel):
+    id: int
+    store_id: int | None
+    entity_type: str
+    entity_id: int
+    filename: str
+    mime_type: str
+    size_bytes: int
+    content_sha256: str
+    tags: list[str]
+    visibility_role_min: str
+    download_count: int
+    uploaded_by: int | None
+    created_at: datetime
+    duplicate: bool = False
+
+    class Config:
+        from_attributes = True
+
+
+class DocumentUrlResponse(BaseModel):
+    url: str
+    expires_at: datetime
+
+
+class DocumentDownloadLogResponse(BaseModel):
+    id: int
+    user_id: int | None
+    ip: str | None
+    downloaded_at: datetime
+
+    class Config:
+        from_attributes = True
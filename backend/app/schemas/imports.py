@@ -0,0 +1,82 @@
+from datetime import date, datetime
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class ImportMappingUpsert(BaseModel):
+    mapping_json: dict[str, Any] = Field(
+        ...,
+        description='Column mapping, e.g. {"header_row": 1, "columns": {"value_date": "Txn Date", "amount": "Amount"}}',
+    )
+
+
+class ImportMappingResponse(BaseModel):
+    id: int
+    kind: str
+    source: str
+    mapping_json: dict[str, Any]
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ImportAcceptedResponse(BaseModel):
+    import_id: int
+    import_url: str
+    job_id: str | None = Field(default=None, description="Absent when the file was already imported")
+    status: str
+    status_url: str | None = Field(default=None, description="Job status; absent when the file was already imported")
+    duplicate: bool = Field(default=False, description="The same file was imported before; this is that import")
+
+
+class BankImportResponse(BaseModel):
+    id: int
+    filename: str
+    source_bank: str
+    file_format: str
+    size_bytes: int
+    status: str
+    rows_total: int
+    rows_failed: int
+    rows_new: int = Field(..., description="Lines not already imported from an earlier statement")
+    content_sha256: str | None
+    error: str | None
+    statement_date_from: date | None
+    statement_date_to: date | None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class FranchiseImportResponse(BaseModel):
+    id: int
+    store_id: int
+    source: str
+    period: str
+    filename: str
+    file_format: str
+    size_bytes: int
+    status: str
+    rows_total: int
+    rows_failed: int
+    rows_new: int = Field(..., description="Rows added to the period (new or changed)")
+    rows_removed: int = Field(..., description="Earlier rows for the period this file dropped or changed")
+    content_sha256: str | None
+    error: str | None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ImportRowErrorResponse(BaseModel):
+    row_no: int
+    error: str
+    raw: dict[str, Any]
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,76 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class InvoicesFromOrdersRequest(BaseModel):
+    order_ids: list[int] = Field(..., min_length=1, max_length=1000)
+    invoice_date: date | None = None
+    discounts: dict[int, Decimal] = Field(
+        default_factory=dict, description="Invoice-level discount per order id, taken off the taxed total"
+    )
+
+
+class InvoiceLineResponse(BaseModel):
+    id: int
+    order_item_id: int | None
+    item_id: int
+    qty: Decimal
+    price: Decimal
+    tax_rate: Decimal
+    line_tax: Decimal
+    line_total: Decimal
+
+    class Config:
+        from_attributes = True
+
+
+class InvoiceSummaryResponse(BaseModel):
+    id: int
+    company_id: int
+    store_id: int
+    customer_id: int
+    order_id: int | None
+    invoice_no: str | None
+    invoice_date: date
+    status: str
+    subtotal: Decimal
+    tax_total: Decimal
+    discount_total: Decimal
+    package_applied_total: Decimal
+    grand_total: Decimal
+    version: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class InvoiceResponse(InvoiceSummaryResponse):
+    lines: list[InvoiceLineResponse]
+
+
+class InvoicesFromOrdersResponse(BaseModel):
+    invoices: list[InvoiceSummaryResponse]
+    skipped_order_ids: list[int] = Field(
+        ..., description="Orders that were not found, are out of scope, or are already invoiced or cancelled"
+    )
+
+
+class InvoicePostRequest(BaseModel):
+    invoice_ids: list[int] = Field(..., min_length=1, max_length=1000)
+
+
+class InvoicesPostedResponse(BaseModel):
+    invoices: list[InvoiceSummaryResponse]
+    skipped_invoice_ids: list[int] = Field(
+        ..., description="Invoices that were not found, are out of scope, or are not drafts"
+    )
+
+
+class InvoiceExportRequest(BaseModel):
+    invoice_ids: list[int] = Field(..., min_length=1, max_length=20000)
+    format: Literal["pdf", "zip"] = "zip"
@@ -33,6 +33,7 @@ class ItemResponse(BaseModel):
     uom: str
     tax_rate: Decimal
     status: str
+    version: int
     created_at: datetime
     updated_at: datetime
 
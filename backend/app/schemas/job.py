@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field
+
+
+class JobResponse(BaseModel):
+    id: str
+    name: str
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    priority: int
+    attempts: int
+    max_attempts: int
+    progress: float = Field(..., description="Percent complete, 0-100")
+    message: str | None
+    errors: int = Field(..., description="Items that failed so far in a job that carries on past them")
+    result: dict[str, Any] | None
+    result_url: str | None = Field(None, description="Download link once the job has produced a file")
+    error: str | None
+    cancel_requested: bool
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+
+class JobAcceptedResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
@@ -0,0 +1,57 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from pydantic import BaseModel, Field
+
+
+class OrderItemCreate(BaseModel):
+    item_id: int
+    service_type_id: int | None = None
+    qty: Decimal = Field(..., gt=0, max_digits=12, decimal_places=3)
+    remarks: str | None = None
+
+
+class OrderCreate(BaseModel):
+    store_id: int
+    customer_id: int
+    order_date: date | None = None
+    pickup_address_id: int | None = None
+    delivery_address_id: int | None = None
+    notes: str | None = None
+    items: list[OrderItemCreate] = Field(..., min_length=1, max_length=2000)
+
+
+class OrderItemResponse(BaseModel):
+    id: int
+    item_id: int
+    service_type_id: int | None
+    item_rate_id: int | None
+    qty: Decimal
+    unit_price: Decimal
+    tax_rate: Decimal
+    line_amount: Decimal
+    remarks: str | None
+
+    class Config:
+        from_attributes = True
+
+
+class OrderResponse(BaseModel):
+    id: int
+    company_id: int
+    store_id: int
+    customer_id: int
+    order_no: str
+    order_date: date
+    status: str
+    pickup_address_id: int | None
+    delivery_address_id: int | None
+    notes: str | None
+    delivered_at: datetime | None = None
+    version: int
+    items: list[OrderItemResponse]
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,31 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class PaymentCreate(BaseModel):
+    invoice_id: int
+    amount: Decimal = Field(..., gt=0, max_digits=14, decimal_places=2)
+    mode: Literal["cash", "upi", "card", "package_adjust"]
+    payment_date: date | None = None
+    txn_ref: str | None = Field(None, max_length=100)
+    notes: str | None = None
+
+
+class PaymentResponse(BaseModel):
+    id: int
+    company_id: int
+    store_id: int
+    invoice_id: int
+    payment_date: date
+    mode: str
+    amount: Decimal
+    txn_ref: str | None
+    notes: str | None
+    received_by: int | None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,71 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Literal
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class ItemRateCreate(BaseModel):
+    item_id: int
+    customer_id: int | None = None
+    rate: Decimal = Field(..., ge=0, max_digits=12, decimal_places=2)
+    effective_from: date
+    effective_to: date | None = None
+
+    @model_validator(mode="after")
+    def check_window(self) -> "ItemRateCreate":
+        if self.effective_to is not None and self.effective_to < self.effective_from:
+            raise ValueError("effective_to must not be before effective_from")
+        return self
+
+
+class ItemRateUpdate(BaseModel):
+    rate: Decimal | None = Field(None, ge=0, max_digits=12, decimal_places=2)
+    effective_from: date | None = None
+    effective_to: date | None = None
+    status: str | None = Field(None, pattern="^(active|inactive)$")
+
+
+class ItemRateResponse(BaseModel):
+    id: int
+    company_id: int
+    item_id: int
+    customer_id: int | None
+    rate: Decimal
+    effective_from: date
+    effective_to: date | None
+    status: str
+    version: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PriceResolveRequest(BaseModel):
+    item_ids: list[int] = Field(..., min_length=1, max_length=1000)
+    customer_id: int | None = None
+    store_id: int | None = None
+    on_date: date | None = None
+
+    @model_validator(mode="after")
+    def check_date_source(self) -> "PriceResolveRequest":
+        # Orders are priced on their store's business day, so a quote without
+        # an explicit date needs the store to know which day that is.
+        if self.on_date is None and self.store_id is None:
+            raise ValueError("store_id is required when on_date is not given")
+        return self
+
+
+class ResolvedPrice(BaseModel):
+    item_id: int
+    rate: Decimal
+    rate_id: int
+    source: Literal["customer", "base"]
+
+
+class PriceResolveResponse(BaseModel):
+    on_date: date
+    prices: list[ResolvedPrice]
+    unpriced_item_ids: list[int]
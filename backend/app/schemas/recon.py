@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class ReconRuleCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    match_type: Literal["exact", "contains", "regex"]
+    pattern: str = Field(..., min_length=1, max_length=500)
+    map_to: Literal["invoice", "payment"]
+    field: Literal["utr_ref", "description"] = "description"
+    priority: int = Field(100, ge=0, le=10_000, description="Lower runs first")
+    active: bool = True
+
+
+class ReconRuleResponse(BaseModel):
+    id: int
+    company_id: int
+    name: str
+    match_type: str
+    pattern: str
+    map_to: str
+    field: str
+    priority: int
+    active: bool
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class AutoMatchResponse(BaseModel):
+    file_id: int
+    lines: int = Field(..., description="Credit lines that had no match before this run")
+    matched: int
+    unmatched: int
+    by_method: dict[str, int] = Field(..., description="Matches per method: utr, rule or amount")
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,64 @@
+from datetime import date
+from decimal import Decimal
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class PendingPaymentResponse(BaseModel):
+    invoice_id: int
+    invoice_no: str | None
+    invoice_date: date
+    customer_id: int
+    customer_name: str
+    store_id: int
+    store_name: str
+    grand_total: Decimal
+    amount_paid: Decimal
+    balance: Decimal
+    days_outstanding: int
+    aging_bucket: Literal["0-7", "8-15", "16-30", "30+"]
+
+    class Config:
+        from_attributes = True
+
+
+class PendingPaymentsPage(BaseModel):
+    as_of: date
+    items: list[PendingPaymentResponse]
+    next_cursor: str | None = Field(None, description="Pass as cursor to fetch the next page; null on the last page")
+
+
+class AgingTotalResponse(BaseModel):
+    aging_bucket: Literal["0-7", "8-15", "16-30", "30+"]
+    invoices: int
+    balance: Decimal
+
+    class Config:
+        from_attributes = True
+
+
+class PendingPaymentsAgingResponse(BaseModel):
+    as_of: date
+    buckets: list[AgingTotalResponse]
+
+
+class PendingDeliveryResponse(BaseModel):
+    order_id: int
+    order_no: str
+    order_date: date
+    customer_id: int
+    customer_name: str
+    store_id: int
+    store_name: str
+    stage: str
+    days_pending: int
+
+    class Config:
+        from_attributes = True
+
+
+class PendingDeliveriesPage(BaseModel):
+    as_of: date
+    items: list[PendingDeliveryResponse]
+    next_cursor: str | None = Field(None, description="Pass as cursor to fetch the next page; null on the last page")
@@ -1,6 +1,10 @@
-from datetime import datetime
+from datetime import datetime, time
+from typing import Annotated
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+# Invoice numbers are PREFIX/FYFY/NNNNN and GST caps them at 16 characters.
+InvoiceSeriesPrefix = Annotated[str, Field(min_length=1, max_length=5, pattern=r"^[A-Za-z0-9-]+$")]
 
 
 class StoreCreate(BaseModel):
@@ -10,7 +14,8 @@ class StoreCreate(BaseModel):
     address: str
     is_franchise: bool = False
     timezone: str = "Asia/Kolkata"
-    invoice_series_prefix: str
+    closing_cutoff: time = time(23, 59)
+    invoice_series_prefix: InvoiceSeriesPrefix
 
 
 class StoreUpdate(BaseModel):
@@ -20,7 +25,8 @@ class StoreUpdate(BaseModel):
     is_franchise: bool | None = None
     status: str | None = None
     timezone: str | None = None
-    invoice_series_prefix: str | None = None
+    closing_cutoff: time | None = None
+    invoice_series_prefix: InvoiceSeriesPrefix | None = None
 
 
 class StoreResponse(BaseModel):
@@ -32,7 +38,9 @@ class StoreResponse(BaseModel):
     is_franchise: bool
     status: str
     timezone: str
+    closing_cutoff: time
     invoice_series_prefix: str
+    version: int
     created_at: datetime
     updated_at: datetime
 
@@ -24,6 +24,7 @@ class UserResponse(BaseModel):
     first_name: str
     last_name: str
     status: str
+    version: int
     roles: list[RoleResponse]
     store_accesses: list[UserStoreAccessResponse]
     created_at: datetime
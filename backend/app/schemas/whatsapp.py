@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class WhatsAppTemplateUpsert(BaseModel):
+    type: Literal["feedback", "promo"]
+    body: str = Field(
+        ...,
+        min_length=1,
+        max_length=4096,
+        description="Message text; {{customer_name}} is filled per recipient, feedback also gets {{order_no}}",
+    )
+    is_active: bool = True
+
+
+class WhatsAppTemplateResponse(BaseModel):
+    id: int
+    code: str
+    type: str
+    body: str
+    vars: list[str]
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class BroadcastRequest(BaseModel):
+    template_code: str = Field(..., min_length=1, max_length=50)
+    variables: dict[str, str] = Field(
+        default_factory=dict, description="Values for the template's placeholders other than customer_name"
+    )
+
+
+class OptOutResponse(BaseModel):
+    customer_id: int
+    whatsapp_opted_out_at: datetime | None
+
+
+class ProviderStatus(BaseModel):
+    id: str = Field(..., min_length=1, max_length=128, description="The provider's message id")
+    status: str = Field(..., max_length=20, description="sent, delivered, read or failed; others are ignored")
+    timestamp: float | None = Field(default=None, description="Unix time of the status; defaults to receipt time")
+    error: str | None = Field(default=None, max_length=1000)
+
+
+class ProviderCallback(BaseModel):
+    statuses: list[ProviderStatus] = Field(..., max_length=1000)
+
+
+class CallbackAcceptedResponse(BaseModel):
+    accepted: int
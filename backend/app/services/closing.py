@@ -0,0 +1,336 @@
+"""Daily store closing.
+
+Every manager opens the closing screen in the same few minutes before
+cutoff, so the preview must not add up the day's takings on demand. Each
+write path instead adds its effect on the closing figures to the day's
+``store_day_snapshots`` row, in its own transaction, with
+``apply_closing_deltas``. A preview is then a single-row read.
+
+Closing locks the snapshot row and marks it closed. The upsert that applies
+deltas skips closed rows, so a write that races a close either lands first
+or is rejected with 409. If it lands first, it bumps the version that the
+commit checks against the previewed one. Unlike the KPI rollup, deltas go
+straight to the row rather than through an outbox. A snapshot row only sees
+one store's writes, a few a minute, so it does not become a hot spot, and the
+preview stays exact without merging pending rows.
+
+Business days follow each store's timezone and cutoff; see
+``app.services.store_calendar``.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any
+
+from fastapi import status
+from sqlalchemy import Date, and_, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.exceptions import BusinessLogicError
+from app.db.persistence import update_returning
+from app.models.daily_store_close import DailyStoreClose
+from app.models.store import Store
+from app.models.store_day_snapshot import StoreDaySnapshot
+from app.services.kpi_rollup import StoreDayDeltas
+from app.services.store_calendar import business_day_end
+
+SNAPSHOT_CONSTRAINT = "uq_store_day_snapshots_store_id_business_date"
+CLOSING_COUNTS = ("unposted_invoices",)
+CLOSING_AMOUNTS = (
+    "cash_from_sales",
+    "digital_receipts_total",
+    "cash_petty_expense",
+    "cash_deposit_bank",
+    "rider_settlements_due",
+    "package_adjustments",
+    "unposted_invoices_total",
+)
+SNAPSHOT_FIGURES = ("cash_opening_float", *CLOSING_AMOUNTS, *CLOSING_COUNTS)
+
+
+class ClosingDeltas(StoreDayDeltas):
+    """Changes to closing figures, for ``apply_closing_deltas``."""
+
+    date_column = "business_date"
+    counts = CLOSING_COUNTS
+    amounts = CLOSING_AMOUNTS
+
+
+async def apply_closing_deltas(db: AsyncSession, deltas: ClosingDeltas) -> None:
+    """Add ``deltas`` to the store-day snapshots in the caller's transaction (one statement).
+
+    Raises 409 ``day-closed`` if any of the days has been closed.
+    """
+    rows = deltas.rows()
+    if not rows:
+        return
+    fields = (*CLOSING_COUNTS, *CLOSING_AMOUNTS)
+    stmt = pg_insert(StoreDaySnapshot).values([{**row, "version": 1} for row in rows])
+    stmt = stmt.on_conflict_do_update(
+        constraint=SNAPSHOT_CONSTRAINT,
+        set_={
+            **{field: getattr(StoreDaySnapshot, field) + stmt.excluded[field] for field in fields},
+            "version": StoreDaySnapshot.version + 1,
+            "updated_at": func.now(),
+        },
+        where=StoreDaySnapshot.closed.is_(False),
+    )
+    applied = set(
+        (await db.execute(stmt.returning(StoreDaySnapshot.store_id, StoreDaySnapshot.business_date))).tuples()
+    )
+    closed = [row for row in rows if (row["store_id"], row["business_date"]) not in applied]
+    if closed:
+        raise BusinessLogicError(
+            "The business day has been closed for this store",
+            status_code=status.HTTP_409_CONFLICT,
+            error_code="day-closed",
+            extra={
+                "closed_days": [
+                    {"store_id": row["store_id"], "date": row["business_date"].isoformat()} for row in closed
+                ]
+            },
+        )
+
+
+@dataclass(frozen=True)
+class ClosingPreview:
+    store_id: int
+    business_date: date
+    timezone: str
+    cutoff_time_local: time
+    cash_opening_float: Decimal
+    cash_from_sales: Decimal
+    digital_receipts_total: Decimal
+    cash_petty_expense: Decimal
+    cash_deposit_bank: Decimal
+    rider_settlements_due: Decimal
+    package_adjustments: Decimal
+    unposted_invoices_total: Decimal
+    unposted_invoices: int
+    version: int
+    close_id: int | None
+    status: str
+
+    @property
+    def cutoff_at(self) -> datetime:
+        return business_day_end(self.business_date, self.timezone, self.cutoff_time_local)
+
+    @property
+    def cash_closing_expected(self) -> Decimal:
+        return self.cash_opening_float + self.cash_from_sales - self.cash_petty_expense - self.cash_deposit_bank
+
+
+async def closing_preview(db: AsyncSession, company_id: int, store_id: int, business_date: date) -> ClosingPreview:
+    """The day's closing figures so far, read from one snapshot row; 404 if the store is not in the company."""
+    row = (
+        await db.execute(
+            select(
+                Store.timezone,
+                Store.closing_cutoff,
+                *(func.coalesce(getattr(StoreDaySnapshot, figure), 0) for figure in SNAPSHOT_FIGURES),
+                func.coalesce(StoreDaySnapshot.version, 0),
+                DailyStoreClose.id,
+                func.coalesce(DailyStoreClose.status, "open"),
+            )
+            .select_from(Store)
+            .outerjoin(
+                StoreDaySnapshot,
+                and_(StoreDaySnapshot.store_id == Store.id, StoreDaySnapshot.business_date == business_date),
+            )
+            .outerjoin(
+                DailyStoreClose,
+                and_(DailyStoreClose.store_id == Store.id, DailyStoreClose.close_date == business_date),
+            )
+            .where(Store.id == store_id, Store.company_id == company_id)
+        )
+    ).one_or_none()
+    if row is None:
+        raise BusinessLogicError("Store not found", status_code=status.HTTP_404_NOT_FOUND, error_code="not-found")
+    timezone, cutoff, *figures, version, close_id, close_status = row
+    return ClosingPreview(
+        store_id,
+        business_date,
+        timezone,
+        cutoff,
+        **dict(zip(SNAPSHOT_FIGURES, figures, strict=True)),
+        version=version,
+        close_id=close_id,
+        status=close_status,
+    )
+
+
+@dataclass(frozen=True)
+class _LockedDay:
+    version: int
+    cutoff: time
+    figures: dict[str, Any]
+
+
+async def _lock_day(db: AsyncSession, company_id: int, store_id: int, business_date: date) -> _LockedDay:
+    """Create or lock the day's snapshot, mark it closed and return its figures with the store's cutoff."""
+    stmt = pg_insert(StoreDaySnapshot).from_select(
+        ["company_id", "store_id", "business_date", "closed"],
+        select(Store.company_id, Store.id, literal(business_date, Date), literal(True)).where(
+            Store.id == store_id, Store.company_id == company_id
+        ),
+    )
+    stmt = stmt.on_conflict_do_update(constraint=SNAPSHOT_CONSTRAINT, set_={"closed": True})
+    cutoff = select(Store.closing_cutoff).where(Store.id == store_id).scalar_subquery()
+    row = (
+        await db.execute(
+            stmt.returning(
+                StoreDaySnapshot.version,
+                cutoff,
+                *(getattr(StoreDaySnapshot, figure) for figure in SNAPSHOT_FIGURES),
+            )
+        )
+    ).one_or_none()
+    if row is None:
+        raise BusinessLogicError("Store not found", status_code=status.HTTP_404_NOT_FOUND, error_code="not-found")
+    version, cutoff_time, *figures = row
+    return _LockedDay(version, cutoff_time, dict(zip(SNAPSHOT_FIGURES, figures, strict=True)))
+
+
+async def commit_closing(
+    db: AsyncSession,
+    company_id: int,
+    store_id: int,
+    close_date: date,
+    cash_counted: Decimal,
+    closed_by: int,
+    notes: str | None = None,
+    expected_version: int | None = None,
+    can_approve_variance: bool = False,
+) -> tuple[DailyStoreClose, bool]:
+    """Close a store's business day in the caller's transaction; returns the close and whether it is new.
+
+    ``expected_version`` is the version of the preview the manager saw. If
+    takings changed since, the commit fails with 412. Committing a day that
+    is already closed returns the existing close unchanged.
+    """
+    day = await _lock_day(db, company_id, store_id, close_date)
+    if expected_version is not None and day.version != expected_version:
+        raise BusinessLogicError(
+            message="Takings changed since the preview; reload it and retry",
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            error_code="precondition_failed",
+            extra={"current_version": day.version, "expected_version": expected_version},
+        )
+    figures = day.figures
+    expected = (
+        figures["cash_opening_float"]
+        + figures["cash_from_sales"]
+        - figures["cash_petty_expense"]
+        - figures["cash_deposit_bank"]
+    )
+    variance = cash_counted - expected
+    if abs(variance) > settings.CLOSING_VARIANCE_THRESHOLD and not can_approve_variance:
+        raise BusinessLogicError(
+            "Cash variance is above the threshold; an Area Manager must close this day",
+            status_code=status.HTTP_403_FORBIDDEN,
+            error_code="variance-approval-required",
+            extra={"variance": str(variance), "threshold": str(settings.CLOSING_VARIANCE_THRESHOLD)},
+        )
+
+    values = {
+        "company_id": company_id,
+        "store_id": store_id,
+        "close_date": close_date,
+        "cutoff_time_local": day.cutoff,
+        "cash_opening_float": figures["cash_opening_float"],
+        "cash_from_sales": figures["cash_from_sales"],
+        "cash_petty_expense": figures["cash_petty_expense"],
+        "cash_deposit_bank": figures["cash_deposit_bank"],
+        "cash_closing_expected": expected,
+        "cash_counted": cash_counted,
+        "variance": variance,
+        "digital_receipts_total": figures["digital_receipts_total"],
+        "notes": notes,
+        "status": "closed",
+        "snapshot_version": day.version,
+        "closed_by": closed_by,
+    }
+    stmt = pg_insert(DailyStoreClose).values(values)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_daily_store_close_store_id_close_date",
+        set_={
+            **{key: stmt.excluded[key] for key in values if key not in ("company_id", "store_id", "close_date")},
+            "closed_at": func.now(),
+            "version": DailyStoreClose.version + 1,
+            "updated_at": func.now(),
+        },
+        # Only a reopened day is closed again; a repeated commit changes nothing.
+        where=DailyStoreClose.status == "reopened",
+    )
+    close = (
+        await db.execute(
+            stmt.returning(DailyStoreClose).execution_options(populate_existing=True)
+        )
+    ).scalar_one_or_none()
+    if close is None:
+        existing = (
+            await db.execute(
+                select(DailyStoreClose).where(
+                    DailyStoreClose.store_id == store_id, DailyStoreClose.close_date == close_date
+                )
+            )
+        ).scalar_one()
+        return existing, False
+
+    # The cash left in the drawer opens the next day.
+    opening = pg_insert(StoreDaySnapshot).values(
+        company_id=company_id,
+        store_id=store_id,
+        business_date=close_date + timedelta(days=1),
+        cash_opening_float=cash_counted,
+        version=1,
+    )
+    await db.execute(
+        opening.on_conflict_do_update(
+            constraint=SNAPSHOT_CONSTRAINT,
+            set_={
+                "cash_opening_float": opening.excluded.cash_opening_float,
+                "version": StoreDaySnapshot.version + 1,
+                "updated_at": func.now(),
+            },
+            where=StoreDaySnapshot.closed.is_(False),
+        )
+    )
+    return close, True
+
+
+async def reopen_closing(
+    db: AsyncSession,
+    company_id: int,
+    close_id: int,
+    reopened_by: int,
+    reason: str,
+    store_ids: frozenset[int] | None = None,
+) -> DailyStoreClose:
+    """Reopen a closed day so writes to it are accepted again; the close row keeps who reopened it and why."""
+    where = [DailyStoreClose.id == close_id, DailyStoreClose.company_id == company_id]
+    if store_ids is not None:
+        where.append(DailyStoreClose.store_id.in_(store_ids))
+    close = await update_returning(
+        db,
+        DailyStoreClose,
+        [*where, DailyStoreClose.status == "closed"],
+        {"status": "reopened", "reopened_by": reopened_by, "reopened_at": func.now(), "reopen_reason": reason},
+    )
+    if close is None:
+        current = (await db.execute(select(DailyStoreClose.status).where(*where))).scalar_one_or_none()
+        if current is None:
+            raise BusinessLogicError(
+                "Closing not found", status_code=status.HTTP_404_NOT_FOUND, error_code="not-found"
+            )
+        raise BusinessLogicError(
+            "This day is not closed", status_code=status.HTTP_409_CONFLICT, error_code="day-not-closed"
+        )
+    await db.execute(
+        update(StoreDaySnapshot)
+        .where(StoreDaySnapshot.store_id == close.store_id, StoreDaySnapshot.business_date == close.close_date)
+        .values(closed=False, updated_at=func.now())
+    )
+    return close
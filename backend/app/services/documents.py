@@ -0,0 +1,134 @@
+"""Document records, visibility and signed download links.
+
+Downloads go through short-lived links rather than the API token, so a
+browser can fetch a large photo ZIP directly and resume it with Range
+requests. A link carries the document, the user it was issued to and its
+expiry, signed with HMAC-SHA256 under a key derived from ``SECRET_KEY``.
+"""
+import hashlib
+import hmac
+import time
+from typing import Any, Literal
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.rbac import COMPANY_WIDE_ROLES, Principal, permission_registry
+from app.db.persistence import insert_returning
+from app.models.document import Document
+from app.models.document_download_log import DocumentDownloadLog
+
+VisibilityRole = Literal[
+    "STAFF", "B2B_SALES", "STORE_MANAGER", "ACCOUNTANT", "AREA_MANAGER", "COMPANY_ADMIN", "PLATFORM_ADMIN"
+]
+
+# ``visibility_role_min`` admits that role and every role ranked above it.
+VISIBILITY_RANK: dict[str, int] = {
+    "STAFF": 0,
+    "B2B_SALES": 0,
+    "STORE_MANAGER": 1,
+    "ACCOUNTANT": 1,
+    "AREA_MANAGER": 2,
+    "COMPANY_ADMIN": 3,
+    "PLATFORM_ADMIN": 4,
+}
+
+_SIGNING_KEY = hmac.new(settings.SECRET_KEY.encode(), b"document-download", hashlib.sha256).digest()
+
+
+def visibility_rank(principal: Principal) -> int:
+    roles = permission_registry.roles.names(principal.role_mask)
+    return max((VISIBILITY_RANK.get(role, -1) for role in roles), default=-1)
+
+
+def can_view(principal: Principal, document: Document) -> bool:
+    if document.company_id != principal.company_id and not principal.is_platform_admin:
+        return False
+    if document.store_id is not None and not principal.can_access_store(document.store_id):
+        return False
+    return visibility_rank(principal) >= VISIBILITY_RANK[document.visibility_role_min]
+
+
+def download_signature(document_id: int, user_id: int, expires: int) -> str:
+    message = f"{document_id}:{user_id}:{expires}".encode()
+    return hmac.new(_SIGNING_KEY, message, hashlib.sha256).hexdigest()
+
+
+def signed_download_url(document_id: int, user_id: int, now: float | None = None) -> tuple[str, int]:
+    """A download link for ``user_id`` and the Unix time it stops working."""
+    expires = int(now if now is not None else time.time()) + settings.DOCUMENT_URL_TTL_SECONDS
+    signature = download_signature(document_id, user_id, expires)
+    url = f"{settings.API_V1_STR}/documents/{document_id}/download?uid={user_id}&expires={expires}&sig={signature}"
+    return url, expires
+
+
+def verify_download(document_id: int, user_id: int, expires: int, signature: str, now: float | None = None) -> bool:
+    if expires < (now if now is not None else time.time()):
+        return False
+    return hmac.compare_digest(download_signature(document_id, user_id, expires), signature)
+
+
+async def get_document(db: AsyncSession, document_id: int) -> Document | None:
+    result = await db.execute(select(Document).where(Document.id == document_id))
+    return result.scalar_one_or_none()
+
+
+async def find_duplicate(
+    db: AsyncSession, company_id: int, entity_type: str, entity_id: int, content_sha256: str
+) -> Document | None:
+    """The record's existing document with the same content, if any."""
+    result = await db.execute(
+        select(Document)
+        .where(
+            Document.company_id == company_id,
+            Document.content_sha256 == content_sha256,
+            Document.entity_type == entity_type,
+            Document.entity_id == entity_id,
+        )
+        .order_by(Document.id)
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def create_document(db: AsyncSession, values: dict[str, Any]) -> Document:
+    return await insert_returning(db, Document, values)
+
+
+async def list_documents(
+    db: AsyncSession,
+    principal: Principal,
+    company_id: int,
+    entity_type: str | None = None,
+    entity_id: int | None = None,
+    store_id: int | None = None,
+) -> list[Document]:
+    query = select(Document).where(Document.company_id == company_id)
+    if not principal.has_any_role(COMPANY_WIDE_ROLES):
+        query = query.where(or_(Document.store_id.is_(None), Document.store_id.in_(principal.store_ids)))
+    if entity_type is not None:
+        query = query.where(Document.entity_type == entity_type)
+    if entity_id is not None:
+        query = query.where(Document.entity_id == entity_id)
+    if store_id is not None:
+        query = query.where(Document.store_id == store_id)
+    result = await db.execute(query.order_by(Document.id.desc()))
+    return [document for document in result.scalars().all() if can_view(principal, document)]
+
+
+async def record_download(db: AsyncSession, document_id: int, user_id: int, ip: str | None) -> None:
+    await db.execute(insert(DocumentDownloadLog).values(document_id=document_id, user_id=user_id, ip=ip))
+    await db.execute(
+        update(Document).where(Document.id == document_id).values(download_count=Document.download_count + 1)
+    )
+
+
+async def download_log(db: AsyncSession, document_id: int, limit: int) -> list[DocumentDownloadLog]:
+    result = await db.execute(
+        select(DocumentDownloadLog)
+        .where(DocumentDownloadLog.document_id == document_id)
+        .order_by(DocumentDownloadLog.downloaded_at.desc(), DocumentDownloadLog.id.desc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
@@ -0,0 +1,477 @@
+"""Parsing bank statements and franchise sales files.
+
+Parsing is CPU-bound, so ``spool_file`` runs in a process pool
+(``ImportParsePool``) rather than on the event loop. It reads the upload one
+row at a time (a streaming CSV reader, or ``iter_xlsx_rows`` for workbooks),
+runs each row through extractors compiled once from the source's mapping,
+and writes parsed rows and rejected rows to separate spool files in COPY
+text format, split into batches the caller loads with one ``COPY`` each.
+Every parsed row carries ``row_hash``, a SHA-256 of its parsed values (not
+its position), which lets a re-upload skip the rows already imported.
+Neither the parser nor the loader ever holds more than a row (or a batch
+file) in memory, whatever the size of the upload.
+
+This module has no database or settings imports, so spawned workers start
+quickly.
+"""
+import asyncio
+import csv
+import hashlib
+import json
+import multiprocessing
+import re
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Literal, TextIO, cast
+
+from app.core.xlsx import CellValue, iter_xlsx_rows
+
+ImportKind = Literal["bank", "franchise"]
+FileFormat = Literal["csv", "xlsx"]
+FieldType = Literal["text", "date", "datetime", "decimal"]
+
+FILE_FORMATS: tuple[FileFormat, ...] = ("csv", "xlsx")
+
+FIELDS: dict[ImportKind, dict[str, FieldType]] = {
+    "bank": {
+        "value_date": "date",
+        "posted_at": "datetime",
+        "description": "text",
+        "utr_ref": "text",
+        "account_last4": "text",
+        # Either a signed amount (optionally with a direction column) or
+        # separate credit and debit columns.
+        "amount": "decimal",
+        "direction": "text",
+        "credit": "decimal",
+        "debit": "decimal",
+    },
+    "franchise": {
+        "order_ref": "text",
+        "order_date": "date",
+        "amount": "decimal",
+        "customer_name": "text",
+        "customer_phone": "text",
+        "service": "text",
+        "quantity": "decimal",
+    },
+}
+REQUIRED_FIELDS: dict[ImportKind, tuple[str, ...]] = {
+    "bank": ("value_date",),
+    "franchise": ("order_ref", "order_date", "amount"),
+}
+TEXT_LIMITS = {
+    "utr_ref": 64, "account_last4": 4, "order_ref": 64, "customer_name": 200, "customer_phone": 20, "service": 100,
+}
+
+# Target columns of the spooled rows, after the constant prefix the caller passes.
+BANK_TXN_COLUMNS = (
+    "company_id", "import_file_id", "posted_at", "value_date", "amount", "direction", "description", "utr_ref",
+    "account_last4", "raw", "row_hash",
+)
+FRANCHISE_STAGING_COLUMNS = (
+    "company_id", "import_id", "store_id", "source", "period", "row_no", "order_ref", "order_date", "customer_name",
+    "customer_phone", "service", "quantity", "amount", "raw", "row_hash",
+)
+ROW_ERROR_COLUMNS = ("company_id", "import_kind", "import_id", "row_no", "error", "raw")
+
+DEFAULT_DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d-%b-%Y", "%d %b %Y", "%d/%m/%y")
+DEFAULT_DATETIME_FORMATS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S")
+EXCEL_EPOCH = datetime(1899, 12, 30)
+_NUMBER_NOISE = re.compile(r"[,\s₹]|INR|Rs\.?", re.IGNORECASE)
+
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be imported (unreadable, or its header does not fit the mapping)."""
+
+
+class RowError(ValueError):
+    """One row cannot be imported; the file carries on without it."""
+
+
+Converter = Callable[[CellValue], Any]
+
+
+def _text(value: CellValue) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        # Phone numbers and references typed into Excel come back as numbers.
+        value = format(value.to_integral_value() if value == value.to_integral_value() else value, "f")
+    text = value.strip()
+    return text or None
+
+
+def _decimal(value: CellValue) -> Decimal | None:
+    if value is None or isinstance(value, Decimal):
+        return value
+    text = _NUMBER_NOISE.sub("", value)
+    if not text or text == "-":
+        return None
+    negative = text.startswith("(") and text.endswith(")")
+    try:
+        number = Decimal(text.strip("()"))
+    except InvalidOperation as exc:
+        raise RowError(f"{value!r} is not a number") from exc
+    return -number if negative else number
+
+
+def _parse_datetime(value: CellValue, formats: Sequence[str]) -> datetime | None:
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return EXCEL_EPOCH + timedelta(days=float(value))
+    text = value.strip()
+    if not text:
+        return None
+    for fmt in formats:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError as exc:
+        raise RowError(f"{value!r} is not a date") from exc
+
+
+@dataclass(frozen=True)
+class MappingSpec:
+    """A source's validated column mapping.
+
+    ``mapping_json`` looks like::
+
+        {"header_row": 1, "delimiter": ",", "date_formats": ["%d/%m/%Y"],
+         "columns": {"value_date": "Txn Date", "credit": "Deposit Amt", "description": 2}}
+
+    A column is named by its header text (compared case- and
+    space-insensitively) or by its 0-based position. Rows above
+    ``header_row`` (statement preambles) are skipped.
+    """
+
+    kind: ImportKind
+    columns: dict[str, str | int]
+    header_row: int = 1
+    delimiter: str = ","
+    date_formats: tuple[str, ...] = DEFAULT_DATE_FORMATS
+    datetime_formats: tuple[str, ...] = DEFAULT_DATETIME_FORMATS
+
+    @classmethod
+    def parse(cls, kind: ImportKind, mapping_json: dict[str, Any]) -> "MappingSpec":
+        """Validate ``mapping_json``; raises ``ValueError`` describing the first problem."""
+        columns = mapping_json.get("columns")
+        if not isinstance(columns, dict) or not columns:
+            raise ValueError("mapping needs a non-empty 'columns' object")
+        unknown = sorted(set(columns) - set(FIELDS[kind]))
+        if unknown:
+            raise ValueError(f"unknown {kind} fields: {', '.join(unknown)}")
+        missing = [name for name in REQUIRED_FIELDS[kind] if name not in columns]
+        if missing:
+            raise ValueError(f"mapping must name a column for: {', '.join(missing)}")
+        if kind == "bank" and not {"amount", "credit", "debit"} & set(columns):
+            raise ValueError("bank mapping needs an 'amount' column or 'credit'/'debit' columns")
+        for name, column in columns.items():
+            if isinstance(column, bool) or not isinstance(column, str | int) or column == "" or (
+                isinstance(column, int) and column < 0
+            ):
+                raise ValueError(f"column for {name!r} must be a header name or a 0-based position")
+        header_row = mapping_json.get("header_row", 1)
+        if isinstance(header_row, bool) or not isinstance(header_row, int) or header_row < 1:
+            raise ValueError("'header_row' must be a positive row number")
+        delimiter = mapping_json.get("delimiter", ",")
+        if not isinstance(delimiter, str) or len(delimiter) != 1:
+            raise ValueError("'delimiter' must be a single character")
+        return cls(
+            kind=kind,
+            columns=dict(columns),
+            header_row=header_row,
+            delimiter=delimiter,
+            date_formats=cls._formats(mapping_json, "date_formats", DEFAULT_DATE_FORMATS),
+            datetime_formats=cls._formats(mapping_json, "datetime_formats", DEFAULT_DATETIME_FORMATS),
+        )
+
+    @staticmethod
+    def _formats(mapping_json: dict[str, Any], key: str, default: tuple[str, ...]) -> tuple[str, ...]:
+        formats = mapping_json.get(key)
+        if formats is None:
+            return default
+        if not isinstance(formats, list) or not formats or not all(isinstance(f, str) and f for f in formats):
+            raise ValueError(f"{key!r} must be a non-empty list of strptime formats")
+        return tuple(formats)
+
+    def _converter(self, field_type: FieldType) -> Converter:
+        if field_type == "date":
+            return lambda value: (parsed.date() if (parsed := _parse_datetime(value, self.date_formats)) else None)
+        if field_type == "datetime":
+            return lambda value: _parse_datetime(value, self.datetime_formats)
+        if field_type == "decimal":
+            return _decimal
+        return _text
+
+    def bind(self, header: Sequence[CellValue]) -> "RowExtractor":
+        """Resolve the mapped columns against the file's header row, once per file."""
+        names = [_text(cell) or f"column_{position + 1}" for position, cell in enumerate(header)]
+        positions = {" ".join(name.lower().split()): position for position, name in reversed(list(enumerate(names)))}
+        extractors: list[tuple[str, int, Converter]] = []
+        for name, column in self.columns.items():
+            if isinstance(column, int):
+                position = column
+            else:
+                found = positions.get(" ".join(column.lower().split()))
+                if found is None:
+                    raise ImportFileError(f"column {column!r} (for {name}) is not in the header row")
+                position = found
+            extractors.append((name, position, self._converter(FIELDS[self.kind][name])))
+        return RowExtractor(names, extractors)
+
+
+@dataclass(frozen=True)
+class RowExtractor:
+    """A mapping bound to one file's columns: field name, cell position and converter."""
+
+    names: list[str]
+    extractors: list[tuple[str, int, Converter]]
+
+    def extract(self, cells: Sequence[CellValue]) -> dict[str, Any]:
+        values: dict[str, Any] = {}
+        for name, position, convert in self.extractors:
+            cell = cells[position] if position < len(cells) else None
+            try:
+                values[name] = convert(cell)
+            except RowError as exc:
+                raise RowError(f"{name}: {exc}") from None
+            limit = TEXT_LIMITS.get(name)
+            if limit is not None and values[name] is not None and len(values[name]) > limit:
+                raise RowError(f"{name}: longer than {limit} characters")
+        return values
+
+    def raw(self, cells: Sequence[CellValue]) -> dict[str, str]:
+        """The row as read, keyed by header, for provenance and error reports."""
+        raw: dict[str, str] = {}
+        for position, cell in enumerate(cells):
+            if cell is None or cell == "":
+                continue
+            name = self.names[position] if position < len(self.names) else f"column_{position + 1}"
+            raw[name] = str(cell)
+        return raw
+
+
+def _require(values: dict[str, Any], name: str) -> Any:
+    value = values.get(name)
+    if value is None:
+        raise RowError(f"{name}: missing")
+    return value
+
+
+def bank_record(values: dict[str, Any]) -> tuple[Any, ...]:
+    """``(posted_at, value_date, amount, direction, description, utr_ref, account_last4)`` for a statement line."""
+    value_date = _require(values, "value_date")
+    credit, debit = values.get("credit"), values.get("debit")
+    if credit:
+        amount, direction = credit, "credit"
+    elif debit:
+        amount, direction = debit, "debit"
+    elif values.get("amount") is not None:
+        amount = values["amount"]
+        marker = (values.get("direction") or "").lower()
+        if marker.startswith(("c", "d")):
+            direction = "credit" if marker.startswith("c") else "debit"
+        else:
+            direction = "debit" if amount < 0 else "credit"
+    else:
+        raise RowError("amount: missing")
+    amount = abs(amount)
+    if amount == 0:
+        raise RowError("amount: zero")
+    return (
+        values.get("posted_at"), value_date, amount.quantize(Decimal("0.01")), direction,
+        values.get("description") or "", values.get("utr_ref"), values.get("account_last4"),
+    )
+
+
+def franchise_record(values: dict[str, Any], period: str | None) -> tuple[Any, ...]:
+    """``(order_ref, order_date, customer_name, customer_phone, service, quantity, amount)`` for a sales row."""
+    order_ref = _require(values, "order_ref")
+    order_date: date = _require(values, "order_date")
+    amount: Decimal = _require(values, "amount")
+    if period is not None and order_date.strftime("%Y-%m") != period:
+        raise RowError(f"order_date: {order_date.isoformat()} is outside {period}")
+    return (
+        order_ref, order_date, values.get("customer_name"), values.get("customer_phone"), values.get("service"),
+        values.get("quantity"), amount.quantize(Decimal("0.01")),
+    )
+
+
+def copy_text(value: Any) -> str:
+    """One field in ``COPY … (FORMAT text)``: ``\\N`` for NULL, with backslashes and separators escaped."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime | date):
+        text = value.isoformat()
+    elif isinstance(value, dict):
+        text = json.dumps(value, ensure_ascii=False)
+    else:
+        text = str(value)
+    return (
+        text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def copy_line(values: Sequence[Any]) -> str:
+    return "\t".join(copy_text(value) for value in values) + "\n"
+
+
+def row_hash(scope: str, record: Sequence[Any]) -> str:
+    """Fingerprint of a parsed row within ``scope`` (the bank, for statements)."""
+    return hashlib.sha256(f"{scope}\t{copy_line(record)}".encode()).hexdigest()
+
+
+def iter_csv_rows(path: Path, delimiter: str = ",") -> Iterator[tuple[int, list[CellValue]]]:
+    """Yield ``(record number, cells)`` for each non-empty CSV record, 1-based."""
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as source:
+        for row_no, cells in enumerate(csv.reader(source, delimiter=delimiter), start=1):
+            if any(cell.strip() for cell in cells):
+                yield row_no, cast(list[CellValue], cells)
+
+
+def iter_rows(path: Path, file_format: FileFormat, delimiter: str = ",") -> Iterator[tuple[int, list[CellValue]]]:
+    if file_format == "xlsx":
+        return iter_xlsx_rows(path)
+    return iter_csv_rows(path, delimiter)
+
+
+class BatchWriter:
+    """Writes COPY lines into numbered batch files of at most ``batch_rows`` lines each."""
+
+    def __init__(self, directory: Path, prefix: str, batch_rows: int) -> None:
+        self.directory = directory
+        self.prefix = prefix
+        self.batch_rows = batch_rows
+        self.paths: list[str] = []
+        self.rows = 0
+        self._file: TextIO | None = None
+
+    def write(self, values: Sequence[Any]) -> None:
+        if self._file is None or self.rows % self.batch_rows == 0:
+            self.close()
+            path = self.directory / f"{self.prefix}-{len(self.paths):05d}.copy"
+            self.paths.append(str(path))
+            self._file = open(path, "w", encoding="utf-8")  # noqa: SIM115 - closed when the batch fills
+        self._file.write(copy_line(values))
+        self.rows += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@dataclass(frozen=True)
+class SpoolJob:
+    """What a parse worker needs: the upload, how to read it and where to spool.
+
+    ``prefix`` holds the leading column values of every parsed row
+    (``company_id, import_file_id`` for bank lines; ``company_id, import_id,
+    store_id, source, period`` for franchise rows). ``hash_scope`` is mixed
+    into every row hash.
+    """
+
+    kind: ImportKind
+    path: str
+    file_format: FileFormat
+    mapping_json: dict[str, Any]
+    spool_dir: str
+    company_id: int
+    import_id: int
+    prefix: tuple[Any, ...]
+    batch_rows: int
+    period: str | None = None
+    hash_scope: str = ""
+
+
+@dataclass
+class SpoolResult:
+    rows: int = 0
+    failed: int = 0
+    row_batches: list[str] = field(default_factory=list)
+    error_batches: list[str] = field(default_factory=list)
+    date_from: date | None = None
+    date_to: date | None = None
+
+
+def spool_file(job: SpoolJob) -> SpoolResult:
+    """Parse ``job.path`` into COPY batch files; raises ``ImportFileError`` if the file cannot be read at all."""
+    spec = MappingSpec.parse(job.kind, job.mapping_json)
+    spool_dir = Path(job.spool_dir)
+    parsed = BatchWriter(spool_dir, "rows", job.batch_rows)
+    rejected = BatchWriter(spool_dir, "errors", job.batch_rows)
+    result = SpoolResult()
+    extractor: RowExtractor | None = None
+    try:
+        for row_no, cells in iter_rows(Path(job.path), job.file_format, spec.delimiter):
+            if row_no < spec.header_row:
+                continue
+            if extractor is None:
+                extractor = spec.bind(cells)
+                continue
+            try:
+                values = extractor.extract(cells)
+                if job.kind == "bank":
+                    record = bank_record(values)
+                    parsed.write((*job.prefix, *record, extractor.raw(cells), row_hash(job.hash_scope, record)))
+                    value_date: date = record[1]
+                    result.date_from = min(result.date_from or value_date, value_date)
+                    result.date_to = max(result.date_to or value_date, value_date)
+                else:
+                    record = franchise_record(values, job.period)
+                    parsed.write(
+                        (*job.prefix, row_no, *record, extractor.raw(cells), row_hash(job.hash_scope, record))
+                    )
+            except RowError as exc:
+                rejected.write((job.company_id, job.kind, job.import_id, row_no, str(exc), extractor.raw(cells)))
+    except (OSError, csv.Error, KeyError, ValueError) as exc:
+        if isinstance(exc, ImportFileError):
+            raise
+        raise ImportFileError(f"could not read the file: {exc}") from exc
+    finally:
+        parsed.close()
+        rejected.close()
+    if extractor is None:
+        raise ImportFileError(f"the file has no header row at row {spec.header_row}")
+    result.rows, result.failed = parsed.rows, rejected.rows
+    result.row_batches, result.error_batches = parsed.paths, rejected.paths
+    return result
+
+
+class ImportParsePool:
+    """Lazily started process pool for parsing imports.
+
+    ``max_workers=0`` parses inline, which suits tests and small deployments.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max_workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned rather than forked, like the PDF pool: the parent runs
+            # an event loop and database connections.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def spool(self, job: SpoolJob) -> SpoolResult:
+        if self.max_workers == 0:
+            return spool_file(job)
+        return await asyncio.get_running_loop().run_in_executor(self._pool(), spool_file, job)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,457 @@
+"""Bank statement and franchise sales file imports.
+
+An upload is streamed to ``IMPORT_UPLOAD_DIR`` by the API and recorded with
+a snapshot of its source's column mapping; a background job then ingests it:
+
+1. a parse worker (``import_parsing.spool_file``) reads the file row by row
+   and spools parsed and rejected rows to COPY batch files;
+2. each batch is loaded with one ``COPY``, parsed rows into a temporary
+   table and rejected rows into ``import_row_error``;
+3. the parsed rows are merged into ``bank_txn`` or
+   ``franchise_sales_staging`` by row hash with ``INSERT … ON CONFLICT DO
+   NOTHING``, so rows an earlier file already brought in are not written
+   again.
+
+All of it runs in one transaction, so a failed or cancelled attempt leaves
+nothing behind and can simply be retried. Uploads also record the SHA-256
+of the whole file; the API answers a byte-identical re-upload with the
+earlier import instead of queueing a new one.
+
+Memory stays flat however large the file: neither process holds more than a
+row, or one batch file, at a time.
+"""
+import os
+import tempfile
+import uuid
+from collections.abc import Awaitable, Callable, Sequence
+from pathlib import Path
+from typing import Any, cast
+
+from sqlalchemy import CursorResult, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.uploads import SavedUpload
+from app.db.persistence import insert_returning
+from app.models.bank_import_file import BankImportFile
+from app.models.franchise_import import FranchiseImport
+from app.models.import_mapping import ImportMapping
+from app.models.import_row_error import ImportRowError
+from app.services.import_parsing import (
+    BANK_TXN_COLUMNS,
+    FILE_FORMATS,
+    FRANCHISE_STAGING_COLUMNS,
+    ROW_ERROR_COLUMNS,
+    FileFormat,
+    ImportFileError,
+    ImportKind,
+    ImportParsePool,
+    MappingSpec,
+    SpoolJob,
+    SpoolResult,
+)
+
+# Parsed rows are loaded here first, then merged into the real table.
+INCOMING_TABLE = "import_incoming"
+
+# Called with the rows loaded so far and the rows in the file.
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+import_parse_pool = ImportParsePool(
+    (os.cpu_count() or 1) if settings.IMPORT_PARSE_WORKERS is None else settings.IMPORT_PARSE_WORKERS
+)
+
+
+def file_format_for(filename: str) -> FileFormat:
+    """The import format named by ``filename``'s extension; raises ``ValueError`` for anything else."""
+    extension = Path(filename).suffix.lower().lstrip(".")
+    if extension not in FILE_FORMATS:
+        raise ValueError(f"Only {' and '.join(FILE_FORMATS).upper()} files can be imported")
+    return extension
+
+
+def upload_path(kind: ImportKind, company_id: int, file_format: FileFormat) -> Path:
+    """A fresh path under ``IMPORT_UPLOAD_DIR`` for an upload; the client's filename is never used on disk."""
+    return Path(settings.IMPORT_UPLOAD_DIR) / kind / str(company_id) / f"{uuid.uuid4().hex}.{file_format}"
+
+
+async def list_mappings(db: AsyncSession, company_id: int) -> list[ImportMapping]:
+    result = await db.execute(
+        select(ImportMapping)
+        .where(ImportMapping.company_id == company_id)
+        .order_by(ImportMapping.kind, ImportMapping.source)
+    )
+    return list(result.scalars().all())
+
+
+async def get_mapping(db: AsyncSession, company_id: int, kind: ImportKind, source: str) -> ImportMapping | None:
+    result = await db.execute(
+        select(ImportMapping).where(
+            ImportMapping.company_id == company_id, ImportMapping.kind == kind, ImportMapping.source == source
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def save_mapping(
+    db: AsyncSession, company_id: int, kind: ImportKind, source: str, mapping_json: dict[str, Any]
+) -> ImportMapping:
+    """Create or replace a source's mapping; raises ``ValueError`` if it is not a valid ``MappingSpec``."""
+    MappingSpec.parse(kind, mapping_json)
+    stmt = pg_insert(ImportMapping).values(
+        company_id=company_id, kind=kind, source=source, mapping_json=mapping_json
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_import_mapping_company_id_kind_source",
+        set_={"mapping_json": stmt.excluded.mapping_json, "updated_at": func.now()},
+    )
+    result = await db.execute(
+        stmt.returning(ImportMapping).execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+async def create_bank_import(
+    db: AsyncSession,
+    company_id: int,
+    source_bank: str,
+    filename: str,
+    stored_path: Path,
+    upload: SavedUpload,
+    mapping_json: dict[str, Any],
+    created_by: int | None = None,
+) -> BankImportFile:
+    return await insert_returning(
+        db,
+        BankImportFile,
+        {
+            "company_id": company_id,
+            "filename": filename,
+            "source_bank": source_bank,
+            "file_format": file_format_for(filename),
+            "stored_path": str(stored_path),
+            "size_bytes": upload.size,
+            "content_sha256": upload.sha256,
+            "mapping_json": mapping_json,
+            "status": "uploaded",
+            "created_by": created_by,
+        },
+    )
+
+
+async def create_franchise_import(
+    db: AsyncSession,
+    company_id: int,
+    store_id: int,
+    source: str,
+    period: str,
+    filename: str,
+    stored_path: Path,
+    upload: SavedUpload,
+    mapping_json: dict[str, Any],
+    created_by: int | None = None,
+) -> FranchiseImport:
+    return await insert_returning(
+        db,
+        FranchiseImport,
+        {
+            "company_id": company_id,
+            "store_id": store_id,
+            "source": source,
+            "period": period,
+            "filename": filename,
+            "file_format": file_format_for(filename),
+            "stored_path": str(stored_path),
+            "size_bytes": upload.size,
+            "content_sha256": upload.sha256,
+            "mapping_json": mapping_json,
+            "status": "uploaded",
+            "rows_total": 0,
+            "rows_failed": 0,
+            "created_by": created_by,
+        },
+    )
+
+
+async def copy_batches(
+    db: AsyncSession,
+    table: str,
+    columns: Sequence[str],
+    paths: Sequence[str],
+    on_batch: Callable[[], Awaitable[None]] | None = None,
+) -> None:
+    """Load each COPY text batch file into ``table`` with one ``COPY`` in the session's transaction."""
+    if not paths:
+        return
+    connection = await db.connection()
+    # The asyncpg connection under the session, for its COPY support.
+    driver: Any = (await connection.get_raw_connection()).driver_connection
+    for path in paths:
+        await driver.copy_to_table(table, source=path, columns=list(columns), format="text")
+        if on_batch is not None:
+            await on_batch()
+
+
+async def _spool_and_copy(
+    db: AsyncSession,
+    job: SpoolJob,
+    table: str,
+    columns: Sequence[str],
+    on_progress: ProgressCallback | None,
+) -> SpoolResult:
+    """Parse the upload and COPY its rows into a temporary ``INCOMING_TABLE`` shaped like ``table``.
+
+    Rejected rows go straight to ``import_row_error``. The caller merges
+    the incoming rows with ``_numbered_incoming`` before committing.
+    """
+    result = await import_parse_pool.spool(job)
+    total = result.rows + result.failed
+    loaded = 0
+
+    async def on_batch() -> None:
+        nonlocal loaded
+        loaded = min(loaded + job.batch_rows, total)
+        if on_progress is not None:
+            await on_progress(loaded, total)
+
+    await db.execute(
+        text(
+            f"CREATE TEMP TABLE {INCOMING_TABLE} ON COMMIT DROP "
+            f"AS SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
+        )
+    )
+    # Numbers rows in file order, so repeats of an identical row can be told apart.
+    await db.execute(text(f"ALTER TABLE {INCOMING_TABLE} ADD COLUMN file_seq bigserial"))
+    await copy_batches(db, INCOMING_TABLE, columns, result.row_batches, on_batch)
+    await copy_batches(db, ImportRowError.__tablename__, ROW_ERROR_COLUMNS, result.error_batches, on_batch)
+    await db.execute(text(f"ANALYZE {INCOMING_TABLE}"))
+    return result
+
+
+def _numbered_incoming(columns: Sequence[str]) -> str:
+    """The incoming rows with ``row_seq``: 1 for the first row with a given hash in the file, 2 for its repeat."""
+    return (
+        f"SELECT {', '.join(columns)}, "
+        f"row_number() OVER (PARTITION BY row_hash ORDER BY file_seq) AS row_seq FROM {INCOMING_TABLE}"
+    )
+
+
+async def _mark_failed(
+    db: AsyncSession, model: type[BankImportFile | FranchiseImport], row_id: int, error: str
+) -> None:
+    await db.rollback()
+    await db.execute(update(model).where(model.id == row_id).values(status="failed", error=error))
+    await db.commit()
+
+
+def _summary(upload: BankImportFile | FranchiseImport) -> dict[str, Any]:
+    summary = {
+        "import_id": upload.id,
+        "rows": upload.rows_total - upload.rows_failed,
+        "failed": upload.rows_failed,
+        "new": upload.rows_new,
+    }
+    if isinstance(upload, FranchiseImport):
+        summary["removed"] = upload.rows_removed
+    return summary
+
+
+async def find_bank_import(
+    db: AsyncSession, company_id: int, source_bank: str, content_sha256: str
+) -> BankImportFile | None:
+    """The latest import of the same statement file from the same bank that has not failed, if any."""
+    return cast(
+        BankImportFile | None,
+        await db.scalar(
+            select(BankImportFile)
+            .where(
+                BankImportFile.company_id == company_id,
+                BankImportFile.content_sha256 == content_sha256,
+                BankImportFile.source_bank == source_bank,
+                BankImportFile.status != "failed",
+            )
+            .order_by(BankImportFile.id.desc())
+            .limit(1)
+        ),
+    )
+
+
+async def find_franchise_import(
+    db: AsyncSession, company_id: int, store_id: int, source: str, period: str, content_sha256: str
+) -> FranchiseImport | None:
+    """The latest import of the same file for the same store, source and period that has not failed, if any."""
+    return cast(
+        FranchiseImport | None,
+        await db.scalar(
+            select(FranchiseImport)
+            .where(
+                FranchiseImport.company_id == company_id,
+                FranchiseImport.source == source,
+                FranchiseImport.period == period,
+                FranchiseImport.store_id == store_id,
+                FranchiseImport.content_sha256 == content_sha256,
+                FranchiseImport.status != "failed",
+            )
+            .order_by(FranchiseImport.id.desc())
+            .limit(1)
+        ),
+    )
+
+
+async def ingest_bank_file(
+    db: AsyncSession, file_id: int, on_progress: ProgressCallback | None = None
+) -> dict[str, Any]:
+    """Parse an uploaded statement into ``bank_txn``; raises ``ImportFileError`` if the file is unusable.
+
+    Lines already imported for the company from the same bank (by row hash)
+    are skipped, so overlapping statements only add the lines that are new.
+    Running it again for a file that has already been parsed does nothing.
+    """
+    statement = await db.get(BankImportFile, file_id)
+    if statement is None:
+        raise ImportFileError(f"bank import file {file_id} no longer exists")
+    if statement.status == "parsed":
+        return _summary(statement)
+    if statement.stored_path is None or statement.mapping_json is None:
+        raise ImportFileError(f"bank import file {file_id} has no upload to parse")
+    with tempfile.TemporaryDirectory(prefix="bank-import-") as spool_dir:
+        job = SpoolJob(
+            kind="bank",
+            path=statement.stored_path,
+            file_format=cast(FileFormat, statement.file_format),
+            mapping_json=statement.mapping_json,
+            spool_dir=spool_dir,
+            company_id=statement.company_id,
+            import_id=statement.id,
+            prefix=(statement.company_id, statement.id),
+            batch_rows=settings.IMPORT_COPY_BATCH_ROWS,
+            hash_scope=statement.source_bank,
+        )
+        try:
+            result = await _spool_and_copy(db, job, "bank_txn", BANK_TXN_COLUMNS, on_progress)
+        except ImportFileError as exc:
+            await _mark_failed(db, BankImportFile, file_id, str(exc))
+            raise
+    inserted = await db.execute(
+        text(
+            f"INSERT INTO bank_txn ({', '.join(BANK_TXN_COLUMNS)}, row_seq) {_numbered_incoming(BANK_TXN_COLUMNS)} "
+            "ON CONFLICT (company_id, row_hash, row_seq) DO NOTHING"
+        )
+    )
+    statement = (
+        await db.execute(
+            update(BankImportFile)
+            .where(BankImportFile.id == file_id)
+            .values(
+                status="parsed",
+                rows_total=result.rows + result.failed,
+                rows_failed=result.failed,
+                rows_new=cast(CursorResult[Any], inserted).rowcount,
+                statement_date_from=result.date_from,
+                statement_date_to=result.date_to,
+                error=None,
+            )
+            .returning(BankImportFile)
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one()
+    await db.commit()
+    return _summary(statement)
+
+
+async def ingest_franchise_import(
+    db: AsyncSession, import_id: int, on_progress: ProgressCallback | None = None
+) -> dict[str, Any]:
+    """Parse an uploaded franchise sales file into ``franchise_sales_staging``.
+
+    The file replaces the store's rows for its source and period: rows it
+    shares with them (by row hash) are left alone, rows missing from it are
+    deleted and the rest inserted. Rows dated outside the period are
+    rejected like unparseable ones. Running it again for an import that has
+    already been parsed does nothing.
+    """
+    upload = await db.get(FranchiseImport, import_id)
+    if upload is None:
+        raise ImportFileError(f"franchise import {import_id} no longer exists")
+    if upload.status == "parsed":
+        return _summary(upload)
+    if upload.stored_path is None or upload.mapping_json is None:
+        raise ImportFileError(f"franchise import {import_id} has no upload to parse")
+    scope = {"store_id": upload.store_id, "source": upload.source, "period": upload.period}
+    with tempfile.TemporaryDirectory(prefix="franchise-import-") as spool_dir:
+        job = SpoolJob(
+            kind="franchise",
+            path=upload.stored_path,
+            file_format=cast(FileFormat, upload.file_format),
+            mapping_json=upload.mapping_json,
+            spool_dir=spool_dir,
+            company_id=upload.company_id,
+            import_id=upload.id,
+            prefix=(upload.company_id, upload.id, upload.store_id, upload.source, upload.period),
+            batch_rows=settings.IMPORT_COPY_BATCH_ROWS,
+            period=upload.period,
+        )
+        try:
+            result = await _spool_and_copy(
+                db, job, "franchise_sales_staging", FRANCHISE_STAGING_COLUMNS, on_progress
+            )
+        except ImportFileError as exc:
+            await _mark_failed(db, FranchiseImport, import_id, str(exc))
+            raise
+    # Two files for the same period merge one after the other.
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(hashtextextended(:key, 0))"),
+        {"key": f"franchise_import:{upload.store_id}:{upload.source}:{upload.period}"},
+    )
+    removed = await db.execute(
+        text(
+            "DELETE FROM franchise_sales_staging AS s "
+            "WHERE s.store_id = :store_id AND s.source = :source AND s.period = :period AND NOT EXISTS ("
+            f"SELECT 1 FROM ({_numbered_incoming(('row_hash',))}) AS incoming "
+            "WHERE incoming.row_hash = s.row_hash AND incoming.row_seq = s.row_seq)"
+        ),
+        scope,
+    )
+    inserted = await db.execute(
+        text(
+            f"INSERT INTO franchise_sales_staging ({', '.join(FRANCHISE_STAGING_COLUMNS)}, row_seq) "
+            f"{_numbered_incoming(FRANCHISE_STAGING_COLUMNS)} "
+            "ON CONFLICT (store_id, source, period, row_hash, row_seq) DO NOTHING"
+        )
+    )
+    upload = (
+        await db.execute(
+            update(FranchiseImport)
+            .where(FranchiseImport.id == import_id)
+            .values(
+                status="parsed",
+                rows_total=result.rows + result.failed,
+                rows_failed=result.failed,
+                rows_new=cast(CursorResult[Any], inserted).rowcount,
+                rows_removed=cast(CursorResult[Any], removed).rowcount,
+                error=None,
+            )
+            .returning(FranchiseImport)
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one()
+    await db.commit()
+    return _summary(upload)
+
+
+async def row_errors(
+    db: AsyncSession, kind: ImportKind, import_id: int, after_row: int = 0, limit: int = 100
+) -> list[ImportRowError]:
+    """Rejected rows of one import in file order, ``limit`` at a time after ``after_row``."""
+    result = await db.execute(
+        select(ImportRowError)
+        .where(
+            ImportRowError.import_kind == kind,
+            ImportRowError.import_id == import_id,
+            ImportRowError.row_no > after_row,
+        )
+        .order_by(ImportRowError.row_no)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
@@ -0,0 +1,197 @@
+"""Streaming invoice exports.
+
+Invoices are loaded and rendered in chunks of ``EXPORT_CHUNK_SIZE``. The next
+chunk is read from the database while the pool renders the current one, and
+output is yielded as each chunk completes. Memory therefore stays bounded by
+a couple of chunks however many invoices are exported.
+"""
+import asyncio
+import contextlib
+import os
+import zipfile
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable, Collection, Sequence
+from decimal import Decimal
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.pdf import PdfStreamWriter
+from app.core.zipstream import ZipSink
+from app.models.company import Company
+from app.models.company_gstin import CompanyGSTIN
+from app.models.customer import Customer
+from app.models.invoice import Invoice
+from app.models.invoice_line import InvoiceLine
+from app.models.item import Item
+from app.models.store import Store
+from app.services.invoice_pdf import (
+    Branding,
+    DocumentLine,
+    InvoiceDocument,
+    PdfRenderPool,
+    RenderJob,
+    render_document_batch,
+    render_page_batch,
+)
+
+EXPORT_CHUNK_SIZE = 64
+
+# Called with the number of invoices rendered so far after each chunk.
+ProgressCallback = Callable[[int], Awaitable[None]]
+
+pdf_render_pool = PdfRenderPool(
+    (os.cpu_count() or 1) if settings.PDF_RENDER_WORKERS is None else settings.PDF_RENDER_WORKERS
+)
+
+
+async def scoped_invoice_ids(
+    db: AsyncSession, company_id: int, invoice_ids: Sequence[int], store_ids: Collection[int] | None = None
+) -> list[int]:
+    """The subset of ``invoice_ids`` the caller may export, in request order."""
+    query = select(Invoice.id).where(Invoice.id.in_(invoice_ids), Invoice.company_id == company_id)
+    if store_ids is not None:
+        query = query.where(Invoice.store_id.in_(store_ids))
+    found = set((await db.execute(query)).scalars().all())
+    return [invoice_id for invoice_id in dict.fromkeys(invoice_ids) if invoice_id in found]
+
+
+async def _brandings(db: AsyncSession, store_ids: Collection[int]) -> dict[int, Branding]:
+    rows = await db.execute(
+        select(Store.id, Store.name, Store.address, Company.id, Company.trade_name, Company.legal_name,
+               CompanyGSTIN.gstin)
+        .join(Company, Company.id == Store.company_id)
+        .outerjoin(CompanyGSTIN, CompanyGSTIN.id == Store.company_gstin_id)
+        .where(Store.id.in_(store_ids))
+    )
+    return {
+        store_id: Branding(company_id, store_id, trade_name or legal_name, gstin, store_name, address)
+        for store_id, store_name, address, company_id, trade_name, legal_name, gstin in rows.tuples()
+    }
+
+
+async def load_render_jobs(
+    db: AsyncSession, invoice_ids: Sequence[int], brandings: dict[int, Branding]
+) -> list[RenderJob]:
+    """Load invoices as render jobs in ``invoice_ids`` order, filling ``brandings`` as stores are seen."""
+    headers = {
+        invoice.id: (invoice, customer_name)
+        for invoice, customer_name in (
+            await db.execute(
+                select(Invoice, Customer.name)
+                .join(Customer, Customer.id == Invoice.customer_id)
+                .where(Invoice.id.in_(invoice_ids))
+            )
+        ).tuples()
+    }
+    lines: dict[int, list[DocumentLine]] = {invoice_id: [] for invoice_id in headers}
+    for invoice_id, name, qty, price, tax_rate, line_tax, line_total in (
+        await db.execute(
+            select(
+                InvoiceLine.invoice_id,
+                Item.name,
+                InvoiceLine.qty,
+                InvoiceLine.price,
+                InvoiceLine.tax_rate,
+                InvoiceLine.line_tax,
+                InvoiceLine.line_total,
+            )
+            .join(Item, Item.id == InvoiceLine.item_id)
+            .where(InvoiceLine.invoice_id.in_(headers))
+            .order_by(InvoiceLine.invoice_id, InvoiceLine.id)
+        )
+    ).tuples():
+        lines[invoice_id].append(DocumentLine(name, qty, price, tax_rate, line_tax, line_total))
+
+    missing = {invoice.store_id for invoice, _ in headers.values()} - brandings.keys()
+    if missing:
+        brandings.update(await _brandings(db, missing))
+
+    jobs: list[RenderJob] = []
+    for invoice_id in invoice_ids:
+        if invoice_id not in headers:
+            continue
+        invoice, customer_name = headers[invoice_id]
+        jobs.append((
+            brandings[invoice.store_id],
+            InvoiceDocument(
+                invoice_id=invoice.id,
+                invoice_no=invoice.invoice_no,
+                invoice_date=invoice.invoice_date,
+                status=invoice.status,
+                customer_name=customer_name,
+                lines=tuple(lines[invoice_id]),
+                subtotal=Decimal(invoice.subtotal),
+                tax_total=Decimal(invoice.tax_total),
+                discount_total=Decimal(invoice.discount_total),
+                package_applied_total=Decimal(invoice.package_applied_total),
+                grand_total=Decimal(invoice.grand_total),
+            ),
+        ))
+    return jobs
+
+
+async def _chunked_jobs(db: AsyncSession, invoice_ids: Sequence[int]) -> AsyncGenerator[list[RenderJob], None]:
+    """Yield render jobs chunk by chunk, loading the next chunk while the caller renders."""
+    brandings: dict[int, Branding] = {}
+    chunks = [invoice_ids[i:i + EXPORT_CHUNK_SIZE] for i in range(0, len(invoice_ids), EXPORT_CHUNK_SIZE)]
+    pending: asyncio.Future[list[RenderJob]] | None = None
+    try:
+        for position, chunk in enumerate(chunks):
+            jobs = await (pending or load_render_jobs(db, chunk, brandings))
+            # Rendering only awaits the process pool, so the session is free
+            # for the next chunk's queries in the meantime.
+            pending = (
+                asyncio.ensure_future(load_render_jobs(db, chunks[position + 1], brandings))
+                if position + 1 < len(chunks)
+                else None
+            )
+            yield jobs
+    finally:
+        # The consumer stopped early: wait for the prefetch to stop so it is
+        # not left using the session after the export has released it.
+        if pending is not None:
+            pending.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await pending
+
+
+async def stream_invoices_pdf(
+    db: AsyncSession,
+    invoice_ids: Sequence[int],
+    pool: PdfRenderPool = pdf_render_pool,
+    on_progress: ProgressCallback | None = None,
+) -> AsyncIterator[bytes]:
+    """One PDF containing every invoice, streamed page by page."""
+    writer = PdfStreamWriter()
+    rendered = 0
+    yield writer.begin()
+    async for jobs in _chunked_jobs(db, invoice_ids):
+        for pages in await pool.render(render_page_batch, jobs):
+            yield b"".join(writer.add_page(page) for page in pages)
+        rendered += len(jobs)
+        if on_progress is not None:
+            await on_progress(rendered)
+    yield writer.finish()
+
+
+async def stream_invoices_zip(
+    db: AsyncSession,
+    invoice_ids: Sequence[int],
+    pool: PdfRenderPool = pdf_render_pool,
+    on_progress: ProgressCallback | None = None,
+) -> AsyncIterator[bytes]:
+    """A ZIP with one PDF per invoice, streamed entry by entry."""
+    sink = ZipSink()
+    rendered = 0
+    # PDF content streams are already deflated, so entries are stored as-is.
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        async for jobs in _chunked_jobs(db, invoice_ids):
+            documents = await pool.render(render_document_batch, jobs)
+            for (_, document), pdf in zip(jobs, documents, strict=True):
+                archive.writestr(document.filename, pdf)
+            yield sink.drain()
+            rendered += len(jobs)
+            if on_progress is not None:
+                await on_progress(rendered)
+    yield sink.drain()
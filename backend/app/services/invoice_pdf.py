@@ -0,0 +1,207 @@
+"""Invoice PDF rendering.
+
+Rendering is CPU-bound, so it runs in a process pool (``PdfRenderPool``)
+rather than on the event loop. Work is shipped to workers in batches of
+plain dataclasses. Each worker compiles the static part of a page (company and
+store branding, GSTIN, column headings) once per distinct ``Branding`` and
+reuses the compiled bytes for every later invoice of that store.
+
+This module has no database or settings imports, so spawned workers start
+quickly.
+"""
+import asyncio
+import multiprocessing
+import textwrap
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from typing import TypeVar
+
+from app.core.pdf import A4_HEIGHT, A4_WIDTH, Canvas, build_pdf
+
+ResultT = TypeVar("ResultT")
+
+MARGIN = 40.0
+RIGHT = A4_WIDTH - MARGIN
+ROW_HEIGHT = 14.0
+FIRST_ROW_Y = 640.0
+LAST_ROW_Y = 150.0
+LINES_PER_PAGE = int((FIRST_ROW_Y - LAST_ROW_Y) // ROW_HEIGHT) + 1
+
+# Right edges of the numeric columns.
+QTY_X = 330.0
+PRICE_X = 400.0
+TAX_RATE_X = 445.0
+TAX_X = 495.0
+AMOUNT_X = RIGHT
+
+
+@dataclass(frozen=True)
+class Branding:
+    company_id: int
+    store_id: int
+    company_name: str
+    gstin: str | None
+    store_name: str
+    store_address: str
+
+
+@dataclass(frozen=True)
+class DocumentLine:
+    description: str
+    qty: Decimal
+    price: Decimal
+    tax_rate: Decimal
+    line_tax: Decimal
+    line_total: Decimal
+
+
+@dataclass(frozen=True)
+class InvoiceDocument:
+    invoice_id: int
+    invoice_no: str | None
+    invoice_date: date
+    status: str
+    customer_name: str
+    lines: tuple[DocumentLine, ...]
+    subtotal: Decimal
+    tax_total: Decimal
+    discount_total: Decimal
+    package_applied_total: Decimal
+    grand_total: Decimal
+
+    @property
+    def filename(self) -> str:
+        label = (self.invoice_no or f"draft-{self.invoice_id}").replace("/", "-")
+        return f"invoice-{label}.pdf"
+
+
+RenderJob = tuple[Branding, InvoiceDocument]
+
+
+def _money(amount: Decimal) -> str:
+    return f"{amount:,.2f}"
+
+
+@lru_cache(maxsize=256)
+def compile_template(branding: Branding) -> bytes:
+    """Content-stream operators shared by every page for this branding."""
+    canvas = Canvas()
+    top = A4_HEIGHT - MARGIN
+    canvas.text(MARGIN, top - 16, branding.company_name, font="F2", size=16)
+    canvas.text(RIGHT - 92, top - 14, "TAX INVOICE", font="F2", size=12)
+    y = top - 34
+    for line in [branding.store_name, *textwrap.wrap(branding.store_address, 95)[:3]]:
+        canvas.text(MARGIN, y, line, size=9)
+        y -= 12
+    if branding.gstin:
+        canvas.text(MARGIN, y, f"GSTIN: {branding.gstin}", font="F2", size=9)
+    canvas.line(MARGIN, 725, RIGHT, 725, width=1)
+
+    heading_y = FIRST_ROW_Y + ROW_HEIGHT + 4
+    canvas.line(MARGIN, heading_y + 12, RIGHT, heading_y + 12)
+    canvas.text(MARGIN, heading_y, "#", font="F2", size=9)
+    canvas.text(MARGIN + 25, heading_y, "Item", font="F2", size=9)
+    for x, label in ((QTY_X, "Qty"), (PRICE_X, "Rate"), (TAX_RATE_X, "Tax %"), (TAX_X, "Tax"), (AMOUNT_X, "Amount")):
+        canvas.text(x - len(label) * 5.4, heading_y, label, font="F2", size=9)
+    canvas.line(MARGIN, heading_y - 5, RIGHT, heading_y - 5)
+    return canvas.content()
+
+
+def render_pages(branding: Branding, document: InvoiceDocument) -> list[bytes]:
+    """Page content streams for one invoice."""
+    template = compile_template(branding)
+    chunks = [document.lines[i:i + LINES_PER_PAGE] for i in range(0, len(document.lines), LINES_PER_PAGE)] or [()]
+    pages: list[bytes] = []
+    for page_index, chunk in enumerate(chunks):
+        canvas = Canvas()
+        canvas.raw(template)
+        canvas.text(MARGIN, 708, f"Invoice: {document.invoice_no or 'DRAFT'}", font="F2", size=10)
+        canvas.text(MARGIN, 694, f"Date: {document.invoice_date:%d-%m-%Y}", size=9)
+        canvas.text(300, 708, "Bill to:", font="F2", size=10)
+        canvas.text(300, 694, document.customer_name, size=9)
+
+        y = FIRST_ROW_Y
+        for offset, line in enumerate(chunk):
+            number = page_index * LINES_PER_PAGE + offset + 1
+            canvas.text(MARGIN, y, str(number), size=8)
+            canvas.text(MARGIN + 25, y, line.description[:45], size=8)
+            canvas.text_right(QTY_X, y, f"{line.qty.normalize():f}", size=8)
+            canvas.text_right(PRICE_X, y, _money(line.price), size=8)
+            canvas.text_right(TAX_RATE_X, y, f"{line.tax_rate:.2f}", size=8)
+            canvas.text_right(TAX_X, y, _money(line.line_tax), size=8)
+            canvas.text_right(AMOUNT_X, y, _money(line.line_total), size=8)
+            y -= ROW_HEIGHT
+
+        if page_index == len(chunks) - 1:
+            canvas.line(MARGIN, LAST_ROW_Y - 10, RIGHT, LAST_ROW_Y - 10)
+            y = LAST_ROW_Y - 26
+            for label, amount in (
+                ("Subtotal", document.subtotal),
+                ("Tax", document.tax_total),
+                ("Discount", -document.discount_total),
+                ("Package applied", -document.package_applied_total),
+            ):
+                canvas.text(360, y, label, size=9)
+                canvas.text_right(AMOUNT_X, y, _money(amount), size=9)
+                y -= 12
+            canvas.text(360, y - 2, "Grand total", font="F2", size=10)
+            canvas.text_right(AMOUNT_X, y - 2, _money(document.grand_total), size=10)
+        canvas.text(MARGIN, 30, f"Page {page_index + 1} of {len(chunks)}", size=7)
+        pages.append(canvas.content())
+    return pages
+
+
+def render_invoice_pdf(branding: Branding, document: InvoiceDocument) -> bytes:
+    return build_pdf(render_pages(branding, document))
+
+
+def render_page_batch(jobs: Sequence[RenderJob]) -> list[list[bytes]]:
+    return [render_pages(branding, document) for branding, document in jobs]
+
+
+def render_document_batch(jobs: Sequence[RenderJob]) -> list[bytes]:
+    return [render_invoice_pdf(branding, document) for branding, document in jobs]
+
+
+class PdfRenderPool:
+    """Lazily started process pool for PDF rendering.
+
+    ``max_workers=0`` renders inline, which suits tests and tiny exports.
+    """
+
+    def __init__(self, max_workers: int, batch_size: int = 16) -> None:
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned rather than forked: the parent runs an event loop and
+            # database connections that must not be duplicated.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def render(
+        self, fn: Callable[[Sequence[RenderJob]], list[ResultT]], jobs: Sequence[RenderJob]
+    ) -> list[ResultT]:
+        """Run ``fn`` over ``jobs`` split into batches across the pool, keeping job order."""
+        if not jobs:
+            return []
+        if self.max_workers == 0:
+            return fn(jobs)
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        batches = [jobs[i:i + self.batch_size] for i in range(0, len(jobs), self.batch_size)]
+        results = await asyncio.gather(*(loop.run_in_executor(pool, fn, batch) for batch in batches))
+        return [item for batch in results for item in batch]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
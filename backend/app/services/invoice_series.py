@@ -0,0 +1,153 @@
+"""Per-store invoice numbering.
+
+Two allocation modes are offered:
+
+* ``allocate_invoice_numbers`` is gap-free; ``invoices.post_invoices`` uses
+  it to number invoices as they are posted. It bumps the series counter with
+  a single ``UPDATE … RETURNING`` (an upsert for a year's first invoice)
+  inside the caller's transaction, so the numbers are only consumed if that
+  transaction commits. The series row stays locked until then, so callers
+  should allocate as the last statement before committing.
+* ``BlockAllocator`` leases a range of numbers to the current process in a
+  short transaction of its own and hands them out from memory. Numbers left in
+  a lease when a worker stops are never issued, so this mode is only for
+  documents where the law tolerates gaps; no such document uses it yet.
+"""
+import asyncio
+from dataclasses import dataclass
+from datetime import date
+
+from fastapi import status
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.exceptions import BusinessLogicError
+from app.models.invoice_series import InvoiceSeries
+from app.models.store import Store
+
+
+@dataclass(frozen=True)
+class AllocatedNumber:
+    series_id: int
+    financial_year: str
+    number: int
+    invoice_number: str
+
+
+def financial_year(day: date) -> str:
+    """Indian financial year label (April to March), e.g. ``2026-27``."""
+    start = day.year if day.month >= 4 else day.year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+# GST invoice serial numbers may not exceed 16 characters (CGST Rule 46(b)).
+# ``PREFIX/FYFY/NNNNN`` leaves five for the store prefix.
+MAX_INVOICE_NUMBER_LENGTH = 16
+
+
+def format_invoice_number(prefix: str, fy: str, number: int) -> str:
+    invoice_number = f"{prefix}/{fy[2:4]}{fy[5:7]}/{number:05d}"
+    if len(invoice_number) > MAX_INVOICE_NUMBER_LENGTH:
+        raise BusinessLogicError(
+            f"Invoice number {invoice_number} exceeds the GST limit of {MAX_INVOICE_NUMBER_LENGTH} characters; "
+            "shorten the store's invoice series prefix",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            error_code="invoice-number-too-long",
+        )
+    return invoice_number
+
+
+async def _reserve(db: AsyncSession, store_id: int, fy: str, count: int) -> tuple[int, str, int]:
+    """Advance the series by ``count`` and return ``(series_id, prefix, first_number)``."""
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    bump = {"next_number": InvoiceSeries.next_number + count, "updated_at": func.now()}
+    row = (
+        await db.execute(
+            update(InvoiceSeries)
+            .where(InvoiceSeries.store_id == store_id, InvoiceSeries.financial_year == fy)
+            .values(bump)
+            .returning(InvoiceSeries.id, InvoiceSeries.prefix, InvoiceSeries.next_number)
+        )
+    ).one_or_none()
+
+    if row is None:
+        # First invoice of the year for this store: open the series. The upsert
+        # keeps two concurrent first postings from both creating it.
+        opening = insert(InvoiceSeries).from_select(
+            ["store_id", "financial_year", "prefix", "next_number"],
+            select(Store.id, literal(fy), Store.invoice_series_prefix, literal(count + 1)).where(Store.id == store_id),
+        )
+        row = (
+            await db.execute(
+                opening.on_conflict_do_update(
+                    constraint="uq_invoice_series_store_id_financial_year", set_=bump
+                ).returning(InvoiceSeries.id, InvoiceSeries.prefix, InvoiceSeries.next_number)
+            )
+        ).one_or_none()
+
+    if row is None:
+        raise BusinessLogicError("Store not found", status_code=status.HTTP_404_NOT_FOUND, error_code="not-found")
+    series_id, prefix, next_number = row
+    return series_id, prefix, next_number - count
+
+
+async def allocate_invoice_numbers(
+    db: AsyncSession, store_id: int, invoice_date: date, count: int = 1
+) -> list[AllocatedNumber]:
+    """Allocate ``count`` consecutive, gap-free numbers in the caller's transaction."""
+    fy = financial_year(invoice_date)
+    series_id, prefix, first = await _reserve(db, store_id, fy, count)
+    return [
+        AllocatedNumber(series_id, fy, number, format_invoice_number(prefix, fy, number))
+        for number in range(first, first + count)
+    ]
+
+
+async def allocate_invoice_number(db: AsyncSession, store_id: int, invoice_date: date) -> AllocatedNumber:
+    (allocated,) = await allocate_invoice_numbers(db, store_id, invoice_date)
+    return allocated
+
+
+@dataclass
+class _Lease:
+    series_id: int
+    prefix: str
+    next_number: int
+    end_number: int
+
+
+class BlockAllocator:
+    """Hands out numbers from per-series ranges leased to this process.
+
+    Each lease costs one short transaction on the series row, so a store
+    posting ``block_size`` invoices touches the hot row once instead of once
+    per invoice. Not gap-free: see the module docstring.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], block_size: int = 100) -> None:
+        self.session_factory = session_factory
+        self.block_size = block_size
+        self._leases: dict[tuple[int, str], _Lease] = {}
+        self._locks: dict[tuple[int, str], asyncio.Lock] = {}
+
+    async def allocate(self, store_id: int, invoice_date: date) -> AllocatedNumber:
+        fy = financial_year(invoice_date)
+        key = (store_id, fy)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            lease = self._leases.get(key)
+            if lease is None or lease.next_number >= lease.end_number:
+                lease = await self._lease(store_id, fy)
+                self._leases[key] = lease
+            number = lease.next_number
+            lease.next_number += 1
+        return AllocatedNumber(lease.series_id, fy, number, format_invoice_number(lease.prefix, fy, number))
+
+    async def _lease(self, store_id: int, fy: str) -> _Lease:
+        async with self.session_factory() as session:
+            series_id, prefix, first = await _reserve(session, store_id, fy, self.block_size)
+            await session.commit()
+        return _Lease(series_id, prefix, first, first + self.block_size)
@@ -0,0 +1,142 @@
+"""Invoice arithmetic.
+
+Amounts are converted to integer paise (and quantities to thousandths, tax
+rates to basis points) on the way in and back to ``Decimal`` on the way out,
+so the per-line loop is plain integer maths. Rounding follows the SRS: each
+line amount and each line's tax is rounded half-up to the paisa, and invoice
+totals are sums of the rounded lines.
+
+    grand_total = subtotal + tax_total - discount_total - package_applied_total
+"""
+from collections.abc import Hashable, Iterable, Mapping
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import TypeVar
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+
+PAISE_PER_RUPEE = 100
+QTY_SCALE = 1000  # qty is numeric(12, 3)
+RATE_SCALE = 100 * 100  # tax_rate is a percentage with two decimals
+
+
+@dataclass(frozen=True)
+class LineInput:
+    item_id: int
+    qty: Decimal
+    price: Decimal
+    tax_rate: Decimal
+    order_item_id: int | None = None
+
+
+@dataclass(frozen=True)
+class ComputedLine:
+    item_id: int
+    order_item_id: int | None
+    qty: Decimal
+    price: Decimal
+    tax_rate: Decimal
+    line_amount: Decimal
+    line_tax: Decimal
+    line_total: Decimal
+
+
+@dataclass(frozen=True)
+class InvoiceTotals:
+    subtotal: Decimal
+    tax_total: Decimal
+    discount_total: Decimal
+    package_applied_total: Decimal
+    grand_total: Decimal
+
+
+@dataclass(frozen=True)
+class ComputedInvoice:
+    lines: list[ComputedLine]
+    totals: InvoiceTotals
+
+
+def div_half_up(numerator: int, denominator: int) -> int:
+    """Integer division rounding halves away from zero, like ``ROUND_HALF_UP``."""
+    quotient, remainder = divmod(abs(numerator), denominator)
+    if 2 * remainder >= denominator:
+        quotient += 1
+    return quotient if numerator >= 0 else -quotient
+
+
+def to_units(value: Decimal, scale: int) -> int:
+    """Exact scaled integer for ``value``; raises if it has more precision than ``scale`` allows."""
+    scaled = value * scale
+    units = int(scaled)
+    if units != scaled:
+        raise ValueError(f"{value} has more precision than 1/{scale}")
+    return units
+
+
+def from_paise(paise: int) -> Decimal:
+    return Decimal(paise).scaleb(-2)
+
+
+def compute_invoice(
+    lines: Iterable[LineInput],
+    discount: Decimal = Decimal(0),
+    package_balance: Decimal = Decimal(0),
+) -> ComputedInvoice:
+    """Compute invoice lines and totals.
+
+    ``discount`` is taken off the taxed amount and may not exceed it.
+    ``package_balance`` is what the customer's package can cover; only as
+    much as the invoice still owes is applied, so the grand total never goes
+    negative.
+    """
+    computed: list[ComputedLine] = []
+    subtotal = 0
+    tax_total = 0
+    for line in lines:
+        amount = div_half_up(to_units(line.qty, QTY_SCALE) * to_units(line.price, PAISE_PER_RUPEE), QTY_SCALE)
+        tax = div_half_up(amount * to_units(line.tax_rate, 100), RATE_SCALE)
+        subtotal += amount
+        tax_total += tax
+        computed.append(
+            ComputedLine(
+                item_id=line.item_id,
+                order_item_id=line.order_item_id,
+                qty=line.qty,
+                price=line.price,
+                tax_rate=line.tax_rate,
+                line_amount=from_paise(amount),
+                line_tax=from_paise(tax),
+                line_total=from_paise(amount + tax),
+            )
+        )
+
+    gross = subtotal + tax_total
+    discount_paise = to_units(discount, PAISE_PER_RUPEE)
+    if discount_paise < 0 or discount_paise > gross:
+        raise ValueError("discount must be between zero and the taxed total")
+    package_paise = min(max(to_units(package_balance, PAISE_PER_RUPEE), 0), gross - discount_paise)
+
+    return ComputedInvoice(
+        lines=computed,
+        totals=InvoiceTotals(
+            subtotal=from_paise(subtotal),
+            tax_total=from_paise(tax_total),
+            discount_total=from_paise(discount_paise),
+            package_applied_total=from_paise(package_paise),
+            grand_total=from_paise(gross - discount_paise - package_paise),
+        ),
+    )
+
+
+def compute_invoices(
+    batch: Mapping[KeyT, Iterable[LineInput]],
+    discounts: Mapping[KeyT, Decimal] | None = None,
+    package_balances: Mapping[KeyT, Decimal] | None = None,
+) -> dict[KeyT, ComputedInvoice]:
+    """``compute_invoice`` for many invoices at once, keyed like ``batch``."""
+    discounts = discounts or {}
+    package_balances = package_balances or {}
+    return {
+        key: compute_invoice(lines, discounts.get(key, Decimal(0)), package_balances.get(key, Decimal(0)))
+        for key, lines in batch.items()
+    }
@@ -0,0 +1,235 @@
+"""Draft invoices from orders, and posting them.
+
+``invoices_from_orders`` handles a whole batch in a fixed number of
+statements: one ``UPDATE … RETURNING`` that claims the orders (so two
+concurrent batches can never invoice the same order), one query for all of
+their lines, one multi-row insert for the invoice headers and one for the
+invoice lines. Totals come from ``invoice_totals``. Two more statements
+post the batch to the store-day closing snapshots and to the daily KPI
+outbox.
+
+``post_invoices`` gives drafts their gap-free series numbers from
+``invoice_series`` and marks them posted, in the caller's transaction.
+"""
+from collections import defaultdict
+from collections.abc import Collection, Mapping, Sequence
+from datetime import date
+from decimal import Decimal
+
+from fastapi import status
+from sqlalchemy import BigInteger, String, column, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import BusinessLogicError
+from app.db.persistence import insert_many, insert_many_returning
+from app.models.invoice import Invoice
+from app.models.invoice_line import InvoiceLine
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.store import Store
+from app.services.closing import ClosingDeltas, apply_closing_deltas
+from app.services.invoice_series import allocate_invoice_numbers, financial_year
+from app.services.invoice_totals import LineInput, compute_invoices
+from app.services.kpi_rollup import KpiDeltas, record_kpi_deltas
+from app.services.store_calendar import DEFAULT_CLOSING_CUTOFF, current_business_date
+
+UNINVOICEABLE_ORDER_STATUSES = ("invoiced", "cancelled")
+
+
+async def invoices_from_orders(
+    db: AsyncSession,
+    company_id: int,
+    order_ids: Sequence[int],
+    invoice_date: date | None,
+    discounts: Mapping[int, Decimal] | None = None,
+    store_ids: Collection[int] | None = None,
+) -> tuple[list[Invoice], list[int]]:
+    """Create one draft invoice per order in the caller's transaction.
+
+    Without an ``invoice_date`` each invoice is dated its store's current
+    business day. ``store_ids`` limits the batch to those stores. Returns the
+    invoices in ``order_ids`` order and the ids of orders that were skipped.
+    Raises 409 if an invoice's date has been closed for its store.
+    """
+    claim = update(Order).where(
+        Order.id.in_(order_ids),
+        Order.company_id == company_id,
+        Order.status.notin_(UNINVOICEABLE_ORDER_STATUSES),
+    )
+    if store_ids is not None:
+        claim = claim.where(Order.store_id.in_(store_ids))
+    order_store = Store.id == Order.store_id
+    claimed: dict[int, tuple[int, int]] = {}
+    invoice_dates: dict[int, date] = {}
+    for order_id, store_id, customer_id, timezone, cutoff in (
+        await db.execute(
+            claim.values(status="invoiced", version=Order.version + 1).returning(
+                Order.id,
+                Order.store_id,
+                Order.customer_id,
+                select(Store.timezone).where(order_store).scalar_subquery(),
+                select(Store.closing_cutoff).where(order_store).scalar_subquery(),
+            )
+        )
+    ).tuples():
+        claimed[order_id] = (store_id, customer_id)
+        invoice_dates[order_id] = invoice_date or current_business_date(timezone, cutoff or DEFAULT_CLOSING_CUTOFF)
+    ordered_ids = [order_id for order_id in dict.fromkeys(order_ids) if order_id in claimed]
+    skipped = [order_id for order_id in dict.fromkeys(order_ids) if order_id not in claimed]
+    if not ordered_ids:
+        return [], skipped
+
+    batch: dict[int, list[LineInput]] = {order_id: [] for order_id in ordered_ids}
+    for order_id, order_item_id, item_id, qty, unit_price, tax_rate in (
+        await db.execute(
+            select(
+                OrderItem.order_id,
+                OrderItem.id,
+                OrderItem.item_id,
+                OrderItem.qty,
+                OrderItem.unit_price,
+                OrderItem.tax_rate,
+            )
+            .where(OrderItem.order_id.in_(ordered_ids))
+            .order_by(OrderItem.order_id, OrderItem.id)
+        )
+    ).tuples():
+        batch[order_id].append(LineInput(item_id, qty, unit_price, tax_rate, order_item_id))
+
+    try:
+        computed = compute_invoices(batch, discounts)
+    except ValueError as exc:
+        raise BusinessLogicError(
+            str(exc), status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, error_code="invalid-discount"
+        ) from exc
+
+    # Before the inserts, so a closed day fails fast.
+    closing = ClosingDeltas()
+    for order_id in ordered_ids:
+        totals = computed[order_id].totals
+        closing.add(
+            company_id,
+            claimed[order_id][0],
+            invoice_dates[order_id],
+            unposted_invoices=1,
+            unposted_invoices_total=totals.grand_total,
+            package_adjustments=totals.package_applied_total,
+        )
+    await apply_closing_deltas(db, closing)
+
+    invoices = await insert_many_returning(
+        db,
+        Invoice,
+        [
+            {
+                "company_id": company_id,
+                "store_id": claimed[order_id][0],
+                "customer_id": claimed[order_id][1],
+                "order_id": order_id,
+                "invoice_date": invoice_dates[order_id],
+                "status": "draft",
+                "subtotal": computed[order_id].totals.subtotal,
+                "tax_total": computed[order_id].totals.tax_total,
+                "discount_total": computed[order_id].totals.discount_total,
+                "package_applied_total": computed[order_id].totals.package_applied_total,
+                "grand_total": computed[order_id].totals.grand_total,
+            }
+            for order_id in ordered_ids
+        ],
+    )
+    await insert_many(
+        db,
+        InvoiceLine,
+        [
+            {
+                "invoice_id": invoice.id,
+                "order_item_id": line.order_item_id,
+                "item_id": line.item_id,
+                "qty": line.qty,
+                "price": line.price,
+                "tax_rate": line.tax_rate,
+                "line_tax": line.line_tax,
+                "line_total": line.line_total,
+            }
+            for order_id, invoice in zip(ordered_ids, invoices, strict=True)
+            for line in computed[order_id].lines
+        ],
+    )
+    deltas = KpiDeltas()
+    for order_id in ordered_ids:
+        totals = computed[order_id].totals
+        deltas.add(
+            company_id,
+            claimed[order_id][0],
+            invoice_dates[order_id],
+            invoices=1,
+            sales_gross=totals.subtotal + totals.tax_total,
+            sales_net=totals.subtotal + totals.tax_total - totals.discount_total,
+        )
+    await record_kpi_deltas(db, deltas)
+    return invoices, skipped
+
+
+async def post_invoices(
+    db: AsyncSession,
+    company_id: int,
+    invoice_ids: Sequence[int],
+    store_ids: Collection[int] | None = None,
+) -> tuple[list[Invoice], list[int]]:
+    """Number and post draft invoices in the caller's transaction.
+
+    Numbers are consecutive per store and financial year, in invoice date
+    and id order, and are only consumed if the transaction commits, so
+    commit straight after. ``store_ids`` limits the batch to those stores.
+    Returns the posted invoices in ``invoice_ids`` order and the ids that
+    were skipped (not found or not drafts). Raises 409 if an invoice's date
+    has been closed for its store, and 422 if a store's series prefix makes
+    numbers longer than GST allows.
+    """
+    drafts = select(Invoice.id, Invoice.store_id, Invoice.invoice_date, Invoice.grand_total).where(
+        Invoice.id.in_(invoice_ids), Invoice.company_id == company_id, Invoice.status == "draft"
+    )
+    if store_ids is not None:
+        drafts = drafts.where(Invoice.store_id.in_(store_ids))
+    # Locked in a fixed order so overlapping batches wait rather than deadlock.
+    rows = (
+        await db.execute(drafts.order_by(Invoice.store_id, Invoice.invoice_date, Invoice.id).with_for_update())
+    ).tuples().all()
+    if not rows:
+        return [], list(dict.fromkeys(invoice_ids))
+
+    closing = ClosingDeltas()
+    series: dict[tuple[int, str], list[tuple[int, date]]] = defaultdict(list)
+    for invoice_id, store_id, invoice_date, grand_total in rows:
+        closing.add(
+            company_id, store_id, invoice_date, unposted_invoices=-1, unposted_invoices_total=-grand_total
+        )
+        series[(store_id, financial_year(invoice_date))].append((invoice_id, invoice_date))
+    await apply_closing_deltas(db, closing)
+
+    numbers: list[tuple[int, str]] = []
+    for (store_id, _), invoices in series.items():
+        allocated = await allocate_invoice_numbers(db, store_id, invoices[0][1], count=len(invoices))
+        numbers.extend(
+            (invoice_id, number.invoice_number)
+            for (invoice_id, _), number in zip(invoices, allocated, strict=True)
+        )
+
+    batch = values(column("id", BigInteger), column("invoice_no", String), name="batch").data(numbers)
+    posted = {
+        invoice.id: invoice
+        for invoice in (
+            await db.execute(
+                update(Invoice)
+                .where(Invoice.id == batch.c.id)
+                .values(invoice_no=batch.c.invoice_no, status="posted", version=Invoice.version + 1)
+                .returning(Invoice)
+                .execution_options(populate_existing=True)
+            )
+        ).scalars()
+    }
+    ordered_ids = list(dict.fromkeys(invoice_ids))
+    return (
+        [posted[invoice_id] for invoice_id in ordered_ids if invoice_id in posted],
+        [invoice_id for invoice_id in ordered_ids if invoice_id not in posted],
+    )
@@ -0,0 +1,360 @@
+"""Incrementally maintained daily store KPIs.
+
+Write paths do not touch ``daily_store_kpi`` directly. They describe what
+changed with ``KpiDeltas`` and append it to the ``kpi_deltas`` outbox in
+their own transaction (``record_kpi_deltas``), so a busy store never queues
+on a single hot rollup row. ``fold_kpi_deltas`` periodically moves the
+outbox into the rollup with one ``DELETE … RETURNING`` feeding an
+``INSERT … ON CONFLICT DO UPDATE``. It skips locked deltas, so several
+workers can fold at once.
+
+Readers (``store_kpis``) add the few unfolded deltas to the rollup rows, so
+totals are exact the moment a write commits. A dashboard costs one row per
+store-day, however many orders and invoices lie behind it.
+
+Rows are keyed by store and the store's business date. Orders and invoices
+carry their date already. Timestamps such as payment times are converted
+with ``app.services.store_calendar.business_date``.
+
+``rebuild_kpis`` recomputes history from the source tables in parallel
+store/date-range chunks.
+
+Callers that commit KPI changes bump the company's ``kpi_versions`` counter
+afterwards, which retires cached dashboard results.
+"""
+import asyncio
+from collections.abc import Collection, Sequence
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, ClassVar
+
+from sqlalchemy import Numeric, Select, and_, delete, exists, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import aliased
+
+from app.core.logging import get_logger
+from app.core.version_counter import VersionCounter
+from app.db.persistence import insert_many
+from app.models.daily_store_kpi import DailyStoreKpi
+from app.models.invoice import Invoice
+from app.models.kpi_delta import KpiDelta
+from app.models.order import Order
+from app.models.payment import Payment
+from app.models.store import Store
+
+logger = get_logger(__name__)
+
+kpi_versions = VersionCounter("kpi_version")
+
+COUNT_METRICS = ("orders", "invoices", "new_customers")
+AMOUNT_METRICS = ("sales_gross", "sales_net", "receipts", "expenses_total")
+METRICS = ("orders", "invoices", "sales_gross", "sales_net", "receipts", "new_customers", "expenses_total")
+
+FOLD_BATCH_SIZE = 5000
+REBUILD_CHUNK_DAYS = 31
+REBUILD_ATTEMPTS = 5
+_RETRYABLE_SQLSTATES = {"40001", "40P01"}  # serialization failure, deadlock
+
+
+class StoreDayDeltas:
+    """Changes to per store-day counters from one unit of work, merged per store-day.
+
+    Subclasses name the date column and the counters. ``rows`` comes out in
+    (store, date) order, so concurrent upserts lock rows in the same order.
+    """
+
+    date_column: ClassVar[str]
+    counts: ClassVar[tuple[str, ...]]
+    amounts: ClassVar[tuple[str, ...]]
+
+    def __init__(self) -> None:
+        self._rows: dict[tuple[int, date, int], dict[str, Any]] = {}
+
+    def add(self, company_id: int, store_id: int, day: date, **changes: int | Decimal) -> None:
+        unknown = changes.keys() - {*self.counts, *self.amounts}
+        if unknown:
+            raise ValueError(f"Unknown {type(self).__name__} fields: {', '.join(sorted(unknown))}")
+        row = self._rows.get((store_id, day, company_id))
+        if row is None:
+            row = {"company_id": company_id, "store_id": store_id, self.date_column: day}
+            row.update(dict.fromkeys(self.counts, 0))
+            row.update(dict.fromkeys(self.amounts, Decimal(0)))
+            self._rows[(store_id, day, company_id)] = row
+        for field, value in changes.items():
+            row[field] += value
+
+    def rows(self) -> list[dict[str, Any]]:
+        fields = (*self.counts, *self.amounts)
+        return [
+            row for _, row in sorted(self._rows.items(), key=lambda item: item[0])
+            if any(row[field] for field in fields)
+        ]
+
+    def __bool__(self) -> bool:
+        return bool(self.rows())
+
+
+class KpiDeltas(StoreDayDeltas):
+    """Changes to daily KPIs, for ``record_kpi_deltas``."""
+
+    date_column = "kpi_date"
+    counts = COUNT_METRICS
+    amounts = AMOUNT_METRICS
+
+
+async def record_kpi_deltas(db: AsyncSession, deltas: KpiDeltas) -> None:
+    """Append ``deltas`` to the outbox in the caller's transaction (one statement)."""
+    await insert_many(db, KpiDelta, deltas.rows())
+
+
+async def fold_kpi_deltas(db: AsyncSession, limit: int = FOLD_BATCH_SIZE) -> int:
+    """Move up to ``limit`` outbox rows into ``daily_store_kpi``; returns the number of store-days updated."""
+    batch = select(KpiDelta.id).order_by(KpiDelta.id).limit(limit).with_for_update(skip_locked=True)
+    moved = (
+        delete(KpiDelta)
+        .where(KpiDelta.id.in_(batch))
+        .returning(KpiDelta.company_id, KpiDelta.store_id, KpiDelta.kpi_date, *(getattr(KpiDelta, m) for m in METRICS))
+        .cte("moved")
+    )
+    totals = (
+        select(moved.c.company_id, moved.c.store_id, moved.c.kpi_date, *(func.sum(moved.c[m]) for m in METRICS))
+        .group_by(moved.c.company_id, moved.c.store_id, moved.c.kpi_date)
+        # A consistent lock order keeps concurrent folds from deadlocking.
+        .order_by(moved.c.store_id, moved.c.kpi_date)
+    )
+    stmt = pg_insert(DailyStoreKpi).from_select(["company_id", "store_id", "kpi_date", *METRICS], totals)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_daily_store_kpi_store_id_kpi_date",
+        set_={**{m: getattr(DailyStoreKpi, m) + stmt.excluded[m] for m in METRICS}, "updated_at": func.now()},
+    )
+    return len((await db.execute(stmt.returning(DailyStoreKpi.id))).all())
+
+
+async def fold_all_kpi_deltas(session_factory: async_sessionmaker[AsyncSession]) -> int:
+    """Fold until the outbox is drained, committing after every batch."""
+    folded = 0
+    while True:
+        async with session_factory() as db:
+            updated = await fold_kpi_deltas(db)
+            await db.commit()
+        folded += updated
+        if updated == 0:
+            return folded
+
+
+@dataclass(frozen=True)
+class StoreKpis:
+    store_id: int
+    kpi_date: date | None
+    orders: int
+    invoices: int
+    sales_gross: Decimal
+    sales_net: Decimal
+    receipts: Decimal
+    new_customers: int
+    expenses_total: Decimal
+
+
+async def store_kpis(
+    db: AsyncSession,
+    company_id: int,
+    date_from: date,
+    date_to: date,
+    store_ids: Collection[int] | None = None,
+    by_day: bool = False,
+) -> list[StoreKpis]:
+    """KPI totals per store (or per store-day) between two dates inclusive, including unfolded deltas."""
+
+    def source(model: type[DailyStoreKpi] | type[KpiDelta]) -> Select[Any]:
+        query = select(model.store_id, model.kpi_date, *(getattr(model, m) for m in METRICS)).where(
+            model.company_id == company_id, model.kpi_date.between(date_from, date_to)
+        )
+        if store_ids is not None:
+            query = query.where(model.store_id.in_(store_ids))
+        return query
+
+    combined = union_all(source(DailyStoreKpi), source(KpiDelta)).subquery()
+    keys = [combined.c.store_id, combined.c.kpi_date] if by_day else [combined.c.store_id]
+    rows = await db.execute(
+        select(*keys, *(func.sum(combined.c[m]) for m in METRICS)).group_by(*keys).order_by(*keys)
+    )
+    return [
+        StoreKpis(row[0], row[1] if by_day else None, *row[len(keys):])
+        for row in rows.tuples()
+    ]
+
+
+@dataclass(frozen=True)
+class RebuildChunk:
+    company_id: int
+    store_id: int
+    date_from: date
+    date_to: date
+
+
+def rebuild_chunks(
+    stores: Sequence[tuple[int, int]], date_from: date, date_to: date, days: int = REBUILD_CHUNK_DAYS
+) -> list[RebuildChunk]:
+    """Split ``(company_id, store_id)`` pairs and a date range into independent rebuild chunks."""
+    chunks: list[RebuildChunk] = []
+    for company_id, store_id in stores:
+        start = date_from
+        while start <= date_to:
+            end = min(start + timedelta(days=days - 1), date_to)
+            chunks.append(RebuildChunk(company_id, store_id, start, end))
+            start = end + timedelta(days=1)
+    return chunks
+
+
+def _metric_columns(**given: Any) -> list[Any]:
+    """All metric columns in ``METRICS`` order, zero unless given."""
+    return [
+        given[m].label(m) if m in given
+        else literal(0).label(m) if m in COUNT_METRICS
+        else literal(0, Numeric(16, 2)).label(m)
+        for m in METRICS
+    ]
+
+
+def _source_totals(chunk: RebuildChunk) -> Select[Any]:
+    """Per-day KPIs for one chunk, computed from the source tables."""
+    day = Order.order_date.label("kpi_date")
+    orders = (
+        select(day, *_metric_columns(orders=func.count()))
+        .where(
+            Order.store_id == chunk.store_id,
+            Order.order_date.between(chunk.date_from, chunk.date_to),
+            Order.status != "cancelled",
+        )
+        .group_by(Order.order_date)
+    )
+    earlier = aliased(Order)
+    new_customers = (
+        select(day, *_metric_columns(new_customers=func.count()))
+        .where(
+            Order.store_id == chunk.store_id,
+            Order.order_date.between(chunk.date_from, chunk.date_to),
+            ~exists().where(
+                earlier.customer_id == Order.customer_id,
+                (earlier.order_date < Order.order_date)
+                | and_(earlier.order_date == Order.order_date, earlier.id < Order.id),
+            ),
+        )
+        .group_by(Order.order_date)
+    )
+    gross = func.sum(Invoice.subtotal + Invoice.tax_total)
+    invoices = (
+        select(
+            Invoice.invoice_date.label("kpi_date"),
+            *_metric_columns(
+                invoices=func.count(), sales_gross=gross, sales_net=gross - func.sum(Invoice.discount_total)
+            ),
+        )
+        .where(
+            Invoice.store_id == chunk.store_id,
+            Invoice.invoice_date.between(chunk.date_from, chunk.date_to),
+            Invoice.status != "cancelled",
+        )
+        .group_by(Invoice.invoice_date)
+    )
+    receipts = (
+        select(Payment.payment_date.label("kpi_date"), *_metric_columns(receipts=func.sum(Payment.amount)))
+        .where(
+            Payment.store_id == chunk.store_id,
+            Payment.payment_date.between(chunk.date_from, chunk.date_to),
+            Payment.mode != "package_adjust",
+        )
+        .group_by(Payment.payment_date)
+    )
+    combined = union_all(orders, new_customers, invoices, receipts).subquery()
+    return (
+        select(
+            literal(chunk.company_id),
+            literal(chunk.store_id),
+            combined.c.kpi_date,
+            *(func.sum(combined.c[m]) for m in METRICS),
+        )
+        .group_by(combined.c.kpi_date)
+    )
+
+
+async def rebuild_chunk(db: AsyncSession, chunk: RebuildChunk) -> int:
+    """Replace one chunk's rollup rows with totals recomputed from the source tables.
+
+    Run it in a REPEATABLE READ transaction. Outbox rows already reflected
+    in the snapshot are deleted along with the old rollup rows. Rows
+    committed after the snapshot are left for the next fold. A fold racing
+    on the same rows makes this transaction fail with a serialization
+    error, so nothing is counted twice.
+    """
+    in_chunk = (
+        DailyStoreKpi.store_id == chunk.store_id,
+        DailyStoreKpi.kpi_date.between(chunk.date_from, chunk.date_to),
+    )
+    await db.execute(
+        delete(KpiDelta).where(
+            KpiDelta.store_id == chunk.store_id, KpiDelta.kpi_date.between(chunk.date_from, chunk.date_to)
+        )
+    )
+    await db.execute(delete(DailyStoreKpi).where(*in_chunk))
+    inserted = await db.execute(
+        pg_insert(DailyStoreKpi)
+        .from_select(["company_id", "store_id", "kpi_date", *METRICS], _source_totals(chunk))
+        .returning(DailyStoreKpi.id)
+    )
+    return len(inserted.all())
+
+
+def _is_retryable(exc: DBAPIError) -> bool:
+    return getattr(exc.orig, "sqlstate", None) in _RETRYABLE_SQLSTATES
+
+
+async def _rebuild_with_retry(session_factory: async_sessionmaker[AsyncSession], chunk: RebuildChunk) -> int:
+    for attempt in range(1, REBUILD_ATTEMPTS + 1):
+        async with session_factory() as db:
+            await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            try:
+                rows = await rebuild_chunk(db, chunk)
+                await db.commit()
+                return rows
+            except DBAPIError as exc:
+                await db.rollback()
+                if attempt == REBUILD_ATTEMPTS or not _is_retryable(exc):
+                    raise
+                logger.info(f"Retrying KPI rebuild of store {chunk.store_id} from {chunk.date_from}: {exc.orig}")
+                await asyncio.sleep(0.1 * attempt)
+    raise AssertionError("unreachable")
+
+
+async def rebuild_kpis(
+    session_factory: async_sessionmaker[AsyncSession],
+    date_from: date,
+    date_to: date,
+    company_id: int | None = None,
+    store_ids: Collection[int] | None = None,
+    workers: int = 4,
+) -> int:
+    """Recompute ``daily_store_kpi`` for a date range, ``workers`` chunks at a time; returns rows written."""
+    async with session_factory() as db:
+        query = select(Store.company_id, Store.id).order_by(Store.id)
+        if company_id is not None:
+            query = query.where(Store.company_id == company_id)
+        if store_ids is not None:
+            query = query.where(Store.id.in_(store_ids))
+        stores = list((await db.execute(query)).tuples().all())
+
+    chunks = rebuild_chunks(stores, date_from, date_to)
+    slots = asyncio.Semaphore(workers)
+
+    async def run(chunk: RebuildChunk) -> int:
+        async with slots:
+            return await _rebuild_with_retry(session_factory, chunk)
+
+    written = await asyncio.gather(*(run(chunk) for chunk in chunks))
+    for company in sorted({company for company, _ in stores}):
+        await kpi_versions.bump(company)
+    logger.info(f"Rebuilt {sum(written)} store-days in {len(chunks)} chunks for {len(stores)} stores")
+    return sum(written)
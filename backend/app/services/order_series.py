@@ -0,0 +1,76 @@
+"""Per-store order numbering.
+
+Order numbers only need to be unique per store, so they are handed out the
+way ``invoice_series.BlockAllocator`` hands out gap-tolerant invoice numbers:
+``OrderNumberAllocator`` leases a range from the store's ``order_series`` row
+in a short transaction of its own and issues numbers from memory. Neither the
+series row nor the store row is held for the length of an order's
+transaction; numbers left in a lease, or taken by an order that rolls back,
+are never issued.
+"""
+import asyncio
+from dataclasses import dataclass
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.order_series import OrderSeries
+
+
+def format_order_number(prefix: str, number: int) -> str:
+    return f"{prefix}-{number:06d}"
+
+
+async def _reserve(db: AsyncSession, store_id: int, count: int) -> int:
+    """Advance the store's series by ``count`` and return the first reserved number."""
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    # The series row is opened by a store's first order; the upsert keeps two
+    # concurrent first leases from both creating it.
+    next_number = (
+        await db.execute(
+            insert(OrderSeries)
+            .values(store_id=store_id, next_number=count + 1)
+            .on_conflict_do_update(
+                index_elements=[OrderSeries.store_id],
+                set_={"next_number": OrderSeries.next_number + count, "updated_at": func.now()},
+            )
+            .returning(OrderSeries.next_number)
+        )
+    ).scalar_one()
+    return next_number - count
+
+
+@dataclass
+class _Lease:
+    next_number: int
+    end_number: int
+
+
+class OrderNumberAllocator:
+    """Hands out order numbers from per-store ranges leased to this process."""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], block_size: int = 50) -> None:
+        self.session_factory = session_factory
+        self.block_size = block_size
+        self._leases: dict[int, _Lease] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    async def allocate(self, store_id: int) -> int:
+        lock = self._locks.setdefault(store_id, asyncio.Lock())
+        async with lock:
+            lease = self._leases.get(store_id)
+            if lease is None or lease.next_number >= lease.end_number:
+                lease = await self._lease(store_id)
+                self._leases[store_id] = lease
+            number = lease.next_number
+            lease.next_number += 1
+        return number
+
+    async def _lease(self, store_id: int) -> _Lease:
+        async with self.session_factory() as session:
+            first = await _reserve(session, store_id, self.block_size)
+            await session.commit()
+        return _Lease(first, first + self.block_size)
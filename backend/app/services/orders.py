@@ -0,0 +1,215 @@
+"""Order entry.
+
+``create_order`` validates every line in one pass against set-based
+prefetches (items, service types, customer addresses) and the in-memory
+pricing index, then writes the order header and all of its lines with two
+``INSERT … RETURNING`` statements, plus one row for the daily KPI outbox.
+The statement count does not grow with the number of lines. Order numbers
+come from ``app.services.order_series``, which never locks the store row.
+"""
+from datetime import time
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, NamedTuple
+
+from fastapi import status
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.exceptions import BusinessLogicError
+from app.db.persistence import insert_many_returning, insert_returning, mark_loaded, update_returning
+from app.models.customer import Customer
+from app.models.customer_address import CustomerAddress
+from app.models.item import Item
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.service_type import ServiceType
+from app.models.store import Store
+from app.schemas.order import OrderCreate
+from app.services.kpi_rollup import KpiDeltas, record_kpi_deltas
+from app.services.order_series import OrderNumberAllocator, format_order_number
+from app.services.pricing import pricing_cache
+from app.services.store_calendar import DEFAULT_CLOSING_CUTOFF, current_business_date
+
+PAISE = Decimal("0.01")
+
+
+def line_amount(qty: Decimal, unit_price: Decimal) -> Decimal:
+    return (qty * unit_price).quantize(PAISE, rounding=ROUND_HALF_UP)
+
+
+class CustomerContext(NamedTuple):
+    address_ids: set[int]
+    first_order: bool
+    store_timezone: str
+    store_cutoff: time
+    order_prefix: str
+
+
+async def _customer_context(
+    db: AsyncSession, company_id: int, customer_id: int, store_id: int, address_ids: set[int]
+) -> CustomerContext:
+    """Check the customer and its addresses in one query, along with what the KPI rollup needs.
+
+    Returns which of ``address_ids`` belong to the customer, whether this is
+    its first order, and the store's timezone, closing cutoff and order number
+    prefix. Raises 404 if the customer is not in the company or the store is
+    not an active store of the company.
+    """
+    in_company = (Store.id == store_id, Store.company_id == company_id, Store.status == "active")
+    rows = (
+        await db.execute(
+            select(
+                Customer.id,
+                CustomerAddress.id,
+                select(Store.timezone).where(*in_company).scalar_subquery(),
+                select(Store.closing_cutoff).where(*in_company).scalar_subquery(),
+                select(Store.invoice_series_prefix).where(*in_company).scalar_subquery(),
+                exists().where(Order.customer_id == Customer.id),
+            )
+            .outerjoin(
+                CustomerAddress,
+                and_(CustomerAddress.customer_id == Customer.id, CustomerAddress.id.in_(address_ids)),
+            )
+            .where(Customer.id == customer_id, Customer.company_id == company_id)
+        )
+    ).all()
+    if not rows:
+        raise BusinessLogicError("Customer not found", status_code=status.HTTP_404_NOT_FOUND, error_code="not-found")
+    _, _, timezone, cutoff, prefix, has_orders = rows[0]
+    if prefix is None:
+        raise BusinessLogicError("Store not found", status_code=status.HTTP_404_NOT_FOUND, error_code="not-found")
+    return CustomerContext(
+        address_ids={address_id for _, address_id, *_ in rows if address_id is not None},
+        first_order=not has_orders,
+        store_timezone=timezone,
+        store_cutoff=cutoff or DEFAULT_CLOSING_CUTOFF,
+        order_prefix=prefix,
+    )
+
+
+async def create_order(
+    db: AsyncSession, company_id: int, order_data: OrderCreate, order_numbers: OrderNumberAllocator
+) -> Order:
+    """Validate, price and insert an order in the caller's transaction.
+
+    Every invalid line is reported at once in a 422 with an ``errors`` list.
+    The order date defaults to the store's current business day.
+    """
+    lines = order_data.items
+
+    item_ids = {line.item_id for line in lines}
+    service_type_ids = {line.service_type_id for line in lines if line.service_type_id is not None}
+    address_ids = {
+        address_id
+        for address_id in (order_data.pickup_address_id, order_data.delivery_address_id)
+        if address_id is not None
+    }
+
+    tax_rates: dict[int, Decimal] = dict(
+        (
+            await db.execute(
+                select(Item.id, Item.tax_rate).where(
+                    Item.id.in_(item_ids), Item.company_id == company_id, Item.status == "active"
+                )
+            )
+        ).tuples().all()
+    )
+    known_service_types: set[int] = set()
+    if service_type_ids:
+        known_service_types = set(
+            (
+                await db.execute(
+                    select(ServiceType.id).where(ServiceType.id.in_(service_type_ids), ServiceType.active.is_(True))
+                )
+            ).scalars().all()
+        )
+    customer = await _customer_context(db, company_id, order_data.customer_id, order_data.store_id, address_ids)
+    order_date = order_data.order_date or current_business_date(customer.store_timezone, customer.store_cutoff)
+
+    index = await pricing_cache.index_for(db, company_id)
+    prices = index.resolve_many(item_ids, order_data.customer_id, order_date)
+
+    errors: list[dict[str, Any]] = []
+    for field in ("pickup_address_id", "delivery_address_id"):
+        address_id = getattr(order_data, field)
+        if address_id is not None and address_id not in customer.address_ids:
+            errors.append({"field": field, "message": "Address does not belong to this customer"})
+    for position, line in enumerate(lines):
+        if line.item_id not in tax_rates:
+            errors.append({"line": position, "field": "item_id", "message": "Item not found or inactive"})
+        elif line.item_id not in prices:
+            errors.append({"line": position, "field": "item_id", "message": f"No rate effective on {order_date}"})
+        if line.service_type_id is not None and line.service_type_id not in known_service_types:
+            errors.append({"line": position, "field": "service_type_id", "message": "Service type not found"})
+    if errors:
+        raise BusinessLogicError(
+            "Order has invalid lines",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            error_code="invalid-order",
+            extra={"errors": errors},
+        )
+
+    order = await insert_returning(
+        db,
+        Order,
+        {
+            "company_id": company_id,
+            "order_no": format_order_number(customer.order_prefix, await order_numbers.allocate(order_data.store_id)),
+            "order_date": order_date,
+            **order_data.model_dump(exclude={"items", "order_date"}),
+        },
+    )
+    items = await insert_many_returning(
+        db,
+        OrderItem,
+        [
+            {
+                "order_id": order.id,
+                "item_id": line.item_id,
+                "service_type_id": line.service_type_id,
+                "item_rate_id": prices[line.item_id].rate_id,
+                "qty": line.qty,
+                "unit_price": prices[line.item_id].rate,
+                "tax_rate": tax_rates[line.item_id],
+                "line_amount": line_amount(line.qty, prices[line.item_id].rate),
+                "remarks": line.remarks,
+            }
+            for line in lines
+        ],
+    )
+    deltas = KpiDeltas()
+    deltas.add(company_id, order_data.store_id, order_date, orders=1, new_customers=int(customer.first_order))
+    await record_kpi_deltas(db, deltas)
+    mark_loaded(order, items=items)
+    return order
+
+
+async def mark_delivered(
+    db: AsyncSession,
+    company_id: int,
+    order_id: int,
+    expected_version: int | None = None,
+    store_ids: frozenset[int] | None = None,
+) -> Order:
+    """Record that the order has been handed back; 404 if unknown, 409 if cancelled or already delivered."""
+    where = [Order.id == order_id, Order.company_id == company_id]
+    if store_ids is not None:
+        where.append(Order.store_id.in_(store_ids))
+    order = await update_returning(
+        db,
+        Order,
+        [*where, Order.delivered_at.is_(None), Order.status != "cancelled"],
+        {"delivered_at": func.now()},
+        expected_version=expected_version,
+        options=[selectinload(Order.items)],
+    )
+    if order is None:
+        if (await db.execute(select(Order.id).where(*where))).scalar_one_or_none() is None:
+            raise BusinessLogicError("Order not found", status_code=status.HTTP_404_NOT_FOUND, error_code="not-found")
+        raise BusinessLogicError(
+            "Order is cancelled or already delivered",
+            status_code=status.HTTP_409_CONFLICT,
+            error_code="order-not-deliverable",
+        )
+    return order
@@ -0,0 +1,107 @@
+"""Recording payments against invoices.
+
+``record_payment`` adds the amount to ``invoices.amount_paid`` with a
+guarded ``UPDATE`` (so concurrent payments can never overpay an invoice),
+posts the money to the store-day closing snapshot and the KPI outbox, and
+inserts the payment row, all in the caller's transaction. A payment without
+a date is dated the store's current business day.
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Literal
+
+from fastapi import status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import BusinessLogicError
+from app.db.persistence import insert_returning
+from app.models.invoice import Invoice
+from app.models.payment import Payment
+from app.models.store import Store
+from app.services.closing import ClosingDeltas, apply_closing_deltas
+from app.services.kpi_rollup import KpiDeltas, record_kpi_deltas
+from app.services.store_calendar import DEFAULT_CLOSING_CUTOFF, current_business_date
+
+PaymentMode = Literal["cash", "upi", "card", "package_adjust"]
+
+# Package adjustments are counted when the invoice is drafted, not as receipts.
+PACKAGE_MODE = "package_adjust"
+
+
+async def record_payment(
+    db: AsyncSession,
+    company_id: int,
+    invoice_id: int,
+    amount: Decimal,
+    mode: PaymentMode,
+    payment_date: date | None,
+    txn_ref: str | None = None,
+    notes: str | None = None,
+    received_by: int | None = None,
+    store_ids: frozenset[int] | None = None,
+) -> Payment:
+    """Record one payment; raises 404 for unknown invoices, 409 for cancelled ones and 422 on overpayment."""
+    where = [Invoice.id == invoice_id, Invoice.company_id == company_id]
+    if store_ids is not None:
+        where.append(Invoice.store_id.in_(store_ids))
+    invoice_store = Store.id == Invoice.store_id
+    paid = (
+        await db.execute(
+            update(Invoice)
+            .where(*where, Invoice.status != "cancelled", Invoice.amount_paid + amount <= Invoice.grand_total)
+            .values(amount_paid=Invoice.amount_paid + amount, version=Invoice.version + 1)
+            .returning(
+                Invoice.store_id,
+                select(Store.timezone).where(invoice_store).scalar_subquery(),
+                select(Store.closing_cutoff).where(invoice_store).scalar_subquery(),
+            )
+        )
+    ).one_or_none()
+    if paid is None:
+        current = (
+            await db.execute(select(Invoice.status, Invoice.grand_total - Invoice.amount_paid).where(*where))
+        ).one_or_none()
+        if current is None:
+            raise BusinessLogicError("Invoice not found", status_code=status.HTTP_404_NOT_FOUND, error_code="not-found")
+        if current[0] == "cancelled":
+            raise BusinessLogicError(
+                "Invoice is cancelled", status_code=status.HTTP_409_CONFLICT, error_code="invoice-cancelled"
+            )
+        raise BusinessLogicError(
+            "Payment exceeds the invoice balance",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            error_code="overpayment",
+            extra={"balance": str(current[1])},
+        )
+    store_id, timezone, cutoff = paid
+    payment_date = payment_date or current_business_date(timezone, cutoff or DEFAULT_CLOSING_CUTOFF)
+
+    if mode != PACKAGE_MODE:
+        closing = ClosingDeltas()
+        if mode == "cash":
+            closing.add(company_id, store_id, payment_date, cash_from_sales=amount)
+        else:
+            closing.add(company_id, store_id, payment_date, digital_receipts_total=amount)
+        await apply_closing_deltas(db, closing)
+
+    payment = await insert_returning(
+        db,
+        Payment,
+        {
+            "company_id": company_id,
+            "store_id": store_id,
+            "invoice_id": invoice_id,
+            "payment_date": payment_date,
+            "mode": mode,
+            "amount": amount,
+            "txn_ref": txn_ref,
+            "notes": notes,
+            "received_by": received_by,
+        },
+    )
+    if mode != PACKAGE_MODE:
+        deltas = KpiDeltas()
+        deltas.add(company_id, store_id, payment_date, receipts=amount)
+        await record_kpi_deltas(db, deltas)
+    return payment
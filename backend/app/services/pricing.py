@@ -0,0 +1,195 @@
+"""Effective-dated price resolution.
+
+Each company's active ``item_rates`` are loaded once into a ``PricingIndex``:
+one ``RateTimeline`` of disjoint, sorted date segments per
+``(item_id, customer_id)`` key, so a lookup is a dict access plus a bisect.
+Indexes are tagged with the company's pricing version from Redis; rate writes
+bump the version and every worker rebuilds on its next resolve.
+"""
+import asyncio
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Literal
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.version_counter import VersionCounter, clock_floor
+from app.models.item_rate import ItemRate
+
+RateSource = Literal["customer", "base"]
+
+pricing_versions = VersionCounter("pricing_version")
+
+
+@dataclass(frozen=True)
+class RateWindow:
+    rate_id: int
+    effective_from: date
+    effective_to: date | None
+    rate: Decimal
+
+
+@dataclass(frozen=True)
+class ResolvedRate:
+    item_id: int
+    rate: Decimal
+    rate_id: int
+    source: RateSource
+
+
+class RateTimeline:
+    """Disjoint date segments for one item/customer key, searchable by bisect."""
+
+    __slots__ = ("starts", "ends", "rates", "rate_ids")
+
+    def __init__(self, starts: list[date], ends: list[date | None], rates: list[Decimal], rate_ids: list[int]) -> None:
+        self.starts = starts
+        self.ends = ends
+        self.rates = rates
+        self.rate_ids = rate_ids
+
+    @classmethod
+    def build(cls, windows: Sequence[RateWindow]) -> "RateTimeline":
+        # Cut the calendar at every window edge and let the latest-starting
+        # window that covers each piece win. Keys rarely have more than a
+        # handful of windows, so the quadratic sweep is cheap and runs once
+        # per index build.
+        boundaries = sorted(
+            {w.effective_from for w in windows}
+            | {w.effective_to + timedelta(days=1) for w in windows if w.effective_to is not None}
+        )
+        ranked = sorted(windows, key=lambda w: (w.effective_from, w.rate_id), reverse=True)
+
+        starts: list[date] = []
+        ends: list[date | None] = []
+        rates: list[Decimal] = []
+        rate_ids: list[int] = []
+        for i, start in enumerate(boundaries):
+            end = boundaries[i + 1] - timedelta(days=1) if i + 1 < len(boundaries) else None
+            winner = next(
+                (
+                    w for w in ranked
+                    if w.effective_from <= start and (w.effective_to is None or w.effective_to >= start)
+                ),
+                None,
+            )
+            if winner is None:
+                continue
+            if rate_ids and rate_ids[-1] == winner.rate_id and ends[-1] == start - timedelta(days=1):
+                ends[-1] = end
+                continue
+            starts.append(start)
+            ends.append(end)
+            rates.append(winner.rate)
+            rate_ids.append(winner.rate_id)
+        return cls(starts, ends, rates, rate_ids)
+
+    def at(self, day: date) -> tuple[Decimal, int] | None:
+        i = bisect_right(self.starts, day) - 1
+        if i < 0:
+            return None
+        end = self.ends[i]
+        if end is not None and day > end:
+            return None
+        return self.rates[i], self.rate_ids[i]
+
+
+class PricingIndex:
+    def __init__(self, version: int | None, timelines: dict[tuple[int, int | None], RateTimeline]) -> None:
+        self.version = version
+        self.timelines = timelines
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def build(
+        cls, version: int | None, rows: Iterable[tuple[int, int | None, int, Decimal, date, date | None]]
+    ) -> "PricingIndex":
+        """Build from ``(item_id, customer_id, rate_id, rate, effective_from, effective_to)`` rows."""
+        grouped: dict[tuple[int, int | None], list[RateWindow]] = defaultdict(list)
+        for item_id, customer_id, rate_id, rate, effective_from, effective_to in rows:
+            grouped[(item_id, customer_id)].append(RateWindow(rate_id, effective_from, effective_to, rate))
+        return cls(version, {key: RateTimeline.build(windows) for key, windows in grouped.items()})
+
+    def resolve(self, item_id: int, customer_id: int | None, day: date) -> ResolvedRate | None:
+        if customer_id is not None:
+            timeline = self.timelines.get((item_id, customer_id))
+            hit = timeline.at(day) if timeline is not None else None
+            if hit is not None:
+                return ResolvedRate(item_id, hit[0], hit[1], "customer")
+        timeline = self.timelines.get((item_id, None))
+        hit = timeline.at(day) if timeline is not None else None
+        if hit is not None:
+            return ResolvedRate(item_id, hit[0], hit[1], "base")
+        return None
+
+    def resolve_many(self, item_ids: Iterable[int], customer_id: int | None, day: date) -> dict[int, ResolvedRate]:
+        resolved: dict[int, ResolvedRate] = {}
+        for item_id in item_ids:
+            if item_id in resolved:
+                continue
+            hit = self.resolve(item_id, customer_id, day)
+            if hit is not None:
+                resolved[item_id] = hit
+        return resolved
+
+
+class PricingCache:
+    """Process-local pricing indexes, one per company, validated against Redis.
+
+    A lost version counter restarts from the clock, never at a version an
+    index may still carry. When Redis cannot be reached, an index is reused
+    for up to ``max_unverified_seconds``, and none is kept longer than
+    ``max_age_seconds`` in any case.
+    """
+
+    def __init__(self, max_unverified_seconds: float = 60.0, max_age_seconds: float = 900.0) -> None:
+        self.max_unverified_seconds = max_unverified_seconds
+        self.max_age_seconds = max_age_seconds
+        self._indexes: dict[int, PricingIndex] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    async def index_for(self, db: AsyncSession, company_id: int) -> PricingIndex:
+        version = await pricing_versions.ensure(company_id, clock_floor())
+        index = self._indexes.get(company_id)
+        if index is not None and self._is_current(index, version):
+            return index
+
+        lock = self._locks.setdefault(company_id, asyncio.Lock())
+        async with lock:
+            index = self._indexes.get(company_id)
+            if index is not None and self._is_current(index, version):
+                return index
+            # The version is read before the rows, so a rate written while we
+            # load is either included or triggers another rebuild next time.
+            result = await db.execute(
+                select(
+                    ItemRate.item_id,
+                    ItemRate.customer_id,
+                    ItemRate.id,
+                    ItemRate.rate,
+                    ItemRate.effective_from,
+                    ItemRate.effective_to,
+                ).where(ItemRate.company_id == company_id, ItemRate.status == "active")
+            )
+            index = PricingIndex.build(version, result.tuples().all())
+            self._indexes[company_id] = index
+            return index
+
+    async def invalidate(self, company_id: int) -> None:
+        self._indexes.pop(company_id, None)
+        await pricing_versions.bump(company_id, initial=clock_floor())
+
+    def _is_current(self, index: PricingIndex, version: int | None) -> bool:
+        age = time.monotonic() - index.loaded_at
+        if version is None:
+            return age < self.max_unverified_seconds
+        return index.version == version and age < self.max_age_seconds
+
+
+pricing_cache = PricingCache()
@@ -0,0 +1,367 @@
+"""Bank statement auto-matching.
+
+``auto_match`` loads everything one statement can match in a handful of
+set-based queries: its unmatched credit lines, the company's active rules,
+payments dated near the statement and invoices with an outstanding balance.
+It then matches in memory against hash indexes:
+
+1. exact UTR: the line's ``utr_ref`` equals a payment's ``txn_ref``;
+2. rules, in priority order, each compiled once. A regex group extracts a
+   payment reference or invoice number to look up by key; any other hit
+   limits the amount/date match below to the rule's ``map_to`` entities;
+3. amount and date: same amount in paise within ``DATE_WINDOW_DAYS`` of
+   the line's value date.
+
+Each pass runs over the whole statement before the next starts, so stronger
+evidence claims candidates first, and a candidate is matched at most once.
+When two candidates tie, the line is left for manual matching instead of
+being guessed. Matches are written with one multi-row insert per
+``INSERT_BATCH_SIZE`` lines.
+
+Debit lines would match expenses, which the platform does not record yet,
+so they are not auto-matched.
+"""
+import re
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Literal, cast
+
+from fastapi import status
+from sqlalchemy import Exists, exists, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import BusinessLogicError
+from app.models.bank_import_file import BankImportFile
+from app.models.bank_txn import BankTxn
+from app.models.invoice import Invoice
+from app.models.payment import Payment
+from app.models.recon_match import ReconMatch
+from app.models.recon_rule import ReconRule
+
+EntityType = Literal["invoice", "payment"]
+MatchMethod = Literal["utr", "rule", "amount"]
+RuleField = Literal["utr_ref", "description"]
+ENTITY_TYPES: tuple[EntityType, ...] = ("payment", "invoice")
+
+DATE_WINDOW_DAYS = 3
+INSERT_BATCH_SIZE = 2000
+
+UTR_CONFIDENCE = Decimal("1.000")
+RULE_REFERENCE_CONFIDENCE = Decimal("0.900")
+RULE_AMOUNT_CONFIDENCE = Decimal("0.800")
+AMOUNT_CONFIDENCE = Decimal("0.700")
+# Taken off amount/date confidence per day between value date and entity date.
+CONFIDENCE_PER_DAY = Decimal("0.050")
+
+
+def to_paise(amount: Decimal) -> int:
+    return int((amount * 100).to_integral_value())
+
+
+def normalize_reference(value: str | None) -> str | None:
+    """References compare case- and whitespace-insensitively; blank ones never match."""
+    if value is None:
+        return None
+    cleaned = "".join(value.split()).upper()
+    return cleaned or None
+
+
+@dataclass(frozen=True)
+class StatementLine:
+    id: int
+    amount_paise: int
+    value_date: date
+    utr_ref: str | None
+    description: str
+
+
+@dataclass(frozen=True)
+class Candidate:
+    entity_type: EntityType
+    entity_id: int
+    reference: str | None
+    amount_paise: int
+    on: date
+
+
+@dataclass(frozen=True)
+class Match:
+    bank_txn_id: int
+    entity_type: EntityType
+    entity_id: int
+    rule_id: int | None
+    confidence: Decimal
+    method: MatchMethod
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """A ``recon_rule`` ready to apply: ``test`` returns None on a miss, else the extracted reference or ""."""
+
+    id: int
+    map_to: EntityType
+    field: RuleField
+    test: Callable[[str], str | None]
+
+    @classmethod
+    def compile(cls, rule: ReconRule) -> "CompiledRule":
+        pattern = rule.pattern
+        test: Callable[[str], str | None]
+        if rule.match_type == "regex":
+            regex = re.compile(pattern, re.IGNORECASE)
+            group: int | str | None = "ref" if "ref" in regex.groupindex else (1 if regex.groups else None)
+
+            def test(text: str) -> str | None:
+                found = regex.search(text)
+                if found is None:
+                    return None
+                return (found.group(group) or "") if group is not None else ""
+
+        elif rule.match_type == "contains":
+            needle = pattern.casefold()
+
+            def test(text: str) -> str | None:
+                return "" if needle in text.casefold() else None
+
+        else:
+            exact = pattern.casefold()
+
+            def test(text: str) -> str | None:
+                return "" if text.strip().casefold() == exact else None
+
+        return cls(rule.id, cast(EntityType, rule.map_to), cast(RuleField, rule.field), test)
+
+
+def compile_pattern(match_type: str, pattern: str) -> None:
+    """Raise ValueError if ``pattern`` cannot be used as a ``match_type`` rule."""
+    if match_type == "regex":
+        try:
+            re.compile(pattern)
+        except re.error as exc:
+            raise ValueError(f"Invalid regular expression: {exc}") from exc
+
+
+@dataclass
+class CandidateIndex:
+    """Hash indexes over match candidates; claimed candidates are skipped by every lookup."""
+
+    window_days: int = DATE_WINDOW_DAYS
+    by_reference: dict[tuple[EntityType, str], list[Candidate]] = field(default_factory=lambda: defaultdict(list))
+    by_amount_day: dict[tuple[int, date], list[Candidate]] = field(default_factory=lambda: defaultdict(list))
+    claimed: set[tuple[EntityType, int]] = field(default_factory=set)
+
+    @classmethod
+    def build(cls, candidates: Iterable[Candidate], window_days: int = DATE_WINDOW_DAYS) -> "CandidateIndex":
+        index = cls(window_days)
+        for candidate in candidates:
+            reference = normalize_reference(candidate.reference)
+            if reference is not None:
+                index.by_reference[(candidate.entity_type, reference)].append(candidate)
+            index.by_amount_day[(candidate.amount_paise, candidate.on)].append(candidate)
+        return index
+
+    def _open(self, candidates: Iterable[Candidate], types: Sequence[EntityType]) -> list[Candidate]:
+        return [
+            c for c in candidates
+            if c.entity_type in types and (c.entity_type, c.entity_id) not in self.claimed
+        ]
+
+    def by_ref(self, reference: str | None, types: Sequence[EntityType]) -> Candidate | None:
+        """The one open candidate with this reference, or None if there are none or several."""
+        key = normalize_reference(reference)
+        if key is None:
+            return None
+        found = self._open((c for t in types for c in self.by_reference.get((t, key), ())), types)
+        return found[0] if len(found) == 1 else None
+
+    def nearest(self, amount_paise: int, on: date, types: Sequence[EntityType]) -> tuple[Candidate, int] | None:
+        """The one open candidate with this amount closest to ``on`` within the window, and its distance in days."""
+        for days in range(self.window_days + 1):
+            days_apart = {on - timedelta(days=days), on + timedelta(days=days)}
+            found = self._open(
+                (c for day in days_apart for c in self.by_amount_day.get((amount_paise, day), ())), types
+            )
+            if found:
+                return (found[0], days) if len(found) == 1 else None
+        return None
+
+    def claim(self, candidate: Candidate) -> None:
+        self.claimed.add((candidate.entity_type, candidate.entity_id))
+
+
+def match_statement(
+    lines: Sequence[StatementLine], rules: Sequence[CompiledRule], index: CandidateIndex
+) -> list[Match]:
+    """Match ``lines`` against ``index`` pass by pass; see the module docstring for the order."""
+    matches: dict[int, Match] = {}
+
+    def record(line: StatementLine, candidate: Candidate, rule_id: int | None, confidence: Decimal,
+               method: MatchMethod) -> None:
+        index.claim(candidate)
+        matches[line.id] = Match(line.id, candidate.entity_type, candidate.entity_id, rule_id, confidence, method)
+
+    for line in lines:
+        candidate = index.by_ref(line.utr_ref, ("payment",))
+        if candidate is not None:
+            record(line, candidate, None, UTR_CONFIDENCE, "utr")
+
+    for rule in rules:
+        for line in lines:
+            if line.id in matches:
+                continue
+            text = line.utr_ref if rule.field == "utr_ref" else line.description
+            if not text:
+                continue
+            reference = rule.test(text)
+            if reference is None:
+                continue
+            if reference:
+                candidate = index.by_ref(reference, (rule.map_to,))
+                if candidate is not None:
+                    record(line, candidate, rule.id, RULE_REFERENCE_CONFIDENCE, "rule")
+                continue
+            near = index.nearest(line.amount_paise, line.value_date, (rule.map_to,))
+            if near is not None:
+                record(line, near[0], rule.id, RULE_AMOUNT_CONFIDENCE - CONFIDENCE_PER_DAY * near[1], "rule")
+
+    for line in lines:
+        if line.id in matches:
+            continue
+        near = index.nearest(line.amount_paise, line.value_date, ENTITY_TYPES)
+        if near is not None:
+            record(line, near[0], None, AMOUNT_CONFIDENCE - CONFIDENCE_PER_DAY * near[1], "amount")
+
+    return [matches[line.id] for line in lines if line.id in matches]
+
+
+@dataclass(frozen=True)
+class AutoMatchResult:
+    file_id: int
+    lines: int
+    matched: int
+    by_method: dict[str, int]
+
+    @property
+    def unmatched(self) -> int:
+        return self.lines - self.matched
+
+
+def _live_match(entity_type: EntityType, entity_id: Any) -> Exists:
+    return exists().where(
+        ReconMatch.entity_type == entity_type, ReconMatch.entity_id == entity_id, ReconMatch.status != "discarded"
+    )
+
+
+async def _load_lines(db: AsyncSession, file_id: int) -> list[StatementLine]:
+    rows = await db.execute(
+        select(BankTxn.id, BankTxn.amount, BankTxn.value_date, BankTxn.utr_ref, BankTxn.description)
+        .where(
+            BankTxn.import_file_id == file_id,
+            BankTxn.direction == "credit",
+            ~exists().where(ReconMatch.bank_txn_id == BankTxn.id, ReconMatch.status != "discarded"),
+        )
+        .order_by(BankTxn.value_date, BankTxn.id)
+    )
+    return [
+        StatementLine(txn_id, to_paise(amount), value_date, utr_ref, description or "")
+        for txn_id, amount, value_date, utr_ref, description in rows.tuples()
+    ]
+
+
+async def _load_candidates(
+    db: AsyncSession, company_id: int, date_from: date, date_to: date, window_days: int
+) -> list[Candidate]:
+    earliest, latest = date_from - timedelta(days=window_days), date_to + timedelta(days=window_days)
+    payments = await db.execute(
+        select(Payment.id, Payment.txn_ref, Payment.amount, Payment.payment_date).where(
+            Payment.company_id == company_id,
+            Payment.payment_date.between(earliest, latest),
+            Payment.mode != "package_adjust",
+            ~_live_match("payment", Payment.id),
+        )
+    )
+    # Outstanding invoices of any age can be settled by this statement; the
+    # predicate matches ix_invoices_unpaid.
+    invoices = await db.execute(
+        select(Invoice.id, Invoice.invoice_no, Invoice.grand_total - Invoice.amount_paid, Invoice.invoice_date).where(
+            Invoice.company_id == company_id,
+            Invoice.status != "cancelled",
+            Invoice.amount_paid < Invoice.grand_total,
+            Invoice.invoice_date <= latest,
+            ~_live_match("invoice", Invoice.id),
+        )
+    )
+    return [
+        *(Candidate("payment", pid, ref, to_paise(amount), on) for pid, ref, amount, on in payments.tuples()),
+        *(Candidate("invoice", iid, no, to_paise(balance), on) for iid, no, balance, on in invoices.tuples()),
+    ]
+
+
+async def auto_match(db: AsyncSession, company_id: int, file_id: int) -> AutoMatchResult:
+    """Auto-match a statement's open credit lines in the caller's transaction; 404 if the file is unknown."""
+    found = (
+        await db.execute(
+            select(BankImportFile.id).where(BankImportFile.id == file_id, BankImportFile.company_id == company_id)
+        )
+    ).scalar_one_or_none()
+    if found is None:
+        raise BusinessLogicError(
+            "Statement not found", status_code=status.HTTP_404_NOT_FOUND, error_code="not-found"
+        )
+
+    lines = await _load_lines(db, file_id)
+    if not lines:
+        return AutoMatchResult(file_id, 0, 0, {})
+    rules = [
+        CompiledRule.compile(rule)
+        for rule in (
+            await db.execute(
+                select(ReconRule)
+                .where(
+                    ReconRule.company_id == company_id,
+                    ReconRule.active.is_(True),
+                    ReconRule.map_to.in_(ENTITY_TYPES),
+                )
+                .order_by(ReconRule.priority, ReconRule.id)
+            )
+        ).scalars()
+    ]
+    candidates = await _load_candidates(
+        db, company_id, min(line.value_date for line in lines), max(line.value_date for line in lines),
+        DATE_WINDOW_DAYS,
+    )
+
+    matches = match_statement(lines, rules, CandidateIndex.build(candidates))
+
+    written: list[Match] = []
+    for start in range(0, len(matches), INSERT_BATCH_SIZE):
+        batch = matches[start:start + INSERT_BATCH_SIZE]
+        stmt = pg_insert(ReconMatch).values(
+            [
+                {
+                    "company_id": company_id,
+                    "bank_txn_id": match.bank_txn_id,
+                    "entity_type": match.entity_type,
+                    "entity_id": match.entity_id,
+                    "rule_id": match.rule_id,
+                    "confidence": match.confidence,
+                    "status": "auto",
+                }
+                for match in batch
+            ]
+        )
+        # A concurrent run or manual match may have taken a line meanwhile.
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=[ReconMatch.bank_txn_id], index_where=ReconMatch.status != "discarded"
+        )
+        inserted = set((await db.execute(stmt.returning(ReconMatch.bank_txn_id))).scalars())
+        written.extend(match for match in batch if match.bank_txn_id in inserted)
+
+    by_method: dict[str, int] = defaultdict(int)
+    for match in written:
+        by_method[match.method] += 1
+    return AutoMatchResult(file_id, len(lines), len(written), dict(by_method))
@@ -0,0 +1,324 @@
+"""Pending payments and pending deliveries reports.
+
+Both reports read only outstanding rows through partial indexes
+(``ix_invoices_unpaid`` and ``ix_orders_undelivered``) in ``(date, id)``
+order, so a page is an index range scan whatever the size of the history.
+Days outstanding and the aging bucket are computed in SQL, and a bucket
+filter becomes a date range on the same index. Pages are keyset-paginated:
+the cursor is the last row's date and id, so page 500 costs the same as
+page 1. Exports walk the same pages and stream CSV or XLSX as they go.
+
+Outstanding balances come from ``invoices.amount_paid``, which
+``app.services.payments.record_payment`` maintains as each payment is
+written, so no query has to sum payments.
+"""
+import base64
+import csv
+import io
+from collections.abc import AsyncIterator, Awaitable, Callable, Collection, Sequence
+from dataclasses import astuple, dataclass, fields
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Literal, TypeVar
+
+from sqlalchemy import Date, Select, case, func, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.xlsx import XlsxStreamWriter
+from app.models.customer import Customer
+from app.models.invoice import Invoice
+from app.models.order import Order
+from app.models.store import Store
+from app.services.store_calendar import DEFAULT_CLOSING_CUTOFF, current_business_date
+
+AgingBucket = Literal["0-7", "8-15", "16-30", "30+"]
+
+# Label, fewest and most days outstanding (inclusive).
+AGING_BUCKETS: tuple[tuple[AgingBucket, int, int | None], ...] = (
+    ("0-7", 0, 7),
+    ("8-15", 8, 15),
+    ("16-30", 16, 30),
+    ("30+", 31, None),
+)
+
+REPORT_PAGE_SIZE = 100
+EXPORT_CHUNK_SIZE = 1000
+
+Cursor = tuple[date, int]
+
+
+@dataclass(frozen=True)
+class PendingPayment:
+    invoice_id: int
+    invoice_no: str | None
+    invoice_date: date
+    customer_id: int
+    customer_name: str
+    store_id: int
+    store_name: str
+    grand_total: Decimal
+    amount_paid: Decimal
+    balance: Decimal
+    days_outstanding: int
+    aging_bucket: AgingBucket
+
+    @property
+    def cursor(self) -> Cursor:
+        return self.invoice_date, self.invoice_id
+
+
+@dataclass(frozen=True)
+class PendingDelivery:
+    order_id: int
+    order_no: str
+    order_date: date
+    customer_id: int
+    customer_name: str
+    store_id: int
+    store_name: str
+    stage: str
+    days_pending: int
+
+    @property
+    def cursor(self) -> Cursor:
+        return self.order_date, self.order_id
+
+
+@dataclass(frozen=True)
+class AgingTotal:
+    aging_bucket: AgingBucket
+    invoices: int
+    balance: Decimal
+
+
+@dataclass(frozen=True)
+class PendingPaymentsFilter:
+    store_ids: Collection[int] | None = None
+    customer_id: int | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+    aging_bucket: AgingBucket | None = None
+
+
+@dataclass(frozen=True)
+class PendingDeliveriesFilter:
+    store_ids: Collection[int] | None = None
+    customer_id: int | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+    stage: str | None = None
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    return base64.urlsafe_b64encode(f"{cursor[0].isoformat()}:{cursor[1]}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Inverse of ``encode_cursor``; raises ValueError for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        day, _, row_id = raw.partition(":")
+        return date.fromisoformat(day), int(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+async def default_as_of(db: AsyncSession, company_id: int, store_ids: Collection[int] | None) -> date:
+    """The latest current business day among the stores in scope, so no row in the report ages below zero."""
+    query = select(Store.timezone, Store.closing_cutoff).where(Store.company_id == company_id).distinct()
+    if store_ids is not None:
+        query = query.where(Store.id.in_(store_ids))
+    days = [
+        current_business_date(timezone, cutoff or DEFAULT_CLOSING_CUTOFF)
+        for timezone, cutoff in (await db.execute(query)).tuples()
+    ]
+    return max(days, default=datetime.now(UTC).date())
+
+
+def _days_since(as_of: date, column: Any) -> Any:
+    return literal(as_of, Date) - column
+
+
+def _aging_bucket(days: Any) -> Any:
+    whens = [(days <= high, label) for label, _, high in AGING_BUCKETS if high is not None]
+    return case(*whens, else_=AGING_BUCKETS[-1][0])
+
+
+def _pending_payments_query(company_id: int, as_of: date, where: PendingPaymentsFilter) -> Select[Any]:
+    days = _days_since(as_of, Invoice.invoice_date)
+    query = (
+        select(
+            Invoice.id,
+            Invoice.invoice_no,
+            Invoice.invoice_date,
+            Invoice.customer_id,
+            Customer.name.label("customer_name"),
+            Invoice.store_id,
+            Store.name.label("store_name"),
+            Invoice.grand_total,
+            Invoice.amount_paid,
+            (Invoice.grand_total - Invoice.amount_paid).label("balance"),
+            days.label("days_outstanding"),
+            _aging_bucket(days).label("aging_bucket"),
+        )
+        .join(Customer, Customer.id == Invoice.customer_id)
+        .join(Store, Store.id == Invoice.store_id)
+        # Same predicate as ix_invoices_unpaid, so the planner can use it.
+        .where(
+            Invoice.company_id == company_id,
+            Invoice.status != "cancelled",
+            Invoice.amount_paid < Invoice.grand_total,
+        )
+    )
+    if where.store_ids is not None:
+        query = query.where(Invoice.store_id.in_(where.store_ids))
+    if where.customer_id is not None:
+        query = query.where(Invoice.customer_id == where.customer_id)
+    if where.date_from is not None:
+        query = query.where(Invoice.invoice_date >= where.date_from)
+    if where.date_to is not None:
+        query = query.where(Invoice.invoice_date <= where.date_to)
+    if where.aging_bucket is not None:
+        _, low, high = next(bucket for bucket in AGING_BUCKETS if bucket[0] == where.aging_bucket)
+        if low > 0:
+            query = query.where(Invoice.invoice_date <= as_of - timedelta(days=low))
+        if high is not None:
+            query = query.where(Invoice.invoice_date >= as_of - timedelta(days=high))
+    return query
+
+
+def _pending_deliveries_query(company_id: int, as_of: date, where: PendingDeliveriesFilter) -> Select[Any]:
+    query = (
+        select(
+            Order.id,
+            Order.order_no,
+            Order.order_date,
+            Order.customer_id,
+            Customer.name.label("customer_name"),
+            Order.store_id,
+            Store.name.label("store_name"),
+            Order.status,
+            _days_since(as_of, Order.order_date).label("days_pending"),
+        )
+        .join(Customer, Customer.id == Order.customer_id)
+        .join(Store, Store.id == Order.store_id)
+        # Same predicate as ix_orders_undelivered.
+        .where(Order.company_id == company_id, Order.delivered_at.is_(None), Order.status != "cancelled")
+    )
+    if where.store_ids is not None:
+        query = query.where(Order.store_id.in_(where.store_ids))
+    if where.customer_id is not None:
+        query = query.where(Order.customer_id == where.customer_id)
+    if where.date_from is not None:
+        query = query.where(Order.order_date >= where.date_from)
+    if where.date_to is not None:
+        query = query.where(Order.order_date <= where.date_to)
+    if where.stage is not None:
+        query = query.where(Order.status == where.stage)
+    return query
+
+
+def _page(query: Select[Any], day: Any, row_id: Any, after: Cursor | None, limit: int) -> Select[Any]:
+    if after is not None:
+        query = query.where(tuple_(day, row_id) > tuple_(literal(after[0], Date), literal(after[1])))
+    return query.order_by(day, row_id).limit(limit)
+
+
+async def pending_payments(
+    db: AsyncSession,
+    company_id: int,
+    as_of: date,
+    where: PendingPaymentsFilter,
+    after: Cursor | None = None,
+    limit: int = REPORT_PAGE_SIZE,
+) -> list[PendingPayment]:
+    """Invoices with a balance, oldest first, starting after ``after``."""
+    query = _page(_pending_payments_query(company_id, as_of, where), Invoice.invoice_date, Invoice.id, after, limit)
+    return [PendingPayment(*row) for row in (await db.execute(query)).tuples()]
+
+
+async def pending_deliveries(
+    db: AsyncSession,
+    company_id: int,
+    as_of: date,
+    where: PendingDeliveriesFilter,
+    after: Cursor | None = None,
+    limit: int = REPORT_PAGE_SIZE,
+) -> list[PendingDelivery]:
+    """Orders not yet delivered, oldest first, starting after ``after``."""
+    query = _page(_pending_deliveries_query(company_id, as_of, where), Order.order_date, Order.id, after, limit)
+    return [PendingDelivery(*row) for row in (await db.execute(query)).tuples()]
+
+
+async def pending_payments_aging(
+    db: AsyncSession, company_id: int, as_of: date, where: PendingPaymentsFilter
+) -> list[AgingTotal]:
+    """Invoice count and outstanding balance per aging bucket; empty buckets are included."""
+    pending = _pending_payments_query(company_id, as_of, where).subquery()
+    bucket, balance = pending.c.aging_bucket, pending.c.balance
+    totals = {
+        label: (count, total)
+        for label, count, total in (
+            await db.execute(select(bucket, func.count(), func.sum(balance)).group_by(bucket))
+        ).tuples()
+    }
+    return [
+        AgingTotal(label, *totals.get(label, (0, Decimal("0.00"))))
+        for label, _, _ in AGING_BUCKETS
+    ]
+
+
+RowT = TypeVar("RowT", PendingPayment, PendingDelivery)
+
+
+async def _all_pages(
+    fetch: Callable[[Cursor | None], Awaitable[list[RowT]]],
+) -> AsyncIterator[list[RowT]]:
+    after: Cursor | None = None
+    while True:
+        rows = await fetch(after)
+        if rows:
+            yield rows
+        if len(rows) < EXPORT_CHUNK_SIZE:
+            return
+        after = rows[-1].cursor
+
+
+def pending_payment_pages(
+    db: AsyncSession, company_id: int, as_of: date, where: PendingPaymentsFilter
+) -> AsyncIterator[list[PendingPayment]]:
+    return _all_pages(lambda after: pending_payments(db, company_id, as_of, where, after, EXPORT_CHUNK_SIZE))
+
+
+def pending_delivery_pages(
+    db: AsyncSession, company_id: int, as_of: date, where: PendingDeliveriesFilter
+) -> AsyncIterator[list[PendingDelivery]]:
+    return _all_pages(lambda after: pending_deliveries(db, company_id, as_of, where, after, EXPORT_CHUNK_SIZE))
+
+
+def _headers(row_type: type[Any]) -> list[str]:
+    return [spec.name for spec in fields(row_type)]
+
+
+async def stream_csv(row_type: type[Any], pages: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    """CSV with a header row, one chunk per page."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(_headers(row_type))
+    async for rows in pages:
+        writer.writerows(astuple(row) for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+async def stream_xlsx(
+    row_type: type[Any], pages: AsyncIterator[Sequence[Any]], sheet_name: str
+) -> AsyncIterator[bytes]:
+    """Single-sheet XLSX with a header row, one chunk per page."""
+    writer = XlsxStreamWriter(sheet_name)
+    yield writer.begin() + writer.add_rows([_headers(row_type)])
+    async for rows in pages:
+        yield writer.add_rows(astuple(row) for row in rows)
+    yield writer.finish()
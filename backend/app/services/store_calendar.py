@@ -0,0 +1,42 @@
+"""Store-local dates.
+
+A store's business day ends at its ``closing_cutoff`` in its own timezone,
+not at midnight. With the default cutoff of 23:59, a sale rung up at 23:59:30
+already belongs to the next day. A cutoff before noon, such as 05:00 for a
+store that trades past midnight, ends the day early on the next calendar day.
+So sales made at 01:00 still count towards the evening before.
+"""
+from datetime import UTC, date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+DEFAULT_CLOSING_CUTOFF = time(23, 59)
+_NOON = time(12)
+
+
+def store_local_date(moment: datetime, timezone: str) -> date:
+    """The store's calendar date at ``moment``; naive timestamps are UTC, as the database stores them."""
+    return _local(moment, timezone).date()
+
+
+def business_date(moment: datetime, timezone: str, cutoff: time = DEFAULT_CLOSING_CUTOFF) -> date:
+    """The business day that ``moment`` belongs to at a store with the given cutoff."""
+    local = _local(moment, timezone)
+    if cutoff >= _NOON:
+        return local.date() if local.time() < cutoff else local.date() + timedelta(days=1)
+    return local.date() - timedelta(days=1) if local.time() < cutoff else local.date()
+
+
+def current_business_date(timezone: str, cutoff: time = DEFAULT_CLOSING_CUTOFF) -> date:
+    return business_date(datetime.now(UTC), timezone, cutoff)
+
+
+def business_day_end(day: date, timezone: str, cutoff: time = DEFAULT_CLOSING_CUTOFF) -> datetime:
+    """When business day ``day`` ends, as an aware UTC timestamp."""
+    end_date = day if cutoff >= _NOON else day + timedelta(days=1)
+    return datetime.combine(end_date, cutoff, tzinfo=ZoneInfo(timezone)).astimezone(UTC)
+
+
+def _local(moment: datetime, timezone: str) -> datetime:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return moment.astimezone(ZoneInfo(timezone))
@@ -0,0 +1,671 @@
+"""WhatsApp feedback and promo sends.
+
+Every send goes through ``SendPipeline``:
+
+1. recipients arrive a page at a time, each page read in its own short
+   session, so a 50k-customer broadcast never holds a database connection
+   while it waits on the rate limit or the provider;
+2. promos pass the per-recipient frequency cap (``PromoFrequencyCap``, one
+   Redis sorted set per phone), a page per round trip;
+3. a fixed set of sender tasks renders each message from the company's
+   compiled template, takes a token from the company's Redis token bucket
+   (``WHATSAPP_SENDS_PER_SECOND``, shared by every worker) and posts it
+   through the provider's pooled ``httpx.AsyncClient``;
+4. results are buffered and written to ``message_log`` as multi-row
+   inserts of ``WHATSAPP_LOG_BATCH_ROWS``.
+
+Opted-out customers are never selected. A retried broadcast skips customers
+already logged for the campaign, and the frequency cap keeps it from
+re-sending a promo that went out but was not logged before the failure.
+"""
+import asyncio
+import re
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any, Literal
+
+import httpx
+from sqlalchemy import exists, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.rate_limit import RateLimitPolicy, rate_limiter
+from app.core.redis import get_async_redis
+from app.core.version_counter import VersionCounter, clock_floor
+from app.db.persistence import insert_many, update_returning
+from app.models.customer import Customer
+from app.models.message_log import MessageLog
+from app.models.order import Order
+from app.models.whatsapp_template import WhatsAppTemplate
+
+TemplateType = Literal["feedback", "promo"]
+
+PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+# Filled in per recipient; any other placeholder needs a value from the sender.
+RECIPIENT_VARS = frozenset({"customer_name"})
+FEEDBACK_VARS = RECIPIENT_VARS | {"order_no"}
+
+# A one-token bucket spaces sends evenly, so no one-second window exceeds the limit.
+SEND_POLICY = RateLimitPolicy(
+    "whatsapp_send_company", limit=settings.WHATSAPP_SENDS_PER_SECOND, period_seconds=1, scope="company", burst=1
+)
+
+template_versions = VersionCounter("whatsapp_template_version")
+
+
+class MessagingError(ValueError):
+    """A send cannot start (unknown template, missing variables, order not delivered)."""
+
+
+def template_vars(body: str) -> list[str]:
+    """The placeholders in ``body`` in order of first use."""
+    return list(dict.fromkeys(PLACEHOLDER.findall(body)))
+
+
+def _utc_now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """A template body split once into literal text and placeholder names.
+
+    ``literals`` has one more entry than ``names``; rendering interleaves them.
+    """
+
+    code: str
+    type: str
+    literals: tuple[str, ...]
+    names: tuple[str, ...]
+
+    @classmethod
+    def compile(cls, code: str, template_type: str, body: str) -> "CompiledTemplate":
+        parts = PLACEHOLDER.split(body)
+        return cls(code, template_type, tuple(parts[0::2]), tuple(parts[1::2]))
+
+    def missing(self, provided: Iterable[str]) -> list[str]:
+        available = set(provided)
+        return [name for name in dict.fromkeys(self.names) if name not in available]
+
+    def render(self, values: Mapping[str, str]) -> str:
+        out = [self.literals[0]]
+        for name, literal in zip(self.names, self.literals[1:], strict=True):
+            out.append(values[name])
+            out.append(literal)
+        return "".join(out)
+
+
+@dataclass(frozen=True)
+class CompanyTemplates:
+    version: int | None
+    loaded_at: float
+    by_code: dict[str, CompiledTemplate]
+
+
+class TemplateCache:
+    """Process-local compiled templates, one set per company, validated against Redis.
+
+    Template writes bump the company's version, and a lost counter restarts
+    from the clock rather than at a version a cached set may carry. When
+    Redis cannot be reached, a set is reused for up to
+    ``max_unverified_seconds``; none is kept past ``max_age_seconds``.
+    """
+
+    def __init__(self, max_unverified_seconds: float = 60.0, max_age_seconds: float = 900.0) -> None:
+        self.max_unverified_seconds = max_unverified_seconds
+        self.max_age_seconds = max_age_seconds
+        self._templates: dict[int, CompanyTemplates] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    async def get(self, db: AsyncSession, company_id: int, code: str) -> CompiledTemplate | None:
+        """The company's active template ``code``, compiled."""
+        version = await template_versions.ensure(company_id, clock_floor())
+        templates = self._templates.get(company_id)
+        if templates is None or not self._is_current(templates, version):
+            async with self._locks.setdefault(company_id, asyncio.Lock()):
+                templates = self._templates.get(company_id)
+                if templates is None or not self._is_current(templates, version):
+                    templates = await self._load(db, company_id, version)
+        return templates.by_code.get(code)
+
+    async def invalidate(self, company_id: int) -> None:
+        self._templates.pop(company_id, None)
+        await template_versions.bump(company_id, initial=clock_floor())
+
+    async def _load(self, db: AsyncSession, company_id: int, version: int | None) -> CompanyTemplates:
+        rows = await db.execute(
+            select(WhatsAppTemplate.code, WhatsAppTemplate.type, WhatsAppTemplate.body).where(
+                WhatsAppTemplate.company_id == company_id, WhatsAppTemplate.is_active.is_(True)
+            )
+        )
+        templates = CompanyTemplates(
+            version,
+            time.monotonic(),
+            {code: CompiledTemplate.compile(code, template_type, body) for code, template_type, body in rows},
+        )
+        self._templates[company_id] = templates
+        return templates
+
+    def _is_current(self, templates: CompanyTemplates, version: int | None) -> bool:
+        age = time.monotonic() - templates.loaded_at
+        if version is None:
+            return age < self.max_unverified_seconds
+        return templates.version == version and age < self.max_age_seconds
+
+
+template_cache = TemplateCache()
+
+
+async def save_template(
+    db: AsyncSession, company_id: int, code: str, template_type: TemplateType, body: str, is_active: bool
+) -> WhatsAppTemplate:
+    """Create or replace template ``code``; call ``template_cache.invalidate`` once committed."""
+    stmt = pg_insert(WhatsAppTemplate).values(
+        company_id=company_id, code=code, type=template_type, body=body, vars=template_vars(body), is_active=is_active
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_whatsapp_template_company_id_code",
+        set_={
+            "type": stmt.excluded.type,
+            "body": stmt.excluded.body,
+            "vars": stmt.excluded.vars,
+            "is_active": stmt.excluded.is_active,
+            "updated_at": func.now(),
+        },
+    )
+    result = await db.execute(stmt.returning(WhatsAppTemplate).execution_options(populate_existing=True))
+    return result.scalar_one()
+
+
+async def set_opt_out(db: AsyncSession, company_id: int, customer_id: int, opted_out: bool) -> Customer | None:
+    """Record that the customer opted out of (or back into) WhatsApp messages; None if unknown."""
+    return await update_returning(
+        db,
+        Customer,
+        [Customer.id == customer_id, Customer.company_id == company_id],
+        {"whatsapp_opted_out_at": func.coalesce(Customer.whatsapp_opted_out_at, func.now()) if opted_out else None},
+    )
+
+
+_send_token_locks: dict[int, asyncio.Lock] = {}
+
+
+async def wait_for_send_token(company_id: int) -> None:
+    """Wait until the company's token bucket allows one more message.
+
+    Senders in one process queue on a lock, so only one of them polls Redis
+    at a time; the bucket itself is shared with every other worker. Unlike
+    the API limits this fails closed: without Redis no worker can tell how
+    many messages the others have sent, so the error stops the send and its
+    job retries later.
+    """
+    async with _send_token_locks.setdefault(company_id, asyncio.Lock()):
+        while True:
+            result = await rate_limiter.hit(SEND_POLICY, f"company:{company_id}", fail_open=False)
+            if result.allowed:
+                return
+            await asyncio.sleep(max(result.retry_after_seconds, 0.005))
+
+
+class PromoFrequencyCap:
+    """At most one promo per recipient per window, in one Redis sorted set per phone.
+
+    Each set holds the campaigns that reached the phone, scored by when. A
+    campaign reserves a page of phones in one transaction and gives a phone
+    back if its send fails. Two campaigns racing for the same phone may both
+    lose it; neither ever sends a second promo inside the window.
+
+    Unlike the API rate limits this fails closed: if Redis is down the
+    broadcast errors and its job retries later.
+    """
+
+    def __init__(self, window_seconds: int) -> None:
+        self.window_seconds = window_seconds
+
+    def key(self, company_id: int, phone: str) -> str:
+        return f"whatsapp:promo:{company_id}:{phone}"
+
+    async def reserve(self, company_id: int, phones: Sequence[str], campaign_id: str) -> set[str]:
+        """Claim ``phones`` for ``campaign_id``; returns the ones it may message."""
+        if not phones:
+            return set()
+        now = time.time()
+        redis = get_async_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            for phone in phones:
+                key = self.key(company_id, phone)
+                pipe.zremrangebyscore(key, "-inf", now - self.window_seconds)
+                pipe.zadd(key, {campaign_id: now}, nx=True)
+                pipe.zcard(key)
+                pipe.expire(key, self.window_seconds)
+            results = await pipe.execute()
+
+        allowed: set[str] = set()
+        crowded: list[str] = []
+        for phone, added, count in zip(phones, results[1::4], results[2::4], strict=True):
+            # Not added means this campaign already holds the phone: a duplicate
+            # number, or an earlier attempt of the same broadcast.
+            if added and count == 1:
+                allowed.add(phone)
+            elif added:
+                crowded.append(phone)
+        if crowded:
+            async with redis.pipeline(transaction=False) as pipe:
+                for phone in crowded:
+                    pipe.zrem(self.key(company_id, phone), campaign_id)
+                await pipe.execute()
+        return allowed
+
+    async def release(self, company_id: int, phone: str, campaign_id: str) -> None:
+        await get_async_redis().zrem(self.key(company_id, phone), campaign_id)
+
+
+promo_cap = PromoFrequencyCap(settings.WHATSAPP_PROMO_INTERVAL_DAYS * 86400)
+
+
+@dataclass(frozen=True)
+class OutboundMessage:
+    to_phone: str
+    body: str
+    template_code: str
+
+
+@dataclass(frozen=True)
+class SendResult:
+    provider_msg_id: str | None = None
+    error: str | None = None
+    retryable: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.provider_msg_id is not None
+
+
+class WhatsAppProvider:
+    """A provider's messaging API behind one pooled ``httpx.AsyncClient``.
+
+    The API takes ``POST /messages`` with ``{"to", "body", "template"}`` and
+    answers ``{"id": provider_msg_id}``; ``whatsapp_stub`` implements it for
+    tests and local development. 429s, 5xx and transport errors are
+    retryable; other 4xx are not.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        token: str = "",
+        *,
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.name = name
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {token}"} if token else None,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+
+    async def send(self, message: OutboundMessage) -> SendResult:
+        try:
+            response = await self._client.post(
+                "/messages", json={"to": message.to_phone, "body": message.body, "template": message.template_code}
+            )
+        except httpx.HTTPError as exc:
+            return SendResult(error=f"{type(exc).__name__}: {exc}", retryable=True)
+        if response.status_code == 429 or response.status_code >= 500:
+            return SendResult(error=f"HTTP {response.status_code}", retryable=True)
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        if response.is_error:
+            return SendResult(error=f"HTTP {response.status_code}: {payload.get('error') or response.text[:200]}")
+        provider_msg_id = payload.get("id")
+        if not provider_msg_id:
+            return SendResult(error="Provider response had no message id")
+        return SendResult(provider_msg_id=str(provider_msg_id))
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_providers: dict[str, WhatsAppProvider] = {}
+
+
+def get_provider() -> WhatsAppProvider:
+    """The configured provider, created once per process so every send shares its pool."""
+    provider = _providers.get(settings.WHATSAPP_PROVIDER)
+    if provider is None:
+        provider = WhatsAppProvider(
+            settings.WHATSAPP_PROVIDER,
+            settings.WHATSAPP_API_URL,
+            settings.WHATSAPP_API_TOKEN,
+            timeout=settings.WHATSAPP_API_TIMEOUT_SECONDS,
+            max_connections=settings.WHATSAPP_MAX_CONNECTIONS,
+        )
+        _providers[settings.WHATSAPP_PROVIDER] = provider
+    return provider
+
+
+async def close_providers() -> None:
+    providers = list(_providers.values())
+    _providers.clear()
+    for provider in providers:
+        await provider.aclose()
+
+
+@dataclass(frozen=True)
+class Recipient:
+    customer_id: int | None
+    phone: str
+    name: str
+
+
+@dataclass
+class SendSummary:
+    sent: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.failed + self.skipped
+
+
+LogWriter = Callable[[list[dict[str, Any]]], Awaitable[None]]
+Throttle = Callable[[int], Awaitable[None]]
+ProgressCallback = Callable[[SendSummary], Awaitable[None]]
+
+
+class SendPipeline:
+    """Sends one template to a stream of recipient pages at the company's allowed rate."""
+
+    def __init__(
+        self,
+        company_id: int,
+        template: CompiledTemplate,
+        provider: WhatsAppProvider,
+        write_logs: LogWriter,
+        *,
+        variables: Mapping[str, str] | None = None,
+        campaign_id: str | None = None,
+        order_id: int | None = None,
+        throttle: Throttle = wait_for_send_token,
+        frequency_cap: PromoFrequencyCap | None = None,
+        concurrency: int = settings.WHATSAPP_SEND_CONCURRENCY,
+        attempts: int = settings.WHATSAPP_SEND_ATTEMPTS,
+        log_batch_rows: int = settings.WHATSAPP_LOG_BATCH_ROWS,
+        retry_delay: float = 0.5,
+        on_progress: ProgressCallback | None = None,
+    ) -> None:
+        if template.type == "promo" and campaign_id is None:
+            raise MessagingError("Promo sends need a campaign id")
+        self.company_id = company_id
+        self.template = template
+        self.provider = provider
+        self.write_logs = write_logs
+        self.variables = dict(variables or {})
+        self.campaign_id = campaign_id
+        self.order_id = order_id
+        self.throttle = throttle
+        self.frequency_cap = frequency_cap if template.type == "promo" else None
+        self.concurrency = concurrency
+        self.attempts = attempts
+        self.log_batch_rows = log_batch_rows
+        self.retry_delay = retry_delay
+        self.on_progress = on_progress
+        self.summary = SendSummary()
+        self._logs: list[dict[str, Any]] = []
+        self._flush_lock = asyncio.Lock()
+
+    async def run(self, pages: AsyncIterator[Sequence[Recipient]]) -> SendSummary:
+        queue: asyncio.Queue[Recipient | None] = asyncio.Queue(maxsize=self.concurrency * 2)
+        senders = [asyncio.create_task(self._sender(queue)) for _ in range(self.concurrency)]
+        try:
+            async for page in pages:
+                for recipient in await self._admit(page):
+                    await queue.put(recipient)
+            for _ in senders:
+                await queue.put(None)
+            await asyncio.gather(*senders)
+        except BaseException:
+            for sender in senders:
+                sender.cancel()
+            await asyncio.gather(*senders, return_exceptions=True)
+            raise
+        finally:
+            # Whatever went out is logged, even when the run fails part way.
+            await self._flush()
+        return self.summary
+
+    async def _admit(self, page: Sequence[Recipient]) -> Sequence[Recipient]:
+        if self.frequency_cap is None or self.campaign_id is None:
+            return page
+        allowed = await self.frequency_cap.reserve(
+            self.company_id, [recipient.phone for recipient in page], self.campaign_id
+        )
+        admitted: list[Recipient] = []
+        for recipient in page:
+            # Customers sharing a number get the promo once between them.
+            if recipient.phone in allowed:
+                allowed.discard(recipient.phone)
+                admitted.append(recipient)
+        self.summary.skipped += len(page) - len(admitted)
+        return admitted
+
+    async def _sender(self, queue: "asyncio.Queue[Recipient | None]") -> None:
+        while (recipient := await queue.get()) is not None:
+            body = self.template.render({**self.variables, "customer_name": recipient.name})
+            result = await self._send(OutboundMessage(recipient.phone, body, self.template.code))
+            if result.ok:
+                self.summary.sent += 1
+            else:
+                self.summary.failed += 1
+                if self.frequency_cap is not None and self.campaign_id is not None:
+                    await self.frequency_cap.release(self.company_id, recipient.phone, self.campaign_id)
+            self._logs.append(self._log_row(recipient, body, result))
+            if len(self._logs) >= self.log_batch_rows:
+                await self._flush()
+
+    async def _send(self, message: OutboundMessage) -> SendResult:
+        result = SendResult(error="Not sent")
+        for attempt in range(self.attempts):
+            if attempt:
+                await asyncio.sleep(min(self.retry_delay * 2 ** (attempt - 1), 5.0))
+            await self.throttle(self.company_id)
+            result = await self.provider.send(message)
+            if result.ok or not result.retryable:
+                break
+        return result
+
+    def _log_row(self, recipient: Recipient, body: str, result: SendResult) -> dict[str, Any]:
+        now = _utc_now()
+        return {
+            "company_id": self.company_id,
+            "customer_id": recipient.customer_id,
+            "to_phone": recipient.phone,
+            "template_code": self.template.code,
+            "type": self.template.type,
+            "body_rendered": body,
+            "order_id": self.order_id,
+            "campaign_id": self.campaign_id,
+            "status": "sent" if result.ok else "failed",
+            "provider": self.provider.name,
+            "provider_msg_id": result.provider_msg_id,
+            "error": result.error,
+            "created_at": now,
+            "sent_at": now if result.ok else None,
+        }
+
+    async def _flush(self) -> None:
+        async with self._flush_lock:
+            rows, self._logs = self._logs, []
+            if rows:
+                await self.write_logs(rows)
+            if self.on_progress is not None:
+                await self.on_progress(self.summary)
+
+
+def message_log_writer(session_factory: async_sessionmaker[AsyncSession]) -> LogWriter:
+    """Write each batch of log rows with one multi-row INSERT in its own short session."""
+
+    async def write(rows: list[dict[str, Any]]) -> None:
+        async with session_factory() as db:
+            await insert_many(db, MessageLog, rows)
+            await db.commit()
+
+    return write
+
+
+def _audience(company_id: int, campaign_id: str) -> list[Any]:
+    already_logged = exists().where(MessageLog.campaign_id == campaign_id, MessageLog.customer_id == Customer.id)
+    return [
+        Customer.company_id == company_id,
+        Customer.status == "active",
+        Customer.whatsapp_opted_out_at.is_(None),
+        Customer.phone_primary != "",
+        ~already_logged,
+    ]
+
+
+async def count_audience(db: AsyncSession, company_id: int, campaign_id: str) -> int:
+    return (await db.execute(select(func.count()).where(*_audience(company_id, campaign_id)))).scalar_one()
+
+
+async def audience_pages(
+    session_factory: async_sessionmaker[AsyncSession],
+    company_id: int,
+    campaign_id: str,
+    page_rows: int = settings.WHATSAPP_RECIPIENT_PAGE_ROWS,
+) -> AsyncIterator[list[Recipient]]:
+    """Active, opted-in customers in id order, each page read in its own session.
+
+    Customers an earlier attempt of ``campaign_id`` already logged are left out.
+    """
+    after = 0
+    while True:
+        async with session_factory() as db:
+            rows = (
+                await db.execute(
+                    select(Customer.id, Customer.phone_primary, Customer.name)
+                    .where(*_audience(company_id, campaign_id), Customer.id > after)
+                    .order_by(Customer.id)
+                    .limit(page_rows)
+                )
+            ).all()
+        if not rows:
+            return
+        after = rows[-1][0]
+        yield [Recipient(customer_id, phone, name) for customer_id, phone, name in rows]
+
+
+async def _single(recipient: Recipient) -> AsyncIterator[list[Recipient]]:
+    yield [recipient]
+
+
+async def broadcast_promo(
+    session_factory: async_sessionmaker[AsyncSession],
+    company_id: int,
+    campaign_id: str,
+    template_code: str,
+    variables: Mapping[str, str],
+    on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+) -> dict[str, Any]:
+    """Send promo ``template_code`` to every opted-in customer of the company."""
+    async with session_factory() as db:
+        template = await template_cache.get(db, company_id, template_code)
+        total = await count_audience(db, company_id, campaign_id)
+    if template is None or template.type != "promo":
+        raise MessagingError(f"No active promo template {template_code!r}")
+    missing = template.missing([*variables, *RECIPIENT_VARS])
+    if missing:
+        raise MessagingError(f"Template {template_code!r} needs values for {', '.join(missing)}")
+
+    async def progress(summary: SendSummary) -> None:
+        if on_progress is not None:
+            await on_progress(summary.done, total)
+
+    pipeline = SendPipeline(
+        company_id,
+        template,
+        get_provider(),
+        message_log_writer(session_factory),
+        variables=variables,
+        campaign_id=campaign_id,
+        frequency_cap=promo_cap,
+        on_progress=progress,
+    )
+    summary = await pipeline.run(audience_pages(session_factory, company_id, campaign_id))
+    return {"recipients": total, "sent": summary.sent, "failed": summary.failed, "skipped": summary.skipped}
+
+
+async def feedback_already_sent(db: AsyncSession, order_id: int) -> bool:
+    """True once a feedback message for the order has gone out (failed attempts do not count)."""
+    return bool(
+        (
+            await db.execute(
+                select(
+                    exists().where(
+                        MessageLog.order_id == order_id, MessageLog.type == "feedback", MessageLog.status != "failed"
+                    )
+                )
+            )
+        ).scalar_one()
+    )
+
+
+async def send_order_feedback(
+    session_factory: async_sessionmaker[AsyncSession], company_id: int, order_id: int, template_code: str
+) -> dict[str, Any]:
+    """Send the feedback template for a delivered order, at most once per order."""
+    async with session_factory() as db:
+        template = await template_cache.get(db, company_id, template_code)
+        row = (
+            await db.execute(
+                select(
+                    Order.order_no,
+                    Order.delivered_at,
+                    Customer.id,
+                    Customer.phone_primary,
+                    Customer.name,
+                    Customer.whatsapp_opted_out_at,
+                )
+                .join(Customer, Customer.id == Order.customer_id)
+                .where(Order.id == order_id, Order.company_id == company_id)
+            )
+        ).one_or_none()
+        sent_before = await feedback_already_sent(db, order_id)
+    if row is None:
+        raise MessagingError(f"Order {order_id} not found")
+    order_no, delivered_at, customer_id, phone, name, opted_out_at = row
+    if delivered_at is None:
+        raise MessagingError(f"Order {order_no} has not been delivered")
+    if template is None or template.type != "feedback":
+        raise MessagingError(f"No active feedback template {template_code!r}")
+    missing = template.missing(FEEDBACK_VARS)
+    if missing:
+        raise MessagingError(f"Template {template_code!r} needs values for {', '.join(missing)}")
+    if sent_before:
+        return {"sent": 0, "failed": 0, "skipped": 1, "reason": "already sent"}
+    if opted_out_at is not None or not phone:
+        return {"sent": 0, "failed": 0, "skipped": 1, "reason": "opted out"}
+
+    pipeline = SendPipeline(
+        company_id,
+        template,
+        get_provider(),
+        message_log_writer(session_factory),
+        variables={"order_no": order_no},
+        order_id=order_id,
+        concurrency=1,
+    )
+    summary = await pipeline.run(_single(Recipient(customer_id, phone, name)))
+    return {"sent": summary.sent, "failed": summary.failed, "skipped": summary.skipped}
@@ -0,0 +1,279 @@
+"""Provider delivery callbacks, applied to ``message_log`` in batches.
+
+The callback endpoint only checks the signature and pushes the events onto a
+Redis list, so the provider gets its 200 straight away however bursty it is.
+The ``whatsapp.callbacks`` periodic task drains the list every few hundred
+milliseconds: events are coalesced per ``provider_msg_id`` (a message's
+delivered and read receipts often arrive together) and each batch is applied
+with a single ``UPDATE … FROM (VALUES …)``.
+
+Statuses only move forward (sent, then delivered, then read), so batches can
+be applied out of order or by several workers at once. Receipts for messages
+whose log row has not been written yet (logs are written in batches after
+the send) are requeued for up to ``WHATSAPP_CALLBACK_RETRY_SECONDS``.
+
+A drain moves each batch into a processing list of its own with ``LMOVE``
+and deletes that list only once the batch has committed. Drains register in
+``whatsapp:callbacks:drainers`` and keep a liveness key fresh, so the batch
+of a worker that died mid-way is moved back onto the queue by the next drain
+instead of being lost. Applying an event twice is harmless.
+"""
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import DateTime, Integer, String, Text, and_, case, column, func, or_, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.redis import get_async_redis
+from app.models.message_log import MessageLog
+
+logger = get_logger(__name__)
+
+CALLBACK_QUEUE = "whatsapp:callbacks"
+PROCESSING_PREFIX = "whatsapp:callbacks:processing:"
+DRAINERS_KEY = "whatsapp:callbacks:drainers"
+DRAINER_ALIVE_PREFIX = "whatsapp:callbacks:drainer:"
+# Refreshed before every batch; a drain silent for longer is presumed dead.
+DRAINER_TTL_SECONDS = 300
+
+# A status only replaces one of lower rank; a late "failed" never undoes a delivery.
+STATUS_RANK = {"sent": 1, "failed": 2, "delivered": 2, "read": 3}
+
+
+def callback_signature(secret: str, body: bytes) -> str:
+    """The ``X-Signature-256`` header value the provider sends with ``body``."""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, body: bytes, signature: str | None) -> bool:
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(callback_signature(secret, body), signature)
+
+
+@dataclass(frozen=True)
+class StatusEvent:
+    provider: str
+    provider_msg_id: str
+    status: str
+    at: float
+    error: str | None = None
+    received_at: float = field(default_factory=time.time)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "StatusEvent":
+        return cls(**json.loads(raw))
+
+
+@dataclass
+class StatusUpdate:
+    """Everything a batch says about one message."""
+
+    status: str
+    delivered_at: datetime | None = None
+    read_at: datetime | None = None
+    error: str | None = None
+    events: list[StatusEvent] = field(default_factory=list)
+
+
+def _utc(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, UTC).replace(tzinfo=None)
+
+
+def _earliest(current: datetime | None, candidate: datetime) -> datetime:
+    return candidate if current is None or candidate < current else current
+
+
+def coalesce(events: Iterable[StatusEvent]) -> dict[tuple[str, str], StatusUpdate]:
+    """Fold events into one update per ``(provider, provider_msg_id)``; unknown statuses are dropped."""
+    updates: dict[tuple[str, str], StatusUpdate] = {}
+    for event in events:
+        rank = STATUS_RANK.get(event.status)
+        if rank is None:
+            continue
+        pending = updates.setdefault((event.provider, event.provider_msg_id), StatusUpdate(event.status))
+        pending.events.append(event)
+        if rank > STATUS_RANK[pending.status]:
+            pending.status = event.status
+        if event.status == "delivered":
+            pending.delivered_at = _earliest(pending.delivered_at, _utc(event.at))
+        elif event.status == "read":
+            pending.read_at = _earliest(pending.read_at, _utc(event.at))
+        elif event.status == "failed":
+            pending.error = event.error or "Failed"
+    return updates
+
+
+async def enqueue_events(events: Sequence[StatusEvent]) -> None:
+    if events:
+        await get_async_redis().rpush(CALLBACK_QUEUE, *(event.to_json() for event in events))  # type: ignore[misc]
+
+
+async def apply_updates(db: AsyncSession, provider: str, updates: dict[str, StatusUpdate]) -> set[str]:
+    """Apply one provider's updates in one statement; returns the message ids with no log row."""
+    rows = [
+        (msg_id, u.status, STATUS_RANK[u.status], u.delivered_at, u.read_at, u.error)
+        for msg_id, u in updates.items()
+    ]
+    batch = values(
+        column("provider_msg_id", String),
+        column("status", String),
+        column("rank", Integer),
+        column("delivered_at", DateTime),
+        column("read_at", DateTime),
+        column("error", Text),
+        name="batch",
+    ).data(rows)
+    current_rank = case(STATUS_RANK, value=MessageLog.status, else_=0)
+    advances = batch.c.rank > current_rank
+    result = await db.execute(
+        update(MessageLog)
+        .where(
+            MessageLog.provider == provider,
+            MessageLog.provider_msg_id == batch.c.provider_msg_id,
+            or_(
+                advances,
+                and_(MessageLog.delivered_at.is_(None), batch.c.delivered_at.is_not(None)),
+                and_(MessageLog.read_at.is_(None), batch.c.read_at.is_not(None)),
+            ),
+        )
+        .values(
+            status=case((advances, batch.c.status), else_=MessageLog.status),
+            delivered_at=func.coalesce(MessageLog.delivered_at, batch.c.delivered_at),
+            read_at=func.coalesce(MessageLog.read_at, batch.c.read_at),
+            error=case((advances, func.coalesce(batch.c.error, MessageLog.error)), else_=MessageLog.error),
+        )
+        .returning(MessageLog.provider_msg_id)
+    )
+    unchanged = set(updates) - set(result.scalars().all())
+    if not unchanged:
+        return set()
+    # Rows that exist but already had a later status need nothing more.
+    existing = await db.execute(
+        select(MessageLog.provider_msg_id).where(
+            MessageLog.provider == provider, MessageLog.provider_msg_id.in_(unchanged)
+        )
+    )
+    return unchanged - set(existing.scalars().all())
+
+
+async def apply_events(db: AsyncSession, events: Sequence[StatusEvent]) -> list[StatusEvent]:
+    """Apply a batch of events; returns the ones to retry because their message is not logged yet."""
+    by_provider: dict[str, dict[str, StatusUpdate]] = defaultdict(dict)
+    for (provider, msg_id), pending in coalesce(events).items():
+        by_provider[provider][msg_id] = pending
+
+    retry: list[StatusEvent] = []
+    expired = 0
+    cutoff = time.time() - settings.WHATSAPP_CALLBACK_RETRY_SECONDS
+    for provider, updates in by_provider.items():
+        for msg_id in await apply_updates(db, provider, updates):
+            for event in updates[msg_id].events:
+                if event.received_at >= cutoff:
+                    retry.append(event)
+                else:
+                    expired += 1
+    if expired:
+        logger.warning(f"Dropped {expired} WhatsApp callback events for messages that were never logged")
+    return retry
+
+
+async def _move_all(redis: Any, source: str, destination: str) -> int:
+    moved = 0
+    while count := await redis.llen(source):
+        async with redis.pipeline(transaction=False) as pipe:
+            for _ in range(count):
+                pipe.lmove(source, destination, "LEFT", "RIGHT")
+            moved += sum(item is not None for item in await pipe.execute())
+    return moved
+
+
+async def _requeue(redis: Any, drainer: str) -> int:
+    """Put a drain's in-flight events back on the queue and unregister it."""
+    requeued = await _move_all(redis, PROCESSING_PREFIX + drainer, CALLBACK_QUEUE)
+    await redis.srem(DRAINERS_KEY, drainer)
+    return requeued
+
+
+async def recover_abandoned_callbacks() -> int:
+    """Requeue the in-flight batches of drains whose liveness key has lapsed; returns how many events."""
+    redis = get_async_redis()
+    drainers = list(await redis.smembers(DRAINERS_KEY))  # type: ignore[misc]
+    if not drainers:
+        return 0
+    async with redis.pipeline(transaction=False) as pipe:
+        for drainer in drainers:
+            pipe.exists(DRAINER_ALIVE_PREFIX + drainer)
+        alive = await pipe.execute()
+    recovered = 0
+    for drainer, is_alive in zip(drainers, alive, strict=True):
+        if not is_alive:
+            recovered += await _requeue(redis, drainer)
+    if recovered:
+        logger.warning(f"Requeued {recovered} WhatsApp callback events from drains that stopped mid-batch")
+    return recovered
+
+
+async def drain_callbacks(
+    session_factory: async_sessionmaker[AsyncSession], batch_events: int = settings.WHATSAPP_CALLBACK_BATCH_EVENTS
+) -> int:
+    """Apply queued callback events a batch at a time until the queue runs dry; returns how many were applied.
+
+    A batch that fails to apply goes back on the queue for the next run, and
+    so does one left behind by a worker that died before committing it.
+    """
+    redis = get_async_redis()
+    await recover_abandoned_callbacks()
+    if not await redis.llen(CALLBACK_QUEUE):  # type: ignore[misc]
+        return 0
+
+    drainer = uuid.uuid4().hex
+    processing = PROCESSING_PREFIX + drainer
+    applied = 0
+    try:
+        while True:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.set(DRAINER_ALIVE_PREFIX + drainer, "1", ex=DRAINER_TTL_SECONDS)
+                pipe.sadd(DRAINERS_KEY, drainer)
+                pipe.llen(CALLBACK_QUEUE)
+                queued = (await pipe.execute())[-1]
+            if not queued:
+                return applied
+            async with redis.pipeline(transaction=False) as pipe:
+                for _ in range(min(queued, batch_events)):
+                    pipe.lmove(CALLBACK_QUEUE, processing, "LEFT", "RIGHT")
+                raw: list[str] = [item for item in await pipe.execute() if item is not None]
+            if not raw:
+                return applied
+            events = [StatusEvent.from_json(item) for item in raw]
+            async with session_factory() as db:
+                retry = await apply_events(db, events)
+                await db.commit()
+            async with redis.pipeline(transaction=True) as pipe:
+                if retry:
+                    pipe.rpush(CALLBACK_QUEUE, *(event.to_json() for event in retry))
+                pipe.delete(processing)
+                await pipe.execute()
+            applied += len(events) - len(retry)
+            # Requeued events wait for the next run rather than spinning here.
+            if len(raw) < batch_events:
+                return applied
+    finally:
+        try:
+            await redis.delete(DRAINER_ALIVE_PREFIX + drainer)
+            await _requeue(redis, drainer)
+        except Exception as e:
+            logger.warning(f"Could not requeue in-flight WhatsApp callbacks; the next drain will: {e}")
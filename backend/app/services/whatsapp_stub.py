@@ -0,0 +1,61 @@
+"""A local stand-in for the WhatsApp provider's messaging API.
+
+Run it with ``uvicorn app.services.whatsapp_stub:app --port 8099`` and point
+``WHATSAPP_API_URL`` at it, or mount ``create_stub_app()`` on an
+``httpx.ASGITransport`` in tests. It accepts ``POST /messages`` the way
+``WhatsAppProvider`` sends them and answers with a fresh message id.
+
+Numbers ending in ``0000`` are rejected as invalid, and ``fail_every``
+answers every n-th message with a 503, to exercise the error paths.
+"""
+import os
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Annotated, Any
+
+from fastapi import FastAPI, Header, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+INVALID_SUFFIX = "0000"
+
+
+class StubMessage(BaseModel):
+    to: str
+    body: str
+    template: str | None = None
+
+
+@dataclass
+class StubState:
+    token: str = ""
+    fail_every: int = 0
+    received: int = 0
+    recent: deque[dict[str, Any]] = field(default_factory=lambda: deque(maxlen=1000))
+
+
+def create_stub_app(token: str = "", fail_every: int = 0) -> FastAPI:
+    stub = FastAPI(title="WhatsApp provider stub")
+    state = StubState(token=token, fail_every=fail_every)
+    stub.state.provider = state
+
+    @stub.post("/messages", response_model=None)
+    async def send_message(
+        message: StubMessage, authorization: Annotated[str | None, Header()] = None
+    ) -> dict[str, str] | JSONResponse:
+        if state.token and authorization != f"Bearer {state.token}":
+            return JSONResponse({"error": "Bad token"}, status_code=status.HTTP_401_UNAUTHORIZED)
+        state.received += 1
+        if state.fail_every and state.received % state.fail_every == 0:
+            return JSONResponse({"error": "Try again"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if message.to.endswith(INVALID_SUFFIX):
+            return JSONResponse({"error": "Not a WhatsApp number"}, status_code=status.HTTP_400_BAD_REQUEST)
+        message_id = f"stub-{uuid.uuid4().hex}"
+        state.recent.append({"id": message_id, **message.model_dump()})
+        return {"id": message_id}
+
+    return stub
+
+
+app = create_stub_app(os.environ.get("WHATSAPP_API_TOKEN", ""), int(os.environ.get("WHATSAPP_STUB_FAIL_EVERY", "0")))
@@ -0,0 +1,146 @@
+"""Live job events.
+
+Queues publish a snapshot of a job whenever its status or progress changes.
+With Redis the snapshot goes to the ``jobs:events:<id>`` channel. Each API
+process holds a single pub/sub connection (``RedisJobEventHub``) and fans
+every message out to its local subscribers, so a thousand clients watching
+one export share one subscription. Watching a job costs no database queries.
+"""
+import asyncio
+import contextlib
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+from redis.asyncio.client import PubSub
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.redis import get_async_redis
+from app.tasks.jobs import Job
+
+logger = get_logger(__name__)
+
+CHANNEL_PREFIX = "jobs:events:"
+# Events are whole snapshots, so a slow subscriber only needs the latest few.
+SUBSCRIBER_BUFFER = 16
+
+
+def job_channel(job_id: str) -> str:
+    return CHANNEL_PREFIX + job_id
+
+
+def job_event(job: Job) -> dict[str, Any]:
+    """What subscribers are told about a job after each change."""
+    return {
+        "id": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "message": job.message,
+        "errors": job.errors,
+        "error": job.error,
+        "result_url": job.result_url,
+    }
+
+
+def encode_event(job: Job) -> str:
+    return json.dumps(job_event(job))
+
+
+class JobEventHub:
+    """Fans job events out to the subscribers in this process."""
+
+    def __init__(self) -> None:
+        self._subscribers: dict[str, set[asyncio.Queue[dict[str, Any]]]] = {}
+
+    def deliver(self, job_id: str, event: dict[str, Any]) -> None:
+        for queue in self._subscribers.get(job_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def _watch(self, job_id: str) -> None:
+        """Start receiving events for ``job_id``; called for its first local subscriber."""
+
+    async def _unwatch(self, job_id: str) -> None:
+        """Stop receiving events for ``job_id``; called once its last local subscriber leaves."""
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, job_id: str) -> AsyncIterator[asyncio.Queue[dict[str, Any]]]:
+        queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+        subscribers = self._subscribers.setdefault(job_id, set())
+        first = not subscribers
+        subscribers.add(queue)
+        try:
+            if first:
+                await self._watch(job_id)
+            yield queue
+        finally:
+            subscribers.discard(queue)
+            if not subscribers and self._subscribers.get(job_id) is subscribers:
+                del self._subscribers[job_id]
+                await self._unwatch(job_id)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisJobEventHub(JobEventHub):
+    def __init__(self) -> None:
+        super().__init__()
+        self._pubsub: PubSub | None = None
+        self._reader: asyncio.Task[None] | None = None
+
+    async def _watch(self, job_id: str) -> None:
+        if self._pubsub is None:
+            self._pubsub = get_async_redis().pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(job_channel(job_id))
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read(self._pubsub))
+
+    async def _unwatch(self, job_id: str) -> None:
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.unsubscribe(job_channel(job_id))
+            except Exception as e:
+                logger.warning(f"Failed to unsubscribe from job {job_id}: {e}")
+
+    async def _read(self, pubsub: PubSub) -> None:
+        while True:
+            try:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job event subscription interrupted: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is not None and message["type"] == "message":
+                self.deliver(message["channel"].removeprefix(CHANNEL_PREFIX), json.loads(message["data"]))
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reader
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()  # type: ignore[no-untyped-call]
+            self._pubsub = None
+
+
+_job_event_hub: JobEventHub | None = None
+
+
+def get_job_event_hub() -> JobEventHub:
+    global _job_event_hub
+    if _job_event_hub is None:
+        _job_event_hub = JobEventHub() if settings.JOB_QUEUE_BACKEND == "memory" else RedisJobEventHub()
+    return _job_event_hub
+
+
+async def close_job_event_hub() -> None:
+    global _job_event_hub
+    if _job_event_hub is not None:
+        await _job_event_hub.close()
+        _job_event_hub = None
@@ -0,0 +1,117 @@
+"""Task handlers run by the job worker."""
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any
+
+import aiofiles  # type: ignore[import-untyped]
+
+from app.db.session import AsyncSessionLocal
+from app.services.import_parsing import ImportFileError
+from app.services.imports import ingest_bank_file, ingest_franchise_import
+from app.services.invoice_export import stream_invoices_pdf, stream_invoices_zip
+from app.services.kpi_rollup import fold_all_kpi_deltas
+from app.services.whatsapp import MessagingError, broadcast_promo, send_order_feedback
+from app.services.whatsapp_callbacks import drain_callbacks
+from app.tasks.jobs import PermanentJobError, periodic, task
+
+if TYPE_CHECKING:
+    from app.tasks.worker import JobContext
+
+EXPORT_MEDIA_TYPES = {"pdf": "application/pdf", "zip": "application/zip"}
+
+
+@task("invoices.export")
+async def export_invoices(ctx: "JobContext", payload: dict[str, Any]) -> dict[str, Any]:
+    """Render invoices to a PDF or ZIP file for later download.
+
+    The ids were scoped to the requester when the job was queued.
+    """
+    export_format = payload.get("format")
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise PermanentJobError(f"Unsupported export format {export_format!r}")
+    invoice_ids: list[int] = payload["invoice_ids"]
+    filename = f"invoices.{export_format}"
+    stream = stream_invoices_pdf if export_format == "pdf" else stream_invoices_zip
+
+    async def on_progress(rendered: int) -> None:
+        await ctx.progress(100 * rendered / len(invoice_ids), f"{rendered} of {len(invoice_ids)} invoices rendered")
+
+    # Opening with "wb" truncates whatever an earlier attempt left behind.
+    async with AsyncSessionLocal() as db, aiofiles.open(ctx.result_path(filename), "wb") as out:
+        async for chunk in stream(db, invoice_ids, on_progress=on_progress):
+            await out.write(chunk)
+
+    return {"file": filename, "media_type": EXPORT_MEDIA_TYPES[export_format], "invoices": len(invoice_ids)}
+
+
+def _import_progress(ctx: "JobContext") -> Callable[[int, int], Awaitable[None]]:
+    async def on_progress(loaded: int, total: int) -> None:
+        await ctx.progress(100 * loaded / max(total, 1), f"{loaded} of {total} rows loaded")
+
+    return on_progress
+
+
+@task("imports.bank")
+async def import_bank_statement(ctx: "JobContext", payload: dict[str, Any]) -> dict[str, Any]:
+    """Parse an uploaded bank statement into ``bank_txn``; an unusable file fails without retries."""
+    async with AsyncSessionLocal() as db:
+        try:
+            return await ingest_bank_file(db, payload["file_id"], on_progress=_import_progress(ctx))
+        except ImportFileError as exc:
+            raise PermanentJobError(str(exc)) from exc
+
+
+@task("imports.franchise")
+async def import_franchise_sales(ctx: "JobContext", payload: dict[str, Any]) -> dict[str, Any]:
+    """Parse an uploaded franchise sales file into ``franchise_sales_staging``."""
+    async with AsyncSessionLocal() as db:
+        try:
+            return await ingest_franchise_import(db, payload["import_id"], on_progress=_import_progress(ctx))
+        except ImportFileError as exc:
+            raise PermanentJobError(str(exc)) from exc
+
+
+@task("whatsapp.broadcast")
+async def whatsapp_broadcast(ctx: "JobContext", payload: dict[str, Any]) -> dict[str, Any]:
+    """Send a promo to the company's opted-in customers; the job id is the campaign id."""
+    if ctx.job.company_id is None:
+        raise PermanentJobError("Broadcasts need a company")
+
+    async def on_progress(done: int, total: int) -> None:
+        await ctx.progress(100 * done / max(total, 1), f"{done} of {total} customers processed")
+
+    try:
+        return await broadcast_promo(
+            AsyncSessionLocal,
+            ctx.job.company_id,
+            ctx.job.id,
+            payload["template_code"],
+            payload.get("variables", {}),
+            on_progress=on_progress,
+        )
+    except MessagingError as exc:
+        raise PermanentJobError(str(exc)) from exc
+
+
+@task("whatsapp.feedback")
+async def whatsapp_feedback(ctx: "JobContext", payload: dict[str, Any]) -> dict[str, Any]:
+    """Send the feedback message for one delivered order."""
+    if ctx.job.company_id is None:
+        raise PermanentJobError("Feedback messages need a company")
+    try:
+        return await send_order_feedback(
+            AsyncSessionLocal, ctx.job.company_id, payload["order_id"], payload["template_code"]
+        )
+    except MessagingError as exc:
+        raise PermanentJobError(str(exc)) from exc
+
+
+@periodic("kpi.fold", seconds=5)
+async def fold_kpis() -> None:
+    """Move recorded KPI deltas into ``daily_store_kpi``; concurrent folds skip each other's rows."""
+    await fold_all_kpi_deltas(AsyncSessionLocal)
+
+
+@periodic("whatsapp.callbacks", seconds=0.25)
+async def apply_whatsapp_callbacks() -> None:
+    """Apply queued provider receipts to ``message_log``, coalesced per message."""
+    await drain_callbacks(AsyncSessionLocal)
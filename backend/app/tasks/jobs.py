@@ -0,0 +1,172 @@
+"""Job records and the task registry."""
+import json
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field, fields
+from typing import TYPE_CHECKING, Any, Literal
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.tasks.worker import JobContext
+
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+TERMINAL_STATUSES: frozenset[str] = frozenset({"succeeded", "failed", "cancelled"})
+
+MIN_PRIORITY = 0
+MAX_PRIORITY = 9
+DEFAULT_PRIORITY = 5
+
+TaskHandler = Callable[["JobContext", dict[str, Any]], Awaitable[dict[str, Any] | None]]
+PeriodicHandler = Callable[[], Awaitable[None]]
+
+
+class JobCancelledError(Exception):
+    """Raised inside a handler once cancellation of its job has been requested."""
+
+
+class LeaseLostError(Exception):
+    """The worker's lease on a job lapsed and the job may be running elsewhere."""
+
+
+class PermanentJobError(Exception):
+    """A failure that retrying cannot fix; the job goes straight to the dead-letter queue."""
+
+
+@dataclass
+class Job:
+    name: str
+    payload: dict[str, Any]
+    company_id: int | None = None
+    user_id: int | None = None
+    priority: int = DEFAULT_PRIORITY
+    max_attempts: int = 3
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = "queued"
+    attempts: int = 0
+    progress: float = 0.0
+    message: str | None = None
+    errors: int = 0
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    cancel_requested: bool = False
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def queue_score(self) -> int:
+        """Sort key in the ready queue: higher priority first, then oldest first.
+
+        Age is compared to the millisecond; jobs queued within the same
+        millisecond may be claimed in either order.
+        """
+        return (MAX_PRIORITY - self.priority) * 10**13 + int(self.created_at * 1000)
+
+    @property
+    def queue_member(self) -> str:
+        """Queue entry for this job; the company prefix lets the claim script enforce concurrency."""
+        return f"{self.company_id if self.company_id is not None else '-'}:{self.id}"
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    @property
+    def result_url(self) -> str | None:
+        """Download link for the job's result file, once it has one."""
+        if self.status == "succeeded" and self.result is not None and "file" in self.result:
+            return f"{status_url(self.id)}/result"
+        return None
+
+    def unset_fields(self) -> list[str]:
+        """Fields that are ``None``, which ``to_mapping`` leaves out."""
+        return [spec.name for spec in fields(self) if getattr(self, spec.name) is None]
+
+    def to_mapping(self) -> dict[str, str]:
+        """Flat string mapping for a Redis hash; ``None`` fields are omitted."""
+        mapping: dict[str, str] = {"queue_score": str(self.queue_score)}
+        for name, value in asdict(self).items():
+            if value is None:
+                continue
+            if name in ("payload", "result"):
+                mapping[name] = json.dumps(value)
+            elif isinstance(value, bool):
+                mapping[name] = "1" if value else "0"
+            else:
+                mapping[name] = str(value)
+        return mapping
+
+    @classmethod
+    def from_mapping(cls, mapping: dict[str, str]) -> "Job":
+        values: dict[str, Any] = {}
+        for spec in fields(cls):
+            raw = mapping.get(spec.name)
+            if raw is None:
+                continue
+            if spec.name in ("payload", "result"):
+                values[spec.name] = json.loads(raw)
+            elif spec.name == "cancel_requested":
+                values[spec.name] = raw == "1"
+            elif spec.name in ("company_id", "user_id", "priority", "max_attempts", "attempts", "errors"):
+                values[spec.name] = int(raw)
+            elif spec.name in ("progress", "created_at", "started_at", "finished_at"):
+                values[spec.name] = float(raw)
+            else:
+                values[spec.name] = raw
+        return cls(**values)
+
+
+def status_url(job_id: str) -> str:
+    return f"{settings.API_V1_STR}/tasks/{job_id}"
+
+
+@dataclass(frozen=True)
+class PeriodicTask:
+    name: str
+    interval: float
+    handler: PeriodicHandler
+
+
+class TaskRegistry:
+    def __init__(self) -> None:
+        self._handlers: dict[str, TaskHandler] = {}
+        self.periodic_tasks: dict[str, PeriodicTask] = {}
+
+    def task(self, name: str) -> Callable[[TaskHandler], TaskHandler]:
+        """Register the decorated coroutine as the handler for jobs called ``name``."""
+
+        def register(handler: TaskHandler) -> TaskHandler:
+            if name in self._handlers:
+                raise ValueError(f"Task {name!r} is already registered")
+            self._handlers[name] = handler
+            return handler
+
+        return register
+
+    def periodic(self, name: str, seconds: float) -> Callable[[PeriodicHandler], PeriodicHandler]:
+        """Have every worker run the decorated coroutine every ``seconds``.
+
+        Each worker process runs its own schedule, so the handler must be
+        safe to run concurrently with itself in other processes.
+        """
+
+        def register(handler: PeriodicHandler) -> PeriodicHandler:
+            if name in self.periodic_tasks:
+                raise ValueError(f"Periodic task {name!r} is already registered")
+            self.periodic_tasks[name] = PeriodicTask(name, seconds, handler)
+            return handler
+
+        return register
+
+    def get(self, name: str) -> TaskHandler | None:
+        return self._handlers.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._handlers
+
+
+task_registry = TaskRegistry()
+task = task_registry.task
+periodic = task_registry.periodic
@@ -0,0 +1,457 @@
+"""Job queue backends.
+
+``RedisJobQueue`` is shared by the API and any number of worker processes:
+
+* ``jobs:job:<id>`` is a hash holding the job record.
+* ``jobs:ready`` is a sorted set of ``<company>:<id>`` members scored by
+  priority and then enqueue time.
+* ``jobs:delayed`` holds retries until their backoff expires.
+* ``jobs:leases`` holds running jobs scored by lease expiry. Workers extend
+  the lease while a job runs. A job whose worker died is put back on the
+  ready queue once its lease lapses. A lease belongs to one attempt: once it
+  has lapsed, that attempt's heartbeats raise ``LeaseLostError`` and its
+  ``retry`` and ``finish`` change nothing.
+* ``jobs:running:<company>`` counts running jobs per company. The claim script
+  skips a company's jobs while it is at ``company_concurrency``, so one
+  tenant's bulk export cannot starve everyone else.
+* ``jobs:dead`` lists the ids of jobs that failed for good.
+
+Claiming and releasing run as Lua scripts, so each is atomic. The scripts
+touch keys derived from the job members, so this assumes a single Redis node
+rather than a cluster.
+
+Every change of status or progress is also published as a job event (see
+``app.tasks.events``).
+
+``InMemoryJobQueue`` has the same semantics inside a single process. It is
+meant for tests and for development without Redis.
+"""
+import time
+from abc import ABC, abstractmethod
+from typing import Any
+
+from app.core.config import settings
+from app.core.redis import get_async_redis
+from app.tasks.events import JobEventHub, encode_event, get_job_event_hub, job_channel, job_event
+from app.tasks.jobs import Job, LeaseLostError
+
+READY_KEY = "jobs:ready"
+DELAYED_KEY = "jobs:delayed"
+LEASES_KEY = "jobs:leases"
+DEAD_KEY = "jobs:dead"
+JOB_PREFIX = "jobs:job:"
+RUNNING_PREFIX = "jobs:running:"
+IDEMPOTENCY_PREFIX = "jobs:idempotency:"
+
+MAX_DEAD_LETTERS = 10_000
+# How far down the ready queue a claim looks for a company with a free slot.
+CLAIM_SCAN_DEPTH = 50
+
+
+def _company_of(member: str) -> str:
+    return member.split(":", 1)[0]
+
+
+class JobQueue(ABC):
+    def __init__(
+        self,
+        company_concurrency: int | None = None,
+        lease_seconds: int | None = None,
+        result_ttl_seconds: int | None = None,
+    ) -> None:
+        self.company_concurrency = company_concurrency or settings.JOB_COMPANY_CONCURRENCY
+        self.lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+        self.result_ttl_seconds = result_ttl_seconds or settings.JOB_RESULT_TTL_SECONDS
+
+    @abstractmethod
+    async def enqueue(self, job: Job, idempotency_key: str | None = None) -> Job:
+        """Queue ``job``. A repeated ``idempotency_key`` returns the job queued first instead."""
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Job | None: ...
+
+    @abstractmethod
+    async def claim(self) -> Job | None:
+        """Take the most urgent job whose company has a free slot, marking it running."""
+
+    @abstractmethod
+    async def heartbeat(self, job: Job, report: bool = False) -> bool:
+        """Extend the job's lease and return whether cancellation was requested.
+
+        With ``report`` the job's progress, message and error count are saved
+        and published as well. Raises ``LeaseLostError`` if this attempt no
+        longer holds the lease.
+        """
+
+    @abstractmethod
+    async def retry(self, job: Job, error: str, delay: float) -> bool:
+        """Release a failed attempt and run the job again after ``delay`` seconds.
+
+        Returns False, changing nothing, if this attempt no longer holds the lease.
+        """
+
+    @abstractmethod
+    async def finish(self, job: Job) -> bool:
+        """Release a job that has reached a terminal status. Failed jobs go to the dead-letter queue.
+
+        Returns False, changing nothing, if this attempt no longer holds the lease.
+        """
+
+    @abstractmethod
+    async def cancel(self, job_id: str) -> Job | None:
+        """Cancel a queued job outright, or ask the worker running it to stop."""
+
+    @abstractmethod
+    async def dead_letters(self, limit: int = 100) -> list[Job]:
+        """The most recently dead-lettered jobs, newest first."""
+
+
+# KEYS: ready, delayed, leases
+# ARGV: now_ms, company_concurrency, scan_depth, running_prefix, job_prefix, lease_ms, now_s
+_CLAIM = """
+local now = tonumber(ARGV[1])
+
+local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now, 'LIMIT', 0, 100)
+for _, member in ipairs(expired) do
+  local company, id = string.match(member, '^([^:]*):(.*)$')
+  redis.call('ZREM', KEYS[3], member)
+  if redis.call('DECR', ARGV[4] .. company) <= 0 then redis.call('DEL', ARGV[4] .. company) end
+  if redis.call('EXISTS', ARGV[5] .. id) == 1 then
+    redis.call('HSET', ARGV[5] .. id, 'status', 'queued')
+    redis.call('ZADD', KEYS[1], redis.call('HGET', ARGV[5] .. id, 'queue_score') or 0, member)
+  end
+end
+
+local due = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, 100)
+for _, member in ipairs(due) do
+  local _, id = string.match(member, '^([^:]*):(.*)$')
+  redis.call('ZREM', KEYS[2], member)
+  redis.call('ZADD', KEYS[1], redis.call('HGET', ARGV[5] .. id, 'queue_score') or 0, member)
+end
+
+local limit = tonumber(ARGV[2])
+local candidates = redis.call('ZRANGE', KEYS[1], 0, tonumber(ARGV[3]) - 1)
+for _, member in ipairs(candidates) do
+  local company, id = string.match(member, '^([^:]*):(.*)$')
+  local running = tonumber(redis.call('GET', ARGV[4] .. company) or '0')
+  if company == '-' or running < limit then
+    redis.call('ZREM', KEYS[1], member)
+    if redis.call('EXISTS', ARGV[5] .. id) == 1 then
+      redis.call('INCR', ARGV[4] .. company)
+      redis.call('ZADD', KEYS[3], now + tonumber(ARGV[6]), member)
+      redis.call('HSET', ARGV[5] .. id, 'status', 'running', 'started_at', ARGV[7])
+      redis.call('HINCRBY', ARGV[5] .. id, 'attempts', 1)
+      return id
+    end
+  end
+end
+return false
+"""
+
+# A lease is held by the attempt that took it: the member is in the leases set
+# and the job's attempt count has not moved on since.
+# KEYS: leases, job
+# ARGV: member, lease_until_ms, attempts
+_HEARTBEAT = """
+if redis.call('HGET', KEYS[2], 'attempts') ~= ARGV[3] or not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+  return -1
+end
+redis.call('ZADD', KEYS[1], 'XX', ARGV[2], ARGV[1])
+if redis.call('HGET', KEYS[2], 'cancel_requested') == '1' then return 1 end
+return 0
+"""
+
+# KEYS: leases, running counter, ready, delayed, job
+# ARGV: member, attempts
+_SETTLE = """
+if redis.call('HGET', KEYS[5], 'attempts') ~= ARGV[2] or redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+  return 0
+end
+if redis.call('DECR', KEYS[2]) <= 0 then redis.call('DEL', KEYS[2]) end
+redis.call('ZREM', KEYS[3], ARGV[1])
+redis.call('ZREM', KEYS[4], ARGV[1])
+return 1
+"""
+
+
+class RedisJobQueue(JobQueue):
+    async def _settle(self, job: Job) -> bool:
+        """Drop the attempt's lease and its company slot; False if it no longer held the lease."""
+        member = job.queue_member
+        settled = await get_async_redis().register_script(_SETTLE)(
+            keys=[LEASES_KEY, RUNNING_PREFIX + _company_of(member), READY_KEY, DELAYED_KEY, JOB_PREFIX + job.id],
+            args=[member, job.attempts],
+        )
+        return bool(settled)
+
+    async def enqueue(self, job: Job, idempotency_key: str | None = None) -> Job:
+        redis = get_async_redis()
+        if idempotency_key is not None:
+            key = f"{IDEMPOTENCY_PREFIX}{job.company_id if job.company_id is not None else '-'}:{idempotency_key}"
+            if not await redis.set(key, job.id, nx=True, ex=self.result_ttl_seconds):
+                existing_id = await redis.get(key)
+                existing = await self.get(existing_id) if existing_id else None
+                if existing is not None:
+                    return existing
+                await redis.set(key, job.id, ex=self.result_ttl_seconds)
+
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(JOB_PREFIX + job.id, mapping=job.to_mapping())
+            pipe.zadd(READY_KEY, {job.queue_member: job.queue_score})
+            await pipe.execute()
+        return job
+
+    async def get(self, job_id: str) -> Job | None:
+        mapping = await get_async_redis().hgetall(JOB_PREFIX + job_id)  # type: ignore[misc]
+        return Job.from_mapping(mapping) if mapping else None
+
+    async def claim(self) -> Job | None:
+        redis = get_async_redis()
+        now = time.time()
+        job_id = await redis.register_script(_CLAIM)(
+            keys=[READY_KEY, DELAYED_KEY, LEASES_KEY],
+            args=[
+                int(now * 1000),
+                self.company_concurrency,
+                CLAIM_SCAN_DEPTH,
+                RUNNING_PREFIX,
+                JOB_PREFIX,
+                self.lease_seconds * 1000,
+                now,
+            ],
+        )
+        job = await self.get(job_id) if job_id else None
+        if job is not None:
+            await redis.publish(job_channel(job.id), encode_event(job))
+        return job
+
+    async def heartbeat(self, job: Job, report: bool = False) -> bool:
+        redis = get_async_redis()
+        cancel_requested = await redis.register_script(_HEARTBEAT)(
+            keys=[LEASES_KEY, JOB_PREFIX + job.id],
+            args=[job.queue_member, int((time.time() + self.lease_seconds) * 1000), job.attempts],
+        )
+        if cancel_requested == -1:
+            raise LeaseLostError(job.id)
+        if report:
+            fields: dict[str, Any] = {"progress": job.progress, "errors": job.errors}
+            if job.message is not None:
+                fields["message"] = job.message
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.hset(JOB_PREFIX + job.id, mapping=fields)
+                pipe.publish(job_channel(job.id), encode_event(job))
+                await pipe.execute()
+        return bool(cancel_requested == 1)
+
+    # Once settled, the job is in no queue and holds no lease, so nothing else
+    # touches it before the rest of the outcome is written.
+    async def retry(self, job: Job, error: str, delay: float) -> bool:
+        if not await self._settle(job):
+            return False
+        job.status = "queued"
+        job.error = error
+        async with get_async_redis().pipeline(transaction=True) as pipe:
+            pipe.hset(JOB_PREFIX + job.id, mapping={"status": job.status, "error": error})
+            pipe.zadd(DELAYED_KEY, {job.queue_member: int((time.time() + delay) * 1000)})
+            pipe.publish(job_channel(job.id), encode_event(job))
+            await pipe.execute()
+        return True
+
+    async def finish(self, job: Job) -> bool:
+        if not await self._settle(job):
+            return False
+        job.finished_at = time.time()
+        async with get_async_redis().pipeline(transaction=True) as pipe:
+            pipe.hset(JOB_PREFIX + job.id, mapping=job.to_mapping())
+            if job.unset_fields():
+                pipe.hdel(JOB_PREFIX + job.id, *job.unset_fields())
+            if job.status == "failed":
+                # Dead letters are kept until someone deals with them.
+                pipe.persist(JOB_PREFIX + job.id)
+                pipe.lpush(DEAD_KEY, job.id)
+                pipe.ltrim(DEAD_KEY, 0, MAX_DEAD_LETTERS - 1)
+            else:
+                pipe.expire(JOB_PREFIX + job.id, self.result_ttl_seconds)
+            pipe.publish(job_channel(job.id), encode_event(job))
+            await pipe.execute()
+        return True
+
+    async def cancel(self, job_id: str) -> Job | None:
+        redis = get_async_redis()
+        job = await self.get(job_id)
+        if job is None or job.is_terminal:
+            return job
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(READY_KEY, job.queue_member)
+            pipe.zrem(DELAYED_KEY, job.queue_member)
+            removed = sum(await pipe.execute())
+        if removed:
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hset(JOB_PREFIX + job.id, mapping=job.to_mapping())
+                pipe.expire(JOB_PREFIX + job.id, self.result_ttl_seconds)
+                pipe.publish(job_channel(job.id), encode_event(job))
+                await pipe.execute()
+        else:
+            # Already claimed: the worker sees the flag at its next heartbeat.
+            job.cancel_requested = True
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hset(JOB_PREFIX + job.id, "cancel_requested", "1")
+                pipe.publish(job_channel(job.id), encode_event(job))
+                await pipe.execute()
+        return job
+
+    async def dead_letters(self, limit: int = 100) -> list[Job]:
+        redis = get_async_redis()
+        job_ids = await redis.lrange(DEAD_KEY, 0, limit - 1)  # type: ignore[misc]
+        async with redis.pipeline(transaction=False) as pipe:
+            for job_id in job_ids:
+                pipe.hgetall(JOB_PREFIX + job_id)
+            mappings = await pipe.execute()
+        return [Job.from_mapping(mapping) for mapping in mappings if mapping]
+
+
+class InMemoryJobQueue(JobQueue):
+    """Single-process queue with the same claim, lease and concurrency rules as ``RedisJobQueue``."""
+
+    def __init__(
+        self,
+        company_concurrency: int | None = None,
+        lease_seconds: int | None = None,
+        result_ttl_seconds: int | None = None,
+        events: JobEventHub | None = None,
+    ) -> None:
+        super().__init__(company_concurrency, lease_seconds, result_ttl_seconds)
+        self.events = events or get_job_event_hub()
+        # Jobs are stored in their serialised form so callers never share
+        # mutable state with the queue, exactly as with Redis.
+        self.jobs: dict[str, dict[str, str]] = {}
+        self.ready: dict[str, int] = {}
+        self.delayed: dict[str, float] = {}
+        self.leases: dict[str, float] = {}
+        self.running: dict[str, int] = {}
+        self.dead: list[str] = []
+        self.idempotency: dict[str, str] = {}
+
+    def _release(self, member: str) -> None:
+        if self.leases.pop(member, None) is not None:
+            company = _company_of(member)
+            self.running[company] -= 1
+            if self.running[company] <= 0:
+                del self.running[company]
+        self.ready.pop(member, None)
+        self.delayed.pop(member, None)
+
+    def _holds_lease(self, job: Job) -> bool:
+        mapping = self.jobs.get(job.id)
+        return job.queue_member in self.leases and mapping is not None and mapping["attempts"] == str(job.attempts)
+
+    async def enqueue(self, job: Job, idempotency_key: str | None = None) -> Job:
+        if idempotency_key is not None:
+            key = f"{job.company_id if job.company_id is not None else '-'}:{idempotency_key}"
+            existing_id = self.idempotency.setdefault(key, job.id)
+            if existing_id != job.id and existing_id in self.jobs:
+                return Job.from_mapping(self.jobs[existing_id])
+            self.idempotency[key] = job.id
+        self.jobs[job.id] = job.to_mapping()
+        self.ready[job.queue_member] = job.queue_score
+        return job
+
+    async def get(self, job_id: str) -> Job | None:
+        mapping = self.jobs.get(job_id)
+        return Job.from_mapping(mapping) if mapping else None
+
+    async def claim(self) -> Job | None:
+        now = time.time()
+        for member, deadline in list(self.leases.items()):
+            if deadline <= now:
+                self._release(member)
+                job_id = member.split(":", 1)[1]
+                if job_id in self.jobs:
+                    self.jobs[job_id]["status"] = "queued"
+                    self.ready[member] = int(self.jobs[job_id]["queue_score"])
+        for member, run_at in list(self.delayed.items()):
+            if run_at <= now:
+                del self.delayed[member]
+                self.ready[member] = int(self.jobs[member.split(":", 1)[1]]["queue_score"])
+
+        for member in sorted(self.ready, key=self.ready.__getitem__)[:CLAIM_SCAN_DEPTH]:
+            company = _company_of(member)
+            if company != "-" and self.running.get(company, 0) >= self.company_concurrency:
+                continue
+            del self.ready[member]
+            mapping = self.jobs[member.split(":", 1)[1]]
+            self.running[company] = self.running.get(company, 0) + 1
+            self.leases[member] = now + self.lease_seconds
+            mapping.update(status="running", started_at=str(now), attempts=str(int(mapping["attempts"]) + 1))
+            job = Job.from_mapping(mapping)
+            self._publish(job)
+            return job
+        return None
+
+    def _publish(self, job: Job) -> None:
+        self.events.deliver(job.id, job_event(job))
+
+    async def heartbeat(self, job: Job, report: bool = False) -> bool:
+        if not self._holds_lease(job):
+            raise LeaseLostError(job.id)
+        self.leases[job.queue_member] = time.time() + self.lease_seconds
+        mapping = self.jobs[job.id]
+        if report:
+            mapping.update(progress=str(job.progress), errors=str(job.errors))
+            if job.message is not None:
+                mapping["message"] = job.message
+            self._publish(job)
+        return mapping.get("cancel_requested") == "1"
+
+    async def retry(self, job: Job, error: str, delay: float) -> bool:
+        if not self._holds_lease(job):
+            return False
+        self._release(job.queue_member)
+        job.status = "queued"
+        job.error = error
+        self.jobs[job.id].update(status=job.status, error=error)
+        self.delayed[job.queue_member] = time.time() + delay
+        self._publish(job)
+        return True
+
+    async def finish(self, job: Job) -> bool:
+        if not self._holds_lease(job):
+            return False
+        self._release(job.queue_member)
+        job.finished_at = time.time()
+        self.jobs[job.id] = job.to_mapping()
+        if job.status == "failed":
+            self.dead.insert(0, job.id)
+            del self.dead[MAX_DEAD_LETTERS:]
+        self._publish(job)
+        return True
+
+    async def cancel(self, job_id: str) -> Job | None:
+        job = await self.get(job_id)
+        if job is None or job.is_terminal:
+            return job
+        member = job.queue_member
+        if self.ready.pop(member, None) is not None or self.delayed.pop(member, None) is not None:
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            self.jobs[job.id] = job.to_mapping()
+        else:
+            job.cancel_requested = True
+            self.jobs[job.id]["cancel_requested"] = "1"
+        self._publish(job)
+        return job
+
+    async def dead_letters(self, limit: int = 100) -> list[Job]:
+        return [Job.from_mapping(self.jobs[job_id]) for job_id in self.dead[:limit] if job_id in self.jobs]
+
+
+_job_queue: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = InMemoryJobQueue() if settings.JOB_QUEUE_BACKEND == "memory" else RedisJobQueue()
+    return _job_queue
@@ -0,0 +1,284 @@
+"""Job worker.
+
+Run one or more worker processes next to the API::
+
+    python -m app.tasks.worker --concurrency 4
+
+Each process claims jobs from the shared queue and runs up to
+``--concurrency`` of them at once on its event loop. CPU-heavy handlers hand
+their work to a process pool, as the invoice export does.
+
+A job may run more than once. A retry repeats it, and so does a lapsed lease
+when a worker dies mid-job. Handlers must therefore be idempotent. For
+example, they should overwrite their result file rather than append to it.
+A worker that finds its lease has lapsed (it stalled past the lease, or lost
+Redis for that long) stops the handler and records nothing, leaving the job
+to whichever worker reclaimed it.
+"""
+import argparse
+import asyncio
+import contextlib
+import random
+import shutil
+import signal
+import time
+from collections.abc import Awaitable
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.core.logging import get_logger, setup_logging
+from app.core.redis import close_async_redis
+from app.services.imports import import_parse_pool
+from app.services.invoice_export import pdf_render_pool
+from app.services.whatsapp import close_providers
+from app.tasks import handlers  # noqa: F401  (registers the task handlers)
+from app.tasks.jobs import (
+    Job,
+    JobCancelledError,
+    LeaseLostError,
+    PeriodicTask,
+    PermanentJobError,
+    TaskRegistry,
+    task_registry,
+)
+from app.tasks.queue import JobQueue, get_job_queue
+
+logger = get_logger(__name__)
+
+
+def retry_delay(attempt: int, base: float = 5.0, cap: float = 600.0) -> float:
+    """Exponential backoff with jitter: roughly base, 2*base, 4*base... up to ``cap`` seconds."""
+    return min(cap, base * 2.0 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+
+def results_dir(job_id: str) -> Path:
+    return Path(settings.JOB_RESULTS_DIR) / job_id
+
+
+class JobContext:
+    """What a handler gets besides its payload: progress reporting, cancellation and a result directory."""
+
+    def __init__(self, job: Job, queue: JobQueue) -> None:
+        self.job = job
+        self.queue = queue
+        self.cancelled = False
+        self.lease_lost = False
+
+    async def progress(self, percent: float, message: str | None = None, errors: int | None = None) -> None:
+        """Report progress (0-100) to watchers and raise ``JobCancelledError`` if the job has been cancelled.
+
+        Raises ``LeaseLostError`` if another worker may have taken the job over.
+
+        ``errors`` is the number of items that have failed so far, for jobs
+        that carry on past bad rows.
+        """
+        self.job.progress = round(min(max(percent, 0.0), 100.0), 1)
+        self.job.message = message
+        if errors is not None:
+            self.job.errors = errors
+        if await self.queue.heartbeat(self.job, report=True):
+            self.cancelled = True
+        self.raise_if_cancelled()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise JobCancelledError(self.job.id)
+
+    def result_path(self, filename: str) -> Path:
+        """Where to write a downloadable result file; return ``{"file": filename}`` to publish it."""
+        directory = results_dir(self.job.id)
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / filename
+
+    def discard_results(self) -> None:
+        shutil.rmtree(results_dir(self.job.id), ignore_errors=True)
+
+
+class Worker:
+    def __init__(
+        self,
+        queue: JobQueue | None = None,
+        concurrency: int = 4,
+        poll_interval: float = 0.5,
+        registry: TaskRegistry = task_registry,
+    ) -> None:
+        self.queue = queue or get_job_queue()
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.registry = registry
+        self._stopping = asyncio.Event()
+        self._next_periodic_run: dict[str, float] = {}
+        self._periodic_runs: dict[str, asyncio.Task[None]] = {}
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        """Claim and run jobs until ``stop`` is called, then let running jobs finish."""
+        running: set[asyncio.Task[None]] = set()
+        next_purge = 0.0
+        while not self._stopping.is_set():
+            if time.monotonic() >= next_purge:
+                await asyncio.to_thread(purge_expired_results, self.queue.result_ttl_seconds)
+                next_purge = time.monotonic() + 3600
+            self._start_due_periodic_tasks()
+            if len(running) >= self.concurrency:
+                await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            try:
+                job = await self.queue.claim()
+            except Exception as e:
+                logger.error(f"Failed to claim a job: {e}")
+                job = None
+            if job is None:
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                continue
+            execution = asyncio.create_task(self.execute(job))
+            running.add(execution)
+            execution.add_done_callback(running.discard)
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        if self._periodic_runs:
+            await asyncio.gather(*self._periodic_runs.values(), return_exceptions=True)
+
+    def _start_due_periodic_tasks(self) -> None:
+        """Start each periodic task that is due, unless its previous run is still going."""
+        now = time.monotonic()
+        for periodic_task in self.registry.periodic_tasks.values():
+            previous = self._periodic_runs.get(periodic_task.name)
+            if self._next_periodic_run.get(periodic_task.name, 0.0) > now or (previous and not previous.done()):
+                continue
+            self._next_periodic_run[periodic_task.name] = now + periodic_task.interval
+            self._periodic_runs[periodic_task.name] = asyncio.create_task(self._run_periodic(periodic_task))
+
+    async def _run_periodic(self, periodic_task: PeriodicTask) -> None:
+        try:
+            await periodic_task.handler()
+        except Exception:
+            logger.exception(f"Periodic task {periodic_task.name} failed")
+
+    async def _heartbeat(self, context: JobContext, handler_run: asyncio.Future[Any]) -> None:
+        interval = max(self.queue.lease_seconds / 3, 0.1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await self.queue.heartbeat(context.job):
+                    context.cancelled = True
+            except LeaseLostError:
+                context.lease_lost = True
+                handler_run.cancel()
+                return
+            except Exception as e:
+                logger.warning(f"Heartbeat failed for job {context.job.id}: {e}")
+
+    async def execute(self, job: Job) -> None:
+        try:
+            await self._execute(job)
+        except Exception:
+            # The lease lapses and the job is retried by whichever worker claims it next.
+            logger.exception(f"Could not record the outcome of job {job.id}")
+
+    async def _execute(self, job: Job) -> None:
+        handler = self.registry.get(job.name)
+        if handler is None:
+            await self._dead_letter(job, f"No handler registered for task {job.name!r}")
+            return
+        if job.cancel_requested:
+            job.status = "cancelled"
+            await self._settle(job, self.queue.finish(job))
+            return
+        if job.attempts > job.max_attempts:
+            await self._dead_letter(job, job.error or "Worker lost the job too many times")
+            return
+
+        context = JobContext(job, self.queue)
+        handler_run = asyncio.ensure_future(handler(context, job.payload))
+        heartbeat = asyncio.create_task(self._heartbeat(context, handler_run))
+        try:
+            result: dict[str, Any] | None = await handler_run
+        except asyncio.CancelledError:
+            if not context.lease_lost:
+                raise
+            self._abandon(job)
+        except LeaseLostError:
+            self._abandon(job)
+        except JobCancelledError:
+            context.discard_results()
+            job.status = "cancelled"
+            await self._settle(job, self.queue.finish(job))
+        except PermanentJobError as e:
+            context.discard_results()
+            await self._dead_letter(job, str(e))
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.name}) failed on attempt {job.attempts}")
+            context.discard_results()
+            if job.attempts < job.max_attempts:
+                await self._settle(job, self.queue.retry(job, str(e), retry_delay(job.attempts)))
+            else:
+                await self._dead_letter(job, str(e))
+        else:
+            job.status = "succeeded"
+            job.progress = 100.0
+            job.result = result
+            job.error = None
+            await self._settle(job, self.queue.finish(job))
+        finally:
+            heartbeat.cancel()
+
+    async def _settle(self, job: Job, outcome: Awaitable[bool]) -> None:
+        if not await outcome:
+            self._abandon(job)
+
+    def _abandon(self, job: Job) -> None:
+        # The results directory is left alone: the attempt that reclaimed the
+        # job writes to the same one.
+        logger.warning(f"Job {job.id} ({job.name}) lost its lease on attempt {job.attempts} and was abandoned")
+
+    async def _dead_letter(self, job: Job, error: str) -> None:
+        logger.error(f"Job {job.id} ({job.name}) moved to the dead-letter queue: {error}")
+        job.status = "failed"
+        job.error = error
+        await self._settle(job, self.queue.finish(job))
+
+
+def purge_expired_results(ttl_seconds: int) -> None:
+    """Delete result directories older than the job records that point at them."""
+    root = Path(settings.JOB_RESULTS_DIR)
+    if not root.is_dir():
+        return
+    cutoff = time.time() - ttl_seconds
+    for directory in root.iterdir():
+        if directory.is_dir() and directory.stat().st_mtime < cutoff:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+async def _main(concurrency: int) -> None:
+    worker = Worker(concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+    logger.info(f"Job worker started with concurrency {concurrency}")
+    try:
+        await worker.run()
+    finally:
+        pdf_render_pool.shutdown()
+        import_parse_pool.shutdown()
+        await close_providers()
+        await close_async_redis()
+    logger.info("Job worker stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument("--concurrency", type=int, default=4, help="jobs run at once by this process")
+    args = parser.parse_args()
+    if settings.JOB_QUEUE_BACKEND != "redis":
+        parser.error("a separate worker process needs JOB_QUEUE_BACKEND=redis")
+    setup_logging()
+    asyncio.run(_main(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
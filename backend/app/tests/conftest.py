@@ -1,8 +1,10 @@
 import asyncio
 import os
 import sys
-from collections.abc import AsyncGenerator, Generator
+import time
+from collections.abc import AsyncGenerator, Generator, Iterator
 from pathlib import Path
+from typing import Any
 
 import pytest
 from httpx import ASGITransport, AsyncClient
@@ -28,3 +30,249 @@ async def client() -> AsyncGenerator[AsyncClient, None]:
         transport=ASGITransport(app=app), base_url="http://test"
     ) as ac:
         yield ac
+
+
+class FakeRedis:
+    """In-memory stand-in for the subset of ``redis.asyncio.Redis`` used by the app."""
+
+    def __init__(self) -> None:
+        self.store: dict[str, str] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.lists: dict[str, list[str]] = {}
+        self.sets: dict[str, set[str]] = {}
+        self.expires_at: dict[str, float] = {}
+
+    def _purge(self, name: str) -> None:
+        deadline = self.expires_at.get(name)
+        if deadline is not None and deadline <= time.monotonic():
+            self.store.pop(name, None)
+            self.zsets.pop(name, None)
+            self.expires_at.pop(name, None)
+
+    async def get(self, name: str) -> str | None:
+        self._purge(name)
+        return self.store.get(name)
+
+    async def set(
+        self, name: str, value: str, ex: int | None = None, px: int | None = None, nx: bool = False
+    ) -> bool | None:
+        self._purge(name)
+        if nx and name in self.store:
+            return None
+        self.store[name] = str(value)
+        self.expires_at.pop(name, None)
+        if ex is not None:
+            self.expires_at[name] = time.monotonic() + ex
+        elif px is not None:
+            self.expires_at[name] = time.monotonic() + px / 1000
+        return True
+
+    async def incr(self, name: str, amount: int = 1) -> int:
+        self._purge(name)
+        value = int(self.store.get(name, "0")) + amount
+        self.store[name] = str(value)
+        return value
+
+    async def delete(self, *names: str) -> int:
+        removed = 0
+        for name in names:
+            self._purge(name)
+            if any(
+                keyspace.pop(name, None) is not None for keyspace in (self.store, self.zsets, self.lists, self.sets)
+            ):
+                removed += 1
+            self.expires_at.pop(name, None)
+        return removed
+
+    async def exists(self, *names: str) -> int:
+        found = 0
+        for name in names:
+            self._purge(name)
+            found += any(name in keyspace for keyspace in (self.store, self.zsets, self.lists, self.sets))
+        return found
+
+    async def expire(self, name: str, seconds: int) -> bool:
+        self.expires_at[name] = time.monotonic() + seconds
+        return True
+
+    async def zadd(self, name: str, mapping: dict[str, float], nx: bool = False) -> int:
+        self._purge(name)
+        members = self.zsets.setdefault(name, {})
+        added = 0
+        for member, score in mapping.items():
+            if member not in members:
+                added += 1
+            elif nx:
+                continue
+            members[member] = float(score)
+        return added
+
+    async def zrem(self, name: str, *members: str) -> int:
+        self._purge(name)
+        zset = self.zsets.get(name, {})
+        return sum(zset.pop(member, None) is not None for member in members)
+
+    async def zremrangebyscore(self, name: str, low: float | str, high: float | str) -> int:
+        self._purge(name)
+        zset = self.zsets.get(name, {})
+        low_value, high_value = float(low), float(high)
+        doomed = [member for member, score in zset.items() if low_value <= score <= high_value]
+        for member in doomed:
+            del zset[member]
+        return len(doomed)
+
+    async def zcard(self, name: str) -> int:
+        self._purge(name)
+        return len(self.zsets.get(name, {}))
+
+    async def rpush(self, name: str, *values: str) -> int:
+        items = self.lists.setdefault(name, [])
+        items.extend(values)
+        return len(items)
+
+    async def lpop(self, name: str, count: int | None = None) -> str | list[str] | None:
+        items = self.lists.get(name)
+        if not items:
+            return None
+        if count is None:
+            return items.pop(0)
+        popped, self.lists[name] = items[:count], items[count:]
+        return popped
+
+    async def llen(self, name: str) -> int:
+        return len(self.lists.get(name, []))
+
+    async def lmove(self, source: str, destination: str, src: str = "LEFT", dest: str = "RIGHT") -> str | None:
+        items = self.lists.get(source)
+        if not items:
+            return None
+        item = items.pop(0 if src == "LEFT" else -1)
+        if not items:
+            del self.lists[source]
+        target = self.lists.setdefault(destination, [])
+        target.insert(0 if dest == "LEFT" else len(target), item)
+        return item
+
+    async def sadd(self, name: str, *values: str) -> int:
+        members = self.sets.setdefault(name, set())
+        added = len(set(values) - members)
+        members.update(values)
+        return added
+
+    async def srem(self, name: str, *values: str) -> int:
+        members = self.sets.get(name, set())
+        removed = len(members & set(values))
+        members.difference_update(values)
+        if not members:
+            self.sets.pop(name, None)
+        return removed
+
+    async def smembers(self, name: str) -> list[str]:
+        return sorted(self.sets.get(name, ()))
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues ``FakeRedis`` calls and runs them in order on ``execute``."""
+
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+        self.calls: list[Any] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        self.calls.clear()
+
+    def __getattr__(self, name: str) -> Any:
+        method = getattr(self.redis, name)
+
+        def queue(*args: Any, **kwargs: Any) -> "FakePipeline":
+            self.calls.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> list[Any]:
+        calls, self.calls = self.calls, []
+        return [await method(*args, **kwargs) for method, args, kwargs in calls]
+
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    return FakeRedis()
+
+
+class FakeResult:
+    def __init__(self, value: Any = None) -> None:
+        self.value = value
+
+    def scalar_one_or_none(self) -> Any:
+        return self.value
+
+    def scalar_one(self) -> Any:
+        if self.value is None:
+            raise LookupError("no row")
+        return self.value
+
+    def one_or_none(self) -> Any:
+        return self.value
+
+    def one(self) -> Any:
+        return self.scalar_one()
+
+    def scalars(self) -> "FakeResult":
+        return self
+
+    def tuples(self) -> "FakeResult":
+        return self
+
+    def all(self) -> list[Any]:
+        return list(self.value or [])
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.all())
+
+
+class RecordingSession:
+    """Stands in for ``AsyncSession`` and records every executed statement."""
+
+    def __init__(self, results: list[Any] | None = None) -> None:
+        self.results = list(results or [])
+        self.statements: list[Any] = []
+        self.params: list[Any] = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def execute(self, statement: Any, params: Any = None) -> FakeResult:
+        self.statements.append(statement)
+        self.params.append(params)
+        return FakeResult(self.results.pop(0) if self.results else None)
+
+    async def scalar(self, statement: Any, params: Any = None) -> Any:
+        return (await self.execute(statement, params)).scalar_one_or_none()
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    async def rollback(self) -> None:
+        self.rollbacks += 1
+
+    async def __aenter__(self) -> "RecordingSession":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
+
+    def compiled(self, index: int) -> str:
+        from sqlalchemy.dialects import postgresql
+
+        return str(self.statements[index].compile(dialect=postgresql.dialect()))  # type: ignore[no-untyped-call]
+
+
+@pytest.fixture
+def recording_session() -> RecordingSession:
+    return RecordingSession()
@@ -0,0 +1,146 @@
+"""Tests for claims-rich access tokens and authorization versioning."""
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from starlette.requests import Request
+
+from app.core.rbac import get_principal, permission_registry
+from app.models.role import Role
+from app.models.store import Store
+from app.models.user import User
+from app.models.user_role import UserRole
+from app.models.user_store_access import UserStoreAccess
+
+if TYPE_CHECKING:
+    from app.tests.conftest import FakeRedis, RecordingSession
+
+
+def manager() -> User:
+    user = User(id=5, email="manager@example.com", status="active")
+    user.roles = [UserRole(role=Role(code="STORE_MANAGER", name="SM", permissions={"order:manage": True}))]
+    user.store_accesses = [
+        UserStoreAccess(store_id=3, store=Store(id=3, company_id=2)),
+        UserStoreAccess(store_id=4, store=Store(id=4, company_id=2)),
+    ]
+    return user
+
+
+def request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+
+
+@pytest.fixture
+def claims_enabled(fake_redis: "FakeRedis", monkeypatch: pytest.MonkeyPatch) -> "FakeRedis":
+    from app.core import version_counter
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "ACCESS_TOKEN_CLAIMS_ENABLED", True)
+    monkeypatch.setattr(version_counter, "get_async_redis", lambda: fake_redis)
+    return fake_redis
+
+
+def test_claims_round_trip_to_the_same_principal() -> None:
+    user = manager()
+    claims = permission_registry.access_claims(user, authz_version=0)
+
+    assert claims["roles"] == ["STORE_MANAGER"]
+    assert claims["cid"] == 2
+    assert claims["sids"] == [3, 4]
+    assert permission_registry.principal_from_claims(5, claims) == permission_registry.principal_for(user)
+
+
+async def test_fresh_claims_skip_the_database(claims_enabled: "FakeRedis") -> None:
+    await claims_enabled.set("authz_version:5", "0")
+    payload: dict[str, Any] = {"sub": "5", **permission_registry.access_claims(manager(), authz_version=0)}
+
+    principal = await get_principal(request(), payload, db=None)  # type: ignore[arg-type]
+
+    assert principal.company_id == 2
+    assert principal.store_ids == frozenset({3, 4})
+
+
+async def test_bumped_version_falls_back_to_loading_the_user(claims_enabled: "FakeRedis") -> None:
+    from app.core.authz_version import bump_authz_version
+
+    await claims_enabled.set("authz_version:5", "0")
+    stale_user = manager()
+    payload: dict[str, Any] = {"sub": "5", **permission_registry.access_claims(stale_user, authz_version=0)}
+    await bump_authz_version(5)
+
+    current_user = manager()
+    current_user.store_accesses = current_user.store_accesses[:1]
+    http_request = request()
+    http_request.state.current_user = current_user
+
+    principal = await get_principal(http_request, payload, db=None)  # type: ignore[arg-type]
+
+    assert await claims_enabled.get("authz_version:5") == "1"
+    assert principal.store_ids == frozenset({3})
+
+
+async def test_lost_counter_is_unknown_and_restarts_above_issued_versions(claims_enabled: "FakeRedis") -> None:
+    from app.core.authz_version import bump_authz_version, issue_authz_version
+
+    issued = await issue_authz_version(5)
+    assert issued is not None and issued > 0
+    payload: dict[str, Any] = {"sub": "5", **permission_registry.access_claims(manager(), authz_version=issued)}
+    # Redis evicts the counter: the token's claims are no longer trusted.
+    await claims_enabled.delete("authz_version:5")
+    current_user = manager()
+    current_user.store_accesses = []
+    http_request = request()
+    http_request.state.current_user = current_user
+
+    principal = await get_principal(http_request, payload, db=None)  # type: ignore[arg-type]
+
+    assert principal.store_ids == frozenset()
+    await bump_authz_version(5)
+    assert int(await claims_enabled.get("authz_version:5") or 0) > issued
+
+
+async def test_role_change_is_not_committed_when_tokens_cannot_be_invalidated(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from app.core import version_counter
+    from app.core.authz_version import authz_change
+    from app.core.exceptions import BusinessLogicError
+
+    def unreachable() -> Any:
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(version_counter, "get_async_redis", unreachable)
+    committed = False
+
+    with pytest.raises(BusinessLogicError) as error:
+        async with authz_change(5):
+            committed = True
+
+    assert error.value.status_code == 503
+    assert not committed
+
+
+async def test_role_checked_routes_run_only_their_own_query(
+    claims_enabled: "FakeRedis", recording_session: "RecordingSession", monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from fastapi import FastAPI
+    from httpx import ASGITransport, AsyncClient
+
+    from app.api.deps import get_db, get_token_payload
+    from app.api.routers import stores
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    await claims_enabled.set("authz_version:5", "0")
+    payload: dict[str, Any] = {"sub": "5", **permission_registry.access_claims(manager(), authz_version=0)}
+    app = FastAPI()
+    app.include_router(stores.router)
+    app.dependency_overrides[get_db] = lambda: recording_session
+    app.dependency_overrides[get_token_payload] = lambda: payload
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/stores")
+
+    assert response.status_code == 200 and response.json() == []
+    # No user load and no store-access lookup: the company comes from the claims.
+    assert len(recording_session.statements) == 1
+    assert "stores.company_id = %(company_id_1)s" in recording_session.compiled(0)
@@ -0,0 +1,120 @@
+from datetime import UTC, date, datetime, time
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.core.exceptions import BusinessLogicError
+from app.models.daily_store_close import DailyStoreClose
+from app.services import closing
+from app.services.closing import ClosingDeltas
+from app.services.store_calendar import business_date, business_day_end
+
+if TYPE_CHECKING:
+    from app.tests.conftest import RecordingSession
+
+DAY = date(2026, 10, 18)
+ZERO = Decimal("0.00")
+
+
+def test_business_date_follows_the_store_cutoff() -> None:
+    ist = "Asia/Kolkata"
+    # 18:29:30 UTC is 23:59:30 IST: past the default 23:59 cutoff, so the next day.
+    assert business_date(datetime(2026, 10, 18, 18, 28, tzinfo=UTC), ist) == date(2026, 10, 18)
+    assert business_date(datetime(2026, 10, 18, 18, 29, 30, tzinfo=UTC), ist) == date(2026, 10, 19)
+    # With a 05:00 cutoff, 01:00 still belongs to the evening before.
+    assert business_date(datetime(2026, 10, 18, 19, 30, tzinfo=UTC), ist, time(5)) == date(2026, 10, 18)
+    assert business_date(datetime(2026, 10, 18, 23, 30, tzinfo=UTC), ist, time(5)) == date(2026, 10, 19)
+    assert business_day_end(DAY, ist, time(5)) == datetime(2026, 10, 18, 23, 30, tzinfo=UTC)
+    assert business_day_end(DAY, ist) == datetime(2026, 10, 18, 18, 29, tzinfo=UTC)
+
+
+async def test_deltas_for_a_closed_day_are_rejected(recording_session: "RecordingSession") -> None:
+    deltas = ClosingDeltas()
+    deltas.add(1, 3, DAY, unposted_invoices=1, unposted_invoices_total=Decimal("118.00"))
+    deltas.add(1, 4, DAY, unposted_invoices=1, unposted_invoices_total=Decimal("59.00"))
+    recording_session.results = [[(3, DAY)]]  # store 4's day is closed, so its upsert matched nothing
+
+    with pytest.raises(BusinessLogicError) as raised:
+        await closing.apply_closing_deltas(recording_session, deltas)  # type: ignore[arg-type]
+
+    assert raised.value.status_code == 409
+    assert raised.value.extra == {"closed_days": [{"store_id": 4, "date": "2026-10-18"}]}
+    sql = recording_session.compiled(0)
+    assert len(recording_session.statements) == 1
+    assert "store_day_snapshots.unposted_invoices + excluded.unposted_invoices" in sql
+    assert "WHERE store_day_snapshots.closed IS false" in sql
+
+
+async def test_preview_is_one_row(recording_session: "RecordingSession") -> None:
+    figures = [Decimal("500.00"), Decimal("1200.00"), Decimal("800.00"), Decimal("150.00"), Decimal("1000.00"),
+               ZERO, ZERO, Decimal("354.00"), 2]
+    recording_session.results = [("Asia/Kolkata", time(23, 59), *figures, 7, None, "open")]
+
+    preview = await closing.closing_preview(recording_session, 1, 3, DAY)  # type: ignore[arg-type]
+
+    assert len(recording_session.statements) == 1
+    assert (preview.version, preview.status, preview.unposted_invoices) == (7, "open", 2)
+    assert preview.cash_closing_expected == Decimal("550.00")
+    assert preview.cutoff_at == datetime(2026, 10, 18, 18, 29, tzinfo=UTC)
+
+
+def _locked_day(version: int, cash_from_sales: str = "1200.00") -> tuple[object, ...]:
+    # version, cutoff, then SNAPSHOT_FIGURES
+    return (version, time(23, 59), Decimal("500.00"), Decimal(cash_from_sales), ZERO, Decimal("150.00"),
+            Decimal("1000.00"), ZERO, ZERO, ZERO, 0)
+
+
+async def test_commit_rejects_a_stale_preview(recording_session: "RecordingSession") -> None:
+    recording_session.results = [_locked_day(version=8)]
+
+    with pytest.raises(BusinessLogicError) as raised:
+        await closing.commit_closing(
+            recording_session, 1, 3, DAY, Decimal("550.00"), closed_by=9, expected_version=7  # type: ignore[arg-type]
+        )
+
+    assert raised.value.status_code == 412
+    assert raised.value.extra == {"current_version": 8, "expected_version": 7}
+
+
+async def test_large_variance_needs_an_approver(recording_session: "RecordingSession") -> None:
+    recording_session.results = [_locked_day(version=7)]
+
+    with pytest.raises(BusinessLogicError) as raised:
+        await closing.commit_closing(
+            recording_session, 1, 3, DAY, Decimal("0.00"), closed_by=9, expected_version=7  # type: ignore[arg-type]
+        )
+
+    assert raised.value.status_code == 403
+    assert raised.value.extra["variance"] == "-550.00"
+
+
+async def test_commit_closes_and_opens_the_next_day(recording_session: "RecordingSession") -> None:
+    close = DailyStoreClose(id=5, store_id=3, close_date=DAY, status="closed", version=1)
+    recording_session.results = [_locked_day(version=7), close, None]
+
+    result, created = await closing.commit_closing(
+        recording_session, 1, 3, DAY, Decimal("540.00"), closed_by=9, expected_version=7  # type: ignore[arg-type]
+    )
+
+    assert (result, created) == (close, True)
+    assert len(recording_session.statements) == 3
+    insert = recording_session.statements[1].compile().params
+    assert (insert["cash_closing_expected"], insert["variance"], insert["snapshot_version"]) == (
+        Decimal("550.00"), Decimal("-10.00"), 7
+    )
+    assert "WHERE daily_store_close.status = %(status_1)s" in str(recording_session.statements[1].compile())
+    opening = recording_session.statements[2].compile().params
+    assert (opening["business_date"], opening["cash_opening_float"]) == (date(2026, 10, 19), Decimal("540.00"))
+
+
+async def test_repeated_commit_returns_the_existing_close(recording_session: "RecordingSession") -> None:
+    existing = DailyStoreClose(id=5, store_id=3, close_date=DAY, status="closed", version=1)
+    recording_session.results = [_locked_day(version=7), None, existing]
+
+    result, created = await closing.commit_closing(
+        recording_session, 1, 3, DAY, Decimal("550.00"), closed_by=9, expected_version=7  # type: ignore[arg-type]
+    )
+
+    assert (result, created) == (existing, False)
+    assert len(recording_session.statements) == 3
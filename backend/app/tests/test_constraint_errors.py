@@ -0,0 +1,67 @@
+"""Tests for mapping database constraint violations to problem responses."""
+import json
+from pathlib import Path
+
+from sqlalchemy.exc import IntegrityError
+from starlette.requests import Request
+
+from app.core.exceptions import CONSTRAINT_VIOLATIONS, integrity_error_handler
+
+
+class DriverError(Exception):
+    def __init__(self, constraint_name: str | None, sqlstate: str) -> None:
+        super().__init__("duplicate key value violates unique constraint")
+        self.constraint_name = constraint_name
+        self.sqlstate = sqlstate
+
+
+class AdaptedError(Exception):
+    """Mimics SQLAlchemy's asyncpg adapter, which chains the driver error."""
+
+
+def integrity_error(constraint_name: str | None, sqlstate: str = "23505") -> IntegrityError:
+    adapted = AdaptedError("IntegrityError")
+    adapted.__cause__ = DriverError(constraint_name, sqlstate)
+    return IntegrityError("INSERT ...", {}, adapted)
+
+
+def request() -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/api/v1/items", "headers": [],
+                    "query_string": b"", "scheme": "http", "server": ("test", 80)})
+
+
+async def test_registered_unique_constraint_returns_structured_409() -> None:
+    response = await integrity_error_handler(request(), integrity_error("uq_items_company_id_sku"))
+    body = json.loads(bytes(response.body))
+
+    assert response.status_code == 409
+    assert body["type"].endswith("/duplicate-resource")
+    assert body["constraint"] == "uq_items_company_id_sku"
+    assert body["fields"] == ["sku"]
+
+
+async def test_registered_foreign_key_maps_to_404() -> None:
+    error = integrity_error("user_store_access_user_id_fkey", sqlstate="23503")
+
+    response = await integrity_error_handler(request(), error)
+
+    assert response.status_code == 404
+    assert json.loads(bytes(response.body))["detail"] == "User not found."
+
+
+async def test_unknown_constraint_falls_back_to_generic_conflict() -> None:
+    response = await integrity_error_handler(request(), integrity_error("some_new_constraint"))
+    body = json.loads(bytes(response.body))
+
+    assert response.status_code == 409
+    assert body["type"].endswith("/integrity-constraint")
+    assert body["detail"] == "A record with this value already exists."
+    assert body["fields"] == []
+
+
+def test_registered_names_are_created_by_migrations() -> None:
+    migrations = "".join(path.read_text() for path in (Path(__file__).parents[2] / "alembic" / "versions").glob("*.py"))
+    # Foreign keys keep the names Postgres generates for them.
+    named = [name for name in CONSTRAINT_VIOLATIONS if not name.endswith("_fkey")]
+
+    assert [name for name in named if f"'{name}'" not in migrations and f'"{name}"' not in migrations] == []
@@ -0,0 +1,167 @@
+import hashlib
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.deps import get_db
+from app.api.routers import documents as documents_router
+from app.core.config import settings
+from app.core.exceptions import BusinessLogicError
+from app.core.rbac import Principal, get_principal, permission_registry
+from app.core.storage import LocalStorage
+from app.models.document import Document
+from app.services.documents import can_view, signed_download_url, verify_download
+
+if TYPE_CHECKING:
+    from app.tests.conftest import RecordingSession
+
+T0 = 1_792_476_000.0
+
+
+async def _chunks(data: bytes, size: int = 1000) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def _principal(*roles: str, store_ids: frozenset[int] = frozenset()) -> Principal:
+    return Principal(
+        user_id=5, role_mask=permission_registry.roles.mask(roles), permission_mask=0, company_id=1, store_ids=store_ids
+    )
+
+
+def _document(key: str, **overrides: object) -> Document:
+    values: dict[str, object] = {
+        "id": 9, "company_id": 1, "store_id": None, "entity_type": "order", "entity_id": 3,
+        "filename": "qc photos.zip", "mime_type": "application/zip", "storage_key": key,
+        "visibility_role_min": "STAFF",
+    }
+    return Document(**{**values, **overrides})
+
+
+async def test_storage_keeps_one_object_per_content_and_enforces_the_limit(tmp_path: Path) -> None:
+    storage = LocalStorage(tmp_path)
+    data = b"photo-zip" * 5000
+
+    first = await storage.put("1", _chunks(data), max_bytes=len(data))
+    again = await storage.put("1", _chunks(data, size=777), max_bytes=len(data))
+    other_company = await storage.put("2", _chunks(data), max_bytes=len(data))
+
+    digest = hashlib.sha256(data).hexdigest()
+    assert (first.key, first.size, first.sha256, first.created) == (f"1/{digest[:2]}/{digest}", len(data), digest, True)
+    assert again.key == first.key and not again.created
+    assert other_company.created and await storage.exists(other_company.key)
+    assert storage.path(first.key).read_bytes() == data
+
+    with pytest.raises(BusinessLogicError) as too_large:
+        await storage.put("1", _chunks(data + b"!"), max_bytes=len(data))
+    assert too_large.value.status_code == 413
+    assert not any((tmp_path / ".incoming").iterdir())
+    with pytest.raises(ValueError):
+        storage.path("../outside")
+
+
+def test_signed_links_expire_and_are_bound_to_document_and_user() -> None:
+    url, expires = signed_download_url(9, 5, now=T0)
+    signature = url.rsplit("sig=", 1)[1]
+
+    assert url.startswith(f"{settings.API_V1_STR}/documents/9/download?uid=5&expires={expires}&sig=")
+    assert expires == T0 + settings.DOCUMENT_URL_TTL_SECONDS
+    assert verify_download(9, 5, expires, signature, now=T0 + 1)
+    assert not verify_download(9, 5, expires, signature, now=expires + 1)
+    assert not verify_download(10, 5, expires, signature, now=T0)
+    assert not verify_download(9, 6, expires, signature, now=T0)
+    assert not verify_download(9, 5, expires + 3600, signature, now=T0)
+
+
+def test_visibility_follows_role_rank_and_store_access() -> None:
+    manager_only = _document("k", store_id=4, visibility_role_min="STORE_MANAGER")
+
+    assert can_view(_principal("STORE_MANAGER", store_ids=frozenset({4})), manager_only)
+    assert can_view(_principal("AREA_MANAGER"), manager_only)
+    assert not can_view(_principal("STAFF", store_ids=frozenset({4})), manager_only)
+    assert not can_view(_principal("STORE_MANAGER", store_ids=frozenset({5})), manager_only)
+    assert not can_view(_principal("COMPANY_ADMIN"), _document("k", company_id=2))
+
+
+async def test_signed_downloads_serve_ranges_and_log_once(
+    tmp_path: Path, recording_session: "RecordingSession", monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    storage = LocalStorage(tmp_path)
+    data = bytes(range(256)) * 400
+    stored = await storage.put("1", _chunks(data), max_bytes=len(data))
+    monkeypatch.setattr(documents_router, "get_storage", lambda: storage)
+    app = FastAPI()
+    app.include_router(documents_router.download_router)
+    app.dependency_overrides[get_db] = lambda: recording_session
+    url, _ = signed_download_url(9, 5)
+    url = url.removeprefix(settings.API_V1_STR)
+    document = _document(stored.key)
+    recording_session.results = [document, None, None, document]
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        full = await client.get(url)
+        part = await client.get(url, headers={"Range": "bytes=1000-1999"})
+        forged = await client.get(url[:-1] + ("0" if url[-1] != "0" else "1"))
+
+    assert full.status_code == 200 and full.content == data
+    assert full.headers["content-disposition"] == "attachment; filename*=utf-8''qc%20photos.zip"
+    assert part.status_code == 206 and part.content == data[1000:2000]
+    assert part.headers["content-range"] == f"bytes 1000-1999/{len(data)}"
+    assert forged.status_code == 403
+    # The full download is logged and counted; the range request is not.
+    assert len(recording_session.statements) == 4 and recording_session.commits == 1
+    assert recording_session.compiled(1).startswith("INSERT INTO document_download_log")
+    assert "download_count=(document.download_count + %(download_count_1)s)" in recording_session.compiled(2)
+
+
+async def test_upload_releases_the_connection_before_reading_the_body(
+    tmp_path: Path, recording_session: "RecordingSession", monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    storage = LocalStorage(tmp_path)
+    monkeypatch.setattr(documents_router, "get_storage", lambda: storage)
+    app = FastAPI()
+    app.include_router(documents_router.router)
+    app.dependency_overrides[get_db] = lambda: recording_session
+    app.dependency_overrides[get_principal] = lambda: _principal("STORE_MANAGER", store_ids=frozenset({4}))
+    data = b"qc photos" * 100
+    digest = hashlib.sha256(data).hexdigest()
+    stored = _document(
+        f"1/{digest[:2]}/{digest}", store_id=4, size_bytes=len(data), content_sha256=digest, tags=[],
+        download_count=0, uploaded_by=5, created_at=datetime(2026, 10, 19, tzinfo=UTC),
+    )
+    recording_session.results = [4, None, stored]
+    rollbacks_when_read: list[int] = []
+
+    async def body() -> AsyncIterator[bytes]:
+        rollbacks_when_read.append(recording_session.rollbacks)
+        yield data
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/documents",
+            params={"entity_type": "order", "entity_id": 3, "filename": "qc photos.zip", "store_id": 4},
+            content=body(),
+        )
+
+    assert response.status_code == 201 and response.json()["id"] == 9
+    # The store check's transaction ended before the first chunk was read.
+    assert rollbacks_when_read == [1]
+    assert recording_session.commits == 1
+    assert storage.path(f"1/{digest[:2]}/{digest}").read_bytes() == data
+
+
+def test_accel_redirect_hands_the_file_to_the_proxy(tmp_path: Path) -> None:
+    storage = LocalStorage(tmp_path, accel_redirect_prefix="/_documents/")
+
+    response = storage.download_response("1/ab/abc", filename="bill.pdf", media_type="application/pdf")
+
+    assert response.headers["x-accel-redirect"] == "/_documents/1/ab/abc"
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.body == b""
@@ -0,0 +1,130 @@
+"""Tests for the Idempotency-Key middleware."""
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+if TYPE_CHECKING:
+    from app.tests.conftest import FakeRedis
+
+
+@pytest.fixture
+def idempotent_app(fake_redis: "FakeRedis", monkeypatch: pytest.MonkeyPatch) -> tuple[FastAPI, list[Any]]:
+    from app.core import idempotency
+    from app.core.idempotency import IdempotencyMiddleware
+
+    monkeypatch.setattr(idempotency, "get_async_redis", lambda: fake_redis)
+
+    calls: list[Any] = []
+    release = asyncio.Event()
+    release.set()
+
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware)
+
+    @app.post("/things", status_code=201)
+    async def create_thing(payload: dict[str, Any]) -> dict[str, Any]:
+        calls.append(payload)
+        await release.wait()
+        return {"id": len(calls), **payload}
+
+    app.state.release = release
+    return app, calls
+
+
+async def test_duplicate_key_replays_stored_response(idempotent_app: tuple[FastAPI, list[Any]]) -> None:
+    app, calls = idempotent_app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.post("/things", json={"name": "a"}, headers={"Idempotency-Key": "k1"})
+        second = await client.post("/things", json={"name": "a"}, headers={"Idempotency-Key": "k1"})
+
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert len(calls) == 1
+
+
+async def test_reused_key_with_different_payload_is_rejected(idempotent_app: tuple[FastAPI, list[Any]]) -> None:
+    app, calls = idempotent_app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        await client.post("/things", json={"name": "a"}, headers={"Idempotency-Key": "k1"})
+        response = await client.post("/things", json={"name": "b"}, headers={"Idempotency-Key": "k1"})
+
+    assert response.status_code == 422
+    assert response.json()["type"].endswith("/idempotency-key-reused")
+    assert len(calls) == 1
+
+
+async def test_concurrent_duplicate_is_blocked_while_in_flight(idempotent_app: tuple[FastAPI, list[Any]]) -> None:
+    app, calls = idempotent_app
+    app.state.release.clear()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = asyncio.create_task(
+            client.post("/things", json={"name": "a"}, headers={"Idempotency-Key": "k1"})
+        )
+        while not calls:
+            await asyncio.sleep(0)
+        duplicate = await client.post("/things", json={"name": "a"}, headers={"Idempotency-Key": "k1"})
+        app.state.release.set()
+        original = await first
+
+    assert duplicate.status_code == 409
+    assert "retry-after" in duplicate.headers
+    assert original.status_code == 201
+    assert len(calls) == 1
+
+
+async def test_requests_without_key_are_not_deduplicated(idempotent_app: tuple[FastAPI, list[Any]]) -> None:
+    app, calls = idempotent_app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        await client.post("/things", json={"name": "a"})
+        await client.post("/things", json={"name": "a"})
+
+    assert len(calls) == 2
+
+
+async def test_streamed_uploads_are_not_buffered_and_replay_across_tokens(
+    fake_redis: "FakeRedis", monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from app.core import idempotency
+    from app.core.idempotency import IdempotencyMiddleware
+    from app.core.security import create_access_token
+
+    monkeypatch.setattr(idempotency, "get_async_redis", lambda: fake_redis)
+    chunk_sizes: list[list[int]] = []
+
+    async def upload(scope: Any, receive: Any, send: Any) -> None:
+        sizes: list[int] = []
+        while True:
+            message = await receive()
+            sizes.append(len(message.get("body", b"")))
+            if not message.get("more_body", False):
+                break
+        chunk_sizes.append(sizes)
+        await send({"type": "http.response.start", "status": 202, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": f"import {len(chunk_sizes)}".encode()})
+
+    async def body(data: bytes) -> Any:
+        for start in range(0, len(data), 1000):
+            yield data[start:start + 1000]
+
+    data = b"x" * 5000
+    app = IdempotencyMiddleware(upload)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        def headers() -> dict[str, str]:
+            # A fresh token each time, as after a refresh; the key follows its subject.
+            token = create_access_token({"sub": "7", "nonce": str(len(chunk_sizes))})
+            return {"Idempotency-Key": "upload-1", "Authorization": f"Bearer {token}"}
+
+        first = await client.post("/imports/bank", content=body(data), headers=headers())
+        retry = await client.post("/imports/bank", content=body(data), headers=headers())
+        changed = await client.post("/imports/bank", content=body(data + b"!"), headers=headers())
+
+    assert first.status_code == 202 and first.text == "import 1"
+    # The handler saw the body in the chunks it was sent in.
+    assert chunk_sizes == [[1000] * 5 + [0]]
+    assert retry.text == "import 1" and retry.headers["idempotent-replayed"] == "true"
+    assert changed.status_code == 422
@@ -0,0 +1,193 @@
+import hashlib
+from collections.abc import AsyncIterator
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.deps import get_db
+from app.api.routers import imports as imports_router
+from app.core.config import settings
+from app.core.exceptions import BusinessLogicError
+from app.core.rbac import Principal, get_principal, permission_registry
+from app.core.uploads import save_stream
+from app.core.xlsx import XlsxStreamWriter, iter_xlsx_rows
+from app.models.bank_import_file import BankImportFile
+from app.models.import_mapping import ImportMapping
+from app.services.import_parsing import ImportFileError, MappingSpec, SpoolJob, spool_file
+from app.tasks.queue import InMemoryJobQueue
+
+if TYPE_CHECKING:
+    from app.tests.conftest import RecordingSession
+
+BANK_MAPPING: dict[str, Any] = {
+    "header_row": 3,
+    "columns": {
+        "value_date": "Value Dt",
+        "description": "Narration",
+        "utr_ref": "Ref No",
+        "debit": "Withdrawal Amt",
+        "credit": "Deposit Amt",
+    },
+}
+
+
+def _spool(tmp_path: Path, kind: str, source: Path, mapping: dict[str, Any], **extra: object) -> SpoolJob:
+    spool_dir = tmp_path / "spool"
+    spool_dir.mkdir(exist_ok=True)
+    return SpoolJob(
+        kind=kind,  # type: ignore[arg-type]
+        path=str(source),
+        file_format="xlsx" if source.suffix == ".xlsx" else "csv",
+        mapping_json=mapping,
+        spool_dir=str(spool_dir),
+        company_id=1,
+        import_id=9,
+        prefix=(1, 9) if kind == "bank" else (1, 9, 4),
+        batch_rows=2,
+        **extra,  # type: ignore[arg-type]
+    )
+
+
+def _lines(paths: list[str]) -> list[list[str]]:
+    return [line.split("\t") for path in paths for line in Path(path).read_text().splitlines()]
+
+
+def test_mappings_are_validated_up_front() -> None:
+    MappingSpec.parse("bank", BANK_MAPPING)
+    with pytest.raises(ValueError, match="amount"):
+        MappingSpec.parse("bank", {"columns": {"value_date": "Date"}})
+    with pytest.raises(ValueError, match="unknown franchise fields: gst"):
+        MappingSpec.parse("franchise", {"columns": {"order_ref": 0, "order_date": 1, "amount": 2, "gst": 3}})
+    with pytest.raises(ImportFileError, match="'Deposit Amt'"):
+        MappingSpec.parse("bank", BANK_MAPPING).bind(["Value Dt", "Narration", "Ref No", "Withdrawal Amt"])
+
+
+def test_csv_statement_spools_copy_batches_and_rejects_bad_rows(tmp_path: Path) -> None:
+    source = tmp_path / "statement.csv"
+    source.write_text(
+        "ACME BANK,Statement\n"
+        "Account,XXXX1234\n"
+        "value dt ,Narration,Ref No,Withdrawal Amt,Deposit Amt\n"
+        '01/10/2026,"UPI CR\tAsha\nline two",UTR1,,"1,499.50"\n'
+        "02/10/2026,ATM,,200.00,\n"
+        "31/02/2026,Bad date,,,10\n"
+        "03/10/2026,Nothing,,,\n"
+    )
+
+    result = spool_file(_spool(tmp_path, "bank", source, BANK_MAPPING))
+
+    assert (result.rows, result.failed) == (2, 2)
+    assert (result.date_from, result.date_to) == (date(2026, 10, 1), date(2026, 10, 2))
+    assert len(result.row_batches) == 1
+    first, second = _lines(result.row_batches)
+    assert first[:9] == [
+        "1", "9", "\\N", "2026-10-01", "1499.50", "credit", "UPI CR\\tAsha\\nline two", "UTR1", "\\N",
+    ]
+    assert second[4:6] == ["200.00", "debit"]
+    errors = _lines(result.error_batches)
+    assert [(row[3], row[4]) for row in errors] == [
+        ("6", "value_date: '31/02/2026' is not a date"),
+        ("7", "amount: missing"),
+    ]
+
+
+def test_xlsx_sales_file_reads_row_by_row(tmp_path: Path) -> None:
+    source = tmp_path / "sales.xlsx"
+    writer = XlsxStreamWriter()
+    source.write_bytes(
+        writer.begin()
+        + writer.add_rows([
+            ["Order No", "Order Date", "Customer", "Mobile", "Net Amount"],
+            ["TD-1", Decimal("46296"), "Asha", Decimal("9876543210"), Decimal("350.5")],
+            ["TD-2", "05/11/2026", "Ravi", None, Decimal("120")],
+        ])
+        + writer.finish()
+    )
+    assert [row_no for row_no, _ in iter_xlsx_rows(source)] == [1, 2, 3]
+    mapping = {
+        "columns": {
+            "order_ref": "Order No", "order_date": "Order Date", "customer_name": "Customer",
+            "customer_phone": "Mobile", "amount": "Net Amount",
+        },
+    }
+
+    result = spool_file(_spool(tmp_path, "franchise", source, mapping, period="2026-10"))
+
+    [row] = _lines(result.row_batches)
+    # The date was an Excel serial number and the phone a number cell.
+    assert row[:11] == ["1", "9", "4", "2", "TD-1", "2026-10-01", "Asha", "9876543210", "\\N", "\\N", "350.50"]
+    [error] = _lines(result.error_batches)
+    assert error[4] == "order_date: 2026-11-05 is outside 2026-10"
+
+
+async def test_uploads_stream_to_disk_and_stop_at_the_limit(tmp_path: Path) -> None:
+    async def body(*chunks: bytes) -> AsyncIterator[bytes]:
+        for chunk in chunks:
+            yield chunk
+
+    saved = await save_stream(body(b"abc", b"def"), tmp_path / "a" / "ok.csv", max_bytes=6)
+    assert saved.size == 6
+    assert saved.sha256 == hashlib.sha256(b"abcdef").hexdigest()
+    assert (tmp_path / "a" / "ok.csv").read_bytes() == b"abcdef"
+
+    with pytest.raises(BusinessLogicError) as raised:
+        await save_stream(body(b"abc", b"defg"), tmp_path / "big.csv", max_bytes=6)
+    assert raised.value.status_code == 413
+    assert not (tmp_path / "big.csv").exists()
+
+
+async def test_upload_releases_the_connection_before_reading_the_body(
+    tmp_path: Path, recording_session: "RecordingSession", monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(settings, "IMPORT_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(imports_router, "get_job_queue", lambda: InMemoryJobQueue())
+    app = FastAPI()
+    app.include_router(imports_router.router)
+    app.dependency_overrides[get_db] = lambda: recording_session
+    app.dependency_overrides[get_principal] = lambda: Principal(
+        user_id=5, role_mask=permission_registry.roles.mask(["ACCOUNTANT"]), permission_mask=0, company_id=1
+    )
+    mapping = ImportMapping(company_id=1, kind="bank", source="hdfc", mapping_json=BANK_MAPPING)
+    recording_session.results = [mapping, None, BankImportFile(id=7, status="uploaded")]
+    rollbacks_when_read: list[int] = []
+
+    async def body() -> AsyncIterator[bytes]:
+        rollbacks_when_read.append(recording_session.rollbacks)
+        yield b"Value Dt,Narration\n"
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/imports/bank", params={"source_bank": "hdfc", "filename": "statement.csv"}, content=body()
+        )
+
+    assert response.status_code == 202 and response.json()["import_id"] == 7
+    # The mapping lookup's transaction ended before the first chunk was read.
+    assert rollbacks_when_read == [1]
+    assert recording_session.commits == 1
+    assert recording_session.compiled(2).startswith("INSERT INTO bank_import_file")
+
+
+def test_row_hashes_follow_content_not_position(tmp_path: Path) -> None:
+    mapping = {"columns": {"order_ref": "Order", "order_date": "Date", "amount": "Amount"}}
+    first = tmp_path / "first.csv"
+    first.write_text("Order,Date,Amount\nA,01/10/2026,10\nB,02/10/2026,20\nB,02/10/2026,20\n")
+    second = tmp_path / "second.csv"
+    second.write_text("Order,Date,Amount\nB,02/10/2026,20\nA,01/10/2026,10.00\nC,03/10/2026,30\n")
+
+    def hashes(source: Path) -> list[str]:
+        result = spool_file(_spool(tmp_path, "franchise", source, mapping))
+        return [row[-1] for row in _lines(result.row_batches)]
+
+    a, b, b_again = hashes(first)
+    assert b == b_again
+    assert hashes(second)[:2] == [b, a]
+    bank_mapping = {"columns": {"value_date": "Date", "amount": "Amount", "description": "Order"}}
+    in_hdfc = _lines(spool_file(_spool(tmp_path, "bank", first, bank_mapping, hash_scope="hdfc")).row_batches)
+    in_icici = _lines(spool_file(_spool(tmp_path, "bank", first, bank_mapping, hash_scope="icici")).row_batches)
+    assert in_hdfc[0][-1] != in_icici[0][-1]
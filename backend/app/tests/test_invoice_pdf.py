@@ -0,0 +1,152 @@
+"""Tests for invoice PDF rendering and streamed exports."""
+import asyncio
+import io
+import re
+import zipfile
+import zlib
+from datetime import date
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from app.core.pdf import Canvas, build_pdf
+from app.models.invoice import Invoice
+from app.services import invoice_export
+from app.services.invoice_pdf import (
+    LINES_PER_PAGE,
+    Branding,
+    DocumentLine,
+    InvoiceDocument,
+    PdfRenderPool,
+    compile_template,
+    render_pages,
+)
+
+if TYPE_CHECKING:
+    from app.tests.conftest import RecordingSession
+
+BRANDING = Branding(1, 3, "Sparkle Cleaners", "27ABCDE1234F1Z5", "Andheri West", "Shop 4, Andheri West, Mumbai")
+LINE = DocumentLine("Shirt (dry clean)", Decimal("2"), Decimal("120.00"), Decimal("18.00"), Decimal("43.20"),
+                    Decimal("283.20"))
+
+
+def document(lines: int, invoice_id: int = 1) -> InvoiceDocument:
+    return InvoiceDocument(invoice_id, None, date(2026, 10, 1), "draft", "Ravi", (LINE,) * lines,
+                           Decimal("240.00"), Decimal("43.20"), Decimal(0), Decimal(0), Decimal("283.20"))
+
+
+def assert_valid_xref(pdf: bytes) -> int:
+    """Check every xref entry points at its object and return the object count."""
+    start = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", pdf).group(1))  # type: ignore[union-attr]
+    header = re.match(rb"xref\n0 (\d+)\n", pdf[start:])
+    assert header is not None
+    count = int(header.group(1))
+    entries = pdf[start + header.end():].split(b"\n")[:count]
+    for number, entry in enumerate(entries[1:], start=1):
+        offset = int(entry[:10])
+        assert pdf[offset:].startswith(b"%d 0 obj" % number)
+    return count
+
+
+def test_pdf_writer_produces_consistent_xref_and_escapes_text() -> None:
+    canvas = Canvas()
+    canvas.text(40, 800, r"A (tricky) \ name")
+    pdf = build_pdf([canvas.content()] * 3, compress=False)
+
+    assert pdf.startswith(b"%PDF-1.4")
+    assert b"/Count 3" in pdf
+    assert rb"(A \(tricky\) \\ name)" in pdf
+    assert assert_valid_xref(pdf) == 1 + 2 + 3 + 2 * 3
+
+
+def test_long_invoices_paginate_and_reuse_compiled_template() -> None:
+    compile_template.cache_clear()
+
+    pages = render_pages(BRANDING, document(LINES_PER_PAGE + 1))
+    render_pages(BRANDING, document(1))
+
+    assert len(pages) == 2
+    assert b"Grand total" not in pages[0]
+    assert b"Grand total" in pages[1]
+    assert b"Page 2 of 2" in pages[1]
+    assert compile_template.cache_info().misses == 1
+    assert compile_template.cache_info().hits == 1
+
+
+def invoice_rows(count: int) -> list[list[Any]]:
+    return [
+        [
+            (Invoice(id=i, store_id=3, invoice_no=None, invoice_date=date(2026, 10, 1), status="draft",
+                     subtotal=Decimal("240.00"), tax_total=Decimal("43.20"), discount_total=Decimal(0),
+                     package_applied_total=Decimal(0), grand_total=Decimal("283.20")), "Ravi")
+            for i in range(1, count + 1)
+        ],
+        [(i, "Shirt", Decimal(2), Decimal("120.00"), Decimal(18), Decimal("43.20"), Decimal("283.20"))
+         for i in range(1, count + 1)],
+        [(3, "Andheri West", "Mumbai", 1, "Sparkle Cleaners", "Sparkle Pvt Ltd", "27ABCDE1234F1Z5")],
+    ]
+
+
+async def test_zip_export_streams_one_pdf_per_invoice(recording_session: "RecordingSession") -> None:
+    recording_session.results = invoice_rows(3)
+
+    chunks = [
+        chunk async for chunk in invoice_export.stream_invoices_zip(recording_session, [1, 2, 3],  # type: ignore[arg-type]
+                                                                    PdfRenderPool(0))
+    ]
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    assert archive.namelist() == ["invoice-draft-1.pdf", "invoice-draft-2.pdf", "invoice-draft-3.pdf"]
+    assert_valid_xref(archive.read("invoice-draft-2.pdf"))
+
+
+async def test_pdf_export_is_chunked_and_concatenated(
+    recording_session: "RecordingSession", monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(invoice_export, "EXPORT_CHUNK_SIZE", 2)
+    first, every = invoice_rows(2), invoice_rows(3)
+    # The second chunk holds invoice 3 only, and its store's branding is
+    # already known, so no branding query is issued for it.
+    recording_session.results = [first[0], first[1], first[2], every[0][2:], every[1][2:]]
+
+    progress: list[int] = []
+
+    async def on_progress(rendered: int) -> None:
+        progress.append(rendered)
+
+    pdf = b"".join([
+        chunk async for chunk in invoice_export.stream_invoices_pdf(recording_session, [1, 2, 3],  # type: ignore[arg-type]
+                                                                    PdfRenderPool(0), on_progress)
+    ])
+
+    assert progress == [2, 3]
+    assert len(recording_session.statements) == 5
+    assert b"/Count 3" in pdf
+    assert_valid_xref(pdf)
+    contents = re.findall(rb"stream\n(.*?)\nendstream", pdf, re.S)
+    assert all(b"Sparkle Cleaners" in zlib.decompress(content) for content in contents)
+
+
+async def test_closing_an_export_early_waits_for_the_prefetch(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(invoice_export, "EXPORT_CHUNK_SIZE", 1)
+    prefetch_stopped = asyncio.Event()
+
+    async def load_render_jobs(db: Any, invoice_ids: Any, brandings: Any) -> list[Any]:
+        if invoice_ids == [1]:
+            return []
+        try:
+            await asyncio.sleep(60)
+        finally:
+            prefetch_stopped.set()
+        return []
+
+    monkeypatch.setattr(invoice_export, "load_render_jobs", load_render_jobs)
+    chunks = invoice_export._chunked_jobs(None, [1, 2])  # type: ignore[arg-type]
+
+    assert await anext(chunks) == []
+    await asyncio.sleep(0)
+    await chunks.aclose()
+
+    assert prefetch_stopped.is_set()
@@ -0,0 +1,85 @@
+"""Tests for invoice number allocation."""
+from datetime import date
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.core.exceptions import BusinessLogicError
+from app.services.invoice_series import allocate_invoice_numbers, financial_year, format_invoice_number
+
+if TYPE_CHECKING:
+    from app.tests.conftest import RecordingSession
+
+
+@pytest.mark.parametrize(
+    ("day", "expected"),
+    [(date(2026, 3, 31), "2025-26"), (date(2026, 4, 1), "2026-27"), (date(2099, 12, 31), "2099-00")],
+)
+def test_financial_year_runs_april_to_march(day: date, expected: str) -> None:
+    assert financial_year(day) == expected
+
+
+def test_invoice_number_format_stays_within_16_characters() -> None:
+    number = format_invoice_number("ABCDE", "2026-27", 123)
+
+    assert number == "ABCDE/2627/00123" and len(number) == 16
+    assert format_invoice_number("MN", "2026-27", 7) == "MN/2627/00007"
+    assert format_invoice_number("MN", "2026-27", 123456) == "MN/2627/123456"
+    with pytest.raises(BusinessLogicError) as too_long:
+        format_invoice_number("ABCDEFGHIJ", "2026-27", 123)
+    assert too_long.value.status_code == 422
+
+
+async def test_existing_series_is_one_update_returning(recording_session: "RecordingSession") -> None:
+    recording_session.results = [(4, "MN", 13)]
+
+    allocated = await allocate_invoice_numbers(
+        recording_session, 1, date(2026, 10, 1), count=3  # type: ignore[arg-type]
+    )
+
+    assert [a.number for a in allocated] == [10, 11, 12]
+    assert allocated[0].invoice_number == "MN/2627/00010"
+    assert len(recording_session.statements) == 1
+    assert recording_session.compiled(0).startswith("UPDATE invoice_series")
+    assert "RETURNING" in recording_session.compiled(0)
+
+
+async def test_first_invoice_of_year_opens_series(recording_session: "RecordingSession") -> None:
+    recording_session.results = [None, (5, "MN", 2)]
+
+    allocated = await allocate_invoice_numbers(recording_session, 1, date(2026, 10, 1))  # type: ignore[arg-type]
+
+    assert allocated[0].number == 1
+    assert "ON CONFLICT ON CONSTRAINT uq_invoice_series_store_id_financial_year" in recording_session.compiled(1)
+
+
+async def test_unknown_store_is_404(recording_session: "RecordingSession") -> None:
+    with pytest.raises(BusinessLogicError) as exc_info:
+        await allocate_invoice_numbers(recording_session, 99, date(2026, 10, 1))  # type: ignore[arg-type]
+
+    assert exc_info.value.status_code == 404
+
+
+async def test_posting_numbers_drafts_per_store_and_year(recording_session: "RecordingSession") -> None:
+    from decimal import Decimal
+
+    from app.models.invoice import Invoice
+    from app.services.invoices import post_invoices
+
+    march, april = date(2027, 3, 31), date(2027, 4, 2)
+    recording_session.results = [
+        [(21, 1, march, Decimal("118.00")), (22, 1, april, Decimal("59.00"))],  # locked drafts
+        [(1, march), (1, april)],  # closing snapshots
+        (4, "MN", 8),  # 2026-27 series
+        (5, "MN", 2),  # 2027-28 series
+        [Invoice(id=21, invoice_no="MN/2627/00007"), Invoice(id=22, invoice_no="MN/2728/00001")],
+    ]
+
+    posted, skipped = await post_invoices(recording_session, 1, [22, 21, 23])  # type: ignore[arg-type]
+
+    assert [invoice.id for invoice in posted] == [22, 21] and skipped == [23]
+    assert "FOR UPDATE" in recording_session.compiled(0)
+    # March belongs to 2026-27, April opens 2027-28; each draft gets its own series' number.
+    numbers = recording_session.statements[4].compile().params
+    assert [numbers[f"param_{i}"] for i in range(1, 5)] == [21, "MN/2627/00007", 22, "MN/2728/00001"]
+    assert recording_session.compiled(4).startswith("UPDATE invoices SET invoice_no=batch.invoice_no")
@@ -0,0 +1,154 @@
+"""Property tests for the paise-based invoice totals engine.
+
+Random invoices are generated from fixed seeds and every figure is compared
+with a straightforward ``Decimal`` implementation of the SRS rules.
+"""
+import random
+from datetime import date, time
+from decimal import ROUND_HALF_UP, Decimal
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.models.invoice import Invoice
+from app.services import invoice_totals
+from app.services import invoices as invoices_service
+from app.services.invoice_totals import LineInput, compute_invoice, compute_invoices, div_half_up
+from app.services.invoices import invoices_from_orders
+
+if TYPE_CHECKING:
+    from app.tests.conftest import RecordingSession
+
+PAISA = Decimal("0.01")
+TAX_RATES = [Decimal(r) for r in ("0", "5", "12", "18", "28", "0.25", "3", "17.5")]
+
+
+def reference(lines: list[LineInput], discount: Decimal, package_balance: Decimal) -> dict[str, Decimal]:
+    subtotal = Decimal(0)
+    tax_total = Decimal(0)
+    for line in lines:
+        amount = (line.qty * line.price).quantize(PAISA, rounding=ROUND_HALF_UP)
+        subtotal += amount
+        tax_total += (amount * line.tax_rate / 100).quantize(PAISA, rounding=ROUND_HALF_UP)
+    package = min(package_balance, subtotal + tax_total - discount)
+    return {
+        "subtotal": subtotal,
+        "tax_total": tax_total,
+        "discount_total": discount,
+        "package_applied_total": package,
+        "grand_total": subtotal + tax_total - discount - package,
+    }
+
+
+def random_line(rng: random.Random) -> LineInput:
+    return LineInput(
+        item_id=rng.randint(1, 50),
+        qty=Decimal(rng.randint(1, 50_000)).scaleb(-3),
+        price=Decimal(rng.randint(0, 2_000_000)).scaleb(-2),
+        tax_rate=rng.choice(TAX_RATES),
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_totals_match_decimal_reference(seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(100):
+        lines = [random_line(rng) for _ in range(rng.randint(0, 40))]
+        gross = sum(
+            (
+                (line.qty * line.price).quantize(PAISA, rounding=ROUND_HALF_UP) * (1 + line.tax_rate / 100)
+            ).quantize(PAISA, rounding=ROUND_HALF_UP)
+            for line in lines
+        )
+        discount = Decimal(rng.randint(0, int(gross * 100) // 3)).scaleb(-2) if gross else Decimal(0)
+        package_balance = Decimal(rng.randint(0, 10_000_000)).scaleb(-2)
+
+        computed = compute_invoice(lines, discount, package_balance)
+        expected = reference(lines, discount, package_balance)
+
+        assert vars(computed.totals) == expected
+        assert computed.totals.grand_total >= 0
+        assert sum(line.line_total for line in computed.lines) == expected["subtotal"] + expected["tax_total"]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_div_half_up_matches_decimal_rounding(seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(2_000):
+        numerator = rng.randint(-10**9, 10**9)
+        denominator = rng.choice([2, 10, 100, 1000, 10_000])
+        expected = (Decimal(numerator) / denominator).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+        assert div_half_up(numerator, denominator) == expected
+
+
+def test_half_paisa_rounds_up() -> None:
+    line = LineInput(item_id=1, qty=Decimal("0.5"), price=Decimal("0.01"), tax_rate=Decimal("18"))
+    totals = compute_invoice([line]).totals
+    assert totals.subtotal == Decimal("0.01")
+    assert totals.tax_total == Decimal("0.00")
+
+
+def test_rejects_sub_paisa_prices_and_oversized_discounts() -> None:
+    with pytest.raises(ValueError):
+        compute_invoice([LineInput(1, Decimal(1), Decimal("0.001"), Decimal(0))])
+    with pytest.raises(ValueError):
+        compute_invoice([LineInput(1, Decimal(1), Decimal("10"), Decimal(0))], discount=Decimal("10.01"))
+
+
+def test_batch_is_keyed_like_its_input() -> None:
+    lines = [LineInput(1, Decimal(2), Decimal("10"), Decimal("5"))]
+    computed = compute_invoices({"a": lines, "b": []}, discounts={"a": Decimal("1")})
+    assert computed["a"].totals.grand_total == Decimal("20.00")
+    assert computed["b"].totals.grand_total == invoice_totals.from_paise(0)
+
+
+async def test_from_orders_uses_fixed_statement_count(recording_session: "RecordingSession") -> None:
+    order_ids = list(range(1, 301))
+    recording_session.results = [
+        [(order_id, 3, 5, "Asia/Kolkata", time(23, 59)) for order_id in order_ids[:-1]],  # claimed orders
+        [(order_id, order_id * 10, 7, Decimal(2), Decimal("10.00"), Decimal("18")) for order_id in order_ids[:-1]],
+        [(3, date(2026, 10, 1))],  # closing snapshot
+        [Invoice(id=1000 + order_id) for order_id in order_ids[:-1]],
+    ]
+
+    invoices, skipped = await invoices_from_orders(
+        recording_session,  # type: ignore[arg-type]
+        company_id=1,
+        order_ids=order_ids,
+        invoice_date=date(2026, 10, 1),
+    )
+
+    assert len(recording_session.statements) == 6
+    assert skipped == [300]
+    assert len(invoices) == 299
+    assert "ON CONFLICT ON CONSTRAINT uq_store_day_snapshots_store_id_business_date" in recording_session.compiled(2)
+    headers = recording_session.params[3]
+    assert headers[0]["grand_total"] == Decimal("23.60")
+    lines = recording_session.params[4]
+    assert len(lines) == 299
+    assert lines[0]["invoice_id"] == 1001
+    assert lines[0]["line_tax"] == Decimal("3.60")
+    [kpis] = recording_session.params[5]
+    assert (kpis["store_id"], kpis["invoices"], kpis["sales_net"]) == (3, 299, Decimal("23.60") * 299)
+
+
+async def test_from_orders_dates_each_invoice_by_its_store(
+    recording_session: "RecordingSession", monkeypatch: pytest.MonkeyPatch
+) -> None:
+    today = {"Asia/Kolkata": date(2026, 10, 2), "America/New_York": date(2026, 10, 1)}
+    monkeypatch.setattr(invoices_service, "current_business_date", lambda timezone, cutoff: today[timezone])
+    recording_session.results = [
+        [(1, 3, 5, "Asia/Kolkata", time(23, 59)), (2, 4, 5, "America/New_York", time(5, 0))],
+        [(1, 10, 7, Decimal(1), Decimal("10.00"), Decimal("18")), (2, 20, 7, Decimal(1), Decimal("10.00"), Decimal(0))],
+        [(3, date(2026, 10, 2)), (4, date(2026, 10, 1))],
+        [Invoice(id=1001), Invoice(id=1002)],
+    ]
+
+    await invoices_from_orders(recording_session, company_id=1, order_ids=[1, 2], invoice_date=None)  # type: ignore[arg-type]
+
+    assert "stores.closing_cutoff" in recording_session.compiled(0)
+    assert [header["invoice_date"] for header in recording_session.params[3]] == [date(2026, 10, 2), date(2026, 10, 1)]
+    assert sorted((kpi["store_id"], kpi["kpi_date"]) for kpi in recording_session.params[5]) == [
+        (3, date(2026, 10, 2)),
+        (4, date(2026, 10, 1)),
+    ]
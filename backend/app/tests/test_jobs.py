@@ -0,0 +1,459 @@
+import asyncio
+import json
+import os
+import time
+from collections.abc import AsyncGenerator
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.api.routers import invoices as invoices_router
+from app.api.routers import tasks as tasks_router
+from app.core.config import settings
+from app.core.rbac import Principal, permission_registry
+from app.schemas.invoice import InvoiceExportRequest
+from app.tasks import events as job_events
+from app.tasks import queue as job_queue
+from app.tasks.events import JobEventHub, RedisJobEventHub
+from app.tasks.jobs import Job, JobCancelledError, LeaseLostError, PermanentJobError, TaskRegistry
+from app.tasks.queue import InMemoryJobQueue, JobQueue, RedisJobQueue
+from app.tasks.worker import JobContext, Worker
+
+if TYPE_CHECKING:
+    from app.tests.conftest import RecordingSession
+
+TEST_REDIS_URL = os.environ.get("TEST_REDIS_URL")
+
+
+@pytest.fixture(params=["memory", "redis"])
+async def queue(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> AsyncGenerator[JobQueue, None]:
+    """Every queue test runs against the in-memory queue, and against Redis when TEST_REDIS_URL is set."""
+    if request.param == "memory":
+        yield InMemoryJobQueue(company_concurrency=2, lease_seconds=30, events=JobEventHub())
+        return
+    if not TEST_REDIS_URL:
+        pytest.skip("TEST_REDIS_URL is not set")
+    from redis.asyncio import Redis
+
+    redis = Redis.from_url(TEST_REDIS_URL, decode_responses=True)
+
+    async def clear() -> None:
+        keys = [key async for key in redis.scan_iter("jobs:*")]
+        if keys:
+            await redis.delete(*keys)
+
+    await clear()
+    monkeypatch.setattr(job_queue, "get_async_redis", lambda: redis)
+    monkeypatch.setattr(job_events, "get_async_redis", lambda: redis)
+    yield RedisJobQueue(company_concurrency=2, lease_seconds=30)
+    await clear()
+    await redis.aclose()
+
+
+@pytest.fixture
+async def hub(queue: JobQueue) -> AsyncGenerator[JobEventHub, None]:
+    """The hub that receives ``queue``'s events in this process."""
+    if isinstance(queue, InMemoryJobQueue):
+        yield queue.events
+        return
+    redis_hub = RedisJobEventHub()
+    yield redis_hub
+    await redis_hub.close()
+
+
+@pytest.fixture(autouse=True)
+def results_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(settings, "JOB_RESULTS_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _job(company_id: int | None = 1, priority: int = 5, name: str = "test.echo", **payload: Any) -> Job:
+    return Job(name=name, payload=payload, company_id=company_id, user_id=7, priority=priority)
+
+
+async def _drain(worker: Worker, queue: JobQueue) -> None:
+    """Run claimed jobs one after another until the queue has nothing ready."""
+    while (job := await queue.claim()) is not None:
+        await worker.execute(job)
+
+
+async def test_claims_by_priority_then_age(queue: JobQueue) -> None:
+    low = await queue.enqueue(_job(company_id=None, priority=1))
+    first = await queue.enqueue(_job(company_id=None, priority=5))
+    time.sleep(0.002)
+    second = await queue.enqueue(_job(company_id=None, priority=5))
+    urgent = await queue.enqueue(_job(company_id=None, priority=9))
+
+    claimed = [await queue.claim() for _ in range(4)]
+
+    assert [job.id for job in claimed if job] == [urgent.id, first.id, second.id, low.id]
+    assert all(job is not None and job.status == "running" and job.attempts == 1 for job in claimed)
+    assert await queue.claim() is None
+
+
+async def test_company_concurrency_limit_lets_other_companies_through(queue: JobQueue) -> None:
+    busy = []
+    for _ in range(3):
+        busy.append(await queue.enqueue(_job(company_id=1)))
+        time.sleep(0.002)
+    other = await queue.enqueue(_job(company_id=2))
+
+    claimed = [await queue.claim() for _ in range(4)]
+
+    assert [job.id for job in claimed if job] == [busy[0].id, busy[1].id, other.id]
+    assert claimed[3] is None
+
+    first = claimed[0]
+    assert first is not None
+    first.status = "succeeded"
+    await queue.finish(first)
+    third = await queue.claim()
+    assert third is not None and third.id == busy[2].id
+
+
+async def test_enqueue_with_idempotency_key_returns_the_first_job(queue: JobQueue) -> None:
+    first = await queue.enqueue(_job(), idempotency_key="export-1")
+    again = await queue.enqueue(_job(), idempotency_key="export-1")
+    other_company = await queue.enqueue(_job(company_id=2), idempotency_key="export-1")
+
+    assert again.id == first.id
+    assert other_company.id != first.id
+    assert [await queue.claim() for _ in range(3)][2] is None
+
+
+async def test_worker_stores_result_and_file(queue: JobQueue, results_root: Path) -> None:
+    registry = TaskRegistry()
+
+    @registry.task("test.file")
+    async def write_file(ctx: JobContext, payload: dict[str, Any]) -> dict[str, Any]:
+        await ctx.progress(50, "half way")
+        ctx.result_path("out.txt").write_text(payload["text"])
+        return {"file": "out.txt", "media_type": "text/plain"}
+
+    job = await queue.enqueue(_job(name="test.file", text="hello"))
+    await _drain(Worker(queue, registry=registry), queue)
+
+    done = await queue.get(job.id)
+    assert done is not None
+    assert done.status == "succeeded"
+    assert done.progress == 100.0
+    assert done.message == "half way"
+    assert done.result == {"file": "out.txt", "media_type": "text/plain"}
+    assert (results_root / job.id / "out.txt").read_text() == "hello"
+
+
+async def test_failed_attempt_is_retried_after_backoff(queue: JobQueue, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("app.tasks.worker.retry_delay", lambda attempt: 0.0)
+    calls: list[int] = []
+    registry = TaskRegistry()
+
+    @registry.task("test.flaky")
+    async def flaky(ctx: JobContext, payload: dict[str, Any]) -> dict[str, Any]:
+        calls.append(ctx.job.attempts)
+        if len(calls) == 1:
+            raise ConnectionError("provider timed out")
+        return {"ok": True}
+
+    job = await queue.enqueue(_job(name="test.flaky"))
+    await _drain(Worker(queue, registry=registry), queue)
+
+    done = await queue.get(job.id)
+    assert calls == [1, 2]
+    assert done is not None and done.status == "succeeded" and done.error is None
+
+
+async def test_exhausted_and_permanent_failures_are_dead_lettered(
+    queue: JobQueue, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("app.tasks.worker.retry_delay", lambda attempt: 0.0)
+    registry = TaskRegistry()
+
+    @registry.task("test.broken")
+    async def broken(ctx: JobContext, payload: dict[str, Any]) -> None:
+        raise RuntimeError("still broken")
+
+    @registry.task("test.invalid")
+    async def invalid(ctx: JobContext, payload: dict[str, Any]) -> None:
+        raise PermanentJobError("bad payload")
+
+    broken_job = await queue.enqueue(_job(name="test.broken"))
+    invalid_job = await queue.enqueue(_job(name="test.invalid"))
+    unknown_job = await queue.enqueue(_job(name="test.unknown"))
+    await _drain(Worker(queue, registry=registry), queue)
+
+    dead = {job.id: job for job in await queue.dead_letters()}
+    assert dead[broken_job.id].attempts == 3
+    assert dead[broken_job.id].error == "still broken"
+    assert dead[invalid_job.id].attempts == 1
+    assert dead[invalid_job.id].error == "bad payload"
+    assert "test.unknown" in (dead[unknown_job.id].error or "")
+    assert all(job.status == "failed" for job in dead.values())
+
+
+async def test_cancelling_a_queued_job_removes_it(queue: JobQueue) -> None:
+    job = await queue.enqueue(_job())
+
+    cancelled = await queue.cancel(job.id)
+
+    assert cancelled is not None and cancelled.status == "cancelled"
+    assert await queue.claim() is None
+
+
+async def test_cancelling_a_running_job_stops_it_at_the_next_progress_report(
+    queue: JobQueue, results_root: Path
+) -> None:
+    registry = TaskRegistry()
+    reached: list[str] = []
+
+    @registry.task("test.long")
+    async def long_running(ctx: JobContext, payload: dict[str, Any]) -> None:
+        ctx.result_path("partial.bin").write_bytes(b"...")
+        await queue.cancel(ctx.job.id)
+        reached.append("cancel requested")
+        await ctx.progress(10)
+        reached.append("kept going")
+
+    job = await queue.enqueue(_job(name="test.long"))
+    await _drain(Worker(queue, registry=registry), queue)
+
+    done = await queue.get(job.id)
+    assert reached == ["cancel requested"]
+    assert done is not None and done.status == "cancelled"
+    assert not (results_root / job.id).exists()
+
+
+async def test_lapsed_lease_puts_the_job_back_without_leaking_a_slot(queue: JobQueue) -> None:
+    queue.lease_seconds = 0
+    job = await queue.enqueue(_job(company_id=1))
+    lost = await queue.claim()
+    assert lost is not None
+
+    queue.lease_seconds = 30
+    time.sleep(0.002)
+    reclaimed = await queue.claim()
+    assert reclaimed is not None and reclaimed.id == job.id and reclaimed.attempts == 2
+
+    # The stalled worker eventually reports in. Its lease is gone, so nothing
+    # it does touches the reclaimed attempt or releases its slot again.
+    with pytest.raises(LeaseLostError):
+        await queue.heartbeat(lost)
+    assert not await queue.retry(lost, "late", 0)
+    lost.status = "succeeded"
+    assert not await queue.finish(lost)
+    assert await queue.heartbeat(reclaimed) is False
+    assert (await queue.get(job.id)).status == "running"  # type: ignore[union-attr]
+    await queue.enqueue(_job(company_id=1))
+    crowded = await queue.claim()
+    assert crowded is not None and await queue.claim() is None
+    crowded.status = "succeeded"
+    assert await queue.finish(crowded)
+    reclaimed.status = "succeeded"
+    assert await queue.finish(reclaimed)
+    second = await queue.enqueue(_job(company_id=1))
+    third = await queue.enqueue(_job(company_id=1))
+    assert {(await queue.claim()).id, (await queue.claim()).id} == {second.id, third.id}  # type: ignore[union-attr]
+
+
+async def test_worker_abandons_a_job_whose_lease_was_taken_over(queue: JobQueue) -> None:
+    registry = TaskRegistry()
+    reached: list[str] = []
+    queue.lease_seconds = 0
+    job = await queue.enqueue(_job(name="test.stalled"))
+
+    @registry.task("test.stalled")
+    async def stalled(ctx: JobContext, payload: dict[str, Any]) -> None:
+        # The lease lapses and another worker takes the job over.
+        queue.lease_seconds = 0.3  # type: ignore[assignment]
+        time.sleep(0.002)
+        assert await queue.claim() is not None
+        await asyncio.sleep(5)
+        reached.append("kept going")
+
+    claimed = await queue.claim()
+    assert claimed is not None
+    started = time.monotonic()
+    await Worker(queue, registry=registry).execute(claimed)
+
+    assert time.monotonic() - started < 2
+    assert reached == []
+    current = await queue.get(job.id)
+    assert current is not None and current.status == "running" and current.attempts == 2
+
+
+async def test_worker_loop_runs_jobs_until_stopped(queue: JobQueue) -> None:
+    registry = TaskRegistry()
+    worker = Worker(queue, concurrency=2, poll_interval=0.01, registry=registry)
+
+    @registry.task("test.echo")
+    async def echo(ctx: JobContext, payload: dict[str, Any]) -> dict[str, Any]:
+        return {"echo": payload}
+
+    jobs = [await queue.enqueue(_job(company_id=company_id, n=company_id)) for company_id in (1, 2, 3)]
+    loop = asyncio.create_task(worker.run())
+    for _ in range(200):
+        done = [await queue.get(job.id) for job in jobs]
+        if all(job is not None and job.status == "succeeded" for job in done):
+            break
+        await asyncio.sleep(0.01)
+    worker.stop()
+    await loop
+
+    assert [job.result for job in done if job] == [{"echo": {"n": 1}}, {"echo": {"n": 2}}, {"echo": {"n": 3}}]
+
+
+async def test_job_context_raises_once_cancelled() -> None:
+    queue = InMemoryJobQueue()
+    job = await queue.enqueue(_job())
+    context = JobContext(job, queue)
+    context.cancelled = True
+
+    with pytest.raises(JobCancelledError):
+        context.raise_if_cancelled()
+
+
+def test_job_round_trips_through_its_mapping() -> None:
+    job = Job(name="x", payload={"ids": [1, 2]}, company_id=None, result={"file": "a.pdf"}, cancel_requested=True)
+
+    assert Job.from_mapping(job.to_mapping()) == job
+
+
+def _principal(*roles: str, company_id: int | None = 1, user_id: int = 7) -> Principal:
+    return Principal(
+        user_id=user_id,
+        role_mask=permission_registry.roles.mask(roles),
+        permission_mask=0,
+        company_id=company_id,
+    )
+
+
+async def test_task_endpoints_scope_jobs_to_owner_and_company(
+    monkeypatch: pytest.MonkeyPatch, results_root: Path
+) -> None:
+    queue = InMemoryJobQueue()
+    monkeypatch.setattr(tasks_router, "get_job_queue", lambda: queue)
+    job = await queue.enqueue(_job(company_id=1))
+    claimed = await queue.claim()
+    assert claimed is not None
+    (results_root / job.id).mkdir()
+    (results_root / job.id / "invoices.zip").write_bytes(b"PK")
+    claimed.status = "succeeded"
+    claimed.result = {"file": "invoices.zip", "media_type": "application/zip"}
+    await queue.finish(claimed)
+
+    owner = await tasks_router.get_task(job.id, _principal("STORE_MANAGER"))
+    assert owner.status == "succeeded"
+    assert owner.result_url == f"{settings.API_V1_STR}/tasks/{job.id}/result"
+    assert (await tasks_router.get_task(job.id, _principal("COMPANY_ADMIN", user_id=8))).id == job.id
+
+    for outsider in (_principal("STORE_MANAGER", user_id=8), _principal("COMPANY_ADMIN", company_id=2)):
+        with pytest.raises(HTTPException) as exc_info:
+            await tasks_router.get_task(job.id, outsider)
+        assert exc_info.value.status_code == 404
+
+    download = await tasks_router.download_task_result(job.id, _principal("STORE_MANAGER"))
+    assert Path(download.path) == results_root / job.id / "invoices.zip"
+    assert download.media_type == "application/zip"
+
+
+async def test_invoice_export_is_queued_with_scoped_ids(
+    monkeypatch: pytest.MonkeyPatch, recording_session: "RecordingSession"
+) -> None:
+    queue = InMemoryJobQueue()
+    monkeypatch.setattr(invoices_router, "get_job_queue", lambda: queue)
+    recording_session.results = [[3, 1]]
+    response = Response()
+
+    accepted = await invoices_router.queue_invoice_export(
+        InvoiceExportRequest(invoice_ids=[1, 2, 3], format="pdf"),
+        response,
+        recording_session,  # type: ignore[arg-type]
+        _principal("STORE_MANAGER"),
+    )
+
+    job = await queue.get(accepted.job_id)
+    assert job is not None
+    assert job.name == "invoices.export"
+    assert job.payload == {"invoice_ids": [1, 3], "format": "pdf"}
+    assert (job.company_id, job.user_id) == (1, 7)
+    assert response.headers["Location"] == accepted.status_url == f"{settings.API_V1_STR}/tasks/{job.id}"
+
+
+async def _next_events(subscription: "asyncio.Queue[dict[str, Any]]", count: int) -> list[dict[str, Any]]:
+    return [await asyncio.wait_for(subscription.get(), 2) for _ in range(count)]
+
+
+async def test_events_fan_out_to_every_subscriber(queue: JobQueue, hub: JobEventHub) -> None:
+    job = await queue.enqueue(_job())
+    async with hub.subscribe(job.id) as first, hub.subscribe(job.id) as second:
+        if isinstance(hub, RedisJobEventHub):
+            await asyncio.sleep(0.05)  # let Redis register the subscription
+        claimed = await queue.claim()
+        assert claimed is not None
+        await JobContext(claimed, queue).progress(40, "rendering", errors=2)
+        claimed.status = "succeeded"
+        claimed.result = {"file": "invoices.zip"}
+        await queue.finish(claimed)
+
+        for subscription in (first, second):
+            running, progress, done = await _next_events(subscription, 3)
+            assert (running["status"], running["progress"]) == ("running", 0.0)
+            assert (progress["progress"], progress["message"], progress["errors"]) == (40.0, "rendering", 2)
+            assert done["status"] == "succeeded"
+            assert done["result_url"] == f"{settings.API_V1_STR}/tasks/{job.id}/result"
+
+
+def _frames(chunks: list[bytes]) -> list[tuple[str, dict[str, Any]]]:
+    frames: list[tuple[str, dict[str, Any]]] = []
+    for chunk in chunks:
+        if chunk.startswith(b":"):
+            frames.append(("keep-alive", {}))
+            continue
+        event_line, data_line = chunk.decode().strip().split("\n")
+        frames.append((event_line.removeprefix("event: "), json.loads(data_line.removeprefix("data: "))))
+    return frames
+
+
+async def test_event_stream_follows_a_job_to_its_end() -> None:
+    queue = InMemoryJobQueue(events=JobEventHub())
+    registry = TaskRegistry()
+
+    @registry.task("test.steps")
+    async def steps(ctx: JobContext, payload: dict[str, Any]) -> dict[str, Any]:
+        await ctx.progress(50, "half way", errors=1)
+        ctx.result_path("out.csv").write_text("id\n")
+        return {"file": "out.csv"}
+
+    job = await queue.enqueue(_job(name="test.steps"))
+    stream = tasks_router.job_event_stream(job.id, queue.events, queue)
+    chunks = [await anext(stream)]
+    await _drain(Worker(queue, registry=registry), queue)
+    chunks += [chunk async for chunk in stream]
+
+    frames = _frames(chunks)
+    assert [(name, event["status"], event["progress"]) for name, event in frames] == [
+        ("progress", "queued", 0.0),
+        ("progress", "running", 0.0),
+        ("progress", "running", 50.0),
+        ("end", "succeeded", 100.0),
+    ]
+    assert frames[2][1]["errors"] == 1
+    assert frames[-1][1]["result_url"] == f"{settings.API_V1_STR}/tasks/{job.id}/result"
+    assert not queue.events._subscribers
+
+
+async def test_event_stream_recovers_a_missed_final_event() -> None:
+    queue = InMemoryJobQueue(events=JobEventHub())
+    elsewhere = JobEventHub()
+    await queue.enqueue(_job())
+    job = await queue.claim()
+    assert job is not None
+    stream = tasks_router.job_event_stream(job.id, elsewhere, queue, keepalive_seconds=0.01)
+
+    first = await anext(stream)
+    job.status = "cancelled"
+    await queue.finish(job)
+    rest = [chunk async for chunk in stream]
+
+    assert [name for name, _ in _frames([first, *rest])] == ["progress", "keep-alive", "end"]
@@ -0,0 +1,94 @@
+import asyncio
+from datetime import date
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.services import kpi_rollup
+from app.services.kpi_rollup import KpiDeltas, rebuild_chunks
+from app.tasks.jobs import TaskRegistry
+from app.tasks.queue import InMemoryJobQueue
+from app.tasks.worker import Worker
+
+if TYPE_CHECKING:
+    from app.tests.conftest import RecordingSession
+
+
+def test_deltas_merge_per_store_day() -> None:
+    deltas = KpiDeltas()
+    deltas.add(1, 3, date(2026, 10, 1), invoices=1, sales_gross=Decimal("10.50"))
+    deltas.add(1, 3, date(2026, 10, 1), invoices=1, sales_gross=Decimal("4.50"))
+    deltas.add(1, 4, date(2026, 10, 1), orders=1)
+    deltas.add(1, 4, date(2026, 10, 2), new_customers=0)
+
+    rows = deltas.rows()
+
+    assert [(row["store_id"], row["invoices"], row["sales_gross"]) for row in rows] == [
+        (3, 2, Decimal("15.00")),
+        (4, 0, Decimal(0)),
+    ]
+    with pytest.raises(ValueError):
+        deltas.add(1, 3, date(2026, 10, 1), refunds=1)
+
+
+def test_rebuild_chunks_cover_the_range_per_store() -> None:
+    chunks = rebuild_chunks([(1, 3), (1, 4)], date(2026, 1, 1), date(2026, 3, 5), days=31)
+
+    assert [(c.store_id, c.date_from, c.date_to) for c in chunks] == [
+        (3, date(2026, 1, 1), date(2026, 1, 31)),
+        (3, date(2026, 2, 1), date(2026, 3, 3)),
+        (3, date(2026, 3, 4), date(2026, 3, 5)),
+        (4, date(2026, 1, 1), date(2026, 1, 31)),
+        (4, date(2026, 2, 1), date(2026, 3, 3)),
+        (4, date(2026, 3, 4), date(2026, 3, 5)),
+    ]
+
+
+async def test_fold_moves_the_outbox_in_one_statement(recording_session: "RecordingSession") -> None:
+    recording_session.results = [[(1,), (2,)]]
+
+    assert await kpi_rollup.fold_kpi_deltas(recording_session, limit=100) == 2  # type: ignore[arg-type]
+
+    sql = recording_session.compiled(0)
+    assert len(recording_session.statements) == 1
+    assert "DELETE FROM kpi_deltas" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "ON CONFLICT ON CONSTRAINT uq_daily_store_kpi_store_id_kpi_date DO UPDATE" in sql
+    assert "daily_store_kpi.orders + excluded.orders" in sql
+
+
+async def test_reads_add_unfolded_deltas_to_the_rollup(recording_session: "RecordingSession") -> None:
+    recording_session.results = [
+        [(3, 5, 4, Decimal("100.00"), Decimal("90.00"), Decimal(0), 2, Decimal(0))],
+    ]
+
+    [tile] = await kpi_rollup.store_kpis(
+        recording_session, 1, date(2026, 10, 1), date(2026, 10, 31), store_ids={3}  # type: ignore[arg-type]
+    )
+
+    assert (tile.store_id, tile.kpi_date, tile.orders, tile.sales_net) == (3, None, 5, Decimal("90.00"))
+    sql = recording_session.compiled(0)
+    assert "FROM daily_store_kpi" in sql and "UNION ALL" in sql and "FROM kpi_deltas" in sql
+
+
+async def test_worker_runs_periodic_tasks_without_overlap() -> None:
+    registry = TaskRegistry()
+    runs = 0
+    release = asyncio.Event()
+
+    @registry.periodic("test.tick", seconds=0)
+    async def tick() -> None:
+        nonlocal runs
+        runs += 1
+        await release.wait()
+
+    worker = Worker(InMemoryJobQueue(company_concurrency=1, lease_seconds=30), poll_interval=0.01, registry=registry)
+    running = asyncio.create_task(worker.run())
+    await asyncio.sleep(0.05)
+    assert runs == 1
+    release.set()
+    await asyncio.sleep(0.05)
+    worker.stop()
+    await running
+    assert runs > 1
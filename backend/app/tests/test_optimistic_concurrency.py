@@ -0,0 +1,78 @@
+"""Tests for ETag parsing and the versioned single-statement update helper."""
+from typing import TYPE_CHECKING
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.etag import etag_for, parse_if_match
+from app.core.exceptions import BusinessLogicError
+from app.db.persistence import update_returning
+from app.models.item import Item
+
+if TYPE_CHECKING:
+    from app.tests.conftest import RecordingSession
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [(etag_for(3), 3), ('W/"4"', 4), ("7", 7), ("*", None), (None, None)],
+)
+def test_parse_if_match(header: str | None, expected: int | None) -> None:
+    assert parse_if_match(header) == expected
+
+
+def test_parse_if_match_rejects_foreign_etags() -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        parse_if_match('"abc"')
+    assert exc_info.value.status_code == 400
+
+
+async def test_versioned_update_is_a_single_statement(recording_session: "RecordingSession") -> None:
+    item = Item(id=1, company_id=1, sku="SKU", version=3)
+    recording_session.results = [item]
+
+    updated = await update_returning(
+        recording_session,  # type: ignore[arg-type]
+        Item,
+        where=[Item.id == 1, Item.company_id == 1],
+        values={"name": "Shirt"},
+        expected_version=2,
+    )
+
+    sql = recording_session.compiled(0)
+    assert updated is item
+    assert len(recording_session.statements) == 1
+    assert sql.startswith("UPDATE items SET")
+    assert "version=(items.version + %(version_1)s)" in sql
+    assert "items.version = %(version_2)s" in sql
+    assert "RETURNING" in sql
+
+
+async def test_stale_version_raises_precondition_failed(recording_session: "RecordingSession") -> None:
+    recording_session.results = [None, 5]
+
+    with pytest.raises(BusinessLogicError) as exc_info:
+        await update_returning(
+            recording_session,  # type: ignore[arg-type]
+            Item,
+            where=[Item.id == 1],
+            values={"name": "Shirt"},
+            expected_version=2,
+        )
+
+    assert exc_info.value.status_code == 412
+    assert exc_info.value.extra["current_version"] == 5
+
+
+async def test_missing_row_returns_none(recording_session: "RecordingSession") -> None:
+    recording_session.results = [None, None]
+
+    updated = await update_returning(
+        recording_session,  # type: ignore[arg-type]
+        Item,
+        where=[Item.id == 1],
+        values={"name": "Shirt"},
+        expected_version=2,
+    )
+
+    assert updated is None
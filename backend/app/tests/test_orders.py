@@ -0,0 +1,153 @@
+"""Tests for batched order entry."""
+from datetime import date, time
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.core.exceptions import BusinessLogicError
+from app.models.order import Order
+from app.schemas.order import OrderCreate, OrderItemCreate
+from app.services import orders
+from app.services.order_series import OrderNumberAllocator
+from app.services.pricing import PricingCache, PricingIndex
+
+if TYPE_CHECKING:
+    from app.tests.conftest import FakeRedis, RecordingSession
+
+ORDER_DATE = date(2026, 6, 1)
+
+
+@pytest.fixture
+def priced(fake_redis: "FakeRedis", monkeypatch: pytest.MonkeyPatch) -> PricingCache:
+    from app.core import version_counter
+
+    monkeypatch.setattr(version_counter, "get_async_redis", lambda: fake_redis)
+    fake_redis.store["pricing_version:1"] = "7"
+    cache = PricingCache()
+    cache._indexes[1] = PricingIndex.build(7, [
+        (10, None, 100, Decimal("40.00"), date(2026, 1, 1), None),
+        (11, None, 101, Decimal("25.50"), date(2026, 1, 1), None),
+        (11, 5, 102, Decimal("20.00"), date(2026, 1, 1), None),
+    ])
+    monkeypatch.setattr(orders, "pricing_cache", cache)
+    return cache
+
+
+def order_with(lines: list[OrderItemCreate]) -> OrderCreate:
+    return OrderCreate(store_id=3, customer_id=5, order_date=ORDER_DATE, items=lines)
+
+
+def allocator(series: "RecordingSession", block_size: int = 50) -> OrderNumberAllocator:
+    return OrderNumberAllocator(lambda: series, block_size)  # type: ignore[arg-type]
+
+
+async def test_large_order_posts_in_constant_statements(
+    priced: PricingCache, recording_session: "RecordingSession"
+) -> None:
+    lines = [
+        OrderItemCreate(item_id=10 + i % 2, service_type_id=7, qty=Decimal("1.5")) for i in range(500)
+    ]
+    recording_session.results = [
+        [(10, Decimal("18.00")), (11, Decimal("5.00"))],  # items
+        [7],  # service types
+        [(5, None, "Asia/Kolkata", time(23, 59), "MN", True)],  # customer
+        Order(id=99, version=1),  # order header
+        [],  # order lines
+    ]
+    series = type(recording_session)([92])
+
+    order = await orders.create_order(
+        recording_session, 1, order_with(lines), allocator(series)  # type: ignore[arg-type]
+    )
+
+    assert order.items == []
+    assert recording_session.statements[3].compile().params["order_no"] == "MN-000042"
+    assert len(recording_session.statements) == 6
+    assert "store_id" in series.compiled(0) and series.commits == 1
+    rows = recording_session.params[4]
+    assert len(rows) == 500
+    assert rows[0]["unit_price"] == Decimal("40.00")
+    assert rows[0]["tax_rate"] == Decimal("18.00")
+    assert rows[1]["unit_price"] == Decimal("20.00")  # customer override
+    assert rows[1]["item_rate_id"] == 102
+    assert rows[1]["line_amount"] == Decimal("30.00")
+    assert "stores.status" in recording_session.compiled(2)
+    assert recording_session.compiled(3).count("INSERT INTO orders") == 1
+    assert recording_session.params[5] == [
+        {
+            "company_id": 1,
+            "store_id": 3,
+            "kpi_date": ORDER_DATE,
+            "orders": 1,
+            "invoices": 0,
+            "new_customers": 0,
+            "sales_gross": Decimal(0),
+            "sales_net": Decimal(0),
+            "receipts": Decimal(0),
+            "expenses_total": Decimal(0),
+        }
+    ]
+
+
+async def test_every_invalid_line_is_reported(
+    priced: PricingCache, recording_session: "RecordingSession"
+) -> None:
+    lines = [
+        OrderItemCreate(item_id=10, qty=Decimal(1)),
+        OrderItemCreate(item_id=12, qty=Decimal(1)),  # unpriced
+        OrderItemCreate(item_id=99, service_type_id=8, qty=Decimal(1)),  # unknown item and service type
+    ]
+    recording_session.results = [
+        [(10, Decimal("18.00")), (12, Decimal("18.00"))],
+        [],
+        [(5, None, "Asia/Kolkata", time(23, 59), "MN", False)],
+    ]
+    series = type(recording_session)()
+
+    with pytest.raises(BusinessLogicError) as raised:
+        await orders.create_order(
+            recording_session, 1, order_with(lines), allocator(series)  # type: ignore[arg-type]
+        )
+
+    assert raised.value.status_code == 422
+    assert [(e["line"], e["field"]) for e in raised.value.extra["errors"]] == [
+        (1, "item_id"),
+        (2, "item_id"),
+        (2, "service_type_id"),
+    ]
+    assert len(recording_session.statements) == 3
+    assert series.statements == []
+
+
+async def test_an_inactive_or_foreign_store_is_not_found(
+    priced: PricingCache, recording_session: "RecordingSession"
+) -> None:
+    recording_session.results = [[(10, Decimal("18.00"))], [], [(5, None, None, None, None, False)]]
+    series = type(recording_session)()
+
+    with pytest.raises(BusinessLogicError) as raised:
+        await orders.create_order(
+            recording_session, 1, order_with([OrderItemCreate(item_id=10, qty=Decimal(1))]), allocator(series)  # type: ignore[arg-type]
+        )
+
+    assert raised.value.status_code == 404
+    assert series.statements == []
+
+
+async def test_order_numbers_are_leased_from_the_series_in_blocks(recording_session: "RecordingSession") -> None:
+    recording_session.results = [4, 7]
+    numbers = allocator(recording_session, block_size=3)
+
+    issued = [await numbers.allocate(3) for _ in range(4)]
+
+    assert issued == [1, 2, 3, 4]
+    assert len(recording_session.statements) == 2 and recording_session.commits == 2
+    lease = recording_session.compiled(0)
+    assert "ON CONFLICT (store_id) DO UPDATE SET next_number = (order_series.next_number" in lease
+    assert "UPDATE stores" not in lease
+
+
+def test_line_amount_rounds_half_up() -> None:
+    assert orders.line_amount(Decimal("0.125"), Decimal("1.00")) == Decimal("0.13")
+    assert orders.line_amount(Decimal("2.345"), Decimal("10.10")) == Decimal("23.68")
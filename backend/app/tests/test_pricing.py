@@ -0,0 +1,139 @@
+"""Tests for the effective-dated pricing index."""
+from datetime import date, time
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.services.pricing import PricingCache, PricingIndex, RateTimeline, RateWindow
+
+if TYPE_CHECKING:
+    from app.tests.conftest import FakeRedis, RecordingSession
+
+BASE = RateWindow(1, date(2026, 1, 1), None, Decimal("100.00"))
+PROMO = RateWindow(2, date(2026, 3, 1), date(2026, 3, 31), Decimal("80.00"))
+
+
+def test_later_window_overrides_and_earlier_one_resumes() -> None:
+    timeline = RateTimeline.build([BASE, PROMO])
+
+    assert timeline.at(date(2025, 12, 31)) is None
+    assert timeline.at(date(2026, 2, 28)) == (Decimal("100.00"), 1)
+    assert timeline.at(date(2026, 3, 1)) == (Decimal("80.00"), 2)
+    assert timeline.at(date(2026, 3, 31)) == (Decimal("80.00"), 2)
+    assert timeline.at(date(2026, 4, 1)) == (Decimal("100.00"), 1)
+    assert timeline.at(date(2030, 1, 1)) == (Decimal("100.00"), 1)
+
+
+def test_gaps_between_closed_windows_are_unpriced() -> None:
+    timeline = RateTimeline.build([
+        RateWindow(1, date(2026, 1, 1), date(2026, 1, 31), Decimal("10")),
+        RateWindow(2, date(2026, 3, 1), date(2026, 3, 31), Decimal("12")),
+    ])
+
+    assert timeline.at(date(2026, 2, 15)) is None
+    assert timeline.at(date(2026, 3, 15)) == (Decimal("12"), 2)
+    assert timeline.at(date(2026, 4, 1)) is None
+    assert len(timeline.starts) == 2
+
+
+def test_customer_override_falls_back_to_base() -> None:
+    index = PricingIndex.build(0, [
+        (7, None, 1, Decimal("100.00"), date(2026, 1, 1), None),
+        (7, 42, 3, Decimal("90.00"), date(2026, 6, 1), date(2026, 6, 30)),
+        (8, None, 4, Decimal("5.00"), date(2026, 1, 1), None),
+    ])
+
+    resolved = index.resolve_many([7, 8, 9, 7], customer_id=42, day=date(2026, 6, 15))
+
+    assert resolved[7].rate == Decimal("90.00")
+    assert resolved[7].source == "customer"
+    assert resolved[8].source == "base"
+    assert 9 not in resolved
+    assert index.resolve(7, 42, date(2026, 7, 1)).rate == Decimal("100.00")  # type: ignore[union-attr]
+
+
+@pytest.fixture
+def pricing_redis(fake_redis: "FakeRedis", monkeypatch: pytest.MonkeyPatch) -> "FakeRedis":
+    from app.core import version_counter
+
+    monkeypatch.setattr(version_counter, "get_async_redis", lambda: fake_redis)
+    return fake_redis
+
+
+async def test_index_is_rebuilt_only_after_version_bump(
+    pricing_redis: "FakeRedis", recording_session: "RecordingSession"
+) -> None:
+    cache = PricingCache()
+    recording_session.results = [
+        [(7, None, 1, Decimal("100.00"), date(2026, 1, 1), None)],
+        [(7, None, 2, Decimal("110.00"), date(2026, 1, 1), None)],
+    ]
+
+    first = await cache.index_for(recording_session, 1)  # type: ignore[arg-type]
+    again = await cache.index_for(recording_session, 1)  # type: ignore[arg-type]
+    await pricing_redis.incr("pricing_version:1")
+    rebuilt = await cache.index_for(recording_session, 1)  # type: ignore[arg-type]
+
+    assert first is again
+    assert len(recording_session.statements) == 2
+    assert rebuilt.resolve(7, None, date(2026, 5, 1)).rate == Decimal("110.00")  # type: ignore[union-attr]
+
+
+async def test_lost_version_counter_restarts_above_cached_indexes(
+    pricing_redis: "FakeRedis", recording_session: "RecordingSession"
+) -> None:
+    from app.core.version_counter import clock_floor
+    from app.services.pricing import pricing_versions
+
+    cache = PricingCache()
+    recording_session.results = [
+        [(7, None, 1, Decimal("100.00"), date(2026, 1, 1), None)],
+        [(7, None, 2, Decimal("250.00"), date(2026, 1, 1), None)],
+    ]
+    await pricing_versions.bump(1, initial=clock_floor())
+    await cache.index_for(recording_session, 1)  # type: ignore[arg-type]
+
+    # Redis loses the counter, then another worker posts a rate.
+    await pricing_redis.delete("pricing_version:1")
+    await pricing_versions.bump(1, initial=clock_floor())
+    rebuilt = await cache.index_for(recording_session, 1)  # type: ignore[arg-type]
+
+    assert rebuilt.resolve(7, None, date(2026, 5, 1)).rate == Decimal("250.00")  # type: ignore[union-attr]
+
+
+async def test_indexes_are_rebuilt_once_too_old(
+    pricing_redis: "FakeRedis", recording_session: "RecordingSession"
+) -> None:
+    cache = PricingCache(max_age_seconds=0)
+
+    await cache.index_for(recording_session, 1)  # type: ignore[arg-type]
+    await cache.index_for(recording_session, 1)  # type: ignore[arg-type]
+
+    assert len(recording_session.statements) == 2
+
+
+async def test_quotes_default_to_the_store_business_day(
+    pricing_redis: "FakeRedis", recording_session: "RecordingSession"
+) -> None:
+    from pydantic import ValidationError
+
+    from app.api.routers.pricing import resolve_prices
+    from app.core.rbac import Principal, permission_registry
+    from app.schemas.pricing import PriceResolveRequest
+    from app.services.store_calendar import current_business_date
+
+    with pytest.raises(ValidationError):
+        PriceResolveRequest(item_ids=[7])
+    principal = Principal(
+        user_id=5, role_mask=permission_registry.roles.mask(["STAFF"]), permission_mask=0, company_id=1,
+        store_ids=frozenset({4}),
+    )
+    recording_session.results = [("America/Los_Angeles", time(5)), []]
+
+    quote = await resolve_prices(
+        PriceResolveRequest(item_ids=[7], store_id=4), recording_session, principal  # type: ignore[arg-type]
+    )
+
+    assert quote.on_date == current_business_date("America/Los_Angeles", time(5))
+    assert quote.unpriced_item_ids == [7]
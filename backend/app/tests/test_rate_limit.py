@@ -0,0 +1,124 @@
+"""Tests for the token-bucket rate limiter dependencies."""
+from typing import Any
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core.config import settings
+from app.core.rate_limit import RateLimiter, RateLimitPolicy
+
+POLICY = RateLimitPolicy("test_ip", limit=2, period_seconds=60, scope="ip")
+
+
+class ScriptedBucket:
+    """Replays Lua bucket replies: ``[allowed, remaining, retry_after_ms, reset_ms]``."""
+
+    def __init__(self, replies: list[list[int]]) -> None:
+        self.replies = replies
+        self.calls = 0
+
+    async def __call__(self, key: str, policy: RateLimitPolicy) -> list[int]:
+        reply = self.replies[min(self.calls, len(self.replies) - 1)]
+        self.calls += 1
+        return reply
+
+
+async def test_denied_key_is_rejected_locally_until_retry_time(monkeypatch: pytest.MonkeyPatch) -> None:
+    limiter = RateLimiter()
+    bucket = ScriptedBucket([[0, 0, 30_000, 60_000]])
+    monkeypatch.setattr(limiter, "_take", bucket)
+
+    first = await limiter.hit(POLICY, "ip:1.2.3.4")
+    second = await limiter.hit(POLICY, "ip:1.2.3.4")
+
+    assert not first.allowed
+    assert not second.allowed
+    assert 0 < second.retry_after_seconds <= 30
+    assert bucket.calls == 1
+
+
+async def test_redis_failure_fails_open(monkeypatch: pytest.MonkeyPatch) -> None:
+    limiter = RateLimiter()
+
+    async def broken(key: str, policy: RateLimitPolicy) -> list[int]:
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(limiter, "_take", broken)
+
+    result = await limiter.hit(POLICY, "ip:1.2.3.4")
+
+    assert result.allowed
+    with pytest.raises(ConnectionError):
+        await limiter.hit(POLICY, "ip:1.2.3.4", fail_open=False)
+
+
+async def test_local_denial_cache_is_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    limiter = RateLimiter(local_cache_size=2)
+    monkeypatch.setattr(limiter, "_take", ScriptedBucket([[0, 0, 30_000, 60_000]]))
+
+    for host in ("a", "b", "c"):
+        await limiter.hit(POLICY, f"ip:{host}")
+
+    assert list(limiter._deny_until) == ["ratelimit:test_ip:ip:b", "ratelimit:test_ip:ip:c"]
+
+
+async def test_dependency_sets_headers_and_returns_429(monkeypatch: pytest.MonkeyPatch) -> None:
+    from app.core import rate_limit as rate_limit_module
+
+    limiter = RateLimiter()
+    monkeypatch.setattr(limiter, "_take", ScriptedBucket([[1, 4, 0, 12_000], [0, 0, 7_500, 60_000]]))
+    monkeypatch.setattr(rate_limit_module, "rate_limiter", limiter)
+    monkeypatch.setitem(rate_limit_module.ROUTE_CLASS_POLICIES, "test", (POLICY,))
+
+    app = FastAPI()
+
+    @app.get("/limited", dependencies=[Depends(rate_limit_module.rate_limit("test"))])
+    async def limited() -> dict[str, Any]:
+        return {"ok": True}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        allowed = await client.get("/limited")
+        denied = await client.get("/limited")
+
+    assert allowed.status_code == 200
+    assert allowed.headers["x-ratelimit-limit"] == "2"
+    assert allowed.headers["x-ratelimit-remaining"] == "4"
+    assert allowed.headers["x-ratelimit-reset"] == "12"
+    assert denied.status_code == 429
+    assert denied.headers["retry-after"] == "8"
+    assert denied.headers["x-ratelimit-remaining"] == "0"
+
+
+async def test_company_policies_count_per_company_without_token_claims(monkeypatch: pytest.MonkeyPatch) -> None:
+    from app.core import rate_limit as rate_limit_module
+    from app.core.rbac import Principal, get_principal
+
+    limiter = RateLimiter()
+    seen: list[str] = []
+
+    async def take(key: str, policy: RateLimitPolicy) -> list[int]:
+        seen.append(key)
+        return [1, 1, 0, 1_000]
+
+    monkeypatch.setattr(limiter, "_take", take)
+    monkeypatch.setattr(rate_limit_module, "rate_limiter", limiter)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    principals = iter([
+        Principal(user_id=1, role_mask=0, permission_mask=0, company_id=7),
+        Principal(user_id=2, role_mask=0, permission_mask=0, company_id=7),
+    ])
+
+    app = FastAPI()
+    app.dependency_overrides[get_principal] = lambda: next(principals)
+
+    @app.post("/upload", dependencies=[Depends(rate_limit_module.rate_limit("upload"))])
+    async def upload() -> dict[str, Any]:
+        return {"ok": True}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        # Plain tokens carry no company claim; the principal supplies it.
+        for _ in range(2):
+            assert (await client.post("/upload", headers={"Authorization": "Bearer plain"})).status_code == 200
+
+    assert seen == ["ratelimit:upload_company:company:7"] * 2
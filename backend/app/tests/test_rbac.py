@@ -0,0 +1,73 @@
+"""Tests for compiled role and permission bitmasks."""
+from datetime import UTC, datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.rbac import PermissionRegistry, Principal, permission_registry, require_permission, require_principal
+from app.models.role import Role
+from app.models.user import User
+from app.models.user_role import UserRole
+
+
+def user_with_roles(*roles: Role) -> User:
+    user = User(id=1, email="user@example.com", status="active")
+    user.roles = [UserRole(role=role) for role in roles]
+    return user
+
+
+def role(code: str, permissions: dict[str, bool], updated_at: datetime | None = None) -> Role:
+    return Role(code=code, name=code, permissions=permissions, updated_at=updated_at)
+
+
+def test_principal_ors_role_and_permission_masks() -> None:
+    registry = PermissionRegistry()
+    user = user_with_roles(
+        role("STAFF", {"order:view": True, "customer:view": False}),
+        role("ACCOUNTANT", {"invoice:view": True}),
+    )
+
+    principal = registry.principal_for(user)
+
+    assert registry.roles.names(principal.role_mask) == ["STAFF", "ACCOUNTANT"]
+    assert registry.permissions.names(principal.permission_mask) == ["order:view", "invoice:view"]
+    assert not principal.is_platform_admin
+
+
+def test_role_mask_is_recompiled_when_role_changes() -> None:
+    registry = PermissionRegistry()
+    first = datetime(2026, 1, 1, tzinfo=UTC)
+    staff = role("STAFF", {"order:view": True}, updated_at=first)
+    assert registry.role_permissions(staff) == registry.permissions.bit("order:view")
+
+    staff.permissions = {"order:create": True}
+    assert registry.role_permissions(staff) == registry.permissions.bit("order:view")
+
+    staff.updated_at = datetime(2026, 1, 2, tzinfo=UTC)
+    assert registry.role_permissions(staff) == registry.permissions.bit("order:create")
+
+
+def test_unknown_names_get_fresh_bits() -> None:
+    registry = PermissionRegistry()
+    known = registry.permissions.mask(["system:manage", "quote:manage"])
+
+    assert not registry.permissions.bit("brand-new:permission") & known
+
+
+async def test_require_principal_checks_precompiled_mask() -> None:
+    manager = user_with_roles(role("STORE_MANAGER", {}))
+    principal = permission_registry.principal_for(manager)
+
+    assert await require_principal("COMPANY_ADMIN", "STORE_MANAGER")(principal) is principal
+    with pytest.raises(HTTPException) as exc_info:
+        await require_principal("PLATFORM_ADMIN")(principal)
+    assert exc_info.value.status_code == 403
+
+
+async def test_require_permission_checks_permission_bit() -> None:
+    staff = user_with_roles(role("STAFF", {"order:create": True}))
+    principal = permission_registry.principal_for(staff)
+
+    assert await require_permission("order:create")(principal) is principal
+    with pytest.raises(HTTPException):
+        await require_permission("order:manage")(Principal(1, principal.role_mask, 0))
@@ -0,0 +1,79 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.recon_rule import ReconRule
+from app.services.recon import (
+    Candidate,
+    CandidateIndex,
+    CompiledRule,
+    StatementLine,
+    compile_pattern,
+    match_statement,
+    to_paise,
+)
+
+DAY = date(2026, 10, 1)
+
+
+def _rule(rule_id: int, match_type: str, pattern: str, map_to: str = "invoice") -> CompiledRule:
+    return CompiledRule.compile(
+        ReconRule(id=rule_id, match_type=match_type, pattern=pattern, map_to=map_to, field="description")
+    )
+
+
+def test_exact_utr_wins_over_amount_and_claims_the_payment() -> None:
+    index = CandidateIndex.build([
+        Candidate("payment", 1, "UTR-77", 50_000, DAY),
+        Candidate("invoice", 2, "INV-9", 50_000, DAY),
+    ])
+    lines = [
+        StatementLine(10, 50_000, DAY, " utr-77 ", "UPI"),
+        StatementLine(11, 50_000, DAY, "UTR-77", "UPI again"),
+    ]
+
+    matches = match_statement(lines, [], index)
+
+    assert [(m.bank_txn_id, m.entity_type, m.entity_id, m.method, m.confidence) for m in matches] == [
+        (10, "payment", 1, "utr", Decimal("1.000")),
+        (11, "invoice", 2, "amount", Decimal("0.700")),
+    ]
+
+
+def test_rules_extract_references_or_narrow_the_amount_match() -> None:
+    index = CandidateIndex.build([
+        Candidate("invoice", 5, "INV5", 12_345, DAY),
+        Candidate("invoice", 6, "INV6", 20_000, date(2026, 10, 3)),
+        Candidate("payment", 7, None, 20_000, DAY),
+    ])
+    rules = [_rule(1, "regex", r"ref\s+(?P<ref>INV\d+)"), _rule(2, "contains", "NEFT")]
+    lines = [
+        StatementLine(10, 99_999, DAY, None, "Transfer ref inv5"),
+        StatementLine(11, 20_000, DAY, None, "NEFT CR ACME"),
+    ]
+
+    matches = match_statement(lines, rules, index)
+
+    assert [(m.entity_id, m.rule_id, m.confidence) for m in matches] == [
+        (5, 1, Decimal("0.900")),
+        (6, 2, Decimal("0.700")),
+    ]
+
+
+def test_ties_are_left_for_manual_matching() -> None:
+    index = CandidateIndex.build([
+        Candidate("payment", 1, None, 10_000, date(2026, 9, 30)),
+        Candidate("payment", 2, None, 10_000, date(2026, 10, 2)),
+        Candidate("invoice", 3, None, 10_000, date(2026, 10, 10)),
+    ])
+
+    assert match_statement([StatementLine(10, 10_000, DAY, None, "")], [], index) == []
+
+
+def test_amounts_compare_in_paise_and_patterns_are_validated() -> None:
+    assert to_paise(Decimal("1499.99")) == 149_999
+    assert to_paise(Decimal("0.1") + Decimal("0.2")) == 30
+    compile_pattern("contains", "(")
+    with pytest.raises(ValueError):
+        compile_pattern("regex", "(")
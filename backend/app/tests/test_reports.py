@@ -0,0 +1,132 @@
+import io
+import zipfile
+from collections.abc import AsyncIterator
+from datetime import date, time
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.core.exceptions import BusinessLogicError
+from app.models.payment import Payment
+from app.services import payments, reports
+from app.services.payments import record_payment
+from app.services.reports import PendingPayment, PendingPaymentsFilter, decode_cursor, encode_cursor
+
+if TYPE_CHECKING:
+    from app.tests.conftest import RecordingSession
+
+AS_OF = date(2026, 10, 19)
+
+
+def _pending(invoice_id: int, invoice_date: date, customer_name: str = "Asha") -> PendingPayment:
+    return PendingPayment(
+        invoice_id, None, invoice_date, 5, customer_name, 3, "Main", Decimal("100.00"), Decimal("40.00"),
+        Decimal("60.00"), (AS_OF - invoice_date).days, "8-15",
+    )
+
+
+async def _pages(*pages: list[PendingPayment]) -> AsyncIterator[list[PendingPayment]]:
+    for page in pages:
+        yield page
+
+
+def test_cursors_round_trip_and_reject_garbage() -> None:
+    assert decode_cursor(encode_cursor((date(2026, 9, 1), 42))) == (date(2026, 9, 1), 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+async def test_pages_use_the_partial_index_and_keyset(recording_session: "RecordingSession") -> None:
+    recording_session.results = [[tuple(vars(_pending(9, date(2026, 10, 10))).values())]]
+
+    [row] = await reports.pending_payments(
+        recording_session,  # type: ignore[arg-type]
+        1,
+        AS_OF,
+        PendingPaymentsFilter(store_ids={3}, aging_bucket="8-15"),
+        after=(date(2026, 10, 1), 7),
+        limit=50,
+    )
+
+    assert row.cursor == (date(2026, 10, 10), 9)
+    sql = recording_session.compiled(0)
+    assert "invoices.status != %(status_1)s AND invoices.amount_paid < invoices.grand_total" in sql
+    assert "(invoices.invoice_date, invoices.id) > (" in sql
+    assert "ORDER BY invoices.invoice_date, invoices.id" in sql
+    params = list(recording_session.statements[0].compile().params.values())
+    # The 8-15 bucket becomes an invoice date range.
+    assert date(2026, 10, 11) in params and date(2026, 10, 4) in params
+
+
+async def test_aging_lists_every_bucket(recording_session: "RecordingSession") -> None:
+    recording_session.results = [[("16-30", 2, Decimal("80.00"))]]
+
+    totals = await reports.pending_payments_aging(
+        recording_session, 1, AS_OF, PendingPaymentsFilter()  # type: ignore[arg-type]
+    )
+
+    assert [(t.aging_bucket, t.invoices, t.balance) for t in totals] == [
+        ("0-7", 0, Decimal("0.00")),
+        ("8-15", 0, Decimal("0.00")),
+        ("16-30", 2, Decimal("80.00")),
+        ("30+", 0, Decimal("0.00")),
+    ]
+    assert "GROUP BY anon_1.aging_bucket" in recording_session.compiled(0)
+
+
+async def test_exports_stream_one_chunk_per_page() -> None:
+    pages = _pages([_pending(1, date(2026, 10, 1), 'Cust, "A"')], [_pending(2, date(2026, 10, 2))])
+
+    chunks = [chunk async for chunk in reports.stream_csv(PendingPayment, pages)]
+
+    assert len(chunks) == 3
+    lines = b"".join(chunks).decode().splitlines()
+    assert lines[0].startswith("invoice_id,invoice_no,invoice_date")
+    assert lines[1] == '1,,2026-10-01,5,"Cust, ""A""",3,Main,100.00,40.00,60.00,18,8-15'
+
+    pages = _pages([_pending(1, date(2026, 10, 1), "<Asha & co>")])
+    workbook = b"".join([chunk async for chunk in reports.stream_xlsx(PendingPayment, pages, "Pending")])
+    with zipfile.ZipFile(io.BytesIO(workbook)) as archive:
+        assert archive.testzip() is None
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode()
+    assert "<c><v>60.00</v></c>" in sheet
+    assert "&lt;Asha &amp; co&gt;" in sheet
+
+
+async def test_payments_cannot_overpay(recording_session: "RecordingSession") -> None:
+    recording_session.results = [None, ("posted", Decimal("25.00"))]
+
+    with pytest.raises(BusinessLogicError) as raised:
+        await record_payment(
+            recording_session, 1, 9, Decimal("30.00"), "cash", AS_OF  # type: ignore[arg-type]
+        )
+
+    assert raised.value.status_code == 422
+    assert raised.value.extra == {"balance": "25.00"}
+    assert "invoices.amount_paid + %(amount_paid_2)s <= invoices.grand_total" in recording_session.compiled(0)
+
+
+async def test_undated_payments_take_the_store_business_day(
+    recording_session: "RecordingSession", monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(payments, "current_business_date", lambda timezone, cutoff: AS_OF)
+    recording_session.results = [(3, "Asia/Kolkata", time(5, 0)), [(3, AS_OF)], Payment(id=1)]
+
+    await record_payment(recording_session, 1, 9, Decimal("30.00"), "cash", None)  # type: ignore[arg-type]
+
+    assert "stores.closing_cutoff" in recording_session.compiled(0)
+    assert recording_session.statements[1].compile().params["business_date_m0"] == AS_OF
+    assert recording_session.statements[2].compile().params["payment_date"] == AS_OF
+    assert recording_session.params[3][0]["kpi_date"] == AS_OF
+
+
+async def test_reports_default_to_the_latest_business_day_in_scope(
+    recording_session: "RecordingSession", monkeypatch: pytest.MonkeyPatch
+) -> None:
+    today = {"Asia/Kolkata": AS_OF, "America/New_York": date(2026, 10, 18)}
+    monkeypatch.setattr(reports, "current_business_date", lambda timezone, cutoff: today[timezone])
+    recording_session.results = [[("America/New_York", time(23, 59)), ("Asia/Kolkata", time(23, 59))]]
+
+    assert await reports.default_as_of(recording_session, 1, {3, 4}) == AS_OF  # type: ignore[arg-type]
+    assert "stores.id IN" in recording_session.compiled(0)
@@ -0,0 +1,104 @@
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from app.core import result_cache, version_counter
+from app.core.result_cache import ResultCache, result_key
+from app.core.version_counter import VersionCounter
+
+if TYPE_CHECKING:
+    from app.tests.conftest import FakeRedis
+
+
+@pytest.fixture
+def redis(monkeypatch: pytest.MonkeyPatch, fake_redis: "FakeRedis") -> "FakeRedis":
+    monkeypatch.setattr(version_counter, "get_async_redis", lambda: fake_redis)
+    monkeypatch.setattr(result_cache, "get_async_redis", lambda: fake_redis)
+    return fake_redis
+
+
+versions = VersionCounter("test_data_version")
+
+
+def _cache(**overrides: Any) -> ResultCache:
+    options: dict[str, Any] = {"ttl_seconds": 60, "stale_seconds": 600, "poll_seconds": 0.01}
+    options.update(overrides)
+    return ResultCache("test", versions, **options)
+
+
+class Counter:
+    def __init__(self, delay: float = 0.02) -> None:
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self) -> dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"calls": self.calls}
+
+
+def test_keys_ignore_store_order_but_not_scope() -> None:
+    params = {"date_from": "2026-10-01"}
+    assert result_key("stores", [4, 3], params) == result_key("stores", {3, 4}, params)
+    assert result_key("stores", [3, 4], params) != result_key("company", [3, 4], params)
+    assert result_key("company", None, params) != result_key("company", [], params)
+
+
+async def test_concurrent_misses_share_one_computation(redis: "FakeRedis") -> None:
+    cache, compute = _cache(), Counter()
+
+    results = await asyncio.gather(*(cache.get_or_compute(1, "k", compute) for _ in range(10)))
+
+    assert compute.calls == 1
+    assert results == [{"calls": 1}] * 10
+    # Another worker picks the result up from Redis.
+    assert await _cache().get_or_compute(1, "k", Counter()) == {"calls": 1}
+
+
+async def test_other_workers_wait_for_the_lock_holder(redis: "FakeRedis") -> None:
+    first, second = _cache(), _cache()
+    slow, fast = Counter(delay=0.05), Counter()
+
+    results = await asyncio.gather(first.get_or_compute(1, "k", slow), second.get_or_compute(1, "k", fast))
+
+    assert list(results) == [{"calls": 1}, {"calls": 1}]
+    assert (slow.calls, fast.calls) == (1, 0)
+
+
+async def test_writes_serve_stale_once_while_revalidating(redis: "FakeRedis") -> None:
+    cache, compute = _cache(), Counter(delay=0)
+    assert await cache.get_or_compute(1, "k", compute) == {"calls": 1}
+
+    await versions.bump(1)
+    assert await cache.get_or_compute(1, "k", compute) == {"calls": 1}
+    await asyncio.sleep(0.01)
+
+    assert await cache.get_or_compute(1, "k", compute) == {"calls": 2}
+    assert compute.calls == 2
+    # Other companies are unaffected.
+    assert await cache.get_or_compute(2, "k", compute) == {"calls": 3}
+
+
+async def test_expired_entries_are_recomputed_inline(redis: "FakeRedis") -> None:
+    cache, compute = _cache(ttl_seconds=0, stale_seconds=0), Counter(delay=0)
+
+    assert await cache.get_or_compute(1, "k", compute) == {"calls": 1}
+    assert await cache.get_or_compute(1, "k", compute) == {"calls": 2}
+
+
+async def test_without_redis_results_are_reused_only_within_the_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    def unavailable() -> None:
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(version_counter, "get_async_redis", unavailable)
+    monkeypatch.setattr(result_cache, "get_async_redis", unavailable)
+    compute = Counter(delay=0)
+
+    fresh = _cache()
+    assert await fresh.get_or_compute(1, "k", compute) == {"calls": 1}
+    assert await fresh.get_or_compute(1, "k", compute) == {"calls": 1}
+
+    expired = _cache(ttl_seconds=0)
+    assert await expired.get_or_compute(1, "k", compute) == {"calls": 2}
+    assert await expired.get_or_compute(1, "k", compute) == {"calls": 3}
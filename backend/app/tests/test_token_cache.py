@@ -0,0 +1,89 @@
+"""Tests for the process-local decoded-JWT cache."""
+import time
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+from jose import jwt
+
+from app.core import security
+from app.core.security import DecodedTokenCache, create_access_token, decode_token, revoke_token, token_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache() -> Iterator[None]:
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+@pytest.fixture
+def decode_calls(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    calls: list[str] = []
+    original = jwt.decode
+
+    def counting_decode(token: str, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        calls.append(token)
+        payload: dict[str, Any] = original(token, *args, **kwargs)
+        return payload
+
+    monkeypatch.setattr(jwt, "decode", counting_decode)
+    return calls
+
+
+def test_repeated_decode_verifies_once(decode_calls: list[str]) -> None:
+    token = create_access_token({"sub": "1"})
+
+    first = decode_token(token)
+    first["sub"] = "tampered"
+    second = decode_token(token)
+
+    assert second["sub"] == "1"
+    assert len(decode_calls) == 1
+
+
+def test_invalid_tokens_are_not_cached(decode_calls: list[str]) -> None:
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            decode_token("not-a-jwt")
+
+    assert len(decode_calls) == 2
+    assert len(token_cache) == 0
+
+
+def test_revocation_evicts_cached_payload(decode_calls: list[str], monkeypatch: pytest.MonkeyPatch) -> None:
+    def no_redis() -> None:
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(security, "get_redis_client", no_redis)
+    token = create_access_token({"sub": "1", "jti": "abc"})
+    payload = decode_token(token)
+
+    revoke_token("abc", payload["exp"])
+    decode_token(token)
+
+    assert len(decode_calls) == 2
+
+
+def test_entries_expire_at_token_exp() -> None:
+    cache = DecodedTokenCache(max_entries=10)
+    cache.put(b"expired", {"exp": time.time() - 1, "jti": "old"})
+    cache.put(b"live", {"exp": time.time() + 60, "jti": "new"})
+
+    assert cache.get(b"expired") is None
+    assert cache.get(b"live") is not None
+    assert len(cache) == 1
+
+
+def test_cache_is_bounded_lru() -> None:
+    cache = DecodedTokenCache(max_entries=2)
+    exp = time.time() + 60
+    cache.put(b"a", {"exp": exp, "jti": "a"})
+    cache.put(b"b", {"exp": exp, "jti": "b"})
+    cache.get(b"a")
+    cache.put(b"c", {"exp": exp, "jti": "c"})
+
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") is not None
+    cache.evict_jti("b")
+    assert len(cache) == 2
@@ -0,0 +1,181 @@
+from collections.abc import AsyncIterator, Sequence
+from typing import TYPE_CHECKING, Any
+
+import httpx
+import pytest
+
+from app.core.rate_limit import RateLimiter, RateLimitPolicy
+from app.services import whatsapp
+from app.services.whatsapp import (
+    CompiledTemplate,
+    MessagingError,
+    PromoFrequencyCap,
+    Recipient,
+    SendPipeline,
+    TemplateCache,
+    WhatsAppProvider,
+    audience_pages,
+    template_vars,
+    template_versions,
+)
+from app.services.whatsapp_stub import create_stub_app
+
+if TYPE_CHECKING:
+    from app.tests.conftest import FakeRedis, RecordingSession
+
+
+async def _pages(*pages: Sequence[Recipient]) -> AsyncIterator[Sequence[Recipient]]:
+    for page in pages:
+        yield page
+
+
+def _stub_provider(fail_every: int = 0) -> tuple[WhatsAppProvider, Any]:
+    stub = create_stub_app(token="secret", fail_every=fail_every)
+    provider = WhatsAppProvider("stub", "http://stub", "secret", transport=httpx.ASGITransport(app=stub))
+    return provider, stub.state.provider
+
+
+@pytest.fixture
+def promo_redis(fake_redis: "FakeRedis", monkeypatch: pytest.MonkeyPatch) -> "FakeRedis":
+    monkeypatch.setattr(whatsapp, "get_async_redis", lambda: fake_redis)
+    return fake_redis
+
+
+def test_templates_compile_once_and_render_per_recipient() -> None:
+    body = "Hi {{ customer_name }}, {{offer}} till {{until}}. Bye {{customer_name}}!"
+    assert template_vars(body) == ["customer_name", "offer", "until"]
+
+    template = CompiledTemplate.compile("diwali", "promo", body)
+
+    assert template.literals == ("Hi ", ", ", " till ", ". Bye ", "!")
+    assert template.missing(["customer_name", "offer"]) == ["until"]
+    assert template.render({"customer_name": "Asha", "offer": "20% off", "until": "Sunday"}) == (
+        "Hi Asha, 20% off till Sunday. Bye Asha!"
+    )
+    assert CompiledTemplate.compile("plain", "feedback", "Thanks!").render({}) == "Thanks!"
+
+
+async def test_lost_template_version_never_matches_a_cached_set(
+    fake_redis: "FakeRedis", recording_session: "RecordingSession", monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from app.core import version_counter
+    from app.core.version_counter import clock_floor
+
+    monkeypatch.setattr(version_counter, "get_async_redis", lambda: fake_redis)
+    cache = TemplateCache()
+    recording_session.results = [
+        [("thanks", "feedback", "Thanks {{name}}!")],
+        [("thanks", "feedback", "Thank you, {{name}}!")],
+    ]
+    await template_versions.bump(1, initial=clock_floor())
+    old = await cache.get(recording_session, 1, "thanks")  # type: ignore[arg-type]
+
+    # Redis loses the counter, then another worker replaces the template.
+    await fake_redis.delete("whatsapp_template_version:1")
+    await template_versions.bump(1, initial=clock_floor())
+    new = await cache.get(recording_session, 1, "thanks")  # type: ignore[arg-type]
+
+    assert old is not None and old.render({"name": "Asha"}) == "Thanks Asha!"
+    assert new is not None and new.render({"name": "Asha"}) == "Thank you, Asha!"
+
+
+async def test_pipeline_sends_through_the_stub_paced_and_logs_in_batches() -> None:
+    provider, stub_state = _stub_provider(fail_every=3)
+    throttled: list[int] = []
+    batches: list[list[dict[str, Any]]] = []
+
+    async def throttle(company_id: int) -> None:
+        throttled.append(company_id)
+
+    async def write_logs(rows: list[dict[str, Any]]) -> None:
+        batches.append(rows)
+
+    template = CompiledTemplate.compile("thanks", "feedback", "Thanks {{customer_name}} for {{order_no}}")
+    pipeline = SendPipeline(
+        7, template, provider, write_logs,
+        variables={"order_no": "ORD-1"}, order_id=11, throttle=throttle,
+        concurrency=2, log_batch_rows=2, retry_delay=0,
+    )
+    recipients = [Recipient(1, "9800000001", "Asha"), Recipient(2, "9811110000", "Ravi")]
+
+    summary = await pipeline.run(_pages(recipients, [Recipient(3, "9800000003", "Meena")]))
+    await provider.aclose()
+
+    assert (summary.sent, summary.failed, summary.skipped) == (2, 1, 0)
+    rows = sorted((row for batch in batches for row in batch), key=lambda row: row["customer_id"])
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert [row["status"] for row in rows] == ["sent", "failed", "sent"]
+    assert rows[0]["body_rendered"] == "Thanks Asha for ORD-1"
+    assert rows[0]["provider_msg_id"].startswith("stub-") and rows[0]["order_id"] == 11
+    assert rows[1]["error"] == "HTTP 400: Not a WhatsApp number"
+    # Every third request got a 503 and was retried, taking a fresh token each time.
+    assert stub_state.received == 4
+    assert throttled == [7, 7, 7, 7]
+
+
+async def test_promo_cap_allows_one_promo_per_phone_per_window(promo_redis: "FakeRedis") -> None:
+    cap = PromoFrequencyCap(window_seconds=7 * 86400)
+
+    assert await cap.reserve(1, ["p1", "p2", "p1"], "diwali") == {"p1", "p2"}
+    assert await cap.reserve(1, ["p1", "p2", "p3"], "newyear") == {"p3"}
+    # A retry of the same campaign does not reach the phones again.
+    assert await cap.reserve(1, ["p1"], "diwali") == set()
+    assert await cap.reserve(2, ["p1"], "other-company") == {"p1"}
+
+    await cap.release(1, "p2", "diwali")
+    assert await cap.reserve(1, ["p2"], "newyear") == {"p2"}
+    assert await promo_redis.zcard(cap.key(1, "p1")) == 1
+
+
+async def test_send_throttle_stops_when_redis_is_unreachable(monkeypatch: pytest.MonkeyPatch) -> None:
+    limiter = RateLimiter()
+
+    async def unreachable(key: str, policy: RateLimitPolicy) -> list[int]:
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(limiter, "_take", unreachable)
+    monkeypatch.setattr(whatsapp, "rate_limiter", limiter)
+
+    with pytest.raises(ConnectionError):
+        await whatsapp.wait_for_send_token(1)
+
+
+async def test_promos_skip_capped_and_shared_numbers(promo_redis: "FakeRedis") -> None:
+    provider, _ = _stub_provider()
+    cap = PromoFrequencyCap(window_seconds=86400)
+    await cap.reserve(1, ["9800000002"], "earlier")
+    logged: list[dict[str, Any]] = []
+
+    async def write_logs(rows: list[dict[str, Any]]) -> None:
+        logged.extend(rows)
+
+    async def no_wait(company_id: int) -> None:
+        return None
+
+    template = CompiledTemplate.compile("sale", "promo", "Sale on, {{customer_name}}")
+    with pytest.raises(MessagingError):
+        SendPipeline(1, template, provider, write_logs)
+    pipeline = SendPipeline(
+        1, template, provider, write_logs, campaign_id="job-1", throttle=no_wait, frequency_cap=cap
+    )
+    page = [Recipient(1, "9800000001", "Asha"), Recipient(2, "9800000002", "Ravi"), Recipient(3, "9800000001", "Kiran")]
+
+    summary = await pipeline.run(_pages(page))
+    await provider.aclose()
+
+    assert (summary.sent, summary.skipped) == (1, 2)
+    assert [(row["customer_id"], row["campaign_id"], row["type"]) for row in logged] == [(1, "job-1", "promo")]
+
+
+async def test_audience_pages_by_keyset_without_opted_out_or_logged_customers(
+    recording_session: "RecordingSession",
+) -> None:
+    recording_session.results = [[(4, "9800000004", "Asha"), (9, "9800000009", "Ravi")], []]
+
+    pages = [page async for page in audience_pages(lambda: recording_session, 1, "job-1", page_rows=2)]  # type: ignore[arg-type]
+
+    assert pages == [[Recipient(4, "9800000004", "Asha"), Recipient(9, "9800000009", "Ravi")]]
+    first, second = recording_session.compiled(0), recording_session.compiled(1)
+    assert "customers.whatsapp_opted_out_at IS NULL" in first
+    assert "NOT (EXISTS (SELECT" in first and "message_log.campaign_id" in first
+    assert "customers.id > %(id_1)s" in second
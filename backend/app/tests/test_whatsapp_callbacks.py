@@ -0,0 +1,150 @@
+import json
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.routers import whatsapp as whatsapp_router
+from app.core.config import settings
+from app.services import whatsapp_callbacks
+from app.services.whatsapp_callbacks import (
+    CALLBACK_QUEUE,
+    DRAINER_ALIVE_PREFIX,
+    DRAINERS_KEY,
+    PROCESSING_PREFIX,
+    StatusEvent,
+    apply_events,
+    callback_signature,
+    coalesce,
+    drain_callbacks,
+    verify_signature,
+)
+
+if TYPE_CHECKING:
+    from app.tests.conftest import FakeRedis, RecordingSession
+
+T0 = 1_792_468_800.0
+
+
+@pytest.fixture
+def callback_redis(fake_redis: "FakeRedis", monkeypatch: pytest.MonkeyPatch) -> "FakeRedis":
+    monkeypatch.setattr(whatsapp_callbacks, "get_async_redis", lambda: fake_redis)
+    return fake_redis
+
+
+def test_signatures_cover_the_exact_body() -> None:
+    body = b'{"statuses": []}'
+    signature = callback_signature("s3cret", body)
+
+    assert signature.startswith("sha256=")
+    assert verify_signature("s3cret", body, signature)
+    assert not verify_signature("s3cret", body + b" ", signature)
+    assert not verify_signature("s3cret", body, None)
+    assert not verify_signature("", body, callback_signature("", body))
+
+
+def test_receipts_coalesce_to_one_forward_only_update_per_message() -> None:
+    updates = coalesce([
+        StatusEvent("stub", "m1", "read", T0 + 9),
+        StatusEvent("stub", "m1", "delivered", T0 + 5),
+        StatusEvent("stub", "m1", "delivered", T0 + 2),
+        StatusEvent("stub", "m2", "delivered", T0),
+        StatusEvent("stub", "m2", "failed", T0 + 1, error="late"),
+        StatusEvent("stub", "m3", "typing", T0),
+    ])
+
+    assert set(updates) == {("stub", "m1"), ("stub", "m2")}
+    m1, m2 = updates["stub", "m1"], updates["stub", "m2"]
+    assert m1.status == "read"
+    assert (m1.delivered_at, m1.read_at) == (whatsapp_callbacks._utc(T0 + 2), whatsapp_callbacks._utc(T0 + 9))
+    assert len(m1.events) == 3
+    # A failure reported after the delivery does not undo it.
+    assert m2.status == "delivered"
+
+
+async def test_batches_apply_as_one_update_and_requeue_unlogged_messages(
+    recording_session: "RecordingSession",
+) -> None:
+    now = time.time()
+    recording_session.results = [["m1"], ["m2"]]
+    events = [
+        StatusEvent("stub", "m1", "read", T0),
+        StatusEvent("stub", "m2", "delivered", T0),
+        StatusEvent("stub", "m3", "delivered", T0, received_at=now),
+        StatusEvent("stub", "m4", "delivered", T0, received_at=now - settings.WHATSAPP_CALLBACK_RETRY_SECONDS - 1),
+    ]
+
+    retry = await apply_events(recording_session, events)  # type: ignore[arg-type]
+
+    assert [event.provider_msg_id for event in retry] == ["m3"]
+    update_sql = recording_session.compiled(0)
+    assert update_sql.startswith("UPDATE message_log SET status=CASE")
+    assert "FROM (VALUES (" in update_sql and update_sql.count("), (") == 3
+    assert "RETURNING message_log.provider_msg_id" in update_sql
+    assert "message_log.provider_msg_id IN" in recording_session.compiled(1)
+
+
+async def test_callbacks_are_acked_at_once_and_drained_in_batches(
+    callback_redis: "FakeRedis", recording_session: "RecordingSession", monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(settings, "WHATSAPP_CALLBACK_SECRET", "s3cret")
+    app = FastAPI()
+    app.include_router(whatsapp_router.callback_router)
+    body = json.dumps({"statuses": [
+        {"id": "m1", "status": "delivered", "timestamp": T0},
+        {"id": "m1", "status": "read"},
+        {"id": "m2", "status": "failed", "error": "Not on WhatsApp"},
+    ]}).encode()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        forged = await client.post("/whatsapp/callback/provider", content=body, headers={"X-Signature-256": "sha256=0"})
+        accepted = await client.post(
+            "/whatsapp/callback/provider", content=body, headers={"X-Signature-256": callback_signature("s3cret", body)}
+        )
+
+    assert forged.status_code == 401
+    assert accepted.status_code == 200 and accepted.json() == {"accepted": 3}
+    assert len(callback_redis.lists[CALLBACK_QUEUE]) == 3
+
+    recording_session.results = [["m1"], ["m2"]]
+    applied = await drain_callbacks(lambda: recording_session, batch_events=2)  # type: ignore[arg-type]
+
+    assert applied == 3
+    assert not callback_redis.lists
+    assert not callback_redis.sets
+    assert len(recording_session.statements) == 2
+    assert recording_session.commits == 2
+
+
+async def test_batches_in_flight_survive_a_failed_or_dead_drain(
+    callback_redis: "FakeRedis", recording_session: "RecordingSession"
+) -> None:
+    events = [StatusEvent("stub", f"m{n}", "delivered", T0).to_json() for n in range(3)]
+    await callback_redis.rpush(CALLBACK_QUEUE, events[0])
+    # One drain died mid-batch; another is still working on its batch.
+    await callback_redis.rpush(PROCESSING_PREFIX + "dead", events[1])
+    await callback_redis.rpush(PROCESSING_PREFIX + "busy", events[2])
+    await callback_redis.sadd(DRAINERS_KEY, "dead", "busy")
+    await callback_redis.set(DRAINER_ALIVE_PREFIX + "busy", "1", ex=60)
+
+    class UnavailableError(Exception):
+        pass
+
+    async def broken(*args: object) -> None:
+        raise UnavailableError
+
+    failing = type(recording_session)()
+    failing.execute = broken  # type: ignore[method-assign,assignment]
+    with pytest.raises(UnavailableError):
+        await drain_callbacks(lambda: failing)  # type: ignore[arg-type]
+
+    assert sorted(callback_redis.lists[CALLBACK_QUEUE]) == events[:2]
+    assert callback_redis.lists[PROCESSING_PREFIX + "busy"] == [events[2]]
+    assert await callback_redis.smembers(DRAINERS_KEY) == ["busy"]
+
+    recording_session.results = [["m0", "m1"]]
+    assert await drain_callbacks(lambda: recording_session) == 2  # type: ignore[arg-type]
+    assert list(callback_redis.lists) == [PROCESSING_PREFIX + "busy"]
@@ -0,0 +1,199 @@
+"""Query-count assertions for the RETURNING-based create and update handlers."""
+from datetime import UTC, datetime, time
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any
+
+from fastapi import Response
+
+from app.core.rbac import Principal
+from app.models.company import Company
+from app.models.company_gstin import CompanyGSTIN
+from app.models.customer import Customer
+from app.models.item import Item
+from app.models.store import Store
+from app.models.user import User
+from app.models.user_store_access import UserStoreAccess
+
+if TYPE_CHECKING:
+    from app.tests.conftest import RecordingSession
+
+NOW = datetime(2026, 1, 1, tzinfo=UTC)
+TIMESTAMPS: dict[str, Any] = {"created_at": NOW, "updated_at": NOW}
+
+
+def store_manager(company_id: int = 1) -> User:
+    user = User(id=99, email="manager@example.com", status="active")
+    user.store_accesses = [UserStoreAccess(store=Store(id=1, company_id=company_id))]
+    return user
+
+
+async def test_create_store_is_one_insert(recording_session: "RecordingSession") -> None:
+    from app.api.routers.stores import create_store
+    from app.schemas.store import StoreCreate
+
+    recording_session.results = [
+        Store(id=7, company_id=1, name="Main", address="Road", is_franchise=False, status="active",
+              timezone="Asia/Kolkata", closing_cutoff=time(23, 59), invoice_series_prefix="MN", version=1, **TIMESTAMPS)
+    ]
+
+    response = await create_store(
+        StoreCreate(company_id=1, name="Main", address="Road", invoice_series_prefix="MN"),
+        db=recording_session,  # type: ignore[arg-type]
+        principal=Principal(user_id=99, role_mask=0, permission_mask=0, company_id=1),
+    )
+
+    assert response.id == 7
+    assert len(recording_session.statements) == 1
+    assert recording_session.compiled(0).startswith("INSERT INTO stores")
+    assert "RETURNING" in recording_session.compiled(0)
+    assert recording_session.commits == 1
+
+
+async def test_create_customer_without_code_is_one_insert(recording_session: "RecordingSession") -> None:
+    from app.api.routers.customers import create_customer
+    from app.schemas.customer import CustomerCreate
+
+    recording_session.results = [
+        Customer(id=3, company_id=1, code=None, name="Asha", phone_primary="+919800000000", email=None,
+                 notes=None, status="active", version=1, **TIMESTAMPS)
+    ]
+
+    response = await create_customer(
+        CustomerCreate(code=None, name="Asha", phone_primary="+919800000000", email=None, notes=None),
+        db=recording_session,  # type: ignore[arg-type]
+        principal=Principal(user_id=99, role_mask=0, permission_mask=0, company_id=1),
+    )
+
+    assert response.contacts == []
+    assert response.addresses == []
+    assert len(recording_session.statements) == 1
+    assert recording_session.commits == 1
+
+
+async def test_create_item_is_one_insert(recording_session: "RecordingSession") -> None:
+    from app.api.routers.items import create_item
+    from app.schemas.item import ItemCreate
+
+    recording_session.results = [
+        Item(id=5, company_id=1, sku="SH-1", name="Shirt", type="service", hsn_sac=None, uom="piece",
+             tax_rate=Decimal("18.00"), status="active", version=1, **TIMESTAMPS),
+    ]
+
+    response = await create_item(
+        ItemCreate(sku="SH-1", name="Shirt", type="service", hsn_sac=None, uom="piece", tax_rate=Decimal("18")),
+        db=recording_session,  # type: ignore[arg-type]
+        principal=Principal(user_id=99, role_mask=0, permission_mask=0, company_id=1),
+    )
+
+    assert response.sku == "SH-1"
+    assert len(recording_session.statements) == 1
+    assert recording_session.compiled(0).startswith("INSERT INTO items")
+
+
+async def test_create_company_inserts_gstins_in_one_statement(recording_session: "RecordingSession") -> None:
+    from app.api.routers.companies import create_company
+    from app.schemas.company import CompanyCreate
+
+    contacts = {"email": "owner@example.com", "phone": "+919800000000"}
+    address = {"address_line1": "1 Road", "city": "Pune", "state": "Maharashtra", "pincode": "411001"}
+    gstins = [
+        CompanyGSTIN(id=1, company_id=4, gstin="27ABCDE1234F1Z5", is_primary=True, status="active", **TIMESTAMPS),
+        CompanyGSTIN(id=2, company_id=4, gstin="29ABCDE1234F1Z5", is_primary=False, status="active", **TIMESTAMPS),
+    ]
+    recording_session.results = [
+        Company(id=4, legal_name="TSV", trade_name=None, pan=None, contacts=contacts, address=address,
+                status="active", version=1, **TIMESTAMPS),
+        gstins,
+    ]
+
+    response = await create_company(
+        CompanyCreate(
+            legal_name="TSV",
+            contacts=contacts,  # type: ignore[arg-type]
+            address=address,  # type: ignore[arg-type]
+            gstins=[{"gstin": g.gstin, "is_primary": g.is_primary} for g in gstins],  # type: ignore[misc]
+        ),
+        db=recording_session,  # type: ignore[arg-type]
+        principal=Principal(user_id=99, role_mask=0, permission_mask=0, company_id=1),
+    )
+
+    assert [g.gstin for g in response.gstins] == ["27ABCDE1234F1Z5", "29ABCDE1234F1Z5"]
+    assert len(recording_session.statements) == 2
+    assert recording_session.compiled(1).startswith("INSERT INTO company_gstins")
+    assert len(recording_session.params[1]) == 2
+    assert recording_session.commits == 1
+
+
+async def test_create_user_does_not_requery_relationships(recording_session: "RecordingSession") -> None:
+    from app.api.routers.users import create_user
+    from app.schemas.user import UserCreate
+
+    recording_session.results = [
+        User(id=8, email="new@example.com", phone=None, password_hash="x", first_name="New", last_name="User",
+             status="active", version=1, **TIMESTAMPS),
+    ]
+
+    response = await create_user(
+        UserCreate(email="new@example.com", password="long-enough", first_name="New", last_name="User"),
+        db=recording_session,  # type: ignore[arg-type]
+        principal=Principal(user_id=99, role_mask=0, permission_mask=0, company_id=1),
+    )
+
+    assert response.roles == []
+    assert response.store_accesses == []
+    assert len(recording_session.statements) == 1
+    assert recording_session.compiled(0).startswith("INSERT INTO users")
+
+
+async def test_update_store_is_one_statement(recording_session: "RecordingSession") -> None:
+    from app.api.routers.stores import update_store
+    from app.core.rbac import permission_registry
+    from app.models.role import Role
+    from app.models.user_role import UserRole
+    from app.schemas.store import StoreUpdate
+
+    admin = store_manager()
+    admin.roles = [UserRole(role=Role(code="PLATFORM_ADMIN"))]
+    recording_session.results = [
+        Store(id=7, company_id=1, name="Renamed", address="Road", is_franchise=False, status="active",
+              timezone="Asia/Kolkata", closing_cutoff=time(23, 59), invoice_series_prefix="MN", version=4, **TIMESTAMPS)
+    ]
+    response = Response()
+
+    updated = await update_store(
+        7,
+        StoreUpdate(name="Renamed"),
+        response,
+        db=recording_session,  # type: ignore[arg-type]
+        principal=permission_registry.principal_for(admin),
+        expected_version=3,
+    )
+
+    assert updated.version == 4
+    assert response.headers["etag"] == '"4"'
+    assert len(recording_session.statements) == 1
+    assert recording_session.commits == 1
+
+
+async def test_assign_store_relies_on_constraints(recording_session: "RecordingSession") -> None:
+    from app.api.routers.users import assign_store_to_user
+    from app.schemas.user_store_access import UserStoreAccessCreate
+
+    store = Store(id=1, company_id=1, name="Main", address="Road", is_franchise=False, status="active",
+                  timezone="Asia/Kolkata", closing_cutoff=time(23, 59), invoice_series_prefix="MN", version=1,
+                  **TIMESTAMPS)
+    recording_session.results = [
+        store,
+        UserStoreAccess(id=11, user_id=8, store_id=1, scope="edit", created_at=NOW),
+    ]
+
+    response = await assign_store_to_user(
+        8,
+        UserStoreAccessCreate(store_id=1, scope="edit"),
+        db=recording_session,  # type: ignore[arg-type]
+        principal=Principal(user_id=99, role_mask=0, permission_mask=0, company_id=1),
+    )
+
+    assert response.store_id == 1
+    assert len(recording_session.statements) == 2
+    assert recording_session.compiled(1).startswith("INSERT INTO user_store_access")
@@ -0,0 +1,90 @@
+"""Throughput benchmark for invoice PDF rendering.
+
+Renders synthetic invoices through PdfRenderPool with 1 worker and with one
+worker per CPU, and reports pages/second overall and per core. No database
+is needed.
+
+Usage: python scripts/bench_invoice_pdf.py [--invoices 2000] [--lines 12] [--stores 20]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.pdf import PdfStreamWriter
+from app.services.invoice_pdf import (
+    Branding,
+    DocumentLine,
+    InvoiceDocument,
+    PdfRenderPool,
+    RenderJob,
+    render_page_batch,
+)
+
+
+def jobs(invoices: int, lines: int, stores: int) -> list[RenderJob]:
+    rng = random.Random(7)
+    brandings = [
+        Branding(1, store_id, "Sparkle Cleaners", "27ABCDE1234F1Z5", f"Store {store_id}",
+                 "Shop 4, Lokhandwala Complex, Andheri West, Mumbai 400053")
+        for store_id in range(stores)
+    ]
+    generated: list[RenderJob] = []
+    for invoice_id in range(invoices):
+        document_lines = tuple(
+            DocumentLine(f"Article {rng.randint(1, 500)}", Decimal(rng.randint(1, 5)), Decimal("249.00"),
+                         Decimal("18.00"), Decimal("44.82"), Decimal("293.82"))
+            for _ in range(rng.randint(1, lines * 2))
+        )
+        generated.append((
+            rng.choice(brandings),
+            InvoiceDocument(invoice_id, f"AW/2627/{invoice_id:05d}", date(2026, 10, 1), "posted", "Customer",
+                            document_lines, Decimal("100.00"), Decimal("18.00"), Decimal(0), Decimal(0),
+                            Decimal("118.00")),
+        ))
+    return generated
+
+
+async def run(workers: int, batch: list[RenderJob]) -> None:
+    pool = PdfRenderPool(workers)
+    try:
+        await pool.render(render_page_batch, batch[: workers * pool.batch_size])  # start workers
+        writer = PdfStreamWriter()
+        size = len(writer.begin())
+        started = time.perf_counter()
+        rendered = await pool.render(render_page_batch, batch)
+        pages = 0
+        for invoice_pages in rendered:
+            for page in invoice_pages:
+                size += len(writer.add_page(page))
+                pages += 1
+        size += len(writer.finish())
+        elapsed = time.perf_counter() - started
+    finally:
+        pool.shutdown()
+    rate = pages / elapsed
+    print(f"workers={workers:<3} {pages} pages in {elapsed:5.2f}s  {rate:8.0f} pages/s  "
+          f"{rate / workers:8.0f} pages/s/core  {size / 1e6:.1f} MB")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--invoices", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=12)
+    parser.add_argument("--stores", type=int, default=20)
+    args = parser.parse_args()
+
+    batch = jobs(args.invoices, args.lines, args.stores)
+    for workers in sorted({1, os.cpu_count() or 1}):
+        await run(workers, batch)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
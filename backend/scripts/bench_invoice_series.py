@@ -0,0 +1,157 @@
+"""Concurrency benchmark for invoice number allocation.
+
+Posts invoices across many stores in parallel against the database in
+DATABASE_URL and reports throughput for three strategies:
+
+* for_update  - SELECT … FOR UPDATE then UPDATE (two round trips under the lock)
+* returning   - allocate_invoice_numbers (one upsert … RETURNING under the lock)
+* block       - BlockAllocator leasing ranges of --block-size numbers
+
+Each posting is its own transaction. The gap-free strategies are checked
+for gaps and duplicates after the run. The benchmark creates a throwaway
+company and stores and deletes them afterwards.
+
+Usage: python scripts/bench_invoice_series.py [--invoices 10000] [--stores 50] [--concurrency 32]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.models.company import Company
+from app.models.invoice_series import InvoiceSeries
+from app.models.store import Store
+from app.services.invoice_series import (
+    BlockAllocator,
+    allocate_invoice_number,
+    financial_year,
+    format_invoice_number,
+)
+
+INVOICE_DATE = date.today()
+
+
+async def post_for_update(sessions: async_sessionmaker[AsyncSession], store_id: int) -> tuple[int, int]:
+    fy = financial_year(INVOICE_DATE)
+    async with sessions() as session:
+        series = (
+            await session.execute(
+                select(InvoiceSeries)
+                .where(InvoiceSeries.store_id == store_id, InvoiceSeries.financial_year == fy)
+                .with_for_update()
+            )
+        ).scalar_one()
+        number = series.next_number
+        await session.execute(
+            update(InvoiceSeries).where(InvoiceSeries.id == series.id).values(next_number=number + 1)
+        )
+        format_invoice_number(series.prefix, fy, number)
+        await session.commit()
+    return store_id, number
+
+
+async def post_returning(sessions: async_sessionmaker[AsyncSession], store_id: int) -> tuple[int, int]:
+    async with sessions() as session:
+        allocated = await allocate_invoice_number(session, store_id, INVOICE_DATE)
+        await session.commit()
+    return store_id, allocated.number
+
+
+async def run(
+    label: str,
+    post: Callable[[int], Awaitable[tuple[int, int]]],
+    store_ids: list[int],
+    invoices: int,
+    concurrency: int,
+    gap_free: bool,
+) -> None:
+    rng = random.Random(7)
+    queue = [rng.choice(store_ids) for _ in range(invoices)]
+    issued: dict[int, list[int]] = defaultdict(list)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(store_id: int) -> None:
+        async with semaphore:
+            sid, number = await post(store_id)
+            issued[sid].append(number)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(store_id) for store_id in queue))
+    elapsed = time.perf_counter() - started
+
+    duplicates = sum(len(numbers) - len(set(numbers)) for numbers in issued.values())
+    gaps = sum(max(numbers) - min(numbers) + 1 - len(numbers) for numbers in issued.values())
+    check = f"duplicates={duplicates} gaps={gaps}" if gap_free else f"duplicates={duplicates}"
+    print(f"{label:<11} {invoices / elapsed:9.0f} invoices/s  {elapsed:6.2f}s  {check}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--invoices", type=int, default=10_000)
+    parser.add_argument("--stores", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--block-size", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_async_engine(settings.async_database_url, pool_size=args.concurrency, max_overflow=0)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with sessions() as session:
+        company = Company(legal_name="Invoice series benchmark", contacts={}, address={}, status="active")
+        session.add(company)
+        await session.flush()
+        stores = [
+            Store(company_id=company.id, name=f"Bench {i}", address="-", invoice_series_prefix=f"B{i}")
+            for i in range(args.stores)
+        ]
+        session.add_all(stores)
+        await session.commit()
+        store_ids = [store.id for store in stores]
+
+    async def reset_series() -> None:
+        async with sessions() as session:
+            await session.execute(delete(InvoiceSeries).where(InvoiceSeries.store_id.in_(store_ids)))
+            fy = financial_year(INVOICE_DATE)
+            for store in stores:
+                session.add(InvoiceSeries(store_id=store.id, financial_year=fy, prefix=store.invoice_series_prefix))
+            await session.commit()
+
+    block_allocator = BlockAllocator(sessions, block_size=args.block_size)
+
+    async def post_block(store_id: int) -> tuple[int, int]:
+        allocated = await block_allocator.allocate(store_id, INVOICE_DATE)
+        async with sessions() as session:
+            await session.execute(text("SELECT 1"))
+            await session.commit()
+        return store_id, allocated.number
+
+    print(f"{args.invoices} invoices, {args.stores} stores, concurrency {args.concurrency}")
+    try:
+        await reset_series()
+        await run("for_update", lambda s: post_for_update(sessions, s), store_ids, args.invoices,
+                  args.concurrency, True)
+        await reset_series()
+        await run("returning", lambda s: post_returning(sessions, s), store_ids, args.invoices,
+                  args.concurrency, True)
+        await reset_series()
+        await run("block", post_block, store_ids, args.invoices, args.concurrency, False)
+    finally:
+        async with sessions() as session:
+            await session.execute(delete(Company).where(Company.id == company.id))
+            await session.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""Benchmark for order entry.
+
+Posts orders with --lines lines each through ``create_order`` against the
+database in DATABASE_URL, and reports the SQL statements issued per order and
+the posting latency. The benchmark creates a throwaway company with a store,
+a customer, items and base rates, and deletes them afterwards.
+
+Usage: python scripts/bench_order_entry.py [--orders 50] [--lines 500]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import delete, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.models.company import Company
+from app.models.customer import Customer
+from app.models.item import Item
+from app.models.item_rate import ItemRate
+from app.models.kpi_delta import KpiDelta
+from app.models.order import Order
+from app.models.store import Store
+from app.schemas.order import OrderCreate, OrderItemCreate
+from app.services.orders import create_order
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=500)
+    parser.add_argument("--items", type=int, default=300)
+    args = parser.parse_args()
+
+    engine = create_async_engine(settings.async_database_url)
+    sessions = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+
+    statements = 0
+
+    def count(*_: Any) -> None:
+        nonlocal statements
+        statements += 1
+
+    async with sessions() as session:
+        company = Company(legal_name="Order entry benchmark", contacts={}, address={}, status="active")
+        session.add(company)
+        await session.flush()
+        store = Store(company_id=company.id, name="Bench", address="-", invoice_series_prefix="OB")
+        customer = Customer(company_id=company.id, name="Bench B2B", phone_primary="0000000000")
+        items = [
+            Item(company_id=company.id, sku=f"B{i}", name=f"Article {i}", type="service", uom="piece",
+                 tax_rate=Decimal("18.00"))
+            for i in range(args.items)
+        ]
+        session.add_all([store, customer, *items])
+        await session.flush()
+        session.add_all(
+            ItemRate(company_id=company.id, item_id=item.id, rate=Decimal(random.randint(30, 400)),
+                     effective_from=date(2020, 1, 1))
+            for item in items
+        )
+        await session.commit()
+
+    rng = random.Random(7)
+    order_data = OrderCreate(
+        store_id=store.id,
+        customer_id=customer.id,
+        items=[
+            OrderItemCreate(item_id=rng.choice(items).id, qty=Decimal(rng.randint(1, 5)))
+            for _ in range(args.lines)
+        ],
+    )
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    timings: list[float] = []
+    try:
+        for _ in range(args.orders):
+            statements = 0
+            started = time.perf_counter()
+            async with sessions() as session:
+                await create_order(session, company.id, order_data)
+                await session.commit()
+            timings.append(time.perf_counter() - started)
+        print(f"{args.orders} orders x {args.lines} lines: {statements} statements per order (last run)")
+        print(f"median {statistics.median(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+        async with sessions() as session:
+            await session.execute(delete(Order).where(Order.company_id == company.id))
+            await session.execute(delete(KpiDelta).where(KpiDelta.company_id == company.id))
+            await session.execute(delete(Company).where(Company.id == company.id))
+            await session.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""Microbenchmark for cart price resolution.
+
+Builds an in-memory pricing index shaped like a busy company (base rates with
+seasonal promos, plus customer-specific overrides) and times resolving a cart
+against it, compared with the per-line query the index replaces.
+
+Needs DATABASE_URL and SECRET_KEY set like the app (only for settings; no
+connection is made).
+
+Usage: python scripts/bench_pricing.py [--items 5000] [--customers 200] [--lines 40]
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.pricing import PricingIndex
+
+START = date(2025, 4, 1)
+
+RateRow = tuple[int, int | None, int, Decimal, date, date | None]
+
+
+def rows(items: int, customers: int, rng: random.Random) -> list[RateRow]:
+    generated: list[RateRow] = []
+    rate_id = 0
+    for item_id in range(1, items + 1):
+        base = Decimal(rng.randint(20, 500))
+        rate_id += 1
+        generated.append((item_id, None, rate_id, base, START, None))
+        for _ in range(rng.randint(0, 3)):
+            promo_from = START + timedelta(days=rng.randint(0, 600))
+            rate_id += 1
+            promo_to = promo_from + timedelta(days=30)
+            generated.append((item_id, None, rate_id, base * Decimal("0.9"), promo_from, promo_to))
+    for customer_id in range(1, customers + 1):
+        for item_id in rng.sample(range(1, items + 1), 25):
+            rate_id += 1
+            generated.append((item_id, customer_id, rate_id, Decimal(rng.randint(15, 450)), START, None))
+    return generated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=5_000)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    data = rows(args.items, args.customers, rng)
+
+    started = time.perf_counter()
+    index = PricingIndex.build(1, data)
+    build_ms = (time.perf_counter() - started) * 1000
+    print(f"{len(data)} rate rows, {len(index.timelines)} keys, index built in {build_ms:.1f} ms")
+
+    carts = [
+        (
+            rng.sample(range(1, args.items + 1), args.lines),
+            rng.randint(1, args.customers),
+            START + timedelta(days=rng.randint(0, 700)),
+        )
+        for _ in range(100)
+    ]
+    started = time.perf_counter()
+    for i in range(args.rounds):
+        item_ids, customer_id, day = carts[i % len(carts)]
+        index.resolve_many(item_ids, customer_id, day)
+    per_cart = (time.perf_counter() - started) / args.rounds
+    print(f"resolve {args.lines}-line cart: {per_cart * 1e6:.1f} µs ({per_cart * 1e6 / args.lines:.2f} µs/line)")
+
+
+if __name__ == "__main__":
+    main()
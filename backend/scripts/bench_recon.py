@@ -0,0 +1,75 @@
+"""Microbenchmark for bank statement auto-matching.
+
+Builds a statement shaped like a busy month (a third of the lines carry a
+payment UTR, a third quote an invoice number in the narration, the rest only
+match on amount and date) and times indexing the candidates and matching
+the statement in memory, which is what ``auto_match`` does after its bulk
+loads.
+
+Needs DATABASE_URL and SECRET_KEY set like the app (only for settings; no
+connection is made).
+
+Usage: python scripts/bench_recon.py [--lines 10000] [--rules 20]
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.recon_rule import ReconRule
+from app.services.recon import Candidate, CandidateIndex, CompiledRule, StatementLine, match_statement
+
+START = date(2026, 9, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=10_000)
+    parser.add_argument("--rules", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    candidates: list[Candidate] = []
+    lines: list[StatementLine] = []
+    for n in range(args.lines):
+        amount = rng.randint(10_000, 5_000_000)
+        day = START + timedelta(days=rng.randint(0, 29))
+        value_date = day + timedelta(days=rng.randint(0, 2))
+        if n % 3 == 0:
+            candidates.append(Candidate("payment", n, f"UTR{n:09d}", amount, day))
+            lines.append(StatementLine(n, amount, value_date, f"utr{n:09d}", "UPI CR"))
+        elif n % 3 == 1:
+            candidates.append(Candidate("invoice", n, f"INV-{n}", amount, day))
+            lines.append(StatementLine(n, rng.randint(1, 9_999), value_date, None, f"NEFT CR ref INV-{n} ACME"))
+        else:
+            candidates.append(Candidate("invoice", n, None, amount, day))
+            lines.append(StatementLine(n, amount, value_date, None, "CASH DEPOSIT"))
+    rules = [
+        CompiledRule.compile(
+            ReconRule(id=i, match_type="contains", pattern=f"VENDOR{i}", map_to="invoice", field="description")
+        )
+        for i in range(args.rules - 1)
+    ]
+    rules.append(
+        CompiledRule.compile(
+            ReconRule(id=args.rules, match_type="regex", pattern=r"ref\s+(?P<ref>INV-\d+)", map_to="invoice",
+                      field="description")
+        )
+    )
+
+    started = time.perf_counter()
+    index = CandidateIndex.build(candidates)
+    build_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    matches = match_statement(lines, rules, index)
+    match_ms = (time.perf_counter() - started) * 1000
+    print(f"{len(candidates)} candidates indexed in {build_ms:.1f} ms")
+    print(f"{len(lines)} lines, {len(rules)} rules: {len(matches)} matched in {match_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Rebuild daily store KPIs from the source tables.
+
+Recomputes ``daily_store_kpi`` for every store (or one company's stores)
+over a date range. Each store is rebuilt in month-sized chunks, --workers at a
+time, and every chunk commits on its own. It is safe to run while the API is
+taking orders: writes that land during the rebuild stay in the outbox and are
+folded in afterwards.
+
+Usage: python scripts/rebuild_kpis.py --from 2026-01-01 [--to 2026-10-31] [--company-id 1] [--workers 4]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db.session import AsyncSessionLocal, engine
+from app.services.kpi_rollup import fold_all_kpi_deltas, rebuild_kpis
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, required=True)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--company-id", type=int)
+    parser.add_argument("--workers", type=int, default=4, help="chunks rebuilt at once")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        written = await rebuild_kpis(
+            AsyncSessionLocal, args.date_from, args.date_to, company_id=args.company_id, workers=args.workers
+        )
+        folded = await fold_all_kpi_deltas(AsyncSessionLocal)
+    finally:
+        await engine.dispose()
+    print(f"✓ Rebuilt {written} store-days and folded {folded} pending ones in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())